@@ -40,6 +40,24 @@ echo "Cache busting complete. Updated to version: $CACHE_BUST"
 # Note: Tests run via GitHub Actions on push/PR, not during Netlify build
 # This speeds up deploys significantly
 
+# Favicons from assets/images/favicon.svg (a no-op unless the SVG changed)
+python3 scripts/generate-favicons.py
+
+# Give Cloudinary images in posts a responsive srcset (idempotent; new
+# CMS posts get it here without a separate commit)
+python3 scripts/add-responsive-images.py
+
+# Precompute post stats, related posts and the taxonomy index into _data/ and build the sharded search index
+# into assets/search/ (both need PyYAML)
+python3 -c "import yaml" 2>/dev/null || python3 -m pip install --quiet --user pyyaml
+python3 scripts/build-post-stats.py
+python3 scripts/build-related-posts.py
+python3 scripts/build-taxonomy-index.py
+# Placeholders for featured images (the data file is kept in the build
+# cache, so only images added since the last deploy are fetched)
+python3 scripts/build-image-placeholders.py
+python3 scripts/build-search-index.py
+
 # Run Jekyll build
 bundle exec jekyll build
 
@@ -0,0 +1,29 @@
+/**
+ * Build Data Cache Netlify Build Plugin
+ *
+ * Keeps the incremental state of the Python build scripts between deploys.
+ * .cache/ (post manifest, related posts, taxonomy index, image sizes) and
+ * the gitignored _data/image_placeholders.json are restored before
+ * netlify/build.sh runs and saved after the build, so each deploy only
+ * fetches and recomputes what changed since the last one.
+ *
+ * @module netlify/plugins/build-data-cache
+ */
+
+const CACHED_PATHS = ['.cache', '_data/image_placeholders.json'];
+
+export const onPreBuild = async ({ utils }) => {
+  for (const path of CACHED_PATHS) {
+    if (await utils.cache.restore(path)) {
+      console.log(`Restored ${path} from the build cache`);
+    }
+  }
+};
+
+export const onPostBuild = async ({ utils }) => {
+  for (const path of CACHED_PATHS) {
+    if (await utils.cache.save(path)) {
+      console.log(`Saved ${path} to the build cache`);
+    }
+  }
+};
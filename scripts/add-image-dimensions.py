@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Fill in missing width/height attributes on images in posts.
+
+Images without both attributes cause layout shift, because the browser
+can't reserve their space before they load. This pass finds every <img>
+in a post that lacks width or height, reads the image's intrinsic size
+from its first few kilobytes (see utils/image_dimensions.py) and writes
+the attributes back. Cloudinary images are probed through ranged requests
+to their untransformed delivery URL; site-relative images (/assets/...)
+are read from disk. An image that already has one of the attributes gets
+the other from its aspect ratio.
+
+Sizes are cached per public_id in .cache/image-dimensions.json, and posts
+that have not changed since they last cleared this pass are skipped using
+the shared post manifest. A post with an image that couldn't be fetched
+(network or server error) is not marked, so it is retried on the next
+run. Use --force to rescan every post.
+
+Usage:
+    python3 scripts/add-image-dimensions.py [--force] [--workers N]
+"""
+
+import argparse
+from pathlib import Path
+
+from utils.files import atomic_write_text
+from utils.html_tags import rewrite_tags
+from utils.image_dimensions import DEFAULT_CACHE_PATH, DEFAULT_WORKERS, ERROR, DimensionProber, ImageSource
+from utils.manifest import REPO_ROOT, PostManifest
+from utils.references import DeliveryURL, site_config
+
+# Posts directory
+POSTS_DIR = Path(__file__).parent.parent / "_posts"
+
+# Manifest pass name; bump the suffix when the transform changes
+PASS_NAME = "image-dimensions/1"
+
+
+def _dimension(tag, name):
+    """An attribute as a positive int, None if absent, or False if not a plain number"""
+    if not tag.has(name):
+        return None
+    try:
+        value = int(tag.get(name))
+    except ValueError:
+        return False
+    return value if value > 0 else False
+
+
+def image_source(src, site_dir=REPO_ROOT, default_folder=''):
+    """ImageSource for an img src, or None if it isn't a Cloudinary or site-relative image"""
+    url = DeliveryURL.parse(src)
+    if url:
+        return ImageSource.cloudinary(url, default_folder)
+    if src.startswith('/') and not src.startswith('//') and '{{' not in src:
+        return ImageSource.local(src, site_dir)
+    return None
+
+
+def needs_dimensions(tag):
+    """True if an img lacks width or height and has no non-numeric one"""
+    width, height = _dimension(tag, 'width'), _dimension(tag, 'height')
+    return (width is None or height is None) and width is not False and height is not False
+
+
+def find_sources(content, site_dir=REPO_ROOT, default_folder=''):
+    """ImageSources for every img in a post that needs dimensions"""
+    sources = []
+
+    def collect(tag):
+        if needs_dimensions(tag):
+            source = image_source(tag.get('src', ''), site_dir, default_folder)
+            if source:
+                sources.append(source)
+
+    rewrite_tags(content, ['img'], collect)
+    return sources
+
+
+def add_dimensions(content, sizes, site_dir=REPO_ROOT, default_folder=''):
+    """
+    Write width/height onto every img that lacks them and has a known size.
+
+    sizes maps source keys to {'width', 'height'}. Returns the updated
+    content and the number of images changed.
+    """
+    updated = 0
+
+    def fill(tag):
+        nonlocal updated
+        if not needs_dimensions(tag):
+            return
+        source = image_source(tag.get('src', ''), site_dir, default_folder)
+        size = sizes.get(source.key) if source else None
+        if not size:
+            return
+
+        width, height = _dimension(tag, 'width'), _dimension(tag, 'height')
+        if width is None and height is None:
+            width, height = size['width'], size['height']
+        elif height is None:
+            height = max(1, round(width * size['height'] / size['width']))
+        else:
+            width = max(1, round(height * size['width'] / size['height']))
+        tag.set('width', str(width))
+        tag.set('height', str(height))
+        updated += 1
+
+    return rewrite_tags(content, ['img'], fill), updated
+
+
+def add_image_dimensions(posts_dir=None, prober=None, manifest=None, site_dir=REPO_ROOT):
+    """Run the pass over every post in posts_dir that has changed; returns stats."""
+    posts_dir = Path(posts_dir or POSTS_DIR)
+    prober = prober or DimensionProber()
+    manifest = manifest or PostManifest()
+    default_folder = site_config(site_dir).get('cloudinary_default_folder', '')
+
+    stats = {
+        'posts_total': 0,
+        'posts_scanned': 0,
+        'posts_updated': 0,
+        'images_missing_size': 0,
+        'images_updated': 0
+    }
+
+    all_posts = sorted(posts_dir.glob("*.md"))
+    pending = manifest.pending(all_posts, PASS_NAME)
+    stats['posts_total'] = len(all_posts)
+    stats['posts_scanned'] = len(pending)
+
+    # Read every pending post first, so all images are probed in one concurrent batch
+    contents = {}
+    post_sources = {}
+    for post_file in pending:
+        with open(post_file, 'r', encoding='utf-8') as f:
+            contents[post_file] = f.read()
+        post_sources[post_file] = find_sources(contents[post_file], site_dir, default_folder)
+        stats['images_missing_size'] += len(post_sources[post_file])
+
+    sizes = prober.probe([s for sources in post_sources.values() for s in sources])
+
+    for post_file in pending:
+        content = contents[post_file]
+        updated_content, images = add_dimensions(content, sizes, site_dir, default_folder)
+        if updated_content != content:
+            atomic_write_text(post_file, updated_content)
+            print(f"✅ Updated: {post_file.name} ({images} images)")
+            stats['posts_updated'] += 1
+            stats['images_updated'] += images
+
+        if not any(prober.failures.get(s.key) == ERROR for s in post_sources[post_file]):
+            manifest.mark(post_file, PASS_NAME, content=updated_content if updated_content != content else None)
+
+    manifest.prune(posts_dir, all_posts)
+    manifest.save()
+    return stats
+
+
+def main():
+    """Process all posts."""
+    parser = argparse.ArgumentParser(description='Fill in missing width/height attributes on post images')
+    parser.add_argument('--force', action='store_true',
+                        help='Ignore the post manifest and rescan every post')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, metavar='N',
+                        help='Concurrent image requests')
+    parser.add_argument('--cache', default=str(DEFAULT_CACHE_PATH),
+                        help='Image size cache file')
+    args = parser.parse_args()
+
+    prober = DimensionProber(Path(args.cache), workers=args.workers)
+    stats = add_image_dimensions(prober=prober, manifest=PostManifest(enabled=not args.force))
+
+    print(f"\n📊 Summary:")
+    print(f"   Posts scanned: {stats['posts_scanned']} of {stats['posts_total']} (others unchanged since last run)")
+    print(f"   Images without width/height: {stats['images_missing_size']}")
+    print(f"   Sizes probed: {prober.stats['probed']} ({prober.stats['bytes_read'] / 1024:.0f} KB read), "
+          f"cached: {prober.stats['cached']}")
+    print(f"   Images updated: {stats['images_updated']} in {stats['posts_updated']} posts")
+    if prober.stats['missing'] or prober.stats['unreadable'] or prober.stats['errors']:
+        print(f"   ⚠️  Missing: {prober.stats['missing']}, unreadable: {prober.stats['unreadable']}, "
+              f"failed to fetch: {prober.stats['errors']} (retried next run)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,75 +1,198 @@
 #!/usr/bin/env python3
 """
 Add lazy loading to images in markdown posts that don't have it.
+
+Each <img> is handled on its own in a single pass over the post: it gets
+loading="lazy" and decoding="async", except the first above-the-fold image,
+which gets fetchpriority="high" and eager loading so it isn't deferred.
+Posts with a featured_image (or image) are the exception: post.html
+already renders that above the content with fetchpriority="high", so the
+body's first image is lazy like the rest rather than competing with it.
+
+Posts that have not changed since they last cleared this pass are skipped
+using the shared post manifest (.cache/post-manifest.json). Use --force
+to rescan everything. --jobs N spreads the work over N processes.
+
+--watch keeps running after the first pass and rewrites each post as soon
+as it is saved (see utils/watch.py), for use alongside `jekyll serve`.
 """
 
+import argparse
 import os
 import re
 from pathlib import Path
 
+import yaml
+
+from utils.files import atomic_write_text
+from utils.frontmatter import parse_front_matter
+from utils.html_tags import rewrite_tags
+from utils.manifest import PostManifest, hash_bytes, hash_file
+from utils.parallel import merge_stats, run_in_pool
+from utils.timing import Instrumentation, PhaseTimer, add_instrumentation_arguments
+from utils.watch import watch_posts
+
 # Posts directory
 POSTS_DIR = Path(__file__).parent.parent / "_posts"
 
-def has_images(content):
-    """Check if content has img tags."""
-    return bool(re.search(r'<img[^>]+>', content))
+# Manifest pass name; bump the suffix when the transform changes
+PASS_NAME = "lazy-loading/3"
+
+# The first image is treated as above the fold if it starts within this
+# many characters of the start of the post body
+ABOVE_FOLD_CHARS = 1500
+
+def body_start(content):
+    """Return the offset where the post body starts, after any front matter."""
+    match = re.match(r'---\n.*?\n---\n', content, re.DOTALL)
+    return match.end() if match else 0
+
+def shows_featured_image(front_matter):
+    """True if post.html renders a featured image above the body"""
+    return bool(front_matter and (front_matter.get('featured_image') or front_matter.get('image')))
+
+def has_featured_image(content):
+    """shows_featured_image() for a post's text; False if its front matter doesn't parse"""
+    try:
+        return shows_featured_image(parse_front_matter(content)[0])
+    except yaml.YAMLError:
+        return False
+
+def rewrite_images(content, offset=None, featured=None):
+    """
+    Rewrite every img tag in one pass over the post.
+
+    Each image gets loading="lazy" and decoding="async" unless it already sets
+    them. The first image, if it is above the fold, gets fetchpriority="high"
+    and eager loading instead, so it is not deferred behind the rest; not
+    when the post has a featured image, which already has that priority.
+
+    offset is where the body starts and featured whether the post has a
+    featured image, if the caller already knows them.
+    Returns the updated content and the number of images seen.
+    """
+    if offset is None:
+        offset = body_start(content)
+    if featured is None:
+        featured = has_featured_image(content)
+    images = 0
+
+    def optimise(tag):
+        nonlocal images
+        images += 1
+
+        above_fold = images == 1 and not featured and tag.start - offset < ABOVE_FOLD_CHARS
+        if above_fold and not tag.has('fetchpriority'):
+            if tag.get('loading', 'lazy') == 'lazy':
+                tag.set('loading', 'eager')
+            tag.set('fetchpriority', 'high')
+        else:
+            tag.setdefault('loading', 'lazy')
+        tag.setdefault('decoding', 'async')
 
-def has_lazy_loading(content):
-    """Check if content already has loading attribute."""
-    return bool(re.search(r'loading\s*=', content))
+    updated_content = rewrite_tags(content, ['img'], optimise)
+    return updated_content, images
 
 def add_lazy_loading_to_content(content):
-    """Add loading='lazy' to all img tags that don't have it."""
-
-    def add_loading_attr(match):
-        img_tag = match.group(0)
-        # Skip if already has loading attribute
-        if 'loading=' in img_tag:
-            return img_tag
-
-        # Add loading="lazy" before the closing >
-        # Handle self-closing tags (/>)  and regular tags (>)
-        if img_tag.endswith('/>'):
-            return img_tag[:-2] + ' loading="lazy" />'
-        else:
-            return img_tag[:-1] + ' loading="lazy">'
-
-    # Replace all img tags
-    updated_content = re.sub(r'<img[^>]+/?>', add_loading_attr, content)
-    return updated_content
+    """Add lazy loading and async decoding to all img tags that don't have it."""
+    return rewrite_images(content)[0]
+
+def process_post(post_file):
+    """
+    Rewrite one post in place.
+
+    Runs in a worker process when --jobs is used, so it returns everything
+    the parent needs: a stats dict, a message to print (or None) and the
+    digest of the content now on disk.
+    """
+    with open(post_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    updated_content, images = rewrite_images(content)
+    stats = {
+        'posts_with_images': 1 if images else 0,
+        'posts_already_optimised': 0,
+        'posts_updated': 0
+    }
+    message = None
+
+    if updated_content != content:
+        atomic_write_text(post_file, updated_content)
+        message = f"✅ Updated: {post_file.name}"
+        stats['posts_updated'] = 1
+    elif images:
+        stats['posts_already_optimised'] = 1
+
+    # Unchanged text was read in text mode, so hash the file itself (CRLF posts)
+    digest = hash_bytes(updated_content) if message else hash_file(post_file)
+    return stats, message, digest
+
+def lazy_load_posts(posts_dir=None, manifest=None, jobs=1, paths=None, timer=None):
+    """
+    Run the pass over every post in posts_dir that has changed; returns stats.
+
+    paths limits the run to those posts (e.g. the ones --watch saw change).
+    The scan and write phases are timed on timer, if given.
+    """
+    posts_dir = Path(posts_dir or POSTS_DIR)
+    manifest = manifest or PostManifest()
+    timer = timer or PhaseTimer()
+
+    stats = {
+        'posts_total': 0,
+        'posts_scanned': 0,
+        'posts_with_images': 0,
+        'posts_already_optimised': 0,
+        'posts_updated': 0
+    }
+
+    with timer.phase('scan'):
+        all_posts = sorted(posts_dir.glob("*.md"))
+        candidates = all_posts
+        if paths is not None:
+            wanted = set(map(Path, paths))
+            candidates = [p for p in all_posts if p in wanted]
+        pending = manifest.pending(candidates, PASS_NAME)
+        stats['posts_total'] = len(all_posts)
+        stats['posts_scanned'] = len(pending)
+
+    with timer.phase('write'):
+        results = run_in_pool(process_post, pending, jobs=jobs)
+        for post_file, (post_stats, message, digest) in zip(pending, results):
+            merge_stats(stats, post_stats)
+            if message:
+                print(message)
+            manifest.mark(post_file, PASS_NAME, digest=digest)
+
+        manifest.prune(posts_dir, all_posts)
+        manifest.save()
+    return stats
 
 def main():
     """Process all posts."""
-    posts_with_images = 0
-    posts_already_have_lazy = 0
-    posts_updated = 0
-
-    for post_file in sorted(POSTS_DIR.glob("*.md")):
-        with open(post_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        if not has_images(content):
-            continue
-
-        posts_with_images += 1
-
-        if has_lazy_loading(content):
-            posts_already_have_lazy += 1
-            continue
-
-        # Add lazy loading
-        updated_content = add_lazy_loading_to_content(content)
-
-        if updated_content != content:
-            with open(post_file, 'w', encoding='utf-8') as f:
-                f.write(updated_content)
-            print(f"✅ Updated: {post_file.name}")
-            posts_updated += 1
+    parser = argparse.ArgumentParser(description='Add lazy loading to images in posts')
+    parser.add_argument('--force', action='store_true',
+                        help='Ignore the post manifest and rescan every post')
+    parser.add_argument('--jobs', type=int, default=1, metavar='N',
+                        help='Number of worker processes (0 = one per CPU)')
+    parser.add_argument('--watch', action='store_true',
+                        help='After the first pass, keep rewriting posts as they are saved')
+    add_instrumentation_arguments(parser)
+    args = parser.parse_args()
+
+    manifest = PostManifest(enabled=not args.force)
+    with Instrumentation.from_args('add-lazy-loading', args) as run:
+        stats = lazy_load_posts(manifest=manifest, jobs=args.jobs, timer=run.timer)
+    run.write(stats)
 
     print(f"\n📊 Summary:")
-    print(f"   Posts with images: {posts_with_images}")
-    print(f"   Already had lazy loading: {posts_already_have_lazy}")
-    print(f"   Updated with lazy loading: {posts_updated}")
+    print(f"   Posts scanned: {stats['posts_scanned']} of {stats['posts_total']} (others unchanged since last run)")
+    print(f"   Posts with images: {stats['posts_with_images']}")
+    print(f"   Already optimised: {stats['posts_already_optimised']}")
+    print(f"   Updated with lazy loading: {stats['posts_updated']}")
+
+    if args.watch:
+        watch_posts(POSTS_DIR, lambda paths: lazy_load_posts(manifest=manifest, paths=paths))
 
 if __name__ == "__main__":
     main()
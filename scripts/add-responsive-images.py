@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Give Cloudinary images in posts a responsive srcset and sizes.
+
+Posts embed one fixed `q_auto,f_auto/<public_id>` URL per image, which
+Cloudinary serves at the original resolution even on a phone. This pass
+rewrites each such <img> to a `c_limit,w_<n>` src plus a srcset of width
+variants, so browsers download the smallest variant that fills the post
+column at their pixel density.
+
+The variants come from the image's width/height attributes: the image is
+displayed at its width attribute, up to the post column. The srcset
+offers every BREAKPOINTS width up to twice that size, for high-density
+screens, and sizes describes the same slot. The attributes record the
+size the image was embedded at, not the original's, and c_limit never
+upscales, so a variant can't be larger than the original. Images without
+both attributes are left alone. The surrounding <a href>, which the
+lightbox opens, keeps the full image.
+
+Images inside <div class="gallery"> are left alone too: the
+optimize_gallery_images filter in _plugins/ replaces their src with a
+fixed 360px c_fill thumbnail and strips srcset and sizes at render time,
+so anything written here would never reach the page.
+
+Rewriting is idempotent: a srcset this pass wrote is regenerated from the
+current width/height, one written by hand is kept, and untouched tags are
+copied byte-for-byte. Posts that have not changed since they last cleared
+this pass are skipped using the shared post manifest. Use --force to
+rescan everything. --jobs N spreads the work over N processes.
+"""
+
+import argparse
+import re
+from pathlib import Path
+
+from utils.files import atomic_write_text
+from utils.html_tags import rewrite_tags
+from utils.manifest import PostManifest, hash_bytes, hash_file
+from utils.parallel import merge_stats, run_in_pool
+from utils.references import DeliveryURL
+
+# Posts directory
+POSTS_DIR = Path(__file__).parent.parent / "_posts"
+
+# Manifest pass name; bump the suffix when the transform changes
+PASS_NAME = "responsive-images/1"
+
+# Candidate widths, in pixels; the largest useful width is always added
+BREAKPOINTS = (160, 320, 480, 640, 800, 1024, 1280, 1600)
+MAX_WIDTH = 1600
+
+# Highest pixel density variants are offered for
+MAX_DENSITY = 2
+
+# Width of the post column
+CONTENT_WIDTH = 800
+
+# Transformation components this pass may replace; anything else (crops,
+# effects) is a deliberate choice and the image is left alone
+REPLACEABLE_RE = re.compile(r'^(?:q_auto|f_auto|c_limit|[wh]_\d+)$')
+
+# Gallery blocks as _plugins/optimize_gallery_images.rb matches them
+GALLERY_RE = re.compile(r'<div class="gallery">.*?</div>', re.DOTALL)
+
+
+def variant_url(url, width):
+    """Delivery URL of a width-limited, auto-format, auto-quality variant"""
+    return url.with_transformation(f'c_limit,w_{width},q_auto,f_auto')
+
+
+def display_width(width):
+    """CSS pixel width an image is drawn at on a desktop screen"""
+    return min(width, CONTENT_WIDTH)
+
+
+def variant_widths(width):
+    """Widths to offer for an image embedded width pixels wide"""
+    limit = min(display_width(width) * MAX_DENSITY, MAX_WIDTH)
+    return [w for w in BREAKPOINTS if w < limit] + [limit]
+
+
+def sizes_for(width):
+    """sizes attribute for an image in the post column"""
+    return f'(max-width: 768px) 100vw, {display_width(width)}px'
+
+
+def is_replaceable(url):
+    return all(REPLACEABLE_RE.match(part) for part in url.components)
+
+
+def generated_srcset(srcset, asset):
+    """True if a srcset only lists replaceable variants of asset, i.e. this pass wrote it"""
+    # Candidates are separated by a comma and whitespace; URLs contain bare commas
+    for candidate in re.split(r',\s+', srcset.strip()):
+        parts = candidate.split()
+        url = DeliveryURL.parse(parts[0]) if parts else None
+        if not url or url.asset != asset or not is_replaceable(url):
+            return False
+    return True
+
+
+def gallery_spans(content):
+    """(start, end) offsets of every gallery container in a post"""
+    return [match.span() for match in GALLERY_RE.finditer(content)]
+
+
+def rewrite_images(content):
+    """
+    Rewrite every Cloudinary img tag in one pass over the post.
+
+    Returns the updated content and a stats dict.
+    """
+    galleries = gallery_spans(content)
+    stats = {
+        'images': 0,
+        'images_rewritten': 0,
+        'images_without_size': 0,
+        'images_custom': 0,
+        'images_in_gallery': 0
+    }
+
+    def make_responsive(tag):
+        url = DeliveryURL.parse(tag.get('src', ''))
+        if not url:
+            return
+        stats['images'] += 1
+        if any(start <= tag.start < end for start, end in galleries):
+            stats['images_in_gallery'] += 1
+            return
+
+        try:
+            width, height = int(tag.get('width', '')), int(tag.get('height', ''))
+        except ValueError:
+            width = height = 0
+        if width <= 0 or height <= 0:
+            stats['images_without_size'] += 1
+            return
+        if not is_replaceable(url) or (tag.has('srcset') and not generated_srcset(tag.get('srcset'), url.asset)):
+            stats['images_custom'] += 1
+            return
+
+        tag.set('src', variant_url(url, display_width(width)))
+        tag.set('srcset', ', '.join(f'{variant_url(url, w)} {w}w' for w in variant_widths(width)))
+        tag.set('sizes', sizes_for(width))
+        if tag.changed:
+            stats['images_rewritten'] += 1
+
+    updated_content = rewrite_tags(content, ['img'], make_responsive)
+    return updated_content, stats
+
+
+def process_post(post_file):
+    """
+    Rewrite one post in place.
+
+    Runs in a worker process when --jobs is used, so it returns everything
+    the parent needs: a stats dict, a message to print (or None) and the
+    digest of the content now on disk.
+    """
+    with open(post_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    updated_content, image_stats = rewrite_images(content)
+    stats = {
+        'posts_with_images': 1 if image_stats['images'] else 0,
+        'posts_updated': 0
+    }
+    stats.update(image_stats)
+    message = None
+
+    if updated_content != content:
+        atomic_write_text(post_file, updated_content)
+        message = f"✅ Updated: {post_file.name} ({image_stats['images_rewritten']} images)"
+        stats['posts_updated'] = 1
+
+    # Unchanged text was read in text mode, so hash the file itself (CRLF posts)
+    digest = hash_bytes(updated_content) if message else hash_file(post_file)
+    return stats, message, digest
+
+
+def responsive_images(posts_dir=None, manifest=None, jobs=1):
+    """Run the pass over every post in posts_dir that has changed; returns stats."""
+    posts_dir = Path(posts_dir or POSTS_DIR)
+    manifest = manifest or PostManifest()
+
+    stats = {
+        'posts_total': 0,
+        'posts_scanned': 0,
+        'posts_with_images': 0,
+        'posts_updated': 0,
+        'images': 0,
+        'images_rewritten': 0,
+        'images_without_size': 0,
+        'images_custom': 0,
+        'images_in_gallery': 0
+    }
+
+    all_posts = sorted(posts_dir.glob("*.md"))
+    pending = manifest.pending(all_posts, PASS_NAME)
+    stats['posts_total'] = len(all_posts)
+    stats['posts_scanned'] = len(pending)
+
+    results = run_in_pool(process_post, pending, jobs=jobs)
+    for post_file, (post_stats, message, digest) in zip(pending, results):
+        merge_stats(stats, post_stats)
+        if message:
+            print(message)
+        manifest.mark(post_file, PASS_NAME, digest=digest)
+
+    manifest.prune(posts_dir, all_posts)
+    manifest.save()
+    return stats
+
+
+def main():
+    """Process all posts."""
+    parser = argparse.ArgumentParser(description='Add responsive srcset/sizes to Cloudinary images in posts')
+    parser.add_argument('--force', action='store_true',
+                        help='Ignore the post manifest and rescan every post')
+    parser.add_argument('--jobs', type=int, default=1, metavar='N',
+                        help='Number of worker processes (0 = one per CPU)')
+    args = parser.parse_args()
+
+    stats = responsive_images(manifest=PostManifest(enabled=not args.force), jobs=args.jobs)
+
+    print(f"\n📊 Summary:")
+    print(f"   Posts scanned: {stats['posts_scanned']} of {stats['posts_total']} (others unchanged since last run)")
+    print(f"   Posts updated: {stats['posts_updated']}")
+    print(f"   Cloudinary images: {stats['images']}")
+    print(f"   Rewritten: {stats['images_rewritten']}")
+    print(f"   Skipped, no width/height: {stats['images_without_size']}")
+    print(f"   Skipped, custom transformation or srcset: {stats['images_custom']}")
+    print(f"   Skipped, in a gallery (thumbnailed at render time): {stats['images_in_gallery']}")
+
+
+if __name__ == "__main__":
+    main()
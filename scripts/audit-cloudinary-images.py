@@ -2,103 +2,150 @@
 """
 Audit Cloudinary images to find missing assets
 
-Compares images referenced in posts with images uploaded to Cloudinary
+Compares images referenced across the site with images uploaded to Cloudinary
 and reports any missing images.
+
+The Cloudinary listing is cached in .cache/cloudinary-assets.json. Later
+audits only fetch assets created since the last sync (with a periodic full
+resync to pick up deletions), and --offline audits against the cache
+without any API calls. Full resyncs list the top-level folders concurrently
+over a pooled HTTP connection, retrying with backoff when rate limited.
+
+References are collected from posts, pages, _data, _includes and _layouts
+(delivery URLs, front matter featured_image/image, and cloudinary-image.html
+includes) into a persistent index that is updated incrementally, so images
+used only as featured images are no longer reported as unused.
+
+With --head-check (the default when no API credentials are given) the
+library is not listed at all: each referenced image is checked with a HEAD
+request to its delivery URL instead. Results are cached with a TTL, so
+only new or previously missing references are re-checked. This finds
+missing images but cannot report unused ones.
+
+With --duplicates, every image in the library (or, in HEAD check mode,
+every referenced image) is perceptually hashed from a tiny thumbnail and
+near-identical copies under different public_ids are reported in
+clusters, with the posts that use each copy. Hashes are cached per
+public_id, so only new uploads are fetched on later runs.
 """
 
-import re
-import cloudinary
-import cloudinary.api
+import os
 from pathlib import Path
 from collections import defaultdict
 
-class CloudinaryAuditor:
-    def __init__(self, cloud_name, api_key, api_secret):
-        # Configure Cloudinary
-        cloudinary.config(
-            cloud_name=cloud_name,
-            api_key=api_key,
-            api_secret=api_secret,
-            secure=True
-        )
+from utils.cloudinary_admin import API_BASE_URL, CloudinaryAdminClient
+from utils.cloudinary_cache import (
+    DEFAULT_CACHE_PATH, DEFAULT_MAX_AGE_DAYS, DEFAULT_WORKERS, CloudinaryAssetCache
+)
+from utils.delivery_check import DEFAULT_TTL_DAYS, ERROR, MISSING, DeliveryChecker
+from utils.duplicate_images import DEFAULT_DISTANCE, DuplicateImageFinder
+from utils.http_pool import HTTPPool
+from utils.references import DEFAULT_INDEX_PATH, ReferenceIndex
+from utils.timing import Instrumentation, PhaseTimer, add_instrumentation_arguments
 
-        self.posts_dir = Path('_posts')
+class CloudinaryAuditor:
+    def __init__(self, cloud_name, api_key=None, api_secret=None, api=None, cache=None,
+                 offline=False, full_sync=False, site_dir='.', api_base_url=API_BASE_URL,
+                 reference_index=None, head_check=False, delivery_checker=None, duplicate_finder=None,
+                 timer=None):
+        self.offline = offline
+        self.timer = timer or PhaseTimer()
+        self.full_sync = full_sync
+        self.head_check = head_check
+        self.cache = cache or CloudinaryAssetCache(cloud_name)
+        self.api = api
+        self.delivery_checker = delivery_checker
+        self.duplicate_finder = duplicate_finder
+
+        if head_check:
+            self.delivery_checker = delivery_checker or DeliveryChecker(cloud_name)
+        elif self.api is None and not offline:
+            pool = HTTPPool(max_per_host=max(self.cache.workers, 1))
+            self.api = CloudinaryAdminClient(cloud_name, api_key, api_secret,
+                                             base_url=api_base_url, pool=pool)
+
+        self.site_dir = Path(site_dir)
+        self.reference_index = reference_index or ReferenceIndex(self.site_dir, cloud_name)
         self.cloudinary_images = set()
         self.referenced_images = defaultdict(list)
         self.stats = {
             'total_posts': 0,
+            'total_files': 0,
+            'files_rescanned': 0,
             'total_references': 0,
             'total_cloudinary_assets': 0,
             'missing_images': [],
-            'unused_images': []
+            'unused_images': [],
+            'unverified_images': [],
+            'duplicate_clusters': []
         }
 
     def fetch_cloudinary_assets(self):
-        """Fetch all assets from Cloudinary"""
-        print("Fetching Cloudinary assets...")
-
-        resources = []
-        next_cursor = None
-
-        try:
-            while True:
-                if next_cursor:
-                    result = cloudinary.api.resources(
-                        type='upload',
-                        max_results=500,
-                        next_cursor=next_cursor
-                    )
-                else:
-                    result = cloudinary.api.resources(
-                        type='upload',
-                        max_results=500
-                    )
-
-                resources.extend(result['resources'])
-
-                if 'next_cursor' in result:
-                    next_cursor = result['next_cursor']
-                else:
-                    break
-
-            # Extract public_ids
-            self.cloudinary_images = {r['public_id'] for r in resources}
-            self.stats['total_cloudinary_assets'] = len(self.cloudinary_images)
-
-            print(f"Found {len(self.cloudinary_images)} assets in Cloudinary")
-
-        except Exception as e:
-            print(f"Error fetching Cloudinary assets: {e}")
+        """Load Cloudinary assets from the local cache, syncing it with the API first unless offline"""
+        if self.offline:
+            print("Using cached Cloudinary assets (offline)...")
+            if not self.cache.loaded:
+                print("Error: no cached Cloudinary listing; run once without --offline first")
+        else:
+            print("Syncing Cloudinary assets...")
+            try:
+                fetched = self.cache.sync(self.api, full=self.full_sync)
+                print(f"{self.cache.stats['sync_mode'].capitalize()} sync: "
+                      f"{fetched} assets fetched in {self.cache.stats['api_calls']} API calls")
+                if self.cache.stats['sync_mode'] == 'full' and self.cache.stats['shards'] > 1:
+                    print(f"Listed {self.cache.stats['shards']} folders concurrently")
+            except Exception as e:
+                print(f"Error fetching Cloudinary assets: {e}")
+                if self.cache.loaded:
+                    print("Falling back to the cached listing")
+
+        print(self.cache.describe())
+
+        # Extract public_ids
+        self.cloudinary_images = set(self.cache.assets)
+        self.stats['total_cloudinary_assets'] = len(self.cloudinary_images)
+
+        print(f"Found {len(self.cloudinary_images)} assets in Cloudinary")
 
     def extract_cloudinary_references(self):
-        """Extract all Cloudinary image references from posts"""
-        print(f"\nScanning posts in {self.posts_dir}...")
+        """Collect Cloudinary image references from the site source via the reference index"""
+        print(f"\nScanning site sources in {self.site_dir}...")
+
+        index_stats = self.reference_index.update()
+        self.stats['total_files'] = index_stats['files']
+        self.stats['files_rescanned'] = index_stats['files_rescanned']
+        self.stats['total_posts'] = sum(
+            1 for rel in self.reference_index.files if rel.startswith('_posts/')
+        )
 
-        # Pattern to match Cloudinary URLs
-        # Matches: https://res.cloudinary.com/circleseven/image/upload/{transformations}/{public_id}
-        pattern = r'https://res\.cloudinary\.com/circleseven/image/upload/[^/]+/(.+?)(?:["\s<>]|$)'
+        for public_id, files in self.reference_index.references().items():
+            self.referenced_images[public_id].extend(files)
+            self.stats['total_references'] += len(files)
 
-        for post_file in self.posts_dir.glob('*.md'):
-            self.stats['total_posts'] += 1
+        print(f"Scanned {self.stats['total_files']} files "
+              f"({self.stats['files_rescanned']} changed since last audit), "
+              f"{self.stats['total_posts']} posts")
+        print(f"Found {len(self.referenced_images)} unique images referenced")
+        print(f"Total references: {self.stats['total_references']}")
 
-            with open(post_file, 'r', encoding='utf-8') as f:
-                content = f.read()
+    def verify_delivery_urls(self):
+        """Check referenced images exist with HEAD requests instead of listing the library"""
+        print("\nChecking referenced images against their delivery URLs...")
 
-            # Find all Cloudinary references
-            matches = re.findall(pattern, content)
+        checker = self.delivery_checker
+        statuses = checker.check(self.referenced_images)
 
-            for public_id in matches:
-                # Clean up any trailing quotes or spaces
-                public_id = public_id.strip('"\' ')
-                self.referenced_images[public_id].append(post_file.name)
-                self.stats['total_references'] += 1
+        # Images that could not be checked are reported separately, not as missing
+        self.cloudinary_images = {p for p, status in statuses.items() if status != MISSING}
+        self.stats['unverified_images'] = sorted(p for p, status in statuses.items() if status == ERROR)
 
-        print(f"Scanned {self.stats['total_posts']} posts")
-        print(f"Found {len(self.referenced_images)} unique images referenced")
-        print(f"Total references: {self.stats['total_references']}")
+        print(f"Checked {checker.stats['checked']} images "
+              f"({checker.stats['cached']} still fresh in the cache)")
+        if self.stats['unverified_images']:
+            print(f"⚠ Could not verify {len(self.stats['unverified_images'])} images; they will be rechecked next run")
 
     def find_missing_images(self):
-        """Find images referenced in posts but not in Cloudinary"""
+        """Find images referenced in the site but not in Cloudinary"""
         print("\nChecking for missing images...")
 
         for public_id, post_files in self.referenced_images.items():
@@ -119,7 +166,7 @@ class CloudinaryAuditor:
             print("✓ All referenced images found in Cloudinary!")
 
     def find_unused_images(self):
-        """Find images in Cloudinary not referenced in any posts"""
+        """Find images in Cloudinary not referenced anywhere in the site source"""
         print("\nChecking for unused images...")
 
         referenced_set = set(self.referenced_images.keys())
@@ -127,8 +174,8 @@ class CloudinaryAuditor:
 
         if unused:
             self.stats['unused_images'] = sorted(unused)
-            print(f"\nℹ Found {len(unused)} images in Cloudinary not referenced in posts")
-            print("These might be featured images, logos, or other assets")
+            print(f"\nℹ Found {len(unused)} images in Cloudinary not referenced in the site")
+            print("None of these appear in posts, pages, _data, _includes or _layouts")
 
             # Show first 10
             print("\nFirst 10 unused images:")
@@ -138,19 +185,67 @@ class CloudinaryAuditor:
             if len(unused) > 10:
                 print(f"  ... and {len(unused) - 10} more")
         else:
-            print("✓ All Cloudinary images are referenced in posts!")
+            print("✓ All Cloudinary images are referenced in the site!")
+
+    def find_duplicate_images(self):
+        """Find images that are near-identical copies of each other under different public_ids"""
+        print("\nHashing images to find near-duplicates...")
+
+        finder = self.duplicate_finder
+        finder.update({p: self.cache.assets.get(p) for p in self.cloudinary_images})
+        print(f"Hashed {finder.stats['hashed']} images ({finder.stats['cached']} cached)")
+        if finder.stats['failed']:
+            print(f"⚠ Could not hash {len(finder.stats['failed'])} images; they will be retried next run")
+
+        for group in finder.clusters():
+            images = [{
+                'public_id': public_id,
+                'bytes': (self.cache.assets.get(public_id) or {}).get('bytes') or 0,
+                'posts': self.referenced_images.get(public_id, [])
+            } for public_id in group]
+            # Keep the copy the site uses most, then the largest
+            images.sort(key=lambda image: (-len(image['posts']), -image['bytes'], image['public_id']))
+            self.stats['duplicate_clusters'].append({
+                'keep': images[0]['public_id'],
+                'images': images,
+                'wasted_bytes': sum(image['bytes'] for image in images[1:])
+            })
+
+        clusters = self.stats['duplicate_clusters']
+        if not clusters:
+            print("✓ No near-duplicate images found")
+            return
+
+        wasted = sum(cluster['wasted_bytes'] for cluster in clusters)
+        print(f"\nℹ Found {len(clusters)} groups of near-duplicate images ({wasted / 1e6:.1f} MB in extra copies)")
+        for cluster in clusters[:10]:
+            print(f"\n  Keep: {cluster['keep']}")
+            for image in cluster['images']:
+                used = ', '.join(image['posts'][:3]) or 'not referenced'
+                marker = '*' if image['public_id'] == cluster['keep'] else '-'
+                print(f"   {marker} {image['public_id']} ({image['bytes'] / 1e3:.0f} KB): {used}")
+        if len(clusters) > 10:
+            print(f"\n  ... and {len(clusters) - 10} more groups")
 
     def print_summary(self):
         """Print audit summary"""
         print("\n" + "="*60)
         print("CLOUDINARY AUDIT SUMMARY")
         print("="*60)
-        print(f"Posts scanned: {self.stats['total_posts']}")
-        print(f"Cloudinary assets: {self.stats['total_cloudinary_assets']}")
+        print(f"Files scanned: {self.stats['total_files']} ({self.stats['total_posts']} posts)")
+        if self.head_check:
+            print("Cloudinary assets: not listed (HEAD check mode)")
+        else:
+            print(f"Cloudinary assets: {self.stats['total_cloudinary_assets']}")
         print(f"Unique images referenced: {len(self.referenced_images)}")
         print(f"Total references: {self.stats['total_references']}")
         print(f"\nMissing images: {len(self.stats['missing_images'])}")
-        print(f"Unused images: {len(self.stats['unused_images'])}")
+        if self.head_check:
+            print(f"Unverified images: {len(self.stats['unverified_images'])}")
+        else:
+            print(f"Unused images: {len(self.stats['unused_images'])}")
+        if self.duplicate_finder:
+            print(f"Near-duplicate groups: {len(self.stats['duplicate_clusters'])}")
         print("="*60)
 
         if self.stats['missing_images']:
@@ -159,11 +254,30 @@ class CloudinaryAuditor:
             print("\n✓ All referenced images are available in Cloudinary")
 
     def run(self):
-        """Run the audit"""
-        self.fetch_cloudinary_assets()
-        self.extract_cloudinary_references()
-        self.find_missing_images()
-        self.find_unused_images()
+        """Run the audit, timing the fetch, scan and match phases"""
+        if self.head_check:
+            with self.timer.phase('scan'):
+                self.extract_cloudinary_references()
+            with self.timer.phase('fetch'):
+                self.verify_delivery_urls()
+            with self.timer.phase('match'):
+                self.find_missing_images()
+            if self.duplicate_finder:
+                with self.timer.phase('hash'):
+                    self.find_duplicate_images()
+            self.print_summary()
+            return self.stats
+
+        with self.timer.phase('fetch'):
+            self.fetch_cloudinary_assets()
+        with self.timer.phase('scan'):
+            self.extract_cloudinary_references()
+        with self.timer.phase('match'):
+            self.find_missing_images()
+            self.find_unused_images()
+        if self.duplicate_finder:
+            with self.timer.phase('hash'):
+                self.find_duplicate_images()
         self.print_summary()
 
         return self.stats
@@ -174,18 +288,66 @@ def main():
 
     parser = argparse.ArgumentParser(description='Audit Cloudinary images')
     parser.add_argument('--cloud-name', default='circleseven', help='Cloudinary cloud name')
-    parser.add_argument('--api-key', required=True, help='Cloudinary API key')
-    parser.add_argument('--api-secret', required=True, help='Cloudinary API secret')
+    parser.add_argument('--api-key', default=os.environ.get('CLOUDINARY_API_KEY'),
+                        help='Cloudinary API key (default: $CLOUDINARY_API_KEY)')
+    parser.add_argument('--api-secret', default=os.environ.get('CLOUDINARY_API_SECRET'),
+                        help='Cloudinary API secret (default: $CLOUDINARY_API_SECRET)')
+    parser.add_argument('--offline', action='store_true',
+                        help='Audit against the cached asset listing without calling the API')
+    parser.add_argument('--full-sync', action='store_true',
+                        help='Re-list the whole library instead of fetching only new assets')
+    parser.add_argument('--max-age', type=float, default=DEFAULT_MAX_AGE_DAYS, metavar='DAYS',
+                        help='Force a full sync when the last one is older than this')
+    parser.add_argument('--cache', default=str(DEFAULT_CACHE_PATH),
+                        help='Path to the asset cache file')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, metavar='N',
+                        help='Folders to list concurrently during a full sync')
+    parser.add_argument('--head-check', action='store_true',
+                        help='Check referenced images with HEAD requests instead of listing the library '
+                             '(default when no API credentials are given)')
+    parser.add_argument('--head-ttl', type=float, default=DEFAULT_TTL_DAYS, metavar='DAYS',
+                        help='Re-check images seen to exist once their result is older than this')
+    parser.add_argument('--site-dir', default='.',
+                        help='Jekyll site root to scan for references')
+    parser.add_argument('--reference-index', default=str(DEFAULT_INDEX_PATH),
+                        help='Path to the persistent reference index')
+    parser.add_argument('--duplicates', action='store_true',
+                        help='Also report near-duplicate images, by perceptual hash')
+    parser.add_argument('--duplicate-distance', type=int, default=DEFAULT_DISTANCE, metavar='BITS',
+                        help='Largest pHash difference between two copies of one image')
+    parser.add_argument('--local-images', metavar='DIR',
+                        help='Hash local copies (DIR/<public_id>.<ext>) instead of fetching thumbnails where present')
+    parser.add_argument('--jobs', type=int, default=1, metavar='N',
+                        help='Hashing worker processes (0 = one per CPU)')
+    add_instrumentation_arguments(parser)
 
     args = parser.parse_args()
 
+    head_check = args.head_check
+    if not args.offline and not head_check and not (args.api_key and args.api_secret):
+        print("No API credentials given; checking referenced images with HEAD requests instead")
+        head_check = True
+
+    run = Instrumentation.from_args('audit-cloudinary-images', args)
     auditor = CloudinaryAuditor(
         cloud_name=args.cloud_name,
         api_key=args.api_key,
-        api_secret=args.api_secret
+        api_secret=args.api_secret,
+        cache=CloudinaryAssetCache(args.cloud_name, Path(args.cache), args.max_age, args.workers),
+        offline=args.offline,
+        full_sync=args.full_sync,
+        site_dir=args.site_dir,
+        reference_index=ReferenceIndex(args.site_dir, args.cloud_name, path=Path(args.reference_index)),
+        head_check=head_check,
+        delivery_checker=DeliveryChecker(args.cloud_name, ttl_days=args.head_ttl) if head_check else None,
+        duplicate_finder=DuplicateImageFinder(args.cloud_name, distance=args.duplicate_distance, jobs=args.jobs,
+                                              local_dir=args.local_images) if args.duplicates else None,
+        timer=run.timer
     )
 
-    auditor.run()
+    with run:
+        stats = auditor.run()
+    run.write(stats)
 
 
 if __name__ == '__main__':
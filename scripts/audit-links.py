@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Audit the links in posts to find broken internal and external URLs
+
+Every link target in _posts/ is extracted in one pass per post (HTML
+href attributes, Markdown links and reference definitions; code blocks
+are skipped). Internal links, including {{ site.baseurl }} and
+https://circleseven.co.uk URLs, are resolved against a permalink index
+built from the post filenames, the category slugs in _data/taxonomy.yml,
+tag pages, pages, static files and netlify.toml redirects, so they are
+checked without building the site or making a request.
+
+External links are checked over HTTP with bounded concurrency and a
+per-host rate limit. Results are cached in .cache/external-links.json
+with a TTL, so a rerun only requests links that are new or whose result
+has gone stale. Cloudinary URLs are left to audit-cloudinary-images.py.
+--internal-only skips the network entirely.
+
+Usage:
+    python3 scripts/audit-links.py [--internal-only] [--ttl DAYS] [--workers N] [--per-host N]
+"""
+
+import argparse
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from utils.link_check import (
+    BROKEN, DEFAULT_CACHE_PATH, DEFAULT_HOST_INTERVAL, DEFAULT_PER_HOST, DEFAULT_TTL_DAYS,
+    DEFAULT_WORKERS, ERROR, ExternalLinkChecker
+)
+from utils.links import DYNAMIC, EXTERNAL, INTERNAL, PermalinkIndex, extract_links
+from utils.manifest import REPO_ROOT
+from utils.timing import Instrumentation, PhaseTimer, add_instrumentation_arguments
+
+# Hosts whose links other audits cover
+SKIPPED_HOSTS = frozenset({'res.cloudinary.com'})
+
+
+class LinkAuditor:
+    def __init__(self, site_dir='.', checker=None, check_external=True, timer=None):
+        self.site_dir = Path(site_dir)
+        self.checker = checker
+        self.check_external = check_external
+        if check_external and checker is None:
+            self.checker = ExternalLinkChecker()
+        self.timer = timer or PhaseTimer()
+        self.index = None
+        self.internal = defaultdict(list)  # site path -> [(post, line, target)]
+        self.external = defaultdict(list)  # URL -> [(post, line, target)]
+        self.stats = {
+            'total_posts': 0,
+            'total_links': 0,
+            'internal_links': 0,
+            'external_links': 0,
+            'dynamic_links': 0,
+            'skipped_links': 0,
+            'broken_internal': [],
+            'broken_external': [],
+            'unverified_external': []
+        }
+
+    def extract_links(self):
+        """Collect every link in _posts/, sorted into internal and external"""
+        print(f"Scanning posts in {self.site_dir / '_posts'}...")
+        self.index = PermalinkIndex(self.site_dir)
+
+        for path in sorted((self.site_dir / '_posts').glob('*.md')):
+            self.stats['total_posts'] += 1
+            page_url = self.index.post_urls.get(path.stem, '/')
+            for target, line in extract_links(path.read_text(encoding='utf-8')):
+                self.stats['total_links'] += 1
+                kind, url = self.index.classify(target, page_url)
+                where = (f'_posts/{path.name}', line, target)
+                if kind == INTERNAL:
+                    self.internal[url].append(where)
+                elif kind == EXTERNAL and urlsplit(url).hostname not in SKIPPED_HOSTS:
+                    self.external[url].append(where)
+                elif kind == DYNAMIC:
+                    self.stats['dynamic_links'] += 1
+                else:
+                    self.stats['skipped_links'] += 1
+
+        self.stats['internal_links'] = sum(len(v) for v in self.internal.values())
+        self.stats['external_links'] = sum(len(v) for v in self.external.values())
+        print(f"Found {self.stats['total_links']} links in {self.stats['total_posts']} posts "
+              f"({len(self.internal)} internal and {len(self.external)} external URLs)")
+
+    def check_internal_links(self):
+        """Resolve internal links against the permalink index"""
+        print("\nResolving internal links...")
+        for url, places in sorted(self.internal.items()):
+            if not self.index.resolves(url):
+                self.stats['broken_internal'].append({'url': url, 'posts': places})
+        if not self.stats['broken_internal']:
+            print("✓ All internal links resolve")
+
+    def check_external_links(self):
+        """Request external links that have no fresh cached result"""
+        print("\nChecking external links...")
+        statuses = self.checker.check(self.external)
+        for url, (status, code) in sorted(statuses.items()):
+            entry = {'url': url, 'status': code, 'posts': self.external[url]}
+            if status == BROKEN:
+                self.stats['broken_external'].append(entry)
+            elif status == ERROR:
+                self.stats['unverified_external'].append(entry)
+
+        print(f"Checked {self.checker.stats['checked']} links "
+              f"({self.checker.stats['cached']} still fresh in the cache)")
+        if self.stats['unverified_external']:
+            print(f"⚠ Could not verify {len(self.stats['unverified_external'])} links; "
+                  "they will be rechecked next run")
+
+    def report(self, title, entries):
+        if not entries:
+            return
+        print(f"\n⚠ {title} ({len(entries)}):")
+        for entry in entries:
+            status = f" [{entry['status']}]" if entry.get('status') else ''
+            print(f"\n  {entry['url']}{status}")
+            for post, line, _target in entry['posts'][:3]:
+                print(f"  Linked from: {post}:{line}")
+            if len(entry['posts']) > 3:
+                print(f"  ... and {len(entry['posts']) - 3} more")
+
+    def print_summary(self):
+        """Print audit summary"""
+        self.report('Broken internal links', self.stats['broken_internal'])
+        self.report('Broken external links', self.stats['broken_external'])
+
+        print("\n" + "="*60)
+        print("LINK AUDIT SUMMARY")
+        print("="*60)
+        print(f"Posts scanned: {self.stats['total_posts']}")
+        print(f"Links: {self.stats['total_links']} ({self.stats['internal_links']} internal, "
+              f"{self.stats['external_links']} external, {self.stats['dynamic_links']} dynamic)")
+        print(f"\nBroken internal links: {len(self.stats['broken_internal'])}")
+        if self.check_external:
+            print(f"Broken external links: {len(self.stats['broken_external'])}")
+            print(f"Unverified external links: {len(self.stats['unverified_external'])}")
+        else:
+            print("External links: not checked (--internal-only)")
+        print("="*60)
+
+    def run(self):
+        """Run the audit, timing the scan, internal and external phases"""
+        with self.timer.phase('scan'):
+            self.extract_links()
+        with self.timer.phase('internal'):
+            self.check_internal_links()
+        if self.check_external:
+            with self.timer.phase('external'):
+                self.check_external_links()
+        self.print_summary()
+        return self.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Audit internal and external links in posts')
+    parser.add_argument('--site-dir', default=str(REPO_ROOT), help='Jekyll site root')
+    parser.add_argument('--internal-only', action='store_true',
+                        help='Only resolve internal links; make no requests')
+    parser.add_argument('--cache', default=str(DEFAULT_CACHE_PATH), help='Path to the external link cache')
+    parser.add_argument('--ttl', type=float, default=DEFAULT_TTL_DAYS, metavar='DAYS',
+                        help='Re-check external links once their result is older than this')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, metavar='N',
+                        help='External links to check at once')
+    parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST, metavar='N',
+                        help='Concurrent requests to any one host')
+    parser.add_argument('--host-interval', type=float, default=DEFAULT_HOST_INTERVAL, metavar='SECONDS',
+                        help='Minimum gap between requests to one host')
+    add_instrumentation_arguments(parser)
+    args = parser.parse_args()
+
+    checker = None
+    if not args.internal_only:
+        checker = ExternalLinkChecker(Path(args.cache), ttl_days=args.ttl, workers=args.workers,
+                                      per_host=args.per_host, host_interval=args.host_interval)
+
+    run = Instrumentation.from_args('audit-links', args)
+    auditor = LinkAuditor(args.site_dir, checker=checker, check_external=not args.internal_only, timer=run.timer)
+    with run:
+        stats = auditor.run()
+    run.write(stats)
+
+
+if __name__ == '__main__':
+    main()
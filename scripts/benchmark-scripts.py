@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Python maintenance scripts on synthetic sites of increasing size
+
+For each corpus size a fresh process generates a synthetic site (see
+utils/synthetic.py) in a temporary directory and runs:
+
+- add-lazy-loading: a cold run over every post, then a warm rerun that the
+  post manifest should make almost free
+- extract-featured-images: parsing the WXR export on its own, then a cold
+  and a warm run
+- audit-cloudinary-images: a full sync from an in-process fake Admin API,
+  the reference scan and the missing/unused comparison, then a warm audit
+  (incremental sync, nothing rescanned)
+
+Each phase records wall time and the process's peak RSS when it finished;
+each size also records total wall time and overall peak RSS (including any
+--jobs worker processes). Results are written as JSON and can be compared
+against an earlier run with --baseline to catch regressions.
+
+Usage:
+    python3 scripts/benchmark-scripts.py [--sizes 1000 10000 100000] [--jobs N]
+                                         [--output results.json] [--baseline old.json]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from utils.cloudinary_cache import CloudinaryAssetCache
+from utils.manifest import REPO_ROOT, PostManifest
+from utils.references import ReferenceIndex
+from utils.synthetic import CLOUD_NAME, SyntheticCloudinaryAPI, SyntheticCorpus
+from utils.timing import PhaseTimer, peak_rss_mb
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_OUTPUT_DIR = REPO_ROOT / '.cache' / 'benchmarks'
+RESULTS_VERSION = 1
+
+# A phase counts as a regression if it is this much slower than the
+# baseline, and by at least MIN_REGRESSION_SECONDS (to ignore noise)
+DEFAULT_TOLERANCE = 0.25
+MIN_REGRESSION_SECONDS = 0.05
+
+
+def load_script(name):
+    """Import scripts/<name>.py (hyphenated filenames can't be imported directly)"""
+    module_name = name.replace('-', '_')
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_benchmark(posts, workdir, jobs=1, seed=0):
+    """Generate a corpus of posts posts in workdir and time every phase; returns a result dict"""
+    lazy = load_script('add-lazy-loading')
+    extract = load_script('extract-featured-images')
+    audit = load_script('audit-cloudinary-images')
+
+    workdir = Path(workdir)
+    cache_dir = workdir / '.cache'
+    corpus = SyntheticCorpus(workdir, posts, seed=seed)
+    timer = PhaseTimer()
+    results = {}
+
+    # The scripts' progress output would swamp the report and skew timings
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+        with timer.phase('generate: posts'):
+            corpus.write_posts()
+        with timer.phase('generate: wxr export'):
+            corpus.write_wxr()
+        with timer.phase('generate: asset listing'):
+            api = SyntheticCloudinaryAPI(corpus.resources())
+
+        manifest_path = cache_dir / 'post-manifest.json'
+        with timer.phase('lazy-loading: cold'):
+            results['lazy_loading'] = lazy.lazy_load_posts(
+                corpus.posts_dir, PostManifest(manifest_path), jobs=jobs)
+        with timer.phase('lazy-loading: warm'):
+            lazy.lazy_load_posts(corpus.posts_dir, PostManifest(manifest_path), jobs=jobs)
+
+        with timer.phase('featured-images: parse export'):
+            extract.FeaturedImageExtractor(corpus.wxr_path, corpus.posts_dir).parse_xml()
+        with timer.phase('featured-images: cold'):
+            extractor = extract.FeaturedImageExtractor(
+                corpus.wxr_path, corpus.posts_dir, PostManifest(manifest_path), jobs=jobs)
+            extractor.run()
+            results['featured_images'] = {k: v for k, v in extractor.stats.items() if k != 'errors'}
+        with timer.phase('featured-images: warm'):
+            extract.FeaturedImageExtractor(
+                corpus.wxr_path, corpus.posts_dir, PostManifest(manifest_path), jobs=jobs).run()
+
+        def auditor():
+            return audit.CloudinaryAuditor(
+                CLOUD_NAME,
+                api=api,
+                cache=CloudinaryAssetCache(CLOUD_NAME, cache_dir / 'cloudinary-assets.json'),
+                site_dir=workdir,
+                reference_index=ReferenceIndex(
+                    workdir, CLOUD_NAME, path=cache_dir / 'cloudinary-references.json')
+            )
+
+        cold = auditor()
+        with timer.phase('audit: fetch assets'):
+            cold.fetch_cloudinary_assets()
+        with timer.phase('audit: scan references'):
+            cold.extract_cloudinary_references()
+        with timer.phase('audit: compare'):
+            cold.find_missing_images()
+            cold.find_unused_images()
+        results['audit'] = {
+            'references': cold.stats['total_references'],
+            'assets': cold.stats['total_cloudinary_assets'],
+            'missing_images': len(cold.stats['missing_images']),
+            'unused_images': len(cold.stats['unused_images'])
+        }
+        with timer.phase('audit: warm'):
+            warm = auditor()
+            warm.fetch_cloudinary_assets()
+            warm.extract_cloudinary_references()
+            warm.find_missing_images()
+            warm.find_unused_images()
+
+    return {
+        'posts': posts,
+        'jobs': jobs,
+        'wall_seconds': timer.wall_seconds,
+        'peak_rss_mb': peak_rss_mb(),
+        'children_peak_rss_mb': peak_rss_mb(children=True),
+        'phases': timer.phases,
+        'results': results
+    }
+
+
+def run_isolated(posts, jobs, seed, keep):
+    """Run one size in a fresh interpreter so its peak RSS is its own"""
+    workdir = Path(tempfile.mkdtemp(prefix=f'bench-{posts}-'))
+    result_path = workdir / 'result.json'
+    try:
+        subprocess.run(
+            [sys.executable, __file__, '--child', str(posts), '--jobs', str(jobs),
+             '--seed', str(seed), '--workdir', str(workdir), '--result', str(result_path)],
+            check=True
+        )
+        with open(result_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        if keep:
+            print(f"   Corpus kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def print_run(run):
+    """Print one size's timings as a table"""
+    print(f"\n📊 {run['posts']:,} posts (jobs={run['jobs']}): "
+          f"{run['wall_seconds']:.2f}s, peak RSS {run['peak_rss_mb']} MiB"
+          + (f" (workers {run['children_peak_rss_mb']} MiB)" if run.get('children_peak_rss_mb') else ''))
+    for name, phase in run['phases'].items():
+        print(f"   {name:<32} {phase['seconds']:>9.3f}s   {phase['peak_rss_mb']} MiB")
+
+
+def compare(runs, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Return a list of regression messages for phases slower than the baseline.
+
+    Runs are matched by post count and job count, phases by name.
+    """
+    previous = {(run['posts'], run['jobs']): run for run in baseline.get('runs', [])}
+    regressions = []
+    for run in runs:
+        old = previous.get((run['posts'], run['jobs']))
+        if not old:
+            continue
+        for name, phase in run['phases'].items():
+            old_phase = old['phases'].get(name)
+            if not old_phase:
+                continue
+            before, after = old_phase['seconds'], phase['seconds']
+            if after > before * (1 + tolerance) and after - before >= MIN_REGRESSION_SECONDS:
+                regressions.append(f"{run['posts']:,} posts, {name}: {before:.3f}s -> {after:.3f}s "
+                                   f"(+{(after / before - 1) * 100 if before else 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the maintenance scripts on synthetic sites')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), metavar='N',
+                        help='Corpus sizes in posts (default: 1000 10000 100000)')
+    parser.add_argument('--jobs', type=int, default=1, metavar='N',
+                        help='Worker processes for the per-post scripts (0 = one per CPU)')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus generator seed')
+    parser.add_argument('--output', help='Results file (default: .cache/benchmarks/<timestamp>.json)')
+    parser.add_argument('--baseline', help='Earlier results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Fractional slowdown reported as a regression (default: 0.25)')
+    parser.add_argument('--keep', action='store_true', help='Keep the generated corpora')
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run = run_benchmark(args.child, args.workdir, jobs=args.jobs, seed=args.seed)
+        with open(args.result, 'w', encoding='utf-8') as f:
+            json.dump(run, f)
+        return
+
+    runs = []
+    for posts in args.sizes:
+        print(f"Benchmarking {posts:,} posts...")
+        run = run_isolated(posts, args.jobs, args.seed, args.keep)
+        print_run(run)
+        runs.append(run)
+
+    output = Path(args.output) if args.output else DEFAULT_OUTPUT_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': RESULTS_VERSION,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'runs': runs
+        }, f, indent=1)
+    print(f"\n💾 Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(runs, baseline, args.tolerance)
+        if regressions:
+            print(f"\n⚠ {len(regressions)} phases slower than {args.baseline}:")
+            for message in regressions:
+                print(f"   {message}")
+            sys.exit(1)
+        print(f"\n✓ No regressions against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
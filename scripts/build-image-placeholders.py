@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Precompute low-quality placeholders (LQIP) for post featured images
+
+Post cards and featured images show an empty box until the Cloudinary
+image arrives. This builds a tiny placeholder for every featured_image
+(or image) in post front matter and stores it in
+_data/image_placeholders.json, keyed by the public_id the templates
+build (with cloudinary_default_folder prepended to bare names):
+
+    "circle-seven/environment_01": {"color": "#5a6b4e", "lqip": "data:image/png;base64,...", "v": 1}
+
+_includes/post-card-image.html and _includes/featured-image.html paint
+it as the <img>'s background, scaled up and so naturally blurred, until
+the real image covers it. No JavaScript is needed.
+
+Each placeholder is a PLACEHOLDER_WIDTH x PLACEHOLDER_HEIGHT PNG fetched
+from Cloudinary with the card crop, decoded in pure Python (utils/png.py),
+averaged for a fallback colour and re-encoded without ancillary chunks,
+which keeps each data URI to a couple of hundred bytes. Fetches run
+concurrently over the pooled HTTP client; decoding can use a process pool
+with --jobs.
+
+The data file is generated and gitignored, like the other _data/ outputs,
+and kept between deploys in the Netlify build cache (the build-data-cache
+plugin in netlify/plugins/) and the GitHub Actions cache. A previous
+run's file is reused: only public_ids it doesn't have yet are fetched,
+and ones no post uses any more are dropped.
+Images that fail to fetch are reported and retried on the next run; posts
+whose front matter doesn't parse are reported and skipped.
+
+Usage:
+    python3 scripts/build-image-placeholders.py [--force] [--workers N] [--jobs N]
+"""
+
+import argparse
+import base64
+import http.client
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import quote
+
+import yaml
+
+from utils.delivery_check import DELIVERY_BASE_URL
+from utils.files import atomic_write_text
+from utils.frontmatter import parse_front_matter, yaml_error_message
+from utils.http_pool import HTTPPool
+from utils.manifest import REPO_ROOT
+from utils.parallel import run_in_pool
+from utils.png import decode, encode
+from utils.references import ReferenceExtractor, site_config
+
+DEFAULT_OUTPUT = REPO_ROOT / '_data' / 'image_placeholders.json'
+DEFAULT_WORKERS = 16
+
+# Placeholder size, in the 3:2 shape of the 320x213 card crop
+PLACEHOLDER_WIDTH = 12
+PLACEHOLDER_HEIGHT = 8
+
+# Bump when the placeholder size or encoding changes, to rebuild every entry
+PLACEHOLDER_VERSION = 1
+
+
+def placeholder_transformation():
+    return f'c_fill,g_auto,w_{PLACEHOLDER_WIDTH},h_{PLACEHOLDER_HEIGHT},f_png'
+
+
+def make_placeholder(png_bytes):
+    """Placeholder entry for a tiny PNG; runs in a worker process with --jobs"""
+    _width, _height, rows = decode(png_bytes)
+    pixels = [pixel for row in rows for pixel in row]
+    average = [round(sum(pixel[i] for pixel in pixels) / len(pixels)) for i in range(3)]
+    return {
+        'color': '#{:02x}{:02x}{:02x}'.format(*average),
+        'lqip': 'data:image/png;base64,' + base64.b64encode(encode(rows)).decode('ascii'),
+        'v': PLACEHOLDER_VERSION
+    }
+
+
+def _decode_or_error(png_bytes):
+    try:
+        return make_placeholder(png_bytes)
+    except ValueError as e:
+        return str(e)
+
+
+class PlaceholderBuilder:
+    """Keeps _data/image_placeholders.json in step with post featured images"""
+
+    def __init__(self, posts_dir, output=DEFAULT_OUTPUT, site_dir=REPO_ROOT, base_url=DELIVERY_BASE_URL,
+                 workers=DEFAULT_WORKERS, jobs=1, pool=None):
+        config = site_config(site_dir)
+        self.posts_dir = Path(posts_dir)
+        self.output = Path(output)
+        self.cloud_name = config.get('cloudinary_cloud_name', 'circleseven')
+        self.extractor = ReferenceExtractor(self.cloud_name, config.get('cloudinary_default_folder', ''))
+        self.base_url = base_url.rstrip('/')
+        self.workers = workers
+        self.jobs = jobs
+        self.pool = pool or HTTPPool(max_per_host=workers)
+        self.stats = {
+            'images': 0,
+            'computed': 0,
+            'unchanged': 0,
+            'removed': 0,
+            'failed': [],
+            'posts_failed': []
+        }
+
+    def featured_public_ids(self):
+        """public_ids of every post's featured image, as the templates resolve them"""
+        public_ids = set()
+        for path in sorted(self.posts_dir.glob('*.md')):
+            try:
+                front_matter, _body = parse_front_matter(path.read_text(encoding='utf-8'))
+            except ValueError:
+                continue
+            except yaml.YAMLError as e:
+                self.stats['posts_failed'].append((path.name, yaml_error_message(e)))
+                continue
+            value = (front_matter or {}).get('featured_image') or (front_matter or {}).get('image')
+            # Full URLs are used as they are, without a placeholder lookup
+            if isinstance(value, str) and 'http' not in value:
+                public_id = self.extractor.from_value(value)
+                if public_id:
+                    public_ids.add(public_id)
+        return public_ids
+
+    def url_for(self, public_id):
+        return (f'{self.base_url}/{quote(self.cloud_name)}/image/upload/'
+                f'{placeholder_transformation()}/{quote(public_id, safe="/")}')
+
+    def _fetch(self, public_id):
+        try:
+            response = self.pool.get(self.url_for(public_id))
+        except (OSError, http.client.HTTPException) as e:
+            return str(e) or type(e).__name__
+        return response.body if response.ok else f'HTTP {response.status}'
+
+    def load(self):
+        try:
+            with open(self.output, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def build(self, force=False):
+        """Fetch and encode placeholders for new featured images; returns stats"""
+        previous = {} if force else self.load()
+        public_ids = sorted(self.featured_public_ids())
+        data = {}
+        todo = []
+        for public_id in public_ids:
+            entry = previous.get(public_id)
+            if entry and entry.get('v') == PLACEHOLDER_VERSION:
+                data[public_id] = entry
+            else:
+                todo.append(public_id)
+        self.stats.update(images=len(public_ids), unchanged=len(data))
+
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            fetched = list(executor.map(self._fetch, todo))
+
+        downloaded = [(p, body) for p, body in zip(todo, fetched) if isinstance(body, bytes)]
+        self.stats['failed'] = [(p, body) for p, body in zip(todo, fetched) if isinstance(body, str)]
+
+        decoded = run_in_pool(_decode_or_error, [body for _p, body in downloaded], jobs=self.jobs)
+        for (public_id, _body), entry in zip(downloaded, decoded):
+            if isinstance(entry, str):
+                self.stats['failed'].append((public_id, entry))
+                continue
+            data[public_id] = entry
+            self.stats['computed'] += 1
+
+        self.stats['removed'] = len(set(previous) - set(public_ids))
+        if data != previous:
+            self.output.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(self.output, json.dumps(data, indent=1, sort_keys=True) + '\n')
+        return self.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute LQIP placeholders for post featured images')
+    parser.add_argument('--posts-dir', default=str(REPO_ROOT / '_posts'), help='Jekyll posts directory')
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help='Data file to write')
+    parser.add_argument('--force', action='store_true', help='Rebuild every placeholder')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, metavar='N',
+                        help='Concurrent image requests')
+    parser.add_argument('--jobs', type=int, default=1, metavar='N',
+                        help='Decoding worker processes (0 = one per CPU)')
+    args = parser.parse_args()
+
+    builder = PlaceholderBuilder(args.posts_dir, Path(args.output), workers=args.workers, jobs=args.jobs)
+    stats = builder.build(force=args.force)
+
+    for name, message in stats['posts_failed']:
+        print(f"⚠ Skipped {name}: invalid front matter: {message}")
+    print(f"🖼️  Image placeholders: {stats['images']} featured images")
+    print(f"   Computed: {stats['computed']}")
+    print(f"   Unchanged: {stats['unchanged']}")
+    print(f"   Removed: {stats['removed']}")
+    if stats['failed']:
+        print(f"   ⚠️  Failed: {len(stats['failed'])} (retried next run)")
+        for public_id, reason in stats['failed']:
+            print(f"      {public_id}: {reason}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Precompute word counts, reading times and card excerpts for every post
+
+The templates used to work these out in Liquid on every build
+(`content | strip_html | number_of_words` once per post card), which is
+slow and gave slightly different numbers in different places. This writes
+them once to _data/post_stats.json, keyed by post path:
+
+    "_posts/2015-01-04-derelict-house.md": {
+        "words": 412, "reading_time": 2, "excerpt": "...", "hash": "...", "v": 1
+    }
+
+so `site.data.post_stats[post.path]` gives the values. _includes/reading-time.html,
+_includes/post-excerpt.html and the JSON-LD wordCount read them, falling
+back to Liquid for any post missing from the file.
+
+Each entry records the SHA-256 of the post it was computed from; a rerun
+only recomputes posts whose content changed and drops deleted ones. The
+file is generated (git-ignored) and rebuilt by netlify/build.sh.
+
+Posts whose front matter isn't valid YAML are reported and left out, so
+the templates fall back to Liquid for them; --strict makes that an error.
+
+Usage:
+    python3 scripts/build-post-stats.py [--posts-dir _posts] [--output _data/post_stats.json] [--force] [--strict]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import yaml
+
+from utils.files import atomic_write_text
+from utils.frontmatter import parse_front_matter, yaml_error_message
+from utils.manifest import REPO_ROOT, hash_bytes
+from utils.text import excerpt, plain_text, reading_time, word_count
+
+DEFAULT_OUTPUT = REPO_ROOT / '_data' / 'post_stats.json'
+
+# Bump when the counting or excerpt rules change, to recompute every entry
+STATS_VERSION = 1
+
+
+def compute_stats(content):
+    """Stats for one post's full text (front matter and body)"""
+    _front_matter, body = parse_front_matter(content)
+    words = word_count(plain_text(body))
+    return {
+        'words': words,
+        'reading_time': reading_time(words),
+        'excerpt': excerpt(body)
+    }
+
+
+def load_stats(path):
+    """Existing stats file contents, or {} if missing or unreadable"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def build_post_stats(posts_dir, output=DEFAULT_OUTPUT, force=False):
+    """Bring the stats file up to date with posts_dir; returns run stats"""
+    posts_dir = Path(posts_dir)
+    previous = {} if force else load_stats(output)
+    data = {}
+    stats = {
+        'posts': 0,
+        'posts_computed': 0,
+        'posts_unchanged': 0,
+        'posts_removed': 0,
+        'posts_failed': []
+    }
+
+    for path in sorted(posts_dir.glob('*.md')):
+        raw = path.read_bytes()
+        digest = hash_bytes(raw)
+        key = f"_posts/{path.relative_to(posts_dir).as_posix()}"
+        stats['posts'] += 1
+
+        entry = previous.get(key)
+        if entry and entry.get('hash') == digest and entry.get('v') == STATS_VERSION:
+            data[key] = entry
+            stats['posts_unchanged'] += 1
+            continue
+
+        try:
+            entry = compute_stats(raw.decode('utf-8'))
+        except yaml.YAMLError as e:
+            stats['posts_failed'].append((path.name, yaml_error_message(e)))
+            continue
+        entry.update(hash=digest, v=STATS_VERSION)
+        data[key] = entry
+        stats['posts_computed'] += 1
+
+    stats['posts_removed'] = len(set(previous) - set(data))
+
+    if data != previous:
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(output, json.dumps(data, ensure_ascii=False, indent=1, sort_keys=True) + '\n')
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute post word counts, reading times and excerpts')
+    parser.add_argument('--posts-dir', default=str(REPO_ROOT / '_posts'), help='Jekyll posts directory')
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help='Data file to write')
+    parser.add_argument('--force', action='store_true', help='Recompute every post')
+    parser.add_argument('--strict', action='store_true',
+                        help='Exit with status 1 if any post has invalid front matter')
+    args = parser.parse_args()
+
+    stats = build_post_stats(args.posts_dir, Path(args.output), force=args.force)
+
+    for name, message in stats['posts_failed']:
+        print(f"⚠ Skipped {name}: invalid front matter: {message}")
+
+    print(f"📊 Post stats: {stats['posts']} posts")
+    print(f"   Recomputed: {stats['posts_computed']}")
+    print(f"   Unchanged: {stats['posts_unchanged']}")
+    print(f"   Removed: {stats['posts_removed']}")
+
+    if args.strict and stats['posts_failed']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
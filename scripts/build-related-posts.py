@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Precompute related posts for every post into _data/related_posts.json
+
+Replaces the Liquid tier loop in _layouts/post.html, which compared every
+post with every other post on every build. Each post gets one sparse
+vector made of three blocks, so a dot product blends them:
+
+- text: TF-IDF over the title and plain-text body (sublinear tf, the
+  MAX_TERMS strongest terms kept), weight TEXT_WEIGHT
+- categories: each category's slug from _data/taxonomy.yml, plus its
+  parent's slug at PARENT_WEIGHT, so posts in sibling modules of the same
+  course still count as related; weight CATEGORY_WEIGHT
+- tags: tag slugs, weight TAG_WEIGHT
+
+Similarities are computed with SciPy sparse matrices when NumPy/SciPy are
+installed, and with a pure-Python inverted index otherwise; both give the
+same scores. The top-k neighbours of each post are written with what a
+post card needs (path, url, title, date, categories and card image), so
+the layout renders site.data.related_posts[page.path] directly instead of
+finding each neighbour in site.posts.
+
+Incremental mode (the default) caches each post's term counts and ranked
+candidates in .cache/related-posts.json. Only rows for new or edited posts
+are recomputed; their scores are merged into the other posts' candidate
+lists, which keep a few spare entries so a neighbour dropping out doesn't
+force a recompute. Scores between unchanged posts keep the IDF they were
+computed with, so a full rebuild runs when more than FULL_REBUILD_RATIO of
+the posts changed, when settings change, or with --full.
+
+Posts whose front matter isn't valid YAML are reported and left out;
+--strict makes that an error. Future-dated posts are left out too unless
+_config.yml sets `future: true`, since Jekyll doesn't build them. They
+aren't cached, so the first run after a post's date reads it as a new
+post and merges it in incrementally; a cached post whose date is still
+ahead (after future: true is turned off) is left out the same way.
+
+Usage:
+    python3 scripts/build-related-posts.py [--top-k 6] [--full] [--strict]
+"""
+
+import argparse
+import heapq
+import json
+import math
+import re
+import sys
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import yaml
+
+from utils.files import atomic_write_text
+from utils.frontmatter import parse_front_matter, yaml_error_message
+from utils.html_tags import iter_tags
+from utils.manifest import REPO_ROOT, hash_bytes
+from utils.posts import post_date, post_url, site_timezone
+from utils.references import site_config
+from utils.taxonomy import Taxonomy
+from utils.text import plain_text, tokenize
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = None
+    sparse = None
+
+DEFAULT_OUTPUT = REPO_ROOT / '_data' / 'related_posts.json'
+DEFAULT_CACHE_PATH = REPO_ROOT / '.cache' / 'related-posts.json'
+CACHE_VERSION = 2
+
+DEFAULT_TOP_K = 6
+
+# Blend of the three similarity blocks (they sum to 1)
+TEXT_WEIGHT = 0.6
+CATEGORY_WEIGHT = 0.3
+TAG_WEIGHT = 0.1
+
+# A parent category counts this much as the category itself
+PARENT_WEIGHT = 0.5
+
+# Strongest TF-IDF terms kept per post
+MAX_TERMS = 40
+
+# Spare candidates kept per post for incremental updates
+CANDIDATE_MARGIN = 4
+
+# Neighbours scoring below this aren't related at all
+MIN_SCORE = 0.01
+
+# Rebuild everything when more than this share of posts changed
+FULL_REBUILD_RATIO = 0.2
+
+# Rows multiplied at once by the sparse backend
+SPARSE_CHUNK_ROWS = 512
+
+MD_IMAGE_SRC_RE = re.compile(r'!\[[^\]]*\]\(([^)\s]+)')
+
+
+def card_image(front_matter, body):
+    """
+    The image a post card shows, as _includes/post-card-image.html picks it:
+    featured_image or image, else the first image in the post (Cloudinary
+    and WordPress upload URLs reduced to their last path segment).
+    """
+    image = front_matter.get('featured_image') or front_matter.get('image')
+    if image:
+        return str(image)
+
+    found = []
+    tag = next(iter_tags(body, ['img']), None)
+    if tag is not None and tag.get('src'):
+        found.append((tag.start, tag.get('src')))
+    match = MD_IMAGE_SRC_RE.search(body)
+    if match:
+        found.append((match.start(), match.group(1)))
+    if not found:
+        return None
+
+    src = min(found)[1]
+    if 'cloudinary.com' in src:
+        return src.split('/upload/', 1)[1].split('/')[-1] if '/upload/' in src else None
+    if 'circleseven.co.uk/wp-content/uploads' in src:
+        return src.split('/')[-1]
+    return src
+
+
+def _normalise(weights):
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+    return {k: w / norm for k, w in weights.items()} if norm else {}
+
+
+def text_vector(tf, idf):
+    """Unit TF-IDF vector of a post's MAX_TERMS strongest terms"""
+    weights = {term: (1 + math.log(count)) * idf[term] for term, count in tf.items()}
+    top = heapq.nsmallest(MAX_TERMS, weights.items(), key=lambda kv: (-kv[1], kv[0]))
+    return _normalise(dict(top))
+
+
+def taxonomy_vector(categories, taxonomy):
+    """Unit vector over category slugs, parents included at PARENT_WEIGHT"""
+    weights = {}
+    for name in categories:
+        parent = taxonomy.category_parent(name)
+        if parent:
+            weights[parent] = max(weights.get(parent, 0), PARENT_WEIGHT)
+        weights[taxonomy.category_slug(name)] = 1.0
+    return _normalise(weights)
+
+
+def post_vector(doc, idf, taxonomy):
+    """One sparse vector whose dot products blend text, category and tag similarity"""
+    vector = {}
+    blocks = (
+        ('t:', TEXT_WEIGHT, text_vector(doc['tf'], idf)),
+        ('c:', CATEGORY_WEIGHT, taxonomy_vector(doc['categories'], taxonomy)),
+        ('g:', TAG_WEIGHT, _normalise({taxonomy.tag_slug(t): 1.0 for t in doc['tags']})),
+    )
+    for prefix, weight, block in blocks:
+        scale = math.sqrt(weight)
+        for feature, value in block.items():
+            vector[prefix + feature] = value * scale
+    return vector
+
+
+class PythonBackend:
+    """Similarity rows from an inverted index of feature -> (post, weight)"""
+
+    name = 'python'
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.index = defaultdict(list)
+        for doc_id, vector in enumerate(vectors):
+            for feature, weight in vector.items():
+                self.index[feature].append((doc_id, weight))
+
+    def rows(self, doc_ids):
+        """Yield (doc_id, {other doc_id: score}) for each of doc_ids"""
+        for doc_id in doc_ids:
+            scores = defaultdict(float)
+            for feature, weight in self.vectors[doc_id].items():
+                for other, other_weight in self.index[feature]:
+                    scores[other] += weight * other_weight
+            yield doc_id, scores
+
+
+class SparseBackend:
+    """Similarity rows as chunks of a sparse X @ X.T product"""
+
+    name = 'scipy'
+
+    def __init__(self, vectors):
+        features = {}
+        indptr, indices, data = [0], [], []
+        for vector in vectors:
+            for feature, weight in vector.items():
+                indices.append(features.setdefault(feature, len(features)))
+                data.append(weight)
+            indptr.append(len(indices))
+        self.matrix = sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float64), np.asarray(indices), np.asarray(indptr)),
+            shape=(len(vectors), max(len(features), 1))
+        )
+        self.transposed = self.matrix.T.tocsc()
+
+    def rows(self, doc_ids):
+        doc_ids = list(doc_ids)
+        for start in range(0, len(doc_ids), SPARSE_CHUNK_ROWS):
+            chunk = doc_ids[start:start + SPARSE_CHUNK_ROWS]
+            product = (self.matrix[chunk] @ self.transposed).tocsr()
+            for row, doc_id in enumerate(chunk):
+                begin, end = product.indptr[row], product.indptr[row + 1]
+                yield doc_id, dict(zip(product.indices[begin:end].tolist(), product.data[begin:end].tolist()))
+
+
+def make_backend(vectors):
+    """SparseBackend when SciPy is installed, else PythonBackend"""
+    return SparseBackend(vectors) if sparse is not None else PythonBackend(vectors)
+
+
+class RelatedPostsBuilder:
+    """Builds and incrementally maintains the related posts data file"""
+
+    def __init__(self, posts_dir, output=DEFAULT_OUTPUT, cache_path=DEFAULT_CACHE_PATH,
+                 site_dir=REPO_ROOT, top_k=DEFAULT_TOP_K, full=False, now=None):
+        self.posts_dir = Path(posts_dir)
+        self.output = Path(output)
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.taxonomy = Taxonomy.load(site_dir)
+        config = site_config(site_dir)
+        self.permalink = config.get('permalink', '/:title/')
+        self.tz = site_timezone(config.get('timezone'))
+        # Jekyll leaves out posts dated after the build unless future: true
+        self.future = config.get('future') is True
+        self.now = now or datetime.now(timezone.utc)
+        self.top_k = top_k
+        self.full = full
+        self.docs = {}        # key -> {'hash', 'tf', 'categories', 'tags', 'card'}
+        self.candidates = {}  # key -> [[other key, score], ...], best first
+        self.stats = {
+            'posts': 0,
+            'posts_changed': 0,
+            'posts_removed': 0,
+            'posts_future': 0,
+            'posts_failed': [],
+            'rows_computed': 0,
+            'mode': None,
+            'backend': None
+        }
+
+    def settings(self):
+        """Everything the cached scores depend on besides the posts themselves"""
+        return {
+            'version': CACHE_VERSION,
+            'top_k': self.top_k,
+            'weights': [TEXT_WEIGHT, CATEGORY_WEIGHT, TAG_WEIGHT, PARENT_WEIGHT, MAX_TERMS],
+            'taxonomy': hash_bytes(json.dumps([self.taxonomy.categories, self.taxonomy.tags], sort_keys=True))
+        }
+
+    def load_cache(self):
+        """Cached docs and candidates, or ({}, None) if there is no usable cache"""
+        if not self.cache_path:
+            return {}, None
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}, None
+        if data.get('settings', {}).get('version') != CACHE_VERSION:
+            return {}, None
+        if data.get('settings') != self.settings():
+            # Term counts are still valid; the scores aren't
+            return data.get('docs', {}), None
+        return data.get('docs', {}), data.get('candidates', {})
+
+    def save_cache(self):
+        if not self.cache_path:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.cache_path, json.dumps({
+            'settings': self.settings(),
+            'docs': self.docs,
+            'candidates': self.candidates
+        }, ensure_ascii=False, separators=(',', ':'), sort_keys=True))
+
+    def unbuilt(self, date):
+        """True if Jekyll won't build a post with this date yet"""
+        if not date or self.future:
+            return False
+        if isinstance(date, str):
+            date = datetime.fromisoformat(date)
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+        return date > self.now
+
+    def read_posts(self, cached_docs):
+        """Load every post, reusing cached term counts for unchanged ones; returns changed keys"""
+        changed = set()
+        for path in sorted(self.posts_dir.glob('*.md')):
+            raw = path.read_bytes()
+            digest = hash_bytes(raw)
+            key = f"_posts/{path.relative_to(self.posts_dir).as_posix()}"
+
+            cached = cached_docs.get(key)
+            if cached and cached.get('hash') == digest:
+                if self.unbuilt(cached['card']['date']):
+                    self.stats['posts_future'] += 1
+                else:
+                    self.docs[key] = cached
+                continue
+
+            try:
+                front_matter, body = parse_front_matter(raw.decode('utf-8'))
+            except yaml.YAMLError as e:
+                self.stats['posts_failed'].append((path.name, yaml_error_message(e)))
+                continue
+            front_matter = front_matter or {}
+            if front_matter.get('published') is False:
+                continue
+            date = post_date(path, front_matter, self.tz)
+            if self.unbuilt(date):
+                self.stats['posts_future'] += 1
+                continue
+            categories = front_matter.get('categories') or []
+            tags = front_matter.get('tags') or []
+            categories = [str(c) for c in ([categories] if isinstance(categories, str) else categories)]
+            self.docs[key] = {
+                'hash': digest,
+                'tf': dict(Counter(tokenize(f"{front_matter.get('title') or ''} {plain_text(body)}"))),
+                'categories': categories,
+                'tags': [str(t) for t in ([tags] if isinstance(tags, str) else tags)],
+                'card': {
+                    'path': key,
+                    'url': post_url(path, front_matter, self.permalink),
+                    'title': str(front_matter.get('title') or ''),
+                    'date': date.isoformat() if date else None,
+                    'categories': categories,
+                    'featured_image': card_image(front_matter, body)
+                }
+            }
+            changed.add(key)
+        return changed
+
+    def ranked(self, keys, doc_id, scores):
+        """Best top_k + CANDIDATE_MARGIN [key, score] pairs from a score row"""
+        pairs = [(keys[other], round(score, 6)) for other, score in scores.items()
+                 if other != doc_id and score >= MIN_SCORE]
+        best = heapq.nsmallest(self.top_k + CANDIDATE_MARGIN, pairs, key=lambda p: (-p[1], p[0]))
+        return [list(pair) for pair in best]
+
+    def build(self):
+        """Update the data file and cache; returns stats"""
+        cached_docs, cached_candidates = self.load_cache()
+        changed = self.read_posts(cached_docs)
+        removed = set(cached_docs) - set(self.docs)
+        keys = sorted(self.docs)
+        self.stats.update(posts=len(keys), posts_changed=len(changed), posts_removed=len(removed))
+
+        df = Counter()
+        for doc in self.docs.values():
+            df.update(doc['tf'].keys())
+        idf = {term: math.log((1 + len(keys)) / (1 + count)) + 1 for term, count in df.items()}
+        vectors = [post_vector(self.docs[key], idf, self.taxonomy) for key in keys]
+        backend = make_backend(vectors)
+        self.stats['backend'] = backend.name
+
+        full = (self.full or cached_candidates is None
+                or len(changed) + len(removed) > FULL_REBUILD_RATIO * max(len(keys), 1))
+        self.stats['mode'] = 'full' if full else 'incremental'
+        if full:
+            self.candidates = {}
+            for doc_id, scores in backend.rows(range(len(keys))):
+                self.candidates[keys[doc_id]] = self.ranked(keys, doc_id, scores)
+            self.stats['rows_computed'] = len(keys)
+        else:
+            self._update(keys, backend, changed, removed, cached_candidates)
+
+        data = {key: [self.docs[other]['card'] for other, _score in self.candidates[key][:self.top_k]]
+                for key in keys}
+        self.write(data)
+        self.save_cache()
+        return self.stats
+
+    def _update(self, keys, backend, changed, removed, cached_candidates):
+        """Recompute rows for changed posts and merge them into everyone else's"""
+        positions = {key: i for i, key in enumerate(keys)}
+        stale = changed | removed
+        self.candidates = {key: cached_candidates.get(key, []) for key in keys}
+        recompute = set()
+
+        # Drop changed and removed posts from the unchanged posts' lists
+        for key in keys:
+            if key in changed:
+                continue
+            before = self.candidates[key]
+            after = [pair for pair in before if pair[0] not in stale]
+            self.candidates[key] = after
+            if len(after) < self.top_k and len(before) >= self.top_k + CANDIDATE_MARGIN:
+                # The list was cut short, so there may be more neighbours to find
+                recompute.add(key)
+
+        rows = {keys[doc_id]: scores for doc_id, scores in
+                backend.rows(sorted(positions[key] for key in changed | recompute))}
+        self.stats['rows_computed'] = len(rows)
+
+        for key, scores in rows.items():
+            self.candidates[key] = self.ranked(keys, positions[key], scores)
+
+        # Similarity is symmetric: a changed post's row scores it against everyone
+        limit = self.top_k + CANDIDATE_MARGIN
+        for key in changed:
+            for other_id, score in rows[key].items():
+                other = keys[other_id]
+                if other in rows or score < MIN_SCORE:
+                    continue
+                merged = self.candidates[other] + [[key, round(score, 6)]]
+                self.candidates[other] = heapq.nsmallest(limit, merged, key=lambda p: (-p[1], p[0]))
+
+    def write(self, data):
+        """Write the data file if its contents changed"""
+        text = json.dumps(data, ensure_ascii=False, indent=1, sort_keys=True) + '\n'
+        try:
+            if self.output.read_text(encoding='utf-8') == text:
+                return
+        except OSError:
+            pass
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.output, text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute related posts into _data/related_posts.json')
+    parser.add_argument('--posts-dir', default=str(REPO_ROOT / '_posts'), help='Jekyll posts directory')
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help='Data file to write')
+    parser.add_argument('--cache', default=str(DEFAULT_CACHE_PATH), help='Incremental cache file')
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K, metavar='K',
+                        help='Related posts stored per post (the layout shows related_posts_count)')
+    parser.add_argument('--full', action='store_true', help='Recompute every row')
+    parser.add_argument('--strict', action='store_true',
+                        help='Exit with status 1 if any post has invalid front matter')
+    args = parser.parse_args()
+
+    builder = RelatedPostsBuilder(args.posts_dir, args.output, Path(args.cache),
+                                  top_k=args.top_k, full=args.full)
+    stats = builder.build()
+
+    for name, message in stats['posts_failed']:
+        print(f"⚠ Skipped {name}: invalid front matter: {message}")
+    print(f"🔗 Related posts: {stats['posts']} posts ({stats['mode']} update, {stats['backend']} backend)")
+    print(f"   Changed: {stats['posts_changed']}, removed: {stats['posts_removed']}")
+    if stats['posts_future']:
+        print(f"   Future-dated (left out): {stats['posts_future']}")
+    print(f"   Rows computed: {stats['rows_computed']}")
+
+    if args.strict and stats['posts_failed']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
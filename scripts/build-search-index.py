@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Build the site search index from _posts/ as sharded static JSON
+
+Replaces the Liquid-rendered search.json, which inlined the full text of
+every post into one file that the browser had to download and index before
+showing any result. This builds the inverted index ahead of time:
+
+- Post bodies are reduced to plain text (utils/text.py) and tokenised.
+- Each term's postings list holds (doc, weight) pairs, where weight is a
+  BM25 term score summed over the title, category and content fields with
+  the same boosts the old Lunr index used (10, 5, 1). The search page adds
+  the IDF from the postings length at query time.
+- Postings are sharded by term prefix, so a query only downloads the
+  shards for its own terms. Result metadata (title, URL, date, image,
+  reading time, excerpt) is split into chunks loaded for displayed results.
+- Files are named by content hash, so they can be cached indefinitely and
+  unchanged shards are not rewritten. A .gz copy (and .br, if the brotli
+  module is installed) is written next to each file for servers that serve
+  precompressed assets.
+
+Output goes to assets/search/ (git-ignored), with index.json listing the
+shards and chunks. Stale shard and chunk files from earlier builds are
+removed; nothing else in the output directory is touched. Posts whose
+front matter isn't valid YAML are reported and left out (Jekyll skips
+them too); --strict makes that an error. Future-dated posts are left out
+unless _config.yml sets `future: true`, since Jekyll doesn't build them.
+Run before `jekyll build`; netlify/build.sh does.
+
+Usage:
+    python3 scripts/build-search-index.py [--posts-dir _posts] [--output assets/search] [--strict]
+"""
+
+import argparse
+import gzip
+import json
+import re
+import sys
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import yaml
+
+from utils.files import atomic_write_text
+from utils.frontmatter import parse_front_matter, yaml_error_message
+from utils.manifest import REPO_ROOT, hash_bytes
+from utils.posts import post_date, post_url, site_timezone
+from utils.references import site_config
+from utils.text import MIN_TERM_LENGTH, STOP_WORDS, plain_text, reading_time, tokenize, word_count
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+INDEX_VERSION = 1
+DEFAULT_OUTPUT_DIR = REPO_ROOT / 'assets' / 'search'
+
+# Field boosts, as in the Lunr index this replaces
+FIELD_BOOSTS = {'title': 10, 'category': 5, 'content': 1}
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Terms are sharded by their first PREFIX_LENGTH characters
+DEFAULT_PREFIX_LENGTH = 2
+
+# Result metadata is split into chunks of this many posts
+DOCS_CHUNK_SIZE = 500
+
+EXCERPT_CHARS = 150
+
+# Names of the files write_json() produces, and their compressed copies
+GENERATED_FILE_RE = re.compile(r'^(terms-[a-z0-9]+|docs-\d+)\.[0-9a-f]{10}\.json(\.gz|\.br)?$')
+
+
+class SearchIndexBuilder:
+    """Builds the sharded search index for a directory of posts"""
+
+    def __init__(self, posts_dir, output_dir=DEFAULT_OUTPUT_DIR, site_dir=REPO_ROOT,
+                 prefix_length=DEFAULT_PREFIX_LENGTH, now=None):
+        self.posts_dir = Path(posts_dir)
+        self.output_dir = Path(output_dir)
+        self.prefix_length = prefix_length
+        config = site_config(site_dir)
+        self.permalink = config.get('permalink', '/:title/')
+        self.tz = site_timezone(config.get('timezone'))
+        # Jekyll leaves out posts dated after the build unless future: true
+        self.future = config.get('future') is True
+        self.now = now or datetime.now(timezone.utc)
+        self.docs = []
+        self.fields = []  # per doc: {field: Counter of terms}
+        self.stats = {
+            'posts': 0,
+            'posts_skipped': 0,
+            'posts_future': 0,
+            'posts_failed': [],
+            'terms': 0,
+            'shards': 0,
+            'files_written': 0,
+            'files_removed': 0,
+            'bytes': 0,
+            'gzip_bytes': 0
+        }
+
+    def load_posts(self):
+        """Read and tokenise every published post, newest first"""
+        posts = []
+        for path in sorted(self.posts_dir.glob('*.md')):
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            try:
+                front_matter, body = parse_front_matter(text)
+            except yaml.YAMLError as e:
+                self.stats['posts_failed'].append((path.name, yaml_error_message(e)))
+                continue
+            if front_matter is None or front_matter.get('published') is False:
+                self.stats['posts_skipped'] += 1
+                continue
+            date = post_date(path, front_matter, self.tz)
+            if date and date > self.now and not self.future:
+                self.stats['posts_future'] += 1
+                continue
+            posts.append((date, path, front_matter, body))
+
+        # Same order as site.posts; equal dates fall back to the filename
+        posts.sort(key=lambda p: (p[0].timestamp() if p[0] else 0, p[1].name), reverse=True)
+
+        for date, path, front_matter, body in posts:
+            text = plain_text(body)
+            title = str(front_matter.get('title') or '')
+            categories = front_matter.get('categories') or []
+            if isinstance(categories, str):
+                categories = categories.split()
+            category = str(categories[0]) if categories else ''
+
+            self.docs.append({
+                'url': post_url(path, front_matter, self.permalink),
+                'title': title,
+                'category': category,
+                'date': f"{date:%b} {date.day}, {date:%Y}" if date else '',
+                'featured_image': str(front_matter.get('featured_image') or front_matter.get('image') or ''),
+                'reading_time': reading_time(word_count(text)),
+                'excerpt': text[:EXCERPT_CHARS]
+            })
+            self.fields.append({
+                'title': Counter(tokenize(title)),
+                'category': Counter(tokenize(category)),
+                'content': Counter(tokenize(text))
+            })
+
+        self.stats['posts'] = len(self.docs)
+
+    def postings(self):
+        """Return {term: [doc, weight, doc, weight, ...]} with BM25 field weights"""
+        lengths = {field: [sum(doc[field].values()) for doc in self.fields] for field in FIELD_BOOSTS}
+        averages = {field: (sum(values) / len(values) if values else 0) or 1
+                    for field, values in lengths.items()}
+
+        weights = defaultdict(lambda: defaultdict(float))
+        for doc_id, doc in enumerate(self.fields):
+            for field, boost in FIELD_BOOSTS.items():
+                norm = 1 - BM25_B + BM25_B * lengths[field][doc_id] / averages[field]
+                for term, tf in doc[field].items():
+                    weights[term][doc_id] += boost * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+
+        postings = {}
+        for term in sorted(weights):
+            flat = []
+            for doc_id, weight in sorted(weights[term].items()):
+                flat.extend((doc_id, round(weight, 3)))
+            postings[term] = flat
+        self.stats['terms'] = len(postings)
+        return postings
+
+    def shards(self, postings):
+        """Group postings into {prefix: {term: postings}}"""
+        shards = defaultdict(dict)
+        for term, flat in postings.items():
+            shards[term[:self.prefix_length]][term] = flat
+        self.stats['shards'] = len(shards)
+        return shards
+
+    @staticmethod
+    def file_stem(prefix):
+        """Filename-safe name for a shard prefix"""
+        if prefix.isascii() and prefix.isalnum():
+            return prefix
+        return 'u' + prefix.encode('utf-8').hex()
+
+    def write_json(self, name, data, written):
+        """Write data as name.<hash>.json (plus compressed copies); returns the filename"""
+        text = json.dumps(data, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+        raw = text.encode('utf-8')
+        filename = f"{name}.{hash_bytes(raw)[:10]}.json"
+        self._write(filename, raw, written)
+        return filename
+
+    def _write(self, filename, raw, written):
+        path = self.output_dir / filename
+        compressed = {'.gz': gzip.compress(raw, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed['.br'] = brotli.compress(raw)
+
+        # Hashed names only change when the content does
+        if not path.exists() or path.read_bytes() != raw:
+            atomic_write_text(path, raw.decode('utf-8'))
+            self.stats['files_written'] += 1
+        for suffix, data in compressed.items():
+            copy = path.with_name(path.name + suffix)
+            if not copy.exists() or copy.read_bytes() != data:
+                copy.write_bytes(data)
+
+        self.stats['bytes'] += len(raw)
+        self.stats['gzip_bytes'] += len(compressed['.gz'])
+        written.add(filename)
+        written.update(filename + suffix for suffix in compressed)
+
+    def remove_stale(self, written):
+        """Delete shard and chunk files from earlier builds that the new index no longer references"""
+        for path in self.output_dir.iterdir():
+            if path.is_file() and path.name not in written and GENERATED_FILE_RE.match(path.name):
+                path.unlink()
+                self.stats['files_removed'] += 1
+
+    def build(self):
+        """Build and write the whole index; returns stats"""
+        self.load_posts()
+        shards = self.shards(self.postings())
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        written = set()
+
+        shard_files = {
+            prefix: self.write_json(f"terms-{self.file_stem(prefix)}", terms, written)
+            for prefix, terms in sorted(shards.items())
+        }
+        doc_files = [
+            self.write_json(f"docs-{start // DOCS_CHUNK_SIZE}",
+                            self.docs[start:start + DOCS_CHUNK_SIZE], written)
+            for start in range(0, len(self.docs), DOCS_CHUNK_SIZE)
+        ]
+
+        index = {
+            'version': INDEX_VERSION,
+            'doc_count': len(self.docs),
+            'docs_chunk_size': DOCS_CHUNK_SIZE,
+            'docs': doc_files,
+            'prefix_length': self.prefix_length,
+            'min_term_length': MIN_TERM_LENGTH,
+            'stop_words': sorted(STOP_WORDS),
+            'shards': shard_files
+        }
+        raw = json.dumps(index, ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8')
+        self._write('index.json', raw, written)
+
+        self.remove_stale(written)
+        return self.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the sharded site search index')
+    parser.add_argument('--posts-dir', default=str(REPO_ROOT / '_posts'), help='Jekyll posts directory')
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT_DIR), help='Directory for the index files')
+    parser.add_argument('--prefix-length', type=int, default=DEFAULT_PREFIX_LENGTH, metavar='N',
+                        help='Shard terms by their first N characters')
+    parser.add_argument('--strict', action='store_true',
+                        help='Exit with status 1 if any post has invalid front matter')
+    args = parser.parse_args()
+
+    builder = SearchIndexBuilder(args.posts_dir, args.output, prefix_length=args.prefix_length)
+    stats = builder.build()
+
+    for name, message in stats['posts_failed']:
+        print(f"⚠ Skipped {name}: invalid front matter: {message}")
+    print(f"🔎 Search index: {stats['posts']} posts, {stats['terms']:,} terms in {stats['shards']} shards")
+    if stats['posts_future']:
+        print(f"   Future-dated (left out): {stats['posts_future']}")
+    print(f"   {stats['bytes'] / 1024:.1f} KiB ({stats['gzip_bytes'] / 1024:.1f} KiB gzipped)"
+          f"{'' if brotli else '; install brotli for .br copies'}")
+    print(f"   {stats['files_written']} files written, {stats['files_removed']} stale files removed")
+
+    if args.strict and stats['posts_failed']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Precompute the category and tag index and check posts against the taxonomy
+
+Category pages and the breadcrumb, subcategory and category tree includes
+used to find a category's parent and children by walking the nested
+_data/taxonomy.yml in Liquid on every page that shows them. This parses
+the taxonomy and every post's front matter once and writes
+_data/taxonomy_index.json:
+
+    "categories": {
+        "photography": {
+            "name": "Photography", "parent": "projects", "ancestors": ["projects"],
+            "children": [], "posts": ["_posts/2015-01-04-derelict-house.md", ...],
+            "count": 12, "total": 12
+        }, ...
+    },
+    "category_slugs": {"Photography": "photography", ...},
+    "roots": ["projects", ...],
+    "tags": {"photography": {"name": "Photography", "posts": [...], "count": 9}, ...},
+    "tag_slugs": {"Photography": "photography", ...}
+
+so the templates look entries up by slug (or by display name through
+category_slugs). Posts are listed newest first, like site.categories;
+`count` is the posts filed under the category itself and `total` the
+distinct posts in it or any of its descendants. Unpublished posts are
+left out, and so are future-dated ones unless _config.yml sets
+`future: true`, as Jekyll does.
+
+The data file is gitignored and the templates prefer it to site.categories,
+so it has to be rebuilt whenever posts change: `npm run dev` and the
+deploy builds run this first, but after adding or editing posts under a
+plain `jekyll serve`, re-run this script or the listings stay stale. A
+post dated in the future joins the index on the first run after its date.
+
+While building, it reports posts whose categories or tags aren't in the
+taxonomy (with the taxonomy name they probably meant, when the slug
+matches), duplicate names or slugs in the taxonomy, and categories with
+no posts. Posts whose front matter doesn't parse are reported and
+skipped. --strict exits non-zero on anything but empty categories.
+
+Each post's categories, tags and date are cached in
+.cache/taxonomy-index.json with the SHA-256 of the file, so a rerun only
+parses posts that changed; assembling the index from the cached entries
+is a single pass. The data file is only rewritten when it changes.
+
+Usage:
+    python3 scripts/build-taxonomy-index.py [--strict] [--force]
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import yaml
+
+from utils.files import atomic_write_text
+from utils.frontmatter import parse_front_matter, yaml_error_message
+from utils.manifest import REPO_ROOT, hash_bytes
+from utils.posts import post_date
+from utils.references import site_config
+from utils.taxonomy import Taxonomy
+
+DEFAULT_OUTPUT = REPO_ROOT / '_data' / 'taxonomy_index.json'
+DEFAULT_CACHE_PATH = REPO_ROOT / '.cache' / 'taxonomy-index.json'
+
+# Bump when the cached per-post fields change, to reparse every post
+CACHE_VERSION = 1
+
+
+def _names(value):
+    """Front matter categories/tags as a list of strings (YAML allows a bare string)"""
+    if not value:
+        return []
+    return [str(v) for v in ([value] if isinstance(value, str) else value)]
+
+
+def read_post(path, raw):
+    """Cached fields for one post, or None if it is unpublished"""
+    front_matter, _body = parse_front_matter(raw.decode('utf-8'))
+    front_matter = front_matter or {}
+    if front_matter.get('published') is False:
+        return None
+    date = post_date(path, front_matter)
+    return {
+        'categories': _names(front_matter.get('categories')),
+        'tags': _names(front_matter.get('tags')),
+        'date': date.astimezone(timezone.utc).isoformat() if date else ''
+    }
+
+
+class TaxonomyIndexBuilder:
+    def __init__(self, posts_dir, output=DEFAULT_OUTPUT, cache_path=DEFAULT_CACHE_PATH,
+                 site_dir=REPO_ROOT, force=False, now=None):
+        self.posts_dir = Path(posts_dir)
+        self.output = Path(output)
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.taxonomy = Taxonomy.load(site_dir)
+        self.force = force
+        # Jekyll leaves out posts dated after the build unless future: true
+        self.future = site_config(site_dir).get('future') is True
+        self.now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc).isoformat()
+        self.posts = {}  # key -> {'hash', 'categories', 'tags', 'date'}, or {'hash'} if unpublished
+        self.stats = {
+            'posts': 0,
+            'posts_parsed': 0,
+            'posts_unchanged': 0,
+            'posts_removed': 0,
+            'posts_future': 0,
+            'posts_failed': [],
+            'unknown_categories': [],
+            'unknown_tags': [],
+            'taxonomy_problems': list(self.taxonomy.problems),
+            'empty_categories': []
+        }
+
+    def load_cache(self):
+        if not self.cache_path or self.force:
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data.get('posts', {}) if data.get('version') == CACHE_VERSION else {}
+
+    def save_cache(self, cached):
+        if not self.cache_path or cached == self.posts:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.cache_path, json.dumps({
+            'version': CACHE_VERSION,
+            'posts': self.posts
+        }, ensure_ascii=False, separators=(',', ':'), sort_keys=True))
+
+    def read_posts(self, cached):
+        """Front matter of every post, parsing only new and changed files"""
+        live = set()
+        for path in sorted(self.posts_dir.glob('*.md')):
+            raw = path.read_bytes()
+            digest = hash_bytes(raw)
+            key = f"_posts/{path.relative_to(self.posts_dir).as_posix()}"
+            self.stats['posts'] += 1
+            live.add(key)
+
+            entry = cached.get(key)
+            if entry and entry.get('hash') == digest:
+                self.posts[key] = entry
+                self.stats['posts_unchanged'] += 1
+                continue
+
+            try:
+                self.posts[key] = dict(read_post(path, raw) or {}, hash=digest)
+            except yaml.YAMLError as e:
+                # Not cached, so it is parsed again next run
+                self.stats['posts_failed'].append((path.name, yaml_error_message(e)))
+                continue
+            self.stats['posts_parsed'] += 1
+
+        self.stats['posts_removed'] = len(set(cached) - live)
+
+    def validate(self, key, entry):
+        """Record categories and tags of a post that aren't in the taxonomy"""
+        for name in entry['categories']:
+            if name not in self.taxonomy.categories:
+                self.stats['unknown_categories'].append((key, name, self.taxonomy.category_name(name)))
+        for name in entry['tags']:
+            if name not in self.taxonomy.tags:
+                self.stats['unknown_tags'].append((key, name, self.taxonomy.tag_name(name)))
+
+    def build_index(self):
+        """The index data from the taxonomy and the per-post entries"""
+        categories = {}
+        for name, info in self.taxonomy.categories.items():
+            categories[info['slug']] = {
+                'name': name,
+                'parent': info['parent'],
+                'ancestors': [],
+                'children': [],
+                'posts': [],
+                'count': 0,
+                'total': 0
+            }
+        for slug, entry in categories.items():
+            parent = entry['parent']
+            if parent in categories:
+                categories[parent]['children'].append(slug)
+            while parent in categories and parent not in entry['ancestors']:
+                entry['ancestors'].insert(0, parent)
+                parent = categories[parent]['parent']
+
+        tags = {slug: {'name': name, 'posts': [], 'count': 0} for name, slug in self.taxonomy.tags.items()}
+
+        # Newest first, like site.categories and site.tags. Future posts stay
+        # in the cache and are left out here, so they appear once their date
+        # passes even though the file hasn't changed.
+        dated = [(entry['date'], key) for key, entry in self.posts.items() if 'date' in entry]
+        published = sorted(((date, key) for date, key in dated if self.future or date <= self.now), reverse=True)
+        self.stats['posts_future'] = len(dated) - len(published)
+        descendants = {slug: set() for slug in categories}
+        for _date, key in published:
+            entry = self.posts[key]
+            self.validate(key, entry)
+            for name in dict.fromkeys(entry['categories']):
+                info = self.taxonomy.categories.get(name)
+                if info:
+                    categories[info['slug']]['posts'].append(key)
+                    for slug in [info['slug']] + categories[info['slug']]['ancestors']:
+                        descendants[slug].add(key)
+            for name in dict.fromkeys(entry['tags']):
+                if name in self.taxonomy.tags:
+                    tags[self.taxonomy.tags[name]]['posts'].append(key)
+
+        for slug, entry in categories.items():
+            entry['count'] = len(entry['posts'])
+            entry['total'] = len(descendants[slug])
+            if not entry['total']:
+                self.stats['empty_categories'].append(entry['name'])
+        for entry in tags.values():
+            entry['count'] = len(entry['posts'])
+
+        return {
+            'categories': categories,
+            'category_slugs': {name: info['slug'] for name, info in self.taxonomy.categories.items()},
+            'roots': [slug for slug, entry in categories.items() if entry['parent'] not in categories],
+            'tags': tags,
+            'tag_slugs': dict(self.taxonomy.tags)
+        }
+
+    def write(self, data):
+        """Write the data file unless it already holds exactly this data"""
+        text = json.dumps(data, ensure_ascii=False, indent=1) + '\n'
+        try:
+            if self.output.read_text(encoding='utf-8') == text:
+                return False
+        except OSError:
+            pass
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.output, text)
+        return True
+
+    def build(self):
+        """Update the data file and cache; returns stats"""
+        cached = self.load_cache()
+        self.read_posts(cached)
+        self.write(self.build_index())
+        self.save_cache(cached)
+        return self.stats
+
+    def problems(self):
+        """Number of validation problems (empty categories aren't problems)"""
+        return (len(self.stats['unknown_categories']) + len(self.stats['unknown_tags'])
+                + len(self.stats['taxonomy_problems']) + len(self.stats['posts_failed']))
+
+    def print_summary(self):
+        for name, message in self.stats['posts_failed']:
+            print(f"⚠ Skipped {name}: invalid front matter: {message}")
+        for label, key in (('category', 'unknown_categories'), ('tag', 'unknown_tags')):
+            entries = self.stats[key]
+            if entries:
+                print(f"\n⚠ Posts with a {label} not in _data/taxonomy.yml ({len(entries)}):")
+                for post, name, suggestion in entries:
+                    hint = f' (did you mean "{suggestion}"?)' if suggestion else ''
+                    print(f'  {post}: "{name}"{hint}')
+        if self.stats['taxonomy_problems']:
+            print(f"\n⚠ Problems in _data/taxonomy.yml ({len(self.stats['taxonomy_problems'])}):")
+            for problem in self.stats['taxonomy_problems']:
+                print(f"  {problem}")
+        if self.stats['empty_categories']:
+            print(f"\nCategories with no posts: {', '.join(self.stats['empty_categories'])}")
+
+        print(f"\n🗂️  Taxonomy index: {self.stats['posts']} posts")
+        print(f"   Parsed: {self.stats['posts_parsed']}")
+        print(f"   Unchanged: {self.stats['posts_unchanged']}")
+        print(f"   Removed: {self.stats['posts_removed']}")
+        if self.stats['posts_future']:
+            print(f"   Future-dated (left out): {self.stats['posts_future']}")
+        print(f"   Problems: {self.problems()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute the category and tag index and validate post taxonomy')
+    parser.add_argument('--posts-dir', default=str(REPO_ROOT / '_posts'), help='Jekyll posts directory')
+    parser.add_argument('--site-dir', default=str(REPO_ROOT), help='Jekyll site root (for _data/taxonomy.yml)')
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help='Data file to write')
+    parser.add_argument('--cache', default=str(DEFAULT_CACHE_PATH), help='Incremental cache file')
+    parser.add_argument('--force', action='store_true', help='Reparse every post')
+    parser.add_argument('--strict', action='store_true',
+                        help='Exit with status 1 if any post or taxonomy entry fails validation')
+    args = parser.parse_args()
+
+    builder = TaxonomyIndexBuilder(args.posts_dir, Path(args.output), Path(args.cache),
+                                   site_dir=args.site_dir, force=args.force)
+    builder.build()
+    builder.print_summary()
+
+    if args.strict and builder.problems():
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,73 +4,162 @@ Extract featured images from WordPress XML export and add to Jekyll post front m
 
 Reads WordPress XML export, maps _thumbnail_id to attachment URLs,
 then updates Jekyll post front matter with featured_image field.
+
+The export is streamed with iterparse, so multi-gigabyte WXR files (with
+every revision and comment) parse in flat memory.
+
+Posts already checked against the same export are skipped using the shared
+post manifest (.cache/post-manifest.json); if every post is current the
+export is not parsed at all. Use --force to reprocess everything.
+
+featured_image is inserted as a single line at the end of the front matter;
+the existing keys, quoting and dates are left exactly as they were.
+
+--jobs N spreads the per-post work over N processes; output order and the
+summary are the same as a serial run, and posts are written atomically.
 """
 
+import io
+import os
 import xml.etree.ElementTree as ET
 import re
+from contextlib import redirect_stdout
 from pathlib import Path
-import yaml
+
+from utils.files import atomic_write_text
+from utils.frontmatter import parse_front_matter, set_front_matter_key
+from utils.manifest import PostManifest, hash_bytes, hash_file
+from utils.parallel import merge_stats, run_in_pool
+from utils.timing import Instrumentation, PhaseTimer, add_instrumentation_arguments
+
+# WordPress namespaces
+WP_NAMESPACES = {
+    'wp': 'http://wordpress.org/export/1.2/',
+    'content': 'http://purl.org/rss/1.0/modules/content/'
+}
+
+# Print a progress line every this many <item>s while parsing the export
+PROGRESS_INTERVAL = 5000
+
+UPLOAD_URL_RE = re.compile(r'/wp-content/uploads/(\d{4})/(\d{2})/([^/]+)$')
+IMAGE_EXTENSION_RE = re.compile(r'\.(jpg|jpeg|png|gif|webp)$', re.IGNORECASE)
+
+def public_id_from_upload_url(url):
+    """
+    Cloudinary public_id for a WordPress upload URL.
+
+    WordPress URLs: /wp-content/uploads/YYYY/MM/filename.ext
+    Cloudinary public_id: MM/filename (without extension)
+    """
+    url_match = UPLOAD_URL_RE.search(url)
+    if url_match:
+        month = url_match.group(2)
+        filename = url_match.group(3)
+        return f"{month}/{IMAGE_EXTENSION_RE.sub('', filename)}"
+
+    # Fallback: just filename without path
+    return IMAGE_EXTENSION_RE.sub('', url.split('/')[-1])
 
 class FeaturedImageExtractor:
-    def __init__(self, xml_path, posts_dir='_posts'):
+    def __init__(self, xml_path, posts_dir='_posts', manifest=None, jobs=1, timer=None):
         self.xml_path = xml_path
+        self.timer = timer or PhaseTimer()
         self.posts_dir = Path(posts_dir)
+        self.manifest = manifest or PostManifest(enabled=False)
+        self.jobs = jobs
         self.attachments = {}  # Map attachment ID to URL
         self.post_thumbnails = {}  # Map post title/slug to thumbnail ID
-        self.stats = {
+        self.stats = self.empty_stats()
+
+    @staticmethod
+    def empty_stats():
+        return {
             'posts_found': 0,
             'posts_updated': 0,
             'posts_skipped': 0,
+            'posts_unchanged': 0,
             'errors': []
         }
 
     def parse_xml(self):
-        """Parse WordPress XML and extract attachments and thumbnail mappings"""
-        print("Parsing WordPress XML...")
+        """
+        Stream the WordPress XML and extract attachments and thumbnail mappings
 
-        tree = ET.parse(self.xml_path)
-        root = tree.getroot()
-
-        # WordPress namespace
-        namespaces = {
-            'wp': 'http://wordpress.org/export/1.2/',
-            'content': 'http://purl.org/rss/1.0/modules/content/'
-        }
-
-        # Find all items (posts and attachments)
-        for item in root.findall('.//item'):
-            post_type = item.find('wp:post_type', namespaces)
-            if post_type is None:
-                continue
+        Each <item> is handled as soon as it closes and then discarded, so
+        only the two small maps stay in memory however large the export is.
+        """
+        for item in self.iter_items():
+            self.handle_item(item)
 
-            post_type_text = post_type.text
+        print(f"Found {len(self.attachments)} attachments")
+        print(f"Found {len(self.post_thumbnails)} posts with featured images")
 
-            # Extract attachment URLs
-            if post_type_text == 'attachment':
-                post_id = item.find('wp:post_id', namespaces)
-                attachment_url = item.find('wp:attachment_url', namespaces)
+    def iter_items(self):
+        """
+        Yield each <item> of the export as soon as it closes.
 
-                if post_id is not None and attachment_url is not None:
-                    self.attachments[post_id.text] = attachment_url.text
+        The element is cleared once the caller moves on, so the tree never
+        grows beyond the item being handled.
+        """
+        print("Parsing WordPress XML...")
 
-            # Extract post featured image IDs
-            elif post_type_text == 'post':
-                title = item.find('title')
-                post_name = item.find('wp:post_name', namespaces)
+        items = 0
+        depth = 0
+        channel = None
 
-                # Look for _thumbnail_id in postmeta
-                for postmeta in item.findall('wp:postmeta', namespaces):
-                    meta_key = postmeta.find('wp:meta_key', namespaces)
-                    if meta_key is not None and meta_key.text == '_thumbnail_id':
-                        meta_value = postmeta.find('wp:meta_value', namespaces)
-                        if meta_value is not None and title is not None:
-                            # Store by both title and post_name for matching
-                            if post_name is not None:
-                                self.post_thumbnails[post_name.text] = meta_value.text
-                            self.post_thumbnails[title.text] = meta_value.text
+        for event, elem in ET.iterparse(self.xml_path, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if elem.tag == 'channel':
+                    channel = elem
+                continue
 
-        print(f"Found {len(self.attachments)} attachments")
-        print(f"Found {len(self.post_thumbnails)} posts with featured images")
+            depth -= 1
+            if elem.tag == 'item':
+                yield elem
+                items += 1
+                if items % PROGRESS_INTERVAL == 0:
+                    print(f"  ...{items:,} items parsed")
+
+            # Drop finished children of <channel> (items, authors, terms)
+            # so the tree never grows beyond the item being parsed
+            if channel is not None and depth == 2:
+                elem.clear()
+                channel.remove(elem)
+
+        print(f"Parsed {items:,} items")
+
+    def handle_item(self, item):
+        """Record an attachment URL or a post's thumbnail ID from one <item>"""
+        post_type = item.find('wp:post_type', WP_NAMESPACES)
+        if post_type is None:
+            return
+
+        post_type_text = post_type.text
+
+        # Extract attachment URLs
+        if post_type_text == 'attachment':
+            post_id = item.find('wp:post_id', WP_NAMESPACES)
+            attachment_url = item.find('wp:attachment_url', WP_NAMESPACES)
+
+            if post_id is not None and attachment_url is not None:
+                self.attachments[post_id.text] = attachment_url.text
+
+        # Extract post featured image IDs
+        elif post_type_text == 'post':
+            title = item.find('title')
+            post_name = item.find('wp:post_name', WP_NAMESPACES)
+
+            # Look for _thumbnail_id in postmeta
+            for postmeta in item.findall('wp:postmeta', WP_NAMESPACES):
+                meta_key = postmeta.find('wp:meta_key', WP_NAMESPACES)
+                if meta_key is not None and meta_key.text == '_thumbnail_id':
+                    meta_value = postmeta.find('wp:meta_value', WP_NAMESPACES)
+                    if meta_value is not None and title is not None:
+                        # Store by both title and post_name for matching
+                        if post_name is not None:
+                            self.post_thumbnails[post_name.text] = meta_value.text
+                        self.post_thumbnails[title.text] = meta_value.text
 
     def get_thumbnail_url(self, post_slug, post_title):
         """Get thumbnail URL for a post by slug or title"""
@@ -88,24 +177,36 @@ class FeaturedImageExtractor:
 
     def extract_front_matter(self, content):
         """Extract YAML front matter from markdown file"""
-        if not content.startswith('---'):
-            return None, content
-
-        # Find second ---
-        end_match = re.search(r'\n---\n', content[3:])
-        if not end_match:
-            return None, content
-
-        yaml_content = content[3:end_match.start() + 3]
-        rest_content = content[end_match.end() + 3:]
-
         try:
-            front_matter = yaml.safe_load(yaml_content)
-            return front_matter, rest_content
+            return parse_front_matter(content)
         except Exception as e:
             print(f"Error parsing YAML: {e}")
             return None, content
 
+    def featured_image_for(self, post_path, front_matter):
+        """
+        public_id to set as a post's featured_image, or None.
+
+        None if the post already has featured_image or image, or the
+        export has no thumbnail for it.
+        """
+        # Skip if already has featured_image or image
+        if 'featured_image' in front_matter or 'image' in front_matter:
+            return None
+
+        # Get post slug from filename
+        post_slug = post_path.stem.split('-', 3)[-1] if '-' in post_path.stem else post_path.stem
+        post_title = front_matter.get('title', '')
+
+        # Get thumbnail URL
+        thumbnail_url = self.get_thumbnail_url(post_slug, post_title)
+
+        if not thumbnail_url:
+            return None
+
+        public_id = public_id_from_upload_url(thumbnail_url)
+        return public_id
+
     def update_post(self, post_path):
         """Update a single post with featured image"""
         self.stats['posts_found'] += 1
@@ -115,84 +216,108 @@ class FeaturedImageExtractor:
             content = f.read()
 
         # Extract front matter
-        front_matter, body = self.extract_front_matter(content)
+        front_matter, _body = self.extract_front_matter(content)
         if not front_matter:
             self.stats['posts_skipped'] += 1
             return False
 
-        # Skip if already has featured_image or image
-        if 'featured_image' in front_matter or 'image' in front_matter:
+        public_id = self.featured_image_for(post_path, front_matter)
+        if not public_id:
             self.stats['posts_skipped'] += 1
             return False
 
-        # Get post slug from filename
-        post_slug = post_path.stem.split('-', 3)[-1] if '-' in post_path.stem else post_path.stem
-        post_title = front_matter.get('title', '')
-
-        # Get thumbnail URL
-        thumbnail_url = self.get_thumbnail_url(post_slug, post_title)
-
-        if not thumbnail_url:
-            self.stats['posts_skipped'] += 1
-            return False
-
-        # Extract filename from WordPress URL with folder structure
-        # WordPress URLs: /wp-content/uploads/YYYY/MM/filename.ext
-        # Cloudinary public_id: MM/filename (without extension)
-        url_match = re.search(r'/wp-content/uploads/(\d{4})/(\d{2})/([^/]+)$', thumbnail_url)
-        if url_match:
-            year = url_match.group(1)
-            month = url_match.group(2)
-            filename = url_match.group(3)
-            # Remove extension
-            filename_no_ext = re.sub(r'\.(jpg|jpeg|png|gif|webp)$', '', filename, flags=re.IGNORECASE)
-            public_id = f"{month}/{filename_no_ext}"
-        else:
-            # Fallback: just filename without path
-            filename = thumbnail_url.split('/')[-1]
-            public_id = re.sub(r'\.(jpg|jpeg|png|gif|webp)$', '', filename, flags=re.IGNORECASE)
-
-        # Add featured_image to front matter (without extension, with folder)
-        front_matter['featured_image'] = public_id
-
-        # Rebuild file content
-        new_content = '---\n'
-        new_content += yaml.dump(front_matter, default_flow_style=False, allow_unicode=True, sort_keys=False)
-        new_content += '---\n'
-        new_content += body
+        # Add featured_image to front matter (without extension, with folder).
+        # Only that line is inserted; the rest of the file is left untouched.
+        new_content = set_front_matter_key(content, 'featured_image', public_id)
 
         # Write back
-        with open(post_path, 'w', encoding='utf-8') as f:
-            f.write(new_content)
+        atomic_write_text(post_path, new_content)
 
         self.stats['posts_updated'] += 1
         print(f"✓ Updated: {post_path.name} -> {public_id}")
         return True
 
+    def pass_name(self):
+        """Manifest pass name, tied to the export so a new export rechecks every post"""
+        st = os.stat(self.xml_path)
+        fingerprint = hash_bytes(f"{Path(self.xml_path).name}:{st.st_size}:{st.st_mtime_ns}")
+        return f"featured-image/{fingerprint[:12]}"
+
     def run(self):
-        """Process all posts"""
-        self.parse_xml()
+        """Process all posts, timing the scan, parse and write phases"""
+        with self.timer.phase('scan'):
+            pass_name = self.pass_name()
+            all_posts = sorted(self.posts_dir.glob('*.md'))
+            pending = self.manifest.pending(all_posts, pass_name)
+            self.stats['posts_unchanged'] = len(all_posts) - len(pending)
+
+        if pending:
+            with self.timer.phase('parse'):
+                self.parse_xml()
         print(f"\nProcessing posts in {self.posts_dir}...\n")
 
-        for post_file in sorted(self.posts_dir.glob('*.md')):
-            try:
-                self.update_post(post_file)
-            except Exception as e:
-                error_msg = f"Error processing {post_file.name}: {e}"
-                self.stats['errors'].append(error_msg)
-                print(f"✗ {error_msg}")
+        with self.timer.phase('write'):
+            results = run_in_pool(
+                _update_post_worker,
+                pending,
+                jobs=self.jobs,
+                initializer=_init_worker,
+                initargs=(self,)
+            )
+            for post_file, (post_stats, output, digest) in zip(pending, results):
+                merge_stats(self.stats, post_stats)
+                print(output, end='')
+                if digest:
+                    self.manifest.mark(post_file, pass_name, digest=digest)
+
+            self.manifest.prune(self.posts_dir, all_posts)
+            self.manifest.save()
 
         # Print summary
         print(f"\nSummary:")
         print(f"Posts found: {self.stats['posts_found']}")
         print(f"Posts updated: {self.stats['posts_updated']}")
         print(f"Posts skipped: {self.stats['posts_skipped']}")
+        print(f"Posts unchanged since last run: {self.stats['posts_unchanged']}")
 
         if self.stats['errors']:
             print(f"\nErrors: {len(self.stats['errors'])}")
             for error in self.stats['errors']:
                 print(f"  - {error}")
 
+# Extractor used by _update_post_worker; set once per worker process
+_worker_extractor = None
+
+def _init_worker(extractor):
+    global _worker_extractor
+    _worker_extractor = extractor
+
+def _update_post_worker(post_path):
+    """
+    Run update_post for one post, capturing its stats and printed output.
+
+    Returns (stats, output, digest) so the parent can merge and print results
+    in input order; digest is None if the post failed.
+    """
+    extractor = _worker_extractor
+    saved_stats = extractor.stats
+    extractor.stats = extractor.empty_stats()
+    buffer = io.StringIO()
+    digest = None
+
+    try:
+        with redirect_stdout(buffer):
+            try:
+                extractor.update_post(post_path)
+                digest = hash_file(post_path)
+            except Exception as e:
+                error_msg = f"Error processing {post_path.name}: {e}"
+                extractor.stats['errors'].append(error_msg)
+                print(f"✗ {error_msg}")
+        return extractor.stats, buffer.getvalue(), digest
+    finally:
+        extractor.stats = saved_stats
+
 def main():
     import argparse
 
@@ -201,11 +326,21 @@ def main():
                         help='Path to WordPress XML export')
     parser.add_argument('--posts-dir', default='_posts',
                         help='Path to Jekyll posts directory')
+    parser.add_argument('--force', action='store_true',
+                        help='Ignore the post manifest and reprocess every post')
+    parser.add_argument('--jobs', type=int, default=1, metavar='N',
+                        help='Number of worker processes (0 = one per CPU)')
+    add_instrumentation_arguments(parser)
 
     args = parser.parse_args()
 
-    extractor = FeaturedImageExtractor(args.xml, args.posts_dir)
-    extractor.run()
+    run = Instrumentation.from_args('extract-featured-images', args)
+    manifest = PostManifest(enabled=not args.force)
+    extractor = FeaturedImageExtractor(args.xml, args.posts_dir, manifest=manifest, jobs=args.jobs,
+                                       timer=run.timer)
+    with run:
+        extractor.run()
+    run.write(extractor.stats)
 
 if __name__ == '__main__':
     main()
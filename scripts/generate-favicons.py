@@ -1,133 +1,147 @@
 #!/usr/bin/env python3
 """
-Generate favicon PNG files from SVG using Python Imaging Library (PIL/Pillow)
-If PIL is not available, creates a simple HTML file that can be opened in a browser
-to manually save the favicons.
+Generate the favicon PNGs and favicon.ico from assets/images/favicon.svg
+
+Renders the circle-and-7 design once at MASTER_SIZE with the pure-Python
+rasteriser in utils/svg_raster.py, then box-filters it down to every size
+in OUTPUTS, which antialiases the edges. favicon.ico at the site root
+bundles ICO_SIZES as PNG entries, for browsers and crawlers that ask for
+/favicon.ico. The Apple touch icon is flattened onto white, because iOS
+fills transparent corners with black.
+
+Every output carries a tEXt chunk with a hash of the SVG and the render
+settings. When each output's hash matches the current source, the script
+exits without rendering, so netlify/build.sh can run it on every build
+for a few milliseconds. Use --force to regenerate regardless.
+
+Usage:
+    python3 scripts/generate-favicons.py [--force]
 """
 
-import os
-from pathlib import Path
-
-def create_favicon_html():
-    """Create an HTML file to manually generate favicons in a browser"""
-    html_content = '''<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Favicon Generator - Circle Seven</title>
-    <style>
-        body {
-            font-family: Arial, sans-serif;
-            max-width: 800px;
-            margin: 50px auto;
-            padding: 20px;
-        }
-        .favicon-preview {
-            display: inline-block;
-            margin: 20px;
-            text-align: center;
-        }
-        canvas {
-            border: 1px solid #ccc;
-            margin: 10px 0;
-        }
-        button {
-            background: #0084b4;
-            color: white;
-            border: none;
-            padding: 10px 20px;
-            cursor: pointer;
-            border-radius: 4px;
-        }
-        button:hover {
-            background: #005580;
-        }
-    </style>
-</head>
-<body>
-    <h1>Circle Seven Favicon Generator</h1>
-    <p>Right-click each canvas and "Save Image As" to save the favicon files to <code>assets/images/</code></p>
-
-    <div class="favicon-preview">
-        <canvas id="favicon-16" width="16" height="16"></canvas>
-        <p>favicon-16x16.png</p>
-        <button onclick="downloadCanvas('favicon-16', 'favicon-16x16.png')">Download</button>
-    </div>
-
-    <div class="favicon-preview">
-        <canvas id="favicon-32" width="32" height="32"></canvas>
-        <p>favicon-32x32.png</p>
-        <button onclick="downloadCanvas('favicon-32', 'favicon-32x32.png')">Download</button>
-    </div>
-
-    <div class="favicon-preview">
-        <canvas id="favicon-180" width="180" height="180"></canvas>
-        <p>apple-touch-icon.png</p>
-        <button onclick="downloadCanvas('favicon-180', 'apple-touch-icon.png')">Download</button>
-    </div>
-
-    <div class="favicon-preview">
-        <canvas id="favicon-192" width="192" height="192"></canvas>
-        <p>android-chrome-192x192.png</p>
-        <button onclick="downloadCanvas('favicon-192', 'android-chrome-192x192.png')">Download</button>
-    </div>
-
-    <div class="favicon-preview">
-        <canvas id="favicon-512" width="512" height="512"></canvas>
-        <p>android-chrome-512x512.png</p>
-        <button onclick="downloadCanvas('favicon-512', 'android-chrome-512x512.png')">Download</button>
-    </div>
-
-    <script>
-        function drawFavicon(canvasId, size) {
-            const canvas = document.getElementById(canvasId);
-            const ctx = canvas.getContext('2d');
-
-            // Circle background
-            ctx.fillStyle = '#0084b4';
-            ctx.beginPath();
-            ctx.arc(size/2, size/2, size/2 - 2, 0, Math.PI * 2);
-            ctx.fill();
-
-            // Circle border
-            ctx.strokeStyle = '#005580';
-            ctx.lineWidth = 2;
-            ctx.stroke();
-
-            // Number 7
-            ctx.fillStyle = '#ffffff';
-            ctx.font = `bold ${size * 0.6}px Arial, sans-serif`;
-            ctx.textAlign = 'center';
-            ctx.textBaseline = 'middle';
-            ctx.fillText('7', size/2, size/2);
-        }
-
-        function downloadCanvas(canvasId, filename) {
-            const canvas = document.getElementById(canvasId);
-            const link = document.createElement('a');
-            link.download = filename;
-            link.href = canvas.toDataURL('image/png');
-            link.click();
-        }
-
-        // Draw all favicons
-        drawFavicon('favicon-16', 16);
-        drawFavicon('favicon-32', 32);
-        drawFavicon('favicon-180', 180);
-        drawFavicon('favicon-192', 192);
-        drawFavicon('favicon-512', 512);
-    </script>
-</body>
-</html>'''
-
-    output_file = Path('favicon-generator.html')
-    with open(output_file, 'w') as f:
-        f.write(html_content)
-
-    print(f"✓ Created {output_file}")
-    print(f"  Open this file in a browser and click the download buttons")
-    print(f"  Or right-click each canvas and 'Save Image As...'")
-    print(f"  Save the files to: assets/images/")
+import argparse
+import hashlib
+import struct
+
+from utils.files import atomic_write_bytes
+from utils.manifest import REPO_ROOT
+from utils.png import encode, text
+from utils.svg_raster import render, resize
+
+SOURCE_SVG = REPO_ROOT / 'assets' / 'images' / 'favicon.svg'
+IMAGES_DIR = REPO_ROOT / 'assets' / 'images'
+ICO_PATH = REPO_ROOT / 'favicon.ico'
+
+# (filename in assets/images, size, opaque background or None)
+OUTPUTS = (
+    ('favicon-16x16.png', 16, None),
+    ('favicon-32x32.png', 32, None),
+    ('apple-touch-icon.png', 180, (255, 255, 255)),
+    ('android-chrome-192x192.png', 192, None),
+    ('android-chrome-512x512.png', 512, None),
+)
+ICO_SIZES = (16, 32, 48)
+
+# Rendered once at this size and scaled down; at least twice the largest output
+MASTER_SIZE = 1024
+
+# Bump when the rasteriser or output settings change, to regenerate everything
+RENDER_VERSION = 1
+
+# tEXt keyword holding the source hash in every output
+SOURCE_KEY = 'circleseven:favicon-source'
+
+
+def source_hash(svg_bytes):
+    """Hash of the design and everything else that decides the output bytes"""
+    digest = hashlib.sha256(svg_bytes)
+    digest.update(repr((RENDER_VERSION, MASTER_SIZE, OUTPUTS, ICO_SIZES)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def flatten(rows, background):
+    """RGB rows with RGBA pixels composited onto an opaque background"""
+    return [[tuple((c * a + bg * (255 - a)) // 255 for c, bg in zip(pixel[:3], background))
+             for pixel, a in ((p, p[3]) for p in row)] for row in rows]
+
+
+def build_ico(images):
+    """Multi-resolution .ico bytes from (size, png_bytes) pairs"""
+    header = struct.pack('<HHH', 0, 1, len(images))
+    offset = len(header) + 16 * len(images)
+    entries = []
+    for size, data in images:
+        dimension = size if size < 256 else 0
+        entries.append(struct.pack('<BBBBHHII', dimension, dimension, 0, 0, 1, 32, len(data), offset))
+        offset += len(data)
+    return header + b''.join(entries) + b''.join(data for _size, data in images)
+
+
+def ico_first_png(data):
+    """The first PNG entry of an .ico file, or b'' if it has none"""
+    if len(data) < 22 or data[:4] != b'\0\0\1\0':
+        return b''
+    length, offset = struct.unpack_from('<II', data, 6 + 8)
+    return data[offset:offset + length]
+
+
+def recorded_hash(path):
+    """The source hash stored in a generated PNG or .ico, or None"""
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    if path.suffix == '.ico':
+        data = ico_first_png(data)
+    try:
+        return text(data).get(SOURCE_KEY)
+    except ValueError:
+        return None
+
+
+def output_paths():
+    return [IMAGES_DIR / name for name, _size, _background in OUTPUTS] + [ICO_PATH]
+
+
+def generate_favicons(force=False):
+    """Regenerate every output unless all are current; returns the list of files written"""
+    svg_bytes = SOURCE_SVG.read_bytes()
+    digest = source_hash(svg_bytes)
+    if not force and all(recorded_hash(path) == digest for path in output_paths()):
+        return []
+
+    master = render(svg_bytes.decode('utf-8'), MASTER_SIZE)
+    chunks = {SOURCE_KEY: digest}
+    written = []
+
+    def write(path, data):
+        try:
+            if path.read_bytes() == data:
+                return
+        except OSError:
+            pass
+        atomic_write_bytes(path, data)
+        written.append(path)
+
+    for name, size, background in OUTPUTS:
+        rows = resize(master, size).rows()
+        write(IMAGES_DIR / name, encode(flatten(rows, background) if background else rows, chunks))
+
+    write(ICO_PATH, build_ico([(size, encode(resize(master, size).rows(), chunks)) for size in ICO_SIZES]))
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate favicon PNGs and favicon.ico from favicon.svg')
+    parser.add_argument('--force', action='store_true', help='Regenerate even if the outputs are current')
+    args = parser.parse_args()
+
+    written = generate_favicons(force=args.force)
+    if not written:
+        print("✓ Favicons are up to date")
+        return
+    for path in written:
+        print(f"✓ Wrote {path.relative_to(REPO_ROOT)}")
+
 
 if __name__ == '__main__':
-    create_favicon_html()
+    main()
@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Import or resync WordPress posts from a WXR export into _posts/
+
+Builds on FeaturedImageExtractor: the export is streamed one <item> at a
+time, attachments and thumbnails are collected on the way, and every
+published post is handed to a process pool that converts its HTML to
+Markdown as the parse continues, so memory stays flat for any size of
+export.
+
+Conversion follows scripts/html-to-markdown.cjs (simple paragraphs,
+links, emphasis, inline code, plus headings), leaves figures, galleries
+and <pre> blocks as HTML, turns [caption] shortcodes into <figure> with
+<figcaption>, and strips Gutenberg block comments.
+/wp-content/uploads/YYYY/MM/ URLs become Cloudinary delivery URLs for
+MM/filename, the mapping extract-featured-images.py uses for
+featured_image; WordPress's size suffixes (-300x200) and srcset
+attributes are dropped. Categories and tags are mapped onto the names in
+_data/taxonomy.yml by name or slug; unknown ones are kept and reported.
+
+Re-runs are incremental and resumable: .cache/wordpress-import.json maps
+each wp:post_id to its modified date and file. Unchanged posts are not
+converted again, a post whose slug or date changed is renamed, and the
+state is saved every SAVE_INTERVAL posts, so an interrupted import picks
+up where it stopped. An export that hasn't changed since the last
+complete run is not parsed at all. Existing posts that were not imported
+by this script are left alone unless --overwrite-existing is given.
+
+Usage:
+    python3 scripts/import-wordpress.py --xml export.xml [--jobs N] [--force]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from urllib.parse import unquote
+
+from utils.files import atomic_write_text
+from utils.frontmatter import format_key, set_front_matter_key
+from utils.html_tags import rewrite_tags
+from utils.manifest import REPO_ROOT, hash_bytes
+from utils.parallel import stream_in_pool
+from utils.references import site_config
+from utils.taxonomy import Taxonomy, default_slug
+from utils.timing import Instrumentation, add_instrumentation_arguments
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+DEFAULT_STATE_PATH = REPO_ROOT / '.cache' / 'wordpress-import.json'
+STATE_VERSION = 1
+
+# Save the import state after this many posts are written
+SAVE_INTERVAL = 100
+
+# Cloudinary transformations for imported images, as the converted posts use them
+IMAGE_TRANSFORMATION = 'c_limit,w_800,h_800,q_auto,f_auto'
+LINK_TRANSFORMATION = 'q_auto,f_auto'
+
+# WordPress's default category, which the site doesn't use
+UNCATEGORIZED = 'uncategorized'
+
+
+def load_script(name):
+    """Import scripts/<name>.py (hyphenated filenames can't be imported directly)"""
+    module_name = name.replace('-', '_')
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+featured_images = load_script('extract-featured-images')
+WP_NAMESPACES = featured_images.WP_NAMESPACES
+
+UPLOAD_URL_RE = re.compile(r'https?://[^\s"\'()<>]+?/wp-content/uploads/\d{4}/\d{2}/[^\s"\'()<>?#]+')
+SIZE_SUFFIX_RE = re.compile(r'-\d+x\d+(?=\.\w+$)')
+WP_CLASS_RE = re.compile(r'^(?:wp-image-\d+|size-[\w-]+|align\w+)$')
+BLOCK_COMMENT_RE = re.compile(r'<!-- /?wp:.*?-->\n?', re.DOTALL)
+CAPTION_RE = re.compile(r'\[caption[^\]]*\](.*?)\[/caption\]', re.DOTALL)
+CAPTION_MEDIA_RE = re.compile(r'^\s*((?:<a\b[^>]*>\s*)?<img\b[^>]*>(?:\s*</a>)?)(.*)$', re.DOTALL)
+HEADING_RE = re.compile(r'^\s*<h([1-6])>(.*?)</h\1>\s*$')
+
+
+def delivery_url(cloud_name, upload_url, transformation):
+    """Cloudinary delivery URL for a WordPress upload, at its original size"""
+    public_id = featured_images.public_id_from_upload_url(SIZE_SUFFIX_RE.sub('', upload_url))
+    return f'https://res.cloudinary.com/{cloud_name}/image/upload/{transformation}/{public_id}'
+
+
+def is_image(url):
+    # Other uploads (PDFs and the like) weren't migrated to Cloudinary
+    return bool(featured_images.IMAGE_EXTENSION_RE.search(url))
+
+
+def rewrite_uploads(content, cloud_name):
+    """Point <img>, <a> and bare image upload URLs at Cloudinary, dropping WordPress's size variants"""
+
+    def rewrite(tag):
+        if tag.name == 'img':
+            src = tag.get('src', '')
+            if UPLOAD_URL_RE.fullmatch(src):
+                tag.set('src', delivery_url(cloud_name, src, IMAGE_TRANSFORMATION))
+                # The responsive images pass generates a srcset for Cloudinary images
+                tag.remove('srcset')
+                tag.remove('sizes')
+            classes = tag.get('class', '').split()
+            if classes and all(WP_CLASS_RE.match(c) for c in classes):
+                tag.remove('class')
+        else:
+            href = tag.get('href', '')
+            if UPLOAD_URL_RE.fullmatch(href) and is_image(href):
+                tag.set('href', delivery_url(cloud_name, href, LINK_TRANSFORMATION))
+
+    def rewrite_bare(match):
+        url = match.group()
+        return delivery_url(cloud_name, url, LINK_TRANSFORMATION) if is_image(url) else url
+
+    content = rewrite_tags(content, ['img', 'a'], rewrite)
+    return UPLOAD_URL_RE.sub(rewrite_bare, content)
+
+
+def caption_to_figure(match):
+    media = CAPTION_MEDIA_RE.match(match.group(1))
+    if not media:
+        return match.group(1)
+    caption = media.group(2).strip()
+    figcaption = f'<figcaption>{caption}</figcaption>' if caption else ''
+    return f'<figure>{media.group(1).strip()}{figcaption}</figure>'
+
+
+def html_to_markdown(content):
+    """
+    Convert simple HTML in a post body to Markdown, line by line.
+
+    The rules of scripts/html-to-markdown.cjs, plus whole-line headings.
+    Lines inside <figure>, <pre>, gallery <div>s and code fences are kept.
+    """
+    converted = []
+    inside = None
+    for line in content.split('\n'):
+        if inside is None:
+            if '<div class="gallery">' in line:
+                inside = '</div>'
+            elif '<figure>' in line and '</figure>' not in line:
+                inside = '</figure>'
+            elif '<pre' in line and '</pre>' not in line:
+                inside = '</pre>'
+            elif line.strip().startswith('```'):
+                inside = '```'
+                converted.append(line)
+                continue
+        if inside is not None or '<figure>' in line or '<pre' in line:
+            if inside is not None and inside in line:
+                inside = None
+            converted.append(line)
+            continue
+
+        heading = HEADING_RE.match(line)
+        if heading:
+            line = '#' * int(heading.group(1)) + ' ' + heading.group(2).strip()
+        line = re.sub(r'<p>(.*?)</p>', r'\1', line)
+        line = re.sub(r'<a\s+href="([^"]+)"\s+target="_blank"[^>]*>(.*?)</a>', r'[\2](\1){:target="_blank"}', line)
+        line = re.sub(r'<a\s+href="([^"]+)"[^>]*>(.*?)</a>', r'[\2](\1)', line)
+        line = re.sub(r'<(?:em|i)>(.*?)</(?:em|i)>', r'*\1*', line)
+        line = re.sub(r'<(?:strong|b)>(.*?)</(?:strong|b)>', r'**\1**', line)
+        line = re.sub(r'<code>(.*?)</code>', r'`\1`', line)
+        converted.append(line.rstrip())
+    return '\n'.join(converted)
+
+
+def convert_content(content, cloud_name):
+    """Markdown body for a WordPress post's content:encoded HTML"""
+    content = content.replace('\r\n', '\n')
+    content = BLOCK_COMMENT_RE.sub('', content)
+    content = CAPTION_RE.sub(caption_to_figure, content)
+    content = rewrite_uploads(content, cloud_name)
+    content = html_to_markdown(content)
+    content = re.sub(r'\n{3,}', '\n\n', content).strip()
+    return content + '\n' if content else ''
+
+
+def _text(item, path):
+    element = item.find(path, WP_NAMESPACES)
+    return (element.text or '') if element is not None else ''
+
+
+def post_record(item):
+    """Plain-data record of a WXR post <item> (picklable for the pool), or None for other types"""
+    if _text(item, 'wp:post_type') != 'post':
+        return None
+
+    thumbnail_id = None
+    for postmeta in item.findall('wp:postmeta', WP_NAMESPACES):
+        if _text(postmeta, 'wp:meta_key') == '_thumbnail_id':
+            thumbnail_id = _text(postmeta, 'wp:meta_value') or None
+
+    terms = {'category': [], 'post_tag': []}
+    for term in item.findall('category'):
+        if term.get('domain') in terms:
+            terms[term.get('domain')].append(((term.text or '').strip(), term.get('nicename', '')))
+
+    date = _text(item, 'wp:post_date_gmt')
+    if not date or date.startswith('0000'):
+        date = _text(item, 'wp:post_date')
+    modified = _text(item, 'wp:post_modified_gmt')
+    if not modified or modified.startswith('0000'):
+        modified = _text(item, 'wp:post_modified') or date
+
+    title = _text(item, 'title').strip()
+    return {
+        'post_id': _text(item, 'wp:post_id'),
+        'status': _text(item, 'wp:status'),
+        'title': title,
+        'slug': unquote(_text(item, 'wp:post_name')) or default_slug(title),
+        'date': date,
+        'modified': modified,
+        'content': _text(item, 'content:encoded'),
+        'categories': terms['category'],
+        'tags': terms['post_tag'],
+        'thumbnail_id': thumbnail_id
+    }
+
+
+class WordPressImporter(featured_images.FeaturedImageExtractor):
+    """Streams a WXR export into complete _posts/ files, incrementally"""
+
+    def __init__(self, xml_path, posts_dir='_posts', site_dir='.', state_path=DEFAULT_STATE_PATH,
+                 jobs=1, force=False, overwrite_existing=False, timer=None):
+        super().__init__(xml_path, posts_dir, jobs=jobs, timer=timer)
+        self.site_dir = Path(site_dir)
+        self.state_path = Path(state_path)
+        self.force = force
+        self.overwrite_existing = overwrite_existing
+        self.cloud_name = site_config(self.site_dir).get('cloudinary_cloud_name', 'circleseven')
+        self.taxonomy = Taxonomy.load(self.site_dir)
+        self.state = {'version': STATE_VERSION, 'export': None, 'posts': {}}
+        self.late_featured = []  # (post_id, thumbnail_id) whose attachment came later in the export
+        self.unmapped_categories = set()
+        self.unmapped_tags = set()
+        self.stats = {
+            'posts_seen': 0,
+            'posts_created': 0,
+            'posts_updated': 0,
+            'posts_renamed': 0,
+            'posts_unchanged': 0,
+            'posts_unpublished': 0,
+            'posts_existing': 0,
+            'featured_images': 0
+        }
+        self.load_state()
+
+    def load_state(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == STATE_VERSION:
+            self.state = data
+
+    def save_state(self):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.state_path, json.dumps(self.state, indent=1, sort_keys=True))
+
+    def export_fingerprint(self):
+        st = os.stat(self.xml_path)
+        return hash_bytes(f"{Path(self.xml_path).name}:{st.st_size}:{st.st_mtime_ns}")
+
+    def filename(self, record):
+        return f"{record['date'][:10]}-{record['slug']}.md"
+
+    def map_terms(self, terms, lookup, unmapped):
+        names = []
+        for name, slug in terms:
+            if not name or slug == UNCATEGORIZED:
+                continue
+            known = lookup(name, slug)
+            if known is None:
+                unmapped.add(name)
+            mapped = known or name
+            if mapped not in names:
+                names.append(mapped)
+        return names
+
+    def featured_image(self, thumbnail_id):
+        url = self.attachments.get(thumbnail_id) if thumbnail_id else None
+        return featured_images.public_id_from_upload_url(url) if url else None
+
+    def render_post(self, record, body):
+        """Complete post file text: front matter in the site's key order, then the body"""
+        lines = ['---', 'layout: post', format_key('title', record['title']), f"date: {record['date']} +0000"]
+        categories = self.map_terms(record['categories'], self.taxonomy.category_name, self.unmapped_categories)
+        tags = self.map_terms(record['tags'], self.taxonomy.tag_name, self.unmapped_tags)
+        if categories:
+            lines.append(format_key('categories', categories))
+        if tags:
+            lines.append(format_key('tags', tags))
+        featured = self.featured_image(record['thumbnail_id'])
+        if featured:
+            lines.append(format_key('featured_image', featured))
+        elif record['thumbnail_id']:
+            self.late_featured.append((record['post_id'], record['thumbnail_id']))
+        lines.append('---')
+        return '\n'.join(lines) + '\n' + body
+
+    def pending_records(self):
+        """Records of published posts that need converting, collecting attachments on the way"""
+        for item in self.iter_items():
+            self.handle_item(item)
+            record = post_record(item)
+            if record is None:
+                continue
+            self.stats['posts_seen'] += 1
+            if record['status'] != 'publish':
+                self.stats['posts_unpublished'] += 1
+                continue
+
+            entry = self.state['posts'].get(record['post_id'])
+            target = self.posts_dir / self.filename(record)
+            if (entry and not self.force and entry['modified'] == record['modified']
+                    and entry['file'] == target.name and target.exists()):
+                self.stats['posts_unchanged'] += 1
+                if record['thumbnail_id'] and not entry.get('featured'):
+                    self.late_featured.append((record['post_id'], record['thumbnail_id']))
+                continue
+            if not entry and target.exists() and not self.overwrite_existing:
+                self.stats['posts_existing'] += 1
+                continue
+            yield record
+
+    def write_post(self, record, body):
+        post_id = record['post_id']
+        target = self.posts_dir / self.filename(record)
+        entry = self.state['posts'].get(post_id)
+
+        if entry and entry['file'] != target.name:
+            old = self.posts_dir / entry['file']
+            if old.exists():
+                old.unlink()
+                self.stats['posts_renamed'] += 1
+
+        text = self.render_post(record, body)
+        existed = target.exists()
+        if not existed or target.read_text(encoding='utf-8') != text:
+            atomic_write_text(target, text)
+            self.stats['posts_updated' if existed else 'posts_created'] += 1
+            print(f"✓ {'Updated' if existed else 'Imported'}: {target.name}")
+
+        featured = self.featured_image(record['thumbnail_id'])
+        self.state['posts'][post_id] = {'modified': record['modified'], 'file': target.name, 'featured': featured}
+        if featured:
+            self.stats['featured_images'] += 1
+
+    def add_late_featured_images(self):
+        """Set featured_image on posts whose attachment came after them in the export"""
+        for post_id, thumbnail_id in self.late_featured:
+            entry = self.state['posts'].get(post_id)
+            featured = self.featured_image(thumbnail_id)
+            if not entry or not featured:
+                continue
+            path = self.posts_dir / entry['file']
+            text = path.read_text(encoding='utf-8')
+            atomic_write_text(path, set_front_matter_key(text, 'featured_image', featured))
+            entry['featured'] = featured
+            self.stats['featured_images'] += 1
+
+    def run(self):
+        """Import every new or modified published post; returns stats"""
+        fingerprint = self.export_fingerprint()
+        if self.state.get('export') == fingerprint and not (self.force or self.overwrite_existing):
+            print("✓ Export unchanged since the last import; nothing to do")
+            self.stats['export_unchanged'] = True
+            return self.stats
+
+        self.posts_dir.mkdir(parents=True, exist_ok=True)
+        written = 0
+        try:
+            with self.timer.phase('import'):
+                converted = stream_in_pool(_convert_worker, self.pending_records(), jobs=self.jobs,
+                                           initializer=_init_worker, initargs=(self.cloud_name,))
+                for record, body in converted:
+                    self.write_post(record, body)
+                    written += 1
+                    if written % SAVE_INTERVAL == 0:
+                        self.save_state()
+            with self.timer.phase('featured'):
+                self.add_late_featured_images()
+            self.state['export'] = fingerprint
+        finally:
+            self.save_state()
+
+        self.stats['unmapped_categories'] = sorted(self.unmapped_categories)
+        self.stats['unmapped_tags'] = sorted(self.unmapped_tags)
+        return self.stats
+
+
+# Cloudinary cloud name used by _convert_worker; set once per worker process
+_worker_cloud_name = None
+
+
+def _init_worker(cloud_name):
+    global _worker_cloud_name
+    _worker_cloud_name = cloud_name
+
+
+def _convert_worker(record):
+    return convert_content(record['content'], _worker_cloud_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import WordPress posts from a WXR export into _posts/')
+    parser.add_argument('--xml', required=True, help='Path to WordPress XML export')
+    parser.add_argument('--posts-dir', default=str(REPO_ROOT / '_posts'), help='Path to Jekyll posts directory')
+    parser.add_argument('--site-dir', default=str(REPO_ROOT), help='Jekyll site root (for _config.yml and taxonomy)')
+    parser.add_argument('--state', default=str(DEFAULT_STATE_PATH), help='Path to the import state file')
+    parser.add_argument('--force', action='store_true', help='Convert every published post again')
+    parser.add_argument('--overwrite-existing', action='store_true',
+                        help='Replace posts in _posts/ that this script did not create')
+    parser.add_argument('--jobs', type=int, default=1, metavar='N',
+                        help='Number of worker processes (0 = one per CPU)')
+    add_instrumentation_arguments(parser)
+    args = parser.parse_args()
+
+    run = Instrumentation.from_args('import-wordpress', args)
+    importer = WordPressImporter(args.xml, args.posts_dir, args.site_dir, args.state, jobs=args.jobs,
+                                 force=args.force, overwrite_existing=args.overwrite_existing, timer=run.timer)
+    with run:
+        stats = importer.run()
+    run.write(stats)
+    if stats.get('export_unchanged'):
+        return
+
+    print(f"\n📊 Summary:")
+    print(f"   Posts in export: {stats['posts_seen']} ({stats['posts_unpublished']} not published)")
+    print(f"   Imported: {stats['posts_created']}, updated: {stats['posts_updated']}, renamed: {stats['posts_renamed']}")
+    print(f"   Unchanged since last import: {stats['posts_unchanged']}")
+    if stats['posts_existing']:
+        print(f"   ⚠ Skipped {stats['posts_existing']} posts that already exist (use --overwrite-existing)")
+    print(f"   Featured images set: {stats['featured_images']}")
+    for kind in ('categories', 'tags'):
+        unmapped = stats.get(f'unmapped_{kind}')
+        if unmapped:
+            print(f"   ⚠ {kind.capitalize()} not in _data/taxonomy.yml: {', '.join(unmapped)}")
+
+
+if __name__ == '__main__':
+    main()
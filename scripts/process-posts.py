@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Run several per-post passes in one read of the archive
+
+Each post is read and parsed once (utils/pipeline.py), every selected
+pass runs over the same in-memory copy, and the file is written at most
+once. Available passes, in the order they run:
+
+- featured-image: featured_image from a WordPress export (extract-featured-images.py);
+  only runs with --xml
+- lazy-loading: loading/decoding/fetchpriority on images (add-lazy-loading.py);
+  after featured-image, since a featured image takes the first image's priority
+- references: Cloudinary public_ids into the reference index the auditor
+  reads (.cache/cloudinary-references.json), so it has nothing left to
+  rescan in _posts/
+
+Passes share the post manifest with the standalone scripts, so a post
+cleared here is skipped there and vice versa. Use --force to rerun every
+pass on every post. --watch keeps running and reruns the passes on each
+post as it is saved.
+
+Usage:
+    python3 scripts/process-posts.py [--passes lazy-loading,references] [--xml export.xml] [--jobs N] [--watch]
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+import yaml
+
+from utils.manifest import REPO_ROOT, PostManifest
+from utils.pipeline import PostPass, PostPipeline
+from utils.references import DEFAULT_INDEX_PATH, ReferenceIndex
+from utils.watch import watch_posts
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+POSTS_DIR = REPO_ROOT / '_posts'
+
+
+def load_script(name):
+    """Import scripts/<name>.py (hyphenated filenames can't be imported directly)"""
+    module_name = name.replace('-', '_')
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+lazy_loading = load_script('add-lazy-loading')
+featured_images = load_script('extract-featured-images')
+
+
+class LazyLoadingPass(PostPass):
+    label = 'lazy-loading'
+    name = lazy_loading.PASS_NAME
+
+    def apply(self, post):
+        try:
+            featured = lazy_loading.shows_featured_image(post.front_matter)
+        except yaml.YAMLError:
+            featured = False
+        original = post.text
+        post.text, images = lazy_loading.rewrite_images(original, post.body_start, featured)
+        changed = post.text != original
+        if changed:
+            post.messages.append(f"✅ Lazy loading: {post.path.name}")
+        return {'posts_with_images': 1 if images else 0, 'posts_updated': 1 if images and changed else 0}
+
+
+class FeaturedImagePass(PostPass):
+    label = 'featured-image'
+    ready = False
+
+    def __init__(self, xml_path, posts_dir):
+        self.extractor = featured_images.FeaturedImageExtractor(xml_path, posts_dir)
+        self.name = self.extractor.pass_name()
+        self.parsed = None  # (mtime, size) of the export when it was last parsed
+
+    def prepare(self, paths):
+        # --watch prepares on every batch; only reparse the export if it changed
+        st = os.stat(self.extractor.xml_path)
+        if self.parsed != (st.st_mtime_ns, st.st_size):
+            self.extractor.attachments = {}
+            self.extractor.post_thumbnails = {}
+            self.extractor.parse_xml()
+            self.name = self.extractor.pass_name()
+            self.parsed = (st.st_mtime_ns, st.st_size)
+        self.ready = True
+
+    def apply(self, post):
+        front_matter = post.front_matter
+        public_id = self.extractor.featured_image_for(post.path, front_matter) if front_matter else None
+        if not public_id:
+            return {'posts_updated': 0}
+        post.set_front_matter_key('featured_image', public_id)
+        post.messages.append(f"✓ Featured image: {post.path.name} -> {public_id}")
+        return {'posts_updated': 1}
+
+
+class ReferencesPass(PostPass):
+    """Feeds the auditor's reference index; tracked by the index's own mtimes, not the manifest"""
+
+    label = 'references'
+    name = 'references/1'
+
+    def __init__(self, posts_dir=POSTS_DIR, index_path=DEFAULT_INDEX_PATH, force=False):
+        self.posts_dir = Path(posts_dir)
+        self.site_dir = self.posts_dir.parent
+        self.index = ReferenceIndex(self.site_dir, path=index_path)
+        self.extractor = self.index.extractor
+        self.force = force
+        self.changed = False
+
+    def rel(self, path):
+        return Path(path).resolve().relative_to(self.site_dir.resolve()).as_posix()
+
+    def needs(self, path, manifest):
+        return self.force or not self.index.is_current(self.rel(path), path)
+
+    def apply(self, post):
+        post.results[self.label] = sorted(self.extractor.extract(post.text))
+        return {'posts_indexed': 1}
+
+    def collect(self, path, result):
+        self.index.record(self.rel(path), path, result or [])
+        self.changed = True
+
+    def finish(self):
+        prefix = self.rel(self.posts_dir) + '/'
+        live = {self.rel(path) for path in self.posts_dir.glob('*.md')}
+        for rel in [r for r in self.index.files if r.startswith(prefix) and r not in live]:
+            self.index.remove(rel)
+            self.changed = True
+        if self.changed:
+            self.index.save()
+
+
+PASSES = ('featured-image', 'lazy-loading', 'references')
+
+
+def build_passes(names, xml_path=None, posts_dir=POSTS_DIR, index_path=DEFAULT_INDEX_PATH, force=False):
+    """Pass instances for the selected names, in pipeline order"""
+    passes = []
+    for name in PASSES:
+        if name not in names:
+            continue
+        if name == 'lazy-loading':
+            passes.append(LazyLoadingPass())
+        elif name == 'featured-image':
+            if xml_path:
+                passes.append(FeaturedImagePass(xml_path, posts_dir))
+        else:
+            passes.append(ReferencesPass(posts_dir, index_path, force=force))
+    return passes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run per-post passes in one read of the archive')
+    parser.add_argument('--passes', default=','.join(PASSES),
+                        help=f'Comma-separated passes to run (default: {",".join(PASSES)})')
+    parser.add_argument('--xml', help='WordPress export for the featured-image pass (skipped without it)')
+    parser.add_argument('--posts-dir', default=str(POSTS_DIR), help='Path to Jekyll posts directory')
+    parser.add_argument('--reference-index', default=str(DEFAULT_INDEX_PATH),
+                        help='Reference index file the references pass updates')
+    parser.add_argument('--force', action='store_true',
+                        help='Ignore the post manifest and run every pass on every post')
+    parser.add_argument('--jobs', type=int, default=1, metavar='N',
+                        help='Number of worker processes (0 = one per CPU)')
+    parser.add_argument('--watch', action='store_true',
+                        help='After the first run, keep processing posts as they are saved')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.passes.split(',') if name.strip()]
+    unknown = [name for name in names if name not in PASSES]
+    if unknown:
+        parser.error(f"unknown pass(es): {', '.join(unknown)} (choose from {', '.join(PASSES)})")
+
+    passes = build_passes(names, xml_path=args.xml, posts_dir=args.posts_dir,
+                          index_path=Path(args.reference_index), force=args.force)
+    manifest = PostManifest(enabled=not args.force)
+    stats = PostPipeline(passes, manifest=manifest, jobs=args.jobs).run(args.posts_dir)
+
+    print(f"\n📊 Summary:")
+    print(f"   Posts read: {stats['posts_read']} of {stats['posts_total']} (others unchanged since last run)")
+    print(f"   Posts written: {stats['posts_written']}")
+    for label, pass_stats in stats['passes'].items():
+        details = ', '.join(f"{key.replace('_', ' ')}: {value}" for key, value in sorted(pass_stats.items()))
+        print(f"   {label}: {details or 'nothing to do'}")
+    if stats['errors']:
+        print(f"   ⚠️  Errors: {len(stats['errors'])} (retried next run)")
+
+    if args.watch:
+        watch_posts(args.posts_dir, lambda paths: PostPipeline(passes, manifest=manifest).run(args.posts_dir, paths))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+"""
+Shared helpers for the Python maintenance scripts in scripts/.
+
+Scripts are run directly (python3 scripts/<name>.py), which puts this
+directory on sys.path, so modules are imported as `from utils import ...`.
+"""
@@ -0,0 +1,47 @@
+"""
+Minimal Cloudinary Admin API client
+
+Implements just the listing calls the scripts need, over the shared
+keep-alive pool in http_pool.py, so listing the library concurrently does
+not need the cloudinary SDK. resources() takes the same parameters and
+returns the same shape as cloudinary.api.resources.
+"""
+
+import base64
+from urllib.parse import quote, urlencode
+
+from .http_pool import HTTPPool
+
+API_BASE_URL = 'https://api.cloudinary.com'
+
+
+class CloudinaryAdminClient:
+    """Admin API calls for one cloud, authenticated with an API key and secret"""
+
+    def __init__(self, cloud_name, api_key, api_secret, base_url=API_BASE_URL, pool=None):
+        self.cloud_name = cloud_name
+        self.base_url = base_url.rstrip('/')
+        self.pool = pool or HTTPPool()
+        token = base64.b64encode(f'{api_key}:{api_secret}'.encode('utf-8')).decode('ascii')
+        self.auth_headers = {'Authorization': f'Basic {token}'}
+
+    def _get(self, path, params=None):
+        url = f'{self.base_url}/v1_1/{quote(self.cloud_name)}/{path}'
+        if params:
+            url += '?' + urlencode({k: v for k, v in params.items() if v is not None})
+        return self.pool.get(url, headers=self.auth_headers).raise_for_status().json()
+
+    def resources(self, type='upload', resource_type='image', **params):
+        """One page of the resource listing (prefix, start_at, direction, next_cursor, max_results)"""
+        return self._get(f'resources/{resource_type}/{type}', params)
+
+    def root_folders(self):
+        """Names of all top-level folders"""
+        folders = []
+        cursor = None
+        while True:
+            result = self._get('folders', {'max_results': 500, 'next_cursor': cursor})
+            folders.extend(f['path'] for f in result.get('folders', []))
+            cursor = result.get('next_cursor')
+            if not cursor:
+                return folders
@@ -0,0 +1,255 @@
+"""
+Persistent manifest of the assets in a Cloudinary media library
+
+Caches each upload's public_id with its created_at, bytes, format and
+dimensions in .cache/cloudinary-assets.json, so audits don't have to page
+through the whole library every run:
+
+- An incremental sync asks only for assets created since the newest one
+  already cached (start_at, oldest first).
+- A full sync re-lists everything, which also drops deleted assets. It runs
+  when asked for, when there is no cache, or when the last full sync is
+  older than the cache's max age. If it is interrupted, the cursors and
+  partial listing are saved and the next full sync resumes from there.
+- With no API at all, the cached listing can be used as-is (offline audit).
+
+When every cached asset lives in a folder (the library uses MM/filename
+month folders) and the API can list folders, a full sync lists each
+top-level folder prefix concurrently instead of paging through the whole
+library one cursor at a time, plus one shard of everything created since
+the newest cached asset, which catches new root-level uploads the folder
+listings miss. Otherwise, including the very first sync, it falls back to
+a single sequential listing.
+
+The API object needs a resources(**params) method with the semantics of
+cloudinary.api.resources, and optionally root_folders() for sharding.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+from .files import atomic_write_text
+from .manifest import REPO_ROOT
+
+DEFAULT_CACHE_PATH = REPO_ROOT / '.cache' / 'cloudinary-assets.json'
+CACHE_VERSION = 1
+PAGE_SIZE = 500
+
+# Force a full resync (to notice deletions) once the last one is this old
+DEFAULT_MAX_AGE_DAYS = 7
+
+# Concurrent folder listings during a sharded full sync
+DEFAULT_WORKERS = 8
+
+# Resume state for a shard that has been listed completely
+SHARD_DONE = 'done'
+
+# Shard key prefix for "created since <created_at>" (folder shards end in '/')
+SINCE_SHARD = 'since:'
+
+# Fields kept per asset
+ASSET_FIELDS = ('created_at', 'bytes', 'format', 'width', 'height')
+
+
+def compact_asset(resource):
+    """Reduce an API resource dict to the fields the cache keeps"""
+    return {field: resource[field] for field in ASSET_FIELDS if field in resource}
+
+
+class CloudinaryAssetCache:
+    """Local copy of a Cloudinary upload listing, kept current incrementally"""
+
+    def __init__(self, cloud_name, path=DEFAULT_CACHE_PATH, max_age_days=DEFAULT_MAX_AGE_DAYS,
+                 workers=DEFAULT_WORKERS):
+        self.cloud_name = cloud_name
+        self.path = path
+        self.max_age_days = max_age_days
+        self.workers = workers
+        self.assets = {}
+        self.full_synced_at = None
+        # {'shards': {prefix: cursor or SHARD_DONE}, 'assets': {...}} for an interrupted full sync
+        self.resume = None
+        self.loaded = False
+        self.stats = {
+            'api_calls': 0,
+            'assets_fetched': 0,
+            'shards': 0,
+            'sync_mode': None
+        }
+        self._stats_lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Load the cache from disk if it exists and matches this cloud"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get('version') != CACHE_VERSION or data.get('cloud_name') != self.cloud_name:
+            return
+
+        self.assets = data.get('assets', {})
+        self.full_synced_at = data.get('full_synced_at')
+        self.resume = data.get('resume')
+        self.loaded = True
+
+    def save(self):
+        """Write the cache back to disk"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.path, json.dumps({
+            'version': CACHE_VERSION,
+            'cloud_name': self.cloud_name,
+            'full_synced_at': self.full_synced_at,
+            'resume': self.resume,
+            'assets': self.assets
+        }, separators=(',', ':'), sort_keys=True))
+
+    @property
+    def newest_created_at(self):
+        """created_at of the newest cached asset, or None if the cache is empty"""
+        return max((a.get('created_at', '') for a in self.assets.values()), default=None) or None
+
+    def needs_full_sync(self):
+        """True if there is no completed full listing or it is too old"""
+        if not self.loaded or self.full_synced_at is None or self.resume:
+            return True
+        age_days = (time.time() - self.full_synced_at) / 86400
+        return age_days > self.max_age_days
+
+    def sync(self, api, full=False):
+        """
+        Bring the cache up to date using api, then save it.
+
+        Returns the number of assets received from the API.
+        """
+        if full or self.needs_full_sync():
+            self.stats['sync_mode'] = 'full'
+            fetched = self._full_sync(api)
+        else:
+            self.stats['sync_mode'] = 'incremental'
+            fetched = self._incremental_sync(api)
+
+        self.stats['assets_fetched'] += fetched
+        self.save()
+        return fetched
+
+    def _pages(self, api, params, cursor=None):
+        """Yield (resources, next_cursor) for each page of a listing"""
+        while True:
+            page_params = dict(params, type='upload', max_results=PAGE_SIZE)
+            if cursor:
+                page_params['next_cursor'] = cursor
+
+            result = api.resources(**page_params)
+            with self._stats_lock:
+                self.stats['api_calls'] += 1
+            cursor = result.get('next_cursor')
+            yield result.get('resources', []), cursor
+
+            if not cursor:
+                return
+
+    def _shard_prefixes(self, api):
+        """
+        Folder prefixes to list concurrently, or [''] for one sequential listing.
+
+        Sharding by folder only covers assets inside folders, so it is used
+        only once a previous listing has shown there are no root-level
+        assets. Root-level uploads made since then are newer than every
+        cached asset, so a SINCE_SHARD listing by creation date finds them.
+        """
+        if self.workers <= 1 or not hasattr(api, 'root_folders'):
+            return ['']
+        if not self.assets or any('/' not in public_id for public_id in self.assets):
+            return ['']
+
+        folders = api.root_folders()
+        with self._stats_lock:
+            self.stats['api_calls'] += 1
+        if not folders:
+            return ['']
+        return [f'{folder}/' for folder in sorted(folders)] + [f'{SINCE_SHARD}{self.newest_created_at}']
+
+    def _list_shard(self, api, prefix, cursor):
+        """
+        List one prefix from cursor to the end.
+
+        Returns (assets, state, error): state is SHARD_DONE, or the cursor
+        to resume from if the listing failed part way.
+        """
+        found = {}
+        if prefix.startswith(SINCE_SHARD):
+            params = {'start_at': prefix[len(SINCE_SHARD):], 'direction': 'asc'}
+        else:
+            params = {'prefix': prefix} if prefix else {}
+        try:
+            for resources, next_cursor in self._pages(api, params, cursor):
+                for resource in resources:
+                    found[resource['public_id']] = compact_asset(resource)
+                cursor = next_cursor
+        except Exception as e:
+            return found, cursor, e
+        return found, SHARD_DONE, None
+
+    def _full_sync(self, api):
+        """List the whole library, resuming an interrupted listing if there is one"""
+        resume = self.resume or {}
+        listing = dict(resume.get('assets', {}))
+        shards = dict(resume.get('shards') or {p: None for p in self._shard_prefixes(api)})
+        todo = {p: c for p, c in shards.items() if c != SHARD_DONE}
+        self.stats['shards'] = len(shards)
+        fetched = 0
+        errors = []
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(todo)))) as pool:
+                futures = {
+                    pool.submit(self._list_shard, api, prefix, cursor): prefix
+                    for prefix, cursor in todo.items()
+                }
+                for future in as_completed(futures):
+                    found, state, error = future.result()
+                    listing.update(found)
+                    fetched += len(found)
+                    shards[futures[future]] = state
+                    if error:
+                        errors.append(error)
+        finally:
+            if errors or any(state != SHARD_DONE for state in shards.values()):
+                # Keep what we have so the next full sync carries on from here
+                self.resume = {'shards': shards, 'assets': listing}
+                self.save()
+
+        if errors:
+            raise errors[0]
+
+        self.assets = listing
+        self.resume = None
+        self.full_synced_at = time.time()
+        self.loaded = True
+        return fetched
+
+    def _incremental_sync(self, api):
+        """Fetch only assets created since the newest cached one"""
+        start_at = self.newest_created_at
+        if start_at is None:
+            return self._full_sync(api)
+
+        fetched = 0
+        for resources, _cursor in self._pages(api, {'start_at': start_at, 'direction': 'asc'}):
+            for resource in resources:
+                self.assets[resource['public_id']] = compact_asset(resource)
+            fetched += len(resources)
+        return fetched
+
+    def describe(self):
+        """One-line description of the cache state for log output"""
+        if self.full_synced_at is None:
+            return f"{len(self.assets)} cached assets (never fully synced)"
+        synced = datetime.fromtimestamp(self.full_synced_at, timezone.utc).strftime('%Y-%m-%d %H:%M UTC')
+        return f"{len(self.assets)} cached assets (last full sync {synced})"
@@ -0,0 +1,131 @@
+"""
+Check Cloudinary images exist by HEAD-requesting their delivery URLs
+
+An alternative to listing the library through the Admin API: needs no
+credentials, and only costs one small request per image that actually has
+to be checked. Requests run concurrently over the keep-alive pool in
+http_pool.py.
+
+Results are cached in .cache/cloudinary-head-checks.json. An image seen to
+exist is trusted until its entry is older than the TTL; images that were
+missing, failed to check or are new are always re-checked, so a run only
+touches the references that could have changed.
+"""
+
+import http.client
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from .files import atomic_write_text
+from .http_pool import HTTPPool
+from .manifest import REPO_ROOT
+
+DEFAULT_CACHE_PATH = REPO_ROOT / '.cache' / 'cloudinary-head-checks.json'
+DELIVERY_BASE_URL = 'https://res.cloudinary.com'
+DEFAULT_TTL_DAYS = 7
+DEFAULT_WORKERS = 16
+CACHE_VERSION = 1
+
+PRESENT = 'present'
+MISSING = 'missing'
+ERROR = 'error'
+
+
+class DeliveryChecker:
+    """Concurrent, cached HEAD checks of Cloudinary delivery URLs"""
+
+    def __init__(self, cloud_name, cache_path=DEFAULT_CACHE_PATH, ttl_days=DEFAULT_TTL_DAYS,
+                 workers=DEFAULT_WORKERS, base_url=DELIVERY_BASE_URL, pool=None):
+        self.cloud_name = cloud_name
+        self.cache_path = cache_path
+        self.ttl = ttl_days * 86400
+        self.workers = workers
+        self.base_url = base_url.rstrip('/')
+        self.pool = pool or HTTPPool(max_per_host=workers)
+        self.results = {}  # public_id -> {'status': ..., 'checked_at': ...}
+        self.stats = {
+            'checked': 0,
+            'cached': 0,
+            'present': 0,
+            'missing': 0,
+            'errors': 0
+        }
+        self.load()
+
+    def load(self):
+        """Load cached results if they belong to this cloud"""
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == CACHE_VERSION and data.get('cloud_name') == self.cloud_name:
+            self.results = data.get('results', {})
+
+    def save(self):
+        """Write cached results to disk"""
+        if not self.cache_path:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.cache_path, json.dumps({
+            'version': CACHE_VERSION,
+            'cloud_name': self.cloud_name,
+            'results': self.results
+        }, separators=(',', ':'), sort_keys=True))
+
+    def url_for(self, public_id):
+        """Untransformed delivery URL for a public_id"""
+        return f'{self.base_url}/{quote(self.cloud_name)}/image/upload/{quote(public_id, safe="/")}'
+
+    def needs_check(self, public_id, now):
+        """True unless the image was seen to exist within the TTL"""
+        result = self.results.get(public_id)
+        if not result or result['status'] != PRESENT:
+            return True
+        return now - result['checked_at'] > self.ttl
+
+    def _head(self, public_id):
+        try:
+            status = self.pool.head(self.url_for(public_id)).status
+        except (OSError, http.client.HTTPException):
+            return ERROR
+        if 200 <= status < 300:
+            return PRESENT
+        if status in (404, 410):
+            return MISSING
+        return ERROR
+
+    def check(self, public_ids):
+        """
+        Return {public_id: PRESENT | MISSING | ERROR} for public_ids.
+
+        Only IDs without a fresh PRESENT result are requested; errors are
+        reported but not cached.
+        """
+        now = time.time()
+        public_ids = sorted(set(public_ids))
+        todo = [p for p in public_ids if self.needs_check(p, now)]
+        self.stats['cached'] += len(public_ids) - len(todo)
+
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            for public_id, status in zip(todo, executor.map(self._head, todo)):
+                self.stats['checked'] += 1
+                if status == ERROR:
+                    self.results.pop(public_id, None)
+                    self.stats['errors'] += 1
+                    continue
+                self.results[public_id] = {'status': status, 'checked_at': now}
+
+        self.save()
+
+        statuses = {}
+        for public_id in public_ids:
+            result = self.results.get(public_id)
+            statuses[public_id] = result['status'] if result else ERROR
+        self.stats['present'] = sum(1 for s in statuses.values() if s == PRESENT)
+        self.stats['missing'] = sum(1 for s in statuses.values() if s == MISSING)
+        return statuses
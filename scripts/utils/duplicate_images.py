@@ -0,0 +1,194 @@
+"""
+Find near-duplicate images in a Cloudinary library by perceptual hash
+
+Each image is hashed from a THUMBNAIL_SIZE greyscale PNG thumbnail that
+Cloudinary renders on the fly, so only a few hundred bytes are fetched
+per image, or from a local copy of the image when a local directory is
+given (PNG always; other formats when Pillow is installed).
+
+Hashes are cached in .cache/image-hashes.json per public_id, with the
+asset's created_at and bytes from the library listing, so an image is
+only fetched again when it is re-uploaded. Fetches run concurrently over
+the pooled HTTP client, decoding and hashing can use a process pool
+with --jobs, and the clusters are found through a multi-index
+hash table (utils/image_hash.py).
+
+Two images are near-duplicates when their pHashes are within
+DEFAULT_DISTANCE bits and their dHashes agree too (within
+DHASH_DISTANCE), which keeps different photos with similar layouts
+apart.
+"""
+
+import http.client
+import json
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from urllib.parse import quote
+
+from .delivery_check import DELIVERY_BASE_URL
+from .files import atomic_write_text
+from .http_pool import HTTPPool
+from .image_hash import clusters, hamming, image_hashes
+from .manifest import REPO_ROOT
+from .parallel import run_in_pool
+from .png import decode
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DEFAULT_CACHE_PATH = REPO_ROOT / '.cache' / 'image-hashes.json'
+DEFAULT_WORKERS = 16
+DEFAULT_DISTANCE = 6
+DHASH_DISTANCE = 10
+THUMBNAIL_SIZE = 32
+
+# Bump when the hash functions or thumbnail change, to rehash every image
+HASH_VERSION = 1
+
+LOCAL_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+
+
+def thumbnail_transformation():
+    # Squashing to a square is fine: both hashes ignore the aspect ratio
+    return f'c_scale,w_{THUMBNAIL_SIZE},h_{THUMBNAIL_SIZE},e_grayscale,f_png'
+
+
+def hash_image(data):
+    """Hashes of an image file's bytes; runs in a worker process with --jobs"""
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        _width, _height, rows = decode(data)
+        return image_hashes(rows)
+    if Image is None:
+        raise ValueError('not a PNG, and Pillow is not installed to read it')
+    with Image.open(BytesIO(data)) as image:
+        image = image.convert('RGB')
+        image.thumbnail((THUMBNAIL_SIZE * 4, THUMBNAIL_SIZE * 4))
+        width, height = image.size
+        pixels = list(image.getdata())
+    return image_hashes([pixels[y * width:(y + 1) * width] for y in range(height)])
+
+
+def _hash_or_error(data):
+    try:
+        return hash_image(data)
+    except (ValueError, OSError) as e:
+        return str(e) or type(e).__name__
+
+
+class DuplicateImageFinder:
+    """Cached perceptual hashes of library images, and the clusters they form"""
+
+    def __init__(self, cloud_name, cache_path=DEFAULT_CACHE_PATH, distance=DEFAULT_DISTANCE,
+                 workers=DEFAULT_WORKERS, jobs=1, local_dir=None, base_url=DELIVERY_BASE_URL, pool=None):
+        self.cloud_name = cloud_name
+        self.cache_path = cache_path
+        self.distance = distance
+        self.workers = workers
+        self.jobs = jobs
+        self.local_dir = Path(local_dir) if local_dir else None
+        self.base_url = base_url.rstrip('/')
+        self.pool = pool or HTTPPool(max_per_host=workers)
+        self.hashes = {}  # public_id -> {'dhash', 'phash', 'created_at', 'bytes'}
+        self.stats = {
+            'images': 0,
+            'hashed': 0,
+            'cached': 0,
+            'failed': []
+        }
+        self.load()
+
+    def load(self):
+        """Load cached hashes if they belong to this cloud and hash version"""
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == HASH_VERSION and data.get('cloud_name') == self.cloud_name:
+            self.hashes = data.get('hashes', {})
+
+    def save(self):
+        if not self.cache_path:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.cache_path, json.dumps({
+            'version': HASH_VERSION,
+            'cloud_name': self.cloud_name,
+            'hashes': self.hashes
+        }, separators=(',', ':'), sort_keys=True))
+
+    def url_for(self, public_id):
+        return (f'{self.base_url}/{quote(self.cloud_name)}/image/upload/'
+                f'{thumbnail_transformation()}/{quote(public_id, safe="/")}')
+
+    def local_file(self, public_id):
+        for extension in LOCAL_EXTENSIONS:
+            path = self.local_dir / f'{public_id}{extension}'
+            if path.is_file():
+                return path
+        return None
+
+    def _fetch(self, public_id):
+        """Image bytes to hash for public_id, or an error message"""
+        if self.local_dir:
+            path = self.local_file(public_id)
+            if path:
+                return path.read_bytes()
+        try:
+            response = self.pool.get(self.url_for(public_id))
+        except (OSError, http.client.HTTPException) as e:
+            return str(e) or type(e).__name__
+        return response.body if response.ok else f'HTTP {response.status}'
+
+    @staticmethod
+    def signature(asset):
+        asset = asset or {}
+        return {'created_at': asset.get('created_at'), 'bytes': asset.get('bytes')}
+
+    def update(self, assets):
+        """
+        Hash every image in assets that has no current cached hash.
+
+        assets maps public_id -> its listing entry (created_at, bytes), or
+        None when there is no listing; cached hashes of public_ids not in
+        assets are dropped.
+        """
+        self.stats['images'] = len(assets)
+        todo = []
+        for public_id, asset in sorted(assets.items()):
+            cached = self.hashes.get(public_id)
+            if cached and all(cached.get(k) == v for k, v in self.signature(asset).items()):
+                self.stats['cached'] += 1
+            else:
+                todo.append(public_id)
+
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            fetched = list(executor.map(self._fetch, todo))
+
+        downloaded = [(p, body) for p, body in zip(todo, fetched) if isinstance(body, bytes)]
+        self.stats['failed'] = [(p, body) for p, body in zip(todo, fetched) if isinstance(body, str)]
+
+        results = run_in_pool(_hash_or_error, [body for _p, body in downloaded], jobs=self.jobs)
+        for (public_id, _body), result in zip(downloaded, results):
+            if isinstance(result, str):
+                self.stats['failed'].append((public_id, result))
+                continue
+            result.update(self.signature(assets[public_id]))
+            self.hashes[public_id] = result
+            self.stats['hashed'] += 1
+
+        for public_id in set(self.hashes) - set(assets):
+            del self.hashes[public_id]
+        self.save()
+
+    def clusters(self):
+        """Sorted groups of public_ids that look alike"""
+        phashes = {p: int(h['phash'], 16) for p, h in self.hashes.items()}
+        dhashes = {p: int(h['dhash'], 16) for p, h in self.hashes.items()}
+        return clusters(phashes, self.distance,
+                        confirm=lambda a, b: hamming(dhashes[a], dhashes[b]) <= DHASH_DISTANCE)
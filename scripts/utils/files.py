@@ -0,0 +1,43 @@
+"""
+File helpers shared by the post-rewriting scripts.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+
+def atomic_write_text(path, text):
+    """
+    Write text to path via a temp file and rename.
+
+    The rename is atomic, so a crash or a concurrent reader never sees a
+    half-written file. The original file's permissions are kept.
+    """
+    _atomic_write(path, text.encode('utf-8'))
+
+
+def atomic_write_bytes(path, data):
+    """Binary counterpart of atomic_write_text()"""
+    _atomic_write(path, data)
+
+
+def _atomic_write(path, data):
+    path = Path(path)
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
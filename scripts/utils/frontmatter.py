@@ -0,0 +1,159 @@
+"""
+Front matter parsing and minimal-diff editing for Jekyll posts
+
+The Python counterpart of netlify/utils/frontmatter.mjs. The front matter
+span is located once; parsing uses libyaml's CSafeLoader when PyYAML was
+built with it, falling back to the pure-Python SafeLoader.
+
+Edits never re-serialise the whole block. set_front_matter_key() replaces
+the lines of one top-level key, or inserts it before the closing ---, and
+leaves every other byte of the file alone, so key order, quoting, comments
+and dates survive and bulk updates produce one-line diffs.
+"""
+
+import json
+import re
+
+import yaml
+
+# libyaml is several times faster than the pure-Python loader
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+_CLOSING_RE = re.compile(r'^---[ \t]*\r?$', re.MULTILINE)
+
+# Plain scalars that YAML would read back as something other than a string
+_RESERVED_SCALARS = {'', 'null', '~', 'true', 'false', 'yes', 'no', 'on', 'off', 'y', 'n'}
+_PLAIN_SCALAR_RE = re.compile(r'^[A-Za-z0-9_./][A-Za-z0-9 _./()-]*$')
+_NUMBER_RE = re.compile(r'^[-+]?(\.\d+|\d[\d_]*(\.\d*)?)([eE][-+]?\d+)?$')
+
+
+class FrontMatterSpan:
+    """Offsets of the front matter block within a file's text"""
+
+    def __init__(self, yaml_start, yaml_end, body_start, newline):
+        self.yaml_start = yaml_start  # first character of the YAML
+        self.yaml_end = yaml_end      # start of the closing --- line
+        self.body_start = body_start  # first character after the closing --- line
+        self.newline = newline
+
+
+def find_front_matter(text):
+    """Return the FrontMatterSpan of text, or None if it has no front matter"""
+    if text.startswith('---\r\n'):
+        newline = '\r\n'
+    elif text.startswith('---\n'):
+        newline = '\n'
+    else:
+        return None
+
+    yaml_start = 3 + len(newline)
+    if text.startswith('---', yaml_start) and _CLOSING_RE.match(text, yaml_start):
+        # Empty front matter: closing delimiter straight after the opening one
+        close = _CLOSING_RE.match(text, yaml_start)
+    else:
+        close = _CLOSING_RE.search(text, yaml_start)
+        if not close or text[close.start() - 1] != '\n':
+            return None
+
+    body_start = close.end()
+    if text.startswith('\n', body_start):
+        body_start += 1
+    return FrontMatterSpan(yaml_start, close.start(), body_start, newline)
+
+
+def load_yaml(yaml_text):
+    """Parse a YAML document with the fastest available safe loader"""
+    return yaml.load(yaml_text, Loader=YAML_LOADER)
+
+
+def yaml_error_message(error):
+    """One-line description of a YAMLError from a post's front matter"""
+    problem = getattr(error, 'problem', None) or str(error).splitlines()[0]
+    mark = getattr(error, 'problem_mark', None)
+    # The YAML starts on line 2 of the post, after the opening ---
+    return f'{problem} (line {mark.line + 2})' if mark else problem
+
+
+def parse_front_matter(text):
+    """
+    Return (front_matter, body) for a post's text.
+
+    front_matter is None if there is no front matter block or it isn't a
+    YAML mapping; body is then the whole text. Malformed YAML raises
+    yaml.YAMLError.
+    """
+    span = find_front_matter(text)
+    if span is None:
+        return None, text
+
+    front_matter = load_yaml(text[span.yaml_start:span.yaml_end]) or {}
+    if not isinstance(front_matter, dict):
+        return None, text
+    return front_matter, text[span.body_start:]
+
+
+def format_scalar(value):
+    """Render a scalar as YAML, quoting strings only when they need it"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if value is None:
+        return 'null'
+    if isinstance(value, (int, float)):
+        return str(value)
+
+    value = str(value)
+    if (_PLAIN_SCALAR_RE.match(value) and value == value.strip()
+            and value.lower() not in _RESERVED_SCALARS and not _NUMBER_RE.match(value)):
+        return value
+    # JSON strings are valid YAML double-quoted scalars
+    return json.dumps(value, ensure_ascii=False)
+
+
+def format_key(key, value, newline='\n'):
+    """Render one top-level key as YAML lines (no trailing newline)"""
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return f'{key}: []'
+        items = newline.join(f'  - {format_scalar(item)}' for item in value)
+        return f'{key}:{newline}{items}'
+    return f'{key}: {format_scalar(value)}'
+
+
+def _key_lines(yaml_text, key):
+    """(start, end) offsets of a top-level key's lines within yaml_text, or None"""
+    match = re.search(r'^' + re.escape(key) + r'[ \t]*:', yaml_text, re.MULTILINE)
+    if not match:
+        return None
+
+    end = yaml_text.find('\n', match.start())
+    end = len(yaml_text) if end == -1 else end + 1
+    # Continuation lines: indented values, block scalars and block sequences
+    while end < len(yaml_text) and yaml_text[end] in ' \t-':
+        next_end = yaml_text.find('\n', end)
+        end = len(yaml_text) if next_end == -1 else next_end + 1
+    return match.start(), end
+
+
+def set_front_matter_key(text, key, value):
+    """
+    Return text with one top-level front matter key set to value.
+
+    An existing key's lines are replaced in place; a new key is appended
+    after the last existing one. Everything else is left byte-for-byte
+    unchanged. Raises ValueError if text has no front matter.
+    """
+    span = find_front_matter(text)
+    if span is None:
+        raise ValueError('text has no front matter')
+
+    yaml_text = text[span.yaml_start:span.yaml_end]
+    rendered = format_key(key, value, span.newline) + span.newline
+
+    lines = _key_lines(yaml_text, key)
+    if lines:
+        start, end = lines
+        yaml_text = yaml_text[:start] + rendered + yaml_text[end:]
+    else:
+        yaml_text += rendered
+
+    return text[:span.yaml_start] + yaml_text + text[span.yaml_end:]
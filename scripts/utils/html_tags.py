@@ -0,0 +1,262 @@
+"""
+Streaming HTML tag rewriter for Markdown posts
+
+Walks a post once, left to right, and yields each start tag with one of the
+requested names so the caller can inspect it and add or change attributes.
+Everything else is copied through untouched, including HTML comments,
+fenced and inline code, and the contents of <pre>, <code>, <script>,
+<style> and <textarea>, so markup shown as an example is never rewritten.
+
+Only the attributes a caller changes or adds are re-rendered; the rest of a
+tag keeps its original spelling, quoting and spacing, which keeps diffs
+minimal.
+"""
+
+import html
+import re
+
+# Elements whose contents are not scanned for tags
+RAW_TEXT_TAGS = frozenset({'pre', 'code', 'script', 'style', 'textarea'})
+
+# Everything the scanner needs to stop at, in one pattern
+_SCAN_RE = re.compile(
+    r'(?P<comment><!--)'
+    r'|<(?P<tag>[A-Za-z][A-Za-z0-9-]*)'
+    r'|^(?P<fence> {0,3}(?:`{3,}|~{3,}))'
+    r'|(?P<ticks>`+)',
+    re.MULTILINE
+)
+
+# One attribute, or the end of the tag
+_ATTR_RE = re.compile(
+    r'\s*(?:'
+    r'(?P<close>/?>)'
+    r'|(?P<name>[^\s/>="\'<]+)(?:\s*=\s*(?P<value>"[^"]*"|\'[^\']*\'|[^\s>"\'=<`]+))?'
+    r'|(?P<slash>/)'
+    r')'
+)
+
+
+class Tag:
+    """A start tag found in the source, with editable attributes"""
+
+    def __init__(self, name, raw, start, attrs, close_start):
+        self.name = name
+        self.raw = raw
+        self.start = start
+        self.end = start + len(raw)
+        self.self_closing = raw.endswith('/>')
+        self._attrs = attrs  # [(name, value, start, end)] relative to raw
+        self._close_start = close_start
+        self._changed = {}
+        self._added = {}
+        self._removed = set()
+
+    def __repr__(self):
+        return f'<Tag {self.render()!r}>'
+
+    def _find(self, name):
+        name = name.lower()
+        for attr in self._attrs:
+            if attr[0] == name:
+                return attr
+        return None
+
+    def has(self, name):
+        """Return True if the attribute is present"""
+        name = name.lower()
+        if name in self._removed:
+            return False
+        return name in self._added or self._find(name) is not None
+
+    def get(self, name, default=None):
+        """Return an attribute's (unescaped) value, '' for bare attributes"""
+        name = name.lower()
+        if name in self._removed:
+            return default
+        if name in self._changed:
+            return self._changed[name]
+        if name in self._added:
+            return self._added[name]
+        attr = self._find(name)
+        if attr is None:
+            return default
+        return attr[1]
+
+    def set(self, name, value):
+        """Set an attribute, replacing it in place or appending it"""
+        name = name.lower()
+        self._removed.discard(name)
+        if self._find(name) is not None:
+            if self.get(name) != value:
+                self._changed[name] = value
+        else:
+            self._added[name] = value
+
+    def setdefault(self, name, value):
+        """Set an attribute only if it is not already present"""
+        if not self.has(name):
+            self.set(name, value)
+
+    def remove(self, name):
+        """Drop an attribute, with the whitespace before it"""
+        name = name.lower()
+        self._changed.pop(name, None)
+        self._added.pop(name, None)
+        if self._find(name) is not None:
+            self._removed.add(name)
+
+    @property
+    def changed(self):
+        return bool(self._changed or self._added or self._removed)
+
+    def render(self):
+        """Return the tag's source text with any edits applied"""
+        if not self.changed:
+            return self.raw
+
+        out = []
+        pos = 0
+        for name, _value, start, end in self._attrs:
+            if name in self._removed:
+                out.append(self.raw[pos:start].rstrip())
+                pos = end
+            elif name in self._changed:
+                out.append(self.raw[pos:start])
+                out.append(_format_attr(name, self._changed[name]))
+                pos = end
+
+        head = self.raw[pos:self._close_start]
+        if self._added:
+            stripped = head.rstrip()
+            out.append(stripped)
+            for name, value in self._added.items():
+                out.append(' ' + _format_attr(name, value))
+            if self.self_closing:
+                out.append(head[len(stripped):] or ' ')
+        else:
+            out.append(head)
+        out.append(self.raw[self._close_start:])
+        return ''.join(out)
+
+
+def _format_attr(name, value):
+    return f'{name}="{html.escape(value, quote=True)}"'
+
+
+def _parse_tag(text, start, name):
+    """Parse the start tag at text[start], or return None if it is not one"""
+    pos = start + 1 + len(name)
+    attrs = []
+
+    while True:
+        match = _ATTR_RE.match(text, pos)
+        if not match or match.end() == pos:
+            return None
+
+        if match.group('close'):
+            close_start = match.start('close') - start
+            raw = text[start:match.end()]
+            return Tag(name.lower(), raw, start, attrs, close_start)
+
+        if match.group('name'):
+            value = match.group('value')
+            if value is None:
+                value = ''
+            elif value[:1] in ('"', "'"):
+                value = value[1:-1]
+            attrs.append((
+                match.group('name').lower(),
+                html.unescape(value),
+                match.start('name') - start,
+                match.end() - start
+            ))
+
+        pos = match.end()
+
+
+def _skip_fence(text, match):
+    """Return the position after the fenced code block opened by match"""
+    fence = match.group('fence').lstrip(' ')
+    line_end = text.find('\n', match.end())
+    if line_end == -1:
+        return len(text)
+
+    closer = re.compile(
+        r'^ {0,3}' + re.escape(fence[0]) + '{' + str(len(fence)) + r',}[ \t]*$',
+        re.MULTILINE
+    )
+    close = closer.search(text, line_end + 1)
+    return close.end() if close else len(text)
+
+
+def _skip_code_span(text, match):
+    """Return the position after the inline code span opened by match"""
+    ticks = match.group('ticks')
+    para_end = text.find('\n\n', match.end())
+    if para_end == -1:
+        para_end = len(text)
+
+    closer = re.compile(r'(?<!`)' + ticks + r'(?!`)')
+    close = closer.search(text, match.end(), para_end)
+    return close.end() if close else match.end()
+
+
+def iter_tags(text, names):
+    """
+    Yield a Tag for each start tag in text whose name is in names.
+
+    Tags are found in a single left-to-right pass; code, comments and
+    raw-text elements are skipped over rather than scanned.
+    """
+    names = {n.lower() for n in names}
+    pos = 0
+
+    while True:
+        match = _SCAN_RE.search(text, pos)
+        if not match:
+            return
+
+        if match.group('comment'):
+            close = text.find('-->', match.end())
+            pos = len(text) if close == -1 else close + 3
+        elif match.group('fence') is not None:
+            pos = _skip_fence(text, match)
+        elif match.group('ticks'):
+            pos = _skip_code_span(text, match)
+        else:
+            name = match.group('tag')
+            tag = _parse_tag(text, match.start(), name)
+            if tag is None:
+                pos = match.end()
+                continue
+
+            pos = tag.end
+            if tag.name in names:
+                yield tag
+            if tag.name in RAW_TEXT_TAGS and not tag.self_closing:
+                close = re.compile(r'</' + tag.name + r'\s*>', re.IGNORECASE).search(text, pos)
+                if close:
+                    pos = close.end()
+
+
+def rewrite_tags(text, names, callback):
+    """
+    Return text with callback(tag) applied to each matching start tag.
+
+    The callback edits the tag in place with set()/setdefault(); untouched
+    tags and all text between them are copied through unchanged.
+    """
+    out = []
+    pos = 0
+    for tag in iter_tags(text, names):
+        callback(tag)
+        if tag.changed:
+            out.append(text[pos:tag.start])
+            out.append(tag.render())
+            pos = tag.end
+
+    if not out:
+        return text
+    out.append(text[pos:])
+    return ''.join(out)
@@ -0,0 +1,196 @@
+"""
+Keep-alive HTTP connection pool with retry and backoff
+
+A small, thread-safe client built on http.client, so the scripts need no
+third-party HTTP library. Connections are reused per host and the number
+open to any one host is bounded, which makes it safe to share one pool
+between the workers of a ThreadPoolExecutor.
+
+Rate-limit responses (420/429) and transient server errors are retried
+with exponential backoff, honouring Retry-After when the server sends it.
+"""
+
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+USER_AGENT = 'circleseven-scripts/1.0'
+
+# Statuses worth retrying: Cloudinary's 420 and the standard 429, plus
+# transient server errors
+RETRY_STATUSES = frozenset({420, 429, 500, 502, 503, 504})
+
+
+class HTTPError(Exception):
+    """Raised by Response.raise_for_status() for non-2xx responses"""
+
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status} for {response.url}")
+        self.response = response
+
+
+class Response:
+    """A fully read HTTP response"""
+
+    def __init__(self, url, status, headers, body):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    def json(self):
+        return json.loads(self.body.decode('utf-8'))
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise HTTPError(self)
+        return self
+
+
+class _HostPool:
+    """Idle connections and a connection limit for one scheme/host/port"""
+
+    def __init__(self, scheme, host, port, limit, timeout):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.idle = []
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(limit)
+
+    def new_connection(self):
+        cls = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def acquire(self):
+        self.slots.acquire()
+        with self.lock:
+            if self.idle:
+                return self.idle.pop(), True
+        return self.new_connection(), False
+
+    def release(self, conn, reusable):
+        if reusable:
+            with self.lock:
+                self.idle.append(conn)
+        else:
+            conn.close()
+        self.slots.release()
+
+    def close(self):
+        with self.lock:
+            for conn in self.idle:
+                conn.close()
+            self.idle.clear()
+
+
+class HTTPPool:
+    """Pooled, retrying HTTP client shared by the scripts"""
+
+    def __init__(self, max_per_host=8, timeout=30, retries=4, backoff=0.5, max_backoff=30,
+                 retry_statuses=RETRY_STATUSES, headers=None):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = retry_statuses
+        self.headers = {'User-Agent': USER_AGENT}
+        self.headers.update(headers or {})
+        self.sleep = time.sleep
+        self.stats = {'requests': 0, 'retries': 0, 'connections': 0}
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Close all idle connections"""
+        with self._lock:
+            for host in self._hosts.values():
+                host.close()
+
+    def _host_pool(self, scheme, netloc):
+        key = (scheme, netloc)
+        with self._lock:
+            if key not in self._hosts:
+                parts = urlsplit(f'{scheme}://{netloc}')
+                self._hosts[key] = _HostPool(scheme, parts.hostname, parts.port,
+                                             self.max_per_host, self.timeout)
+            return self._hosts[key]
+
+    def _send(self, method, url, headers, body):
+        """Make one request, reusing a pooled connection where possible"""
+        parts = urlsplit(url)
+        host = self._host_pool(parts.scheme, parts.netloc)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        for attempt in range(2):
+            conn, reused = host.acquire()
+            if not reused:
+                with self._lock:
+                    self.stats['connections'] += 1
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                data = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                host.release(conn, False)
+                # A kept-alive connection the server has since closed: retry once on a new one
+                if reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                host.release(conn, False)
+                raise
+
+            host.release(conn, not resp.will_close)
+            return Response(url, resp.status, resp.headers, data)
+
+    def _retry_delay(self, response, attempt):
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+        delay = self.backoff * (2 ** attempt)
+        return min(delay + random.uniform(0, delay / 2), self.max_backoff)
+
+    def request(self, method, url, headers=None, body=None):
+        """Make a request, retrying rate-limited and transient failures with backoff"""
+        merged = dict(self.headers)
+        merged.update(headers or {})
+
+        attempt = 0
+        while True:
+            with self._lock:
+                self.stats['requests'] += 1
+            response = self._send(method, url, merged, body)
+            if response.status not in self.retry_statuses or attempt >= self.retries:
+                return response
+
+            with self._lock:
+                self.stats['retries'] += 1
+            self.sleep(self._retry_delay(response, attempt))
+            attempt += 1
+
+    def get(self, url, headers=None):
+        return self.request('GET', url, headers=headers)
+
+    def head(self, url, headers=None):
+        return self.request('HEAD', url, headers=headers)
@@ -0,0 +1,203 @@
+"""
+Probe intrinsic image dimensions with ranged reads
+
+Fetches only the first bytes of each image, enough for image_headers.py
+to read its size: a `Range: bytes=0-16383` request to the untransformed
+Cloudinary delivery URL, or the start of a local file. JPEGs whose frame
+header sits behind a large EXIF block get a follow-up range request for
+the rest, up to MAX_HEADER_BYTES. Requests run concurrently over the
+keep-alive pool in http_pool.py.
+
+Bare public_ids are probed in the cloudinary_default_folder, where the
+inject_cloudinary_folder filter points them when the page is built.
+
+Sizes are cached in .cache/image-dimensions.json keyed by public_id (or
+site path for local files). An image's size never changes for the same
+public_id, so cached entries never expire. Missing and unreadable images
+are reported but not cached, so they are retried on the next run.
+"""
+
+import http.client
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .delivery_check import DELIVERY_BASE_URL
+from .files import atomic_write_text
+from .http_pool import HTTPPool
+from .image_headers import NeedMoreData, image_size
+from .manifest import REPO_ROOT
+from .references import ReferenceExtractor
+
+DEFAULT_CACHE_PATH = REPO_ROOT / '.cache' / 'image-dimensions.json'
+DEFAULT_WORKERS = 16
+CACHE_VERSION = 1
+
+# First request size, and the most ever read from one image
+HEADER_BYTES = 16384
+MAX_HEADER_BYTES = 262144
+
+MISSING = 'missing'
+UNREADABLE = 'unreadable'
+ERROR = 'error'
+
+
+class ProbeFailed(Exception):
+    """An image's size couldn't be read; `reason` is MISSING, UNREADABLE or ERROR"""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+class ImageSource:
+    """Where to read one image from: a Cloudinary asset or a local file"""
+
+    def __init__(self, key, url=None, path=None):
+        self.key = key
+        self.url = url
+        self.path = path
+
+    @classmethod
+    def cloudinary(cls, delivery_url, default_folder=''):
+        """
+        Source for the original (untransformed) asset behind a DeliveryURL.
+
+        A public_id without a folder gets default_folder prepended, after
+        any version segment, as the site templates do.
+        """
+        extractor = ReferenceExtractor(delivery_url.cloud_name, default_folder)
+        public_id = extractor.with_folder(delivery_url.public_id)
+        asset = delivery_url.asset
+        if public_id != delivery_url.public_id:
+            version, _, name = asset.rpartition('/')
+            asset = '/'.join(filter(None, (version, extractor.default_folder, name)))
+        return cls(public_id, url=f'{delivery_url.cloud_name}/image/upload/{asset}')
+
+    @classmethod
+    def local(cls, site_path, site_dir=REPO_ROOT):
+        """Source for a site-relative path such as /assets/images/logo.png"""
+        site_path = site_path.split('?', 1)[0].split('#', 1)[0]
+        return cls(site_path, path=Path(site_dir) / site_path.lstrip('/'))
+
+
+class DimensionProber:
+    """Concurrent, cached intrinsic size lookups for ImageSources"""
+
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH, workers=DEFAULT_WORKERS,
+                 base_url=DELIVERY_BASE_URL, pool=None):
+        self.cache_path = cache_path
+        self.workers = workers
+        self.base_url = base_url.rstrip('/')
+        self.pool = pool or HTTPPool(max_per_host=workers)
+        self.results = {}   # key -> {'width': ..., 'height': ..., 'format': ...}
+        self.failures = {}  # key -> MISSING, UNREADABLE or ERROR, for this run
+        self.stats = {
+            'probed': 0,
+            'cached': 0,
+            'bytes_read': 0,
+            'missing': 0,
+            'unreadable': 0,
+            'errors': 0
+        }
+        self.load()
+
+    def load(self):
+        """Load cached sizes"""
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == CACHE_VERSION:
+            self.results = data.get('results', {})
+
+    def save(self):
+        """Write cached sizes to disk"""
+        if not self.cache_path:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.cache_path, json.dumps({
+            'version': CACHE_VERSION,
+            'results': self.results
+        }, separators=(',', ':'), sort_keys=True))
+
+    def _read_url(self, url, start, end):
+        """Bytes start..end-1 of url, and whether they run to the end of the image"""
+        try:
+            response = self.pool.get(f'{self.base_url}/{url}', headers={'Range': f'bytes={start}-{end - 1}'})
+        except (OSError, http.client.HTTPException) as e:
+            raise ProbeFailed(ERROR, str(e) or type(e).__name__)
+        if response.status in (404, 410):
+            raise ProbeFailed(MISSING, f'HTTP {response.status}')
+        if response.status == 206:
+            return response.body, len(response.body) < end - start
+        if response.status == 200:
+            # Range ignored: the whole image, from the start
+            return response.body[start:], True
+        if response.status == 416:
+            return b'', True
+        raise ProbeFailed(ERROR, f'HTTP {response.status}')
+
+    def _read_file(self, path, start, end):
+        try:
+            with open(path, 'rb') as f:
+                f.seek(start)
+                data = f.read(end - start)
+        except FileNotFoundError:
+            raise ProbeFailed(MISSING, f'{path} not found')
+        except OSError as e:
+            raise ProbeFailed(ERROR, str(e))
+        return data, len(data) < end - start
+
+    def read_size(self, source):
+        """(width, height, format, bytes read) of one source, reading as few bytes as possible"""
+        data = b''
+        end = HEADER_BYTES
+        while True:
+            if source.url:
+                chunk, complete = self._read_url(source.url, len(data), end)
+            else:
+                chunk, complete = self._read_file(source.path, len(data), end)
+            data += chunk
+            try:
+                return image_size(data) + (len(data),)
+            except NeedMoreData as e:
+                if complete or e.needed > MAX_HEADER_BYTES:
+                    raise ProbeFailed(UNREADABLE, 'image header is truncated or too large')
+                end = min(max(e.needed, len(data) * 2), MAX_HEADER_BYTES)
+            except ValueError as e:
+                raise ProbeFailed(UNREADABLE, str(e))
+
+    def _probe(self, source):
+        try:
+            return self.read_size(source)
+        except ProbeFailed as e:
+            return e
+
+    def probe(self, sources):
+        """
+        Return {key: {'width', 'height', 'format'}} for every source that could be read.
+
+        Only sources not already cached are read; failures are recorded in
+        failures and stats and left out of the result.
+        """
+        unique = {source.key: source for source in sources}
+        todo = [source for key, source in sorted(unique.items()) if key not in self.results]
+        self.stats['cached'] += len(unique) - len(todo)
+
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            for source, result in zip(todo, executor.map(self._probe, todo)):
+                self.stats['probed'] += 1
+                if isinstance(result, ProbeFailed):
+                    self.failures[source.key] = result.reason
+                    self.stats['errors' if result.reason == ERROR else result.reason] += 1
+                    continue
+                width, height, fmt, read = result
+                self.stats['bytes_read'] += read
+                self.results[source.key] = {'width': width, 'height': height, 'format': fmt}
+
+        self.save()
+        return {key: self.results[key] for key in unique if key in self.results}
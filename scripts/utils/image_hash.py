@@ -0,0 +1,174 @@
+"""
+Perceptual image hashes and a multi-index table for finding near-duplicates
+
+Both hashes are 64-bit integers computed from a small greyscale copy of
+the image, so resized, recompressed or re-encoded copies of one picture
+hash to the same or nearby values:
+
+- dhash(): difference hash; a 9x8 thumbnail, one bit per pair of
+  horizontally adjacent pixels (is the left one brighter?)
+- phash(): perceptual hash; the lowest 8x8 frequencies of a 32x32 DCT,
+  one bit per coefficient (is it above the median?)
+
+Similarity is the Hamming distance between hashes. MultiIndex finds every
+hash within a small radius of another by exact lookups on hash chunks, so
+it only compares a handful of candidates; clusters() uses it to group a
+whole library in roughly linear time.
+"""
+
+import math
+
+HASH_SIZE = 8
+PHASH_SIZE = 32
+
+
+def to_grey(rows):
+    """Luma (ITU-R 601) of RGB rows as lists of floats"""
+    return [[0.299 * r + 0.587 * g + 0.114 * b for r, g, b in row] for row in rows]
+
+
+def resize(grey, width, height):
+    """Box-filter a greyscale image to width x height (any scale, either direction)"""
+    src_height = len(grey)
+    src_width = len(grey[0])
+    out = []
+    for y in range(height):
+        y0 = y * src_height / height
+        y1 = (y + 1) * src_height / height
+        row = []
+        for x in range(width):
+            x0 = x * src_width / width
+            x1 = (x + 1) * src_width / width
+            total = 0.0
+            area = 0.0
+            for sy in range(int(y0), min(math.ceil(y1), src_height)):
+                wy = min(y1, sy + 1) - max(y0, sy)
+                for sx in range(int(x0), min(math.ceil(x1), src_width)):
+                    w = wy * (min(x1, sx + 1) - max(x0, sx))
+                    total += grey[sy][sx] * w
+                    area += w
+            row.append(total / area)
+        out.append(row)
+    return out
+
+
+def _bits(flags):
+    value = 0
+    for flag in flags:
+        value = (value << 1) | int(flag)
+    return value
+
+
+def dhash(grey):
+    """64-bit difference hash of a greyscale image"""
+    small = resize(grey, HASH_SIZE + 1, HASH_SIZE)
+    return _bits(row[x] > row[x + 1] for row in small for x in range(HASH_SIZE))
+
+
+def _dct_matrix(n, k):
+    """First k rows of the n-point DCT-II basis (unnormalised; only signs and order matter)"""
+    return [[math.cos(math.pi * u * (2 * i + 1) / (2 * n)) for i in range(n)] for u in range(k)]
+
+
+_DCT = _dct_matrix(PHASH_SIZE, HASH_SIZE)
+
+
+def phash(grey):
+    """64-bit DCT perceptual hash of a greyscale image"""
+    small = resize(grey, PHASH_SIZE, PHASH_SIZE)
+    # Separable 2-D DCT, keeping only the 8x8 lowest frequencies
+    rows = [[sum(c * v for c, v in zip(basis, row)) for basis in _DCT] for row in small]
+    coefficients = [sum(basis[i] * rows[i][u] for i in range(PHASH_SIZE)) for basis in _DCT for u in range(HASH_SIZE)]
+    # The DC term is the overall brightness, which says nothing about the picture
+    ac = sorted(coefficients[1:])
+    median = ac[len(ac) // 2]
+    return _bits(c > median for c in coefficients)
+
+
+def image_hashes(rows):
+    """{'dhash': hex, 'phash': hex} for RGB rows"""
+    grey = to_grey(rows)
+    return {'dhash': f'{dhash(grey):016x}', 'phash': f'{phash(grey):016x}'}
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class MultiIndex:
+    """
+    Multi-index hash table of 64-bit hashes for Hamming radius searches.
+
+    Each hash is split into CHUNKS 16-bit chunks, and each chunk position
+    has its own table. Two hashes within radius r must agree to within
+    r // CHUNKS bits in at least one chunk (pigeonhole), so a search only
+    looks up the few chunk values that close in each table and checks
+    those candidates, instead of comparing against every hash.
+    """
+
+    CHUNKS = 4
+    CHUNK_BITS = 16
+
+    def __init__(self):
+        self.tables = [{} for _ in range(self.CHUNKS)]
+        self.values = {}  # key -> hash
+
+    def _chunks(self, value):
+        mask = (1 << self.CHUNK_BITS) - 1
+        return [(value >> (i * self.CHUNK_BITS)) & mask for i in range(self.CHUNKS)]
+
+    def add(self, value, key):
+        self.values[key] = value
+        for table, chunk in zip(self.tables, self._chunks(value)):
+            table.setdefault(chunk, []).append(key)
+
+    def _near(self, chunk, radius):
+        """Every chunk value within radius bits of chunk"""
+        found = {chunk}
+        for _ in range(radius):
+            found |= {c ^ (1 << bit) for c in found for bit in range(self.CHUNK_BITS)}
+        return found
+
+    def search(self, value, radius):
+        """[(distance, key)] for every key whose hash is within radius of value"""
+        candidates = set()
+        for table, chunk in zip(self.tables, self._chunks(value)):
+            for near in self._near(chunk, radius // self.CHUNKS):
+                candidates.update(table.get(near, ()))
+        found = []
+        for key in candidates:
+            distance = hamming(value, self.values[key])
+            if distance <= radius:
+                found.append((distance, key))
+        return found
+
+
+def clusters(hashes, radius, confirm=None):
+    """
+    Groups of keys whose hashes are within radius of one another.
+
+    hashes maps key -> int. Groups are the connected components of the
+    "within radius" relation (so chains are joined), with at least two
+    keys, sorted. confirm(a, b), if given, must also accept each pair.
+    """
+    index = MultiIndex()
+    for key, value in hashes.items():
+        index.add(value, key)
+
+    parent = {key: key for key in hashes}
+
+    def find(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    for key, value in hashes.items():
+        for _distance, other in index.search(value, radius):
+            if other != key and find(other) != find(key) and (confirm is None or confirm(key, other)):
+                parent[find(other)] = find(key)
+
+    groups = {}
+    for key in hashes:
+        groups.setdefault(find(key), []).append(key)
+    return sorted(sorted(group) for group in groups.values() if len(group) > 1)
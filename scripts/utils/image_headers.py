@@ -0,0 +1,120 @@
+"""
+Intrinsic image dimensions from the first bytes of a file
+
+Parses just enough of a JPEG, PNG, GIF or WebP header to find its pixel
+size, so callers can fetch a small byte range instead of the whole image.
+image_size() raises NeedMoreData when the bytes it was given stop before
+the size, saying how many it needs, and ValueError for anything it can't
+read.
+
+JPEGs rotated by EXIF orientation 5-8 are displayed on their side, so
+their width and height are swapped to match what browsers show.
+"""
+
+import struct
+
+# Start-of-frame markers, which carry the image size
+_JPEG_SOF = frozenset({0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF})
+# Markers without a length field
+_JPEG_STANDALONE = frozenset({0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8, 0xD9})
+_EXIF_ORIENTATION = 0x0112
+
+
+class NeedMoreData(Exception):
+    """The data ends before the image size; `needed` bytes are required"""
+
+    def __init__(self, needed):
+        super().__init__(f'need at least {needed} bytes')
+        self.needed = needed
+
+
+def _require(data, length):
+    if len(data) < length:
+        raise NeedMoreData(length)
+
+
+def _exif_orientation(segment):
+    """EXIF orientation from an APP1 segment body, or 1 if it has none"""
+    if not segment.startswith(b'Exif\0\0') or len(segment) < 14:
+        return 1
+    tiff = segment[6:]
+    order = {b'II': '<', b'MM': '>'}.get(tiff[:2])
+    if not order:
+        return 1
+    try:
+        (ifd,) = struct.unpack_from(order + 'I', tiff, 4)
+        (count,) = struct.unpack_from(order + 'H', tiff, ifd)
+        for i in range(count):
+            tag, _type, _count, value = struct.unpack_from(order + 'HHIH', tiff, ifd + 2 + i * 12)
+            if tag == _EXIF_ORIENTATION:
+                return value
+    except struct.error:
+        pass
+    return 1
+
+
+def _jpeg_size(data):
+    pos = 2
+    orientation = 1
+    while True:
+        _require(data, pos + 2)
+        if data[pos] != 0xFF:
+            raise ValueError('corrupt JPEG marker')
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            pos += 1
+            continue
+        if marker in _JPEG_STANDALONE:
+            pos += 2
+            continue
+
+        _require(data, pos + 4)
+        (length,) = struct.unpack_from('>H', data, pos + 2)
+        if marker in _JPEG_SOF:
+            _require(data, pos + 9)
+            height, width = struct.unpack_from('>HH', data, pos + 5)
+            if orientation >= 5:
+                width, height = height, width
+            return width, height, 'jpeg'
+        if marker == 0xDA:
+            raise ValueError('JPEG has no frame header before its scan data')
+        if marker == 0xE1:
+            _require(data, pos + 2 + length)
+            orientation = max(orientation, _exif_orientation(data[pos + 4:pos + 2 + length]))
+        pos += 2 + length
+
+
+def _webp_size(data):
+    _require(data, 30)
+    chunk = data[12:16]
+    if chunk == b'VP8 ':
+        width, height = struct.unpack_from('<HH', data, 26)
+        return width & 0x3FFF, height & 0x3FFF, 'webp'
+    if chunk == b'VP8L':
+        b0, b1, b2, b3 = data[21:25]
+        width = 1 + (((b1 & 0x3F) << 8) | b0)
+        height = 1 + (((b3 & 0x0F) << 10) | (b2 << 2) | ((b1 & 0xC0) >> 6))
+        return width, height, 'webp'
+    if chunk == b'VP8X':
+        width = 1 + int.from_bytes(data[24:27], 'little')
+        height = 1 + int.from_bytes(data[27:30], 'little')
+        return width, height, 'webp'
+    raise ValueError('unknown WebP chunk')
+
+
+def image_size(data):
+    """(width, height, format) of the image whose first bytes are data"""
+    _require(data, 12)
+    if data.startswith(b'\xff\xd8'):
+        return _jpeg_size(data)
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        _require(data, 24)
+        width, height = struct.unpack_from('>II', data, 16)
+        return width, height, 'png'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        width, height = struct.unpack_from('<HH', data, 6)
+        return width, height, 'gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return _webp_size(data)
+    raise ValueError('not a JPEG, PNG, GIF or WebP image')
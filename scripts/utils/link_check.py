@@ -0,0 +1,184 @@
+"""
+Check external links concurrently, politely and with a result cache
+
+Links are checked from an asyncio event loop: a global semaphore bounds
+how many checks run at once, and each host gets its own semaphore plus a
+minimum gap between request starts, so a post linking fifty pages of one
+site doesn't hammer it. A check waits for its host's turn before taking a
+global slot, so the links of one busy host can't hold every slot while
+the other hosts sit idle. The requests themselves go through the keep-alive
+pool in http_pool.py (run in a thread per check), which already retries
+429s and transient 5xx with backoff.
+
+A HEAD request is tried first; servers that refuse HEAD get a one-byte
+ranged GET instead. Redirects are followed up to MAX_REDIRECTS.
+
+Results are cached in .cache/external-links.json. A link seen to work or
+to be gone is trusted until its entry is older than the TTL; links that
+couldn't be checked (timeouts, DNS failures, odd statuses) are not cached,
+so reruns only touch stale and unsettled entries.
+"""
+
+import asyncio
+import http.client
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+from .files import atomic_write_text
+from .http_pool import HTTPPool
+from .manifest import REPO_ROOT
+
+DEFAULT_CACHE_PATH = REPO_ROOT / '.cache' / 'external-links.json'
+DEFAULT_TTL_DAYS = 7
+DEFAULT_WORKERS = 16
+DEFAULT_PER_HOST = 2
+DEFAULT_HOST_INTERVAL = 0.5
+DEFAULT_TIMEOUT = 15
+MAX_REDIRECTS = 5
+CACHE_VERSION = 1
+
+OK = 'ok'
+BROKEN = 'broken'
+ERROR = 'error'
+
+# Statuses from servers that don't implement HEAD (or refuse it to bots)
+HEAD_REFUSED = frozenset({400, 403, 405, 406, 501})
+REDIRECTS = frozenset({301, 302, 303, 307, 308})
+
+
+class _HostLimiter:
+    """Concurrency limit and minimum spacing of request starts for one host"""
+
+    def __init__(self, limit, interval):
+        self.slots = asyncio.Semaphore(limit)
+        self.interval = interval
+        self.lock = asyncio.Lock()
+        self.next_start = 0.0
+
+    async def wait_turn(self):
+        async with self.lock:
+            now = time.monotonic()
+            if self.next_start > now:
+                await asyncio.sleep(self.next_start - now)
+            self.next_start = max(now, self.next_start) + self.interval
+
+
+class ExternalLinkChecker:
+    """Concurrent, per-host rate-limited, cached checks of external URLs"""
+
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH, ttl_days=DEFAULT_TTL_DAYS, workers=DEFAULT_WORKERS,
+                 per_host=DEFAULT_PER_HOST, host_interval=DEFAULT_HOST_INTERVAL, pool=None):
+        self.cache_path = cache_path
+        self.ttl = ttl_days * 86400
+        self.workers = workers
+        self.per_host = per_host
+        self.host_interval = host_interval
+        self.pool = pool or HTTPPool(max_per_host=per_host, timeout=DEFAULT_TIMEOUT, retries=2)
+        self.results = {}  # url -> {'status': ..., 'code': ..., 'checked_at': ...}
+        self.stats = {
+            'checked': 0,
+            'cached': 0,
+            'ok': 0,
+            'broken': 0,
+            'errors': 0
+        }
+        self.load()
+
+    def load(self):
+        """Load cached results"""
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == CACHE_VERSION:
+            self.results = data.get('results', {})
+
+    def save(self):
+        """Write cached results to disk"""
+        if not self.cache_path:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.cache_path, json.dumps({
+            'version': CACHE_VERSION,
+            'results': self.results
+        }, separators=(',', ':'), sort_keys=True))
+
+    def needs_check(self, url, now):
+        """True unless the link has a result younger than the TTL"""
+        result = self.results.get(url)
+        return not result or now - result['checked_at'] > self.ttl
+
+    def _request(self, url):
+        """(status, code) for one URL, following redirects"""
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self.pool.head(url)
+            if response.status in HEAD_REFUSED:
+                response = self.pool.get(url, headers={'Range': 'bytes=0-0'})
+            location = response.headers.get('Location')
+            if response.status in REDIRECTS and location:
+                url = urljoin(url, location)
+                continue
+            if 200 <= response.status < 300:
+                return OK, response.status
+            if response.status in (404, 410):
+                return BROKEN, response.status
+            return ERROR, response.status
+        return ERROR, 'too many redirects'
+
+    def _fetch(self, url):
+        try:
+            return self._request(url)
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            return ERROR, type(e).__name__
+
+    async def _check_all(self, urls):
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(max(1, self.workers))
+        hosts = {}
+
+        async def check(url):
+            host = hosts.setdefault(urlsplit(url).netloc.lower(),
+                                    _HostLimiter(max(1, self.per_host), self.host_interval))
+            async with host.slots:
+                await host.wait_turn()
+                async with slots:
+                    return url, await loop.run_in_executor(executor, self._fetch, url)
+
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            return await asyncio.gather(*(check(url) for url in urls))
+
+    def check(self, urls):
+        """
+        Return {url: (OK | BROKEN | ERROR, HTTP status or error name)} for urls.
+
+        Only URLs without a fresh cached result are requested; errors are
+        reported but not cached.
+        """
+        now = time.time()
+        urls = sorted(set(urls))
+        todo = [url for url in urls if self.needs_check(url, now)]
+        self.stats['cached'] += len(urls) - len(todo)
+
+        fresh = {}
+        if todo:
+            for url, (status, code) in asyncio.run(self._check_all(todo)):
+                self.stats['checked'] += 1
+                if status == ERROR:
+                    self.results.pop(url, None)
+                    fresh[url] = (status, code)
+                    continue
+                self.results[url] = {'status': status, 'code': code, 'checked_at': now}
+        self.save()
+
+        statuses = {}
+        for url in urls:
+            result = self.results.get(url)
+            statuses[url] = (result['status'], result['code']) if result else fresh.get(url, (ERROR, None))
+        for key, status in (('ok', OK), ('broken', BROKEN), ('errors', ERROR)):
+            self.stats[key] = sum(1 for s, _code in statuses.values() if s == status)
+        return statuses
@@ -0,0 +1,215 @@
+"""
+Hyperlinks in post Markdown and the site's own URLs to resolve them against
+
+extract_links() finds every link target in a post in one regex pass:
+HTML href attributes, inline Markdown links and images' links, reference
+definitions and <autolinks>. Fenced code blocks, <pre> blocks, inline code
+and HTML comments are matched by the same pattern and skipped, so code
+samples don't produce false reports. {{ site.baseurl }} and {{ site.url }}
+are expanded; targets still containing Liquid are reported as dynamic.
+
+PermalinkIndex is the set of URLs a build of the site serves, worked out
+from the source without running Jekyll: post permalinks (utils/posts.py),
+category pages from _data/taxonomy.yml, tag pages for every tag in use,
+pages and their permalinks, pagination, plugin outputs, static files and
+the redirects in netlify.toml.
+"""
+
+import bisect
+import math
+import os
+import re
+from pathlib import Path
+from urllib.parse import unquote, urljoin, urlsplit
+
+from .frontmatter import parse_front_matter
+from .posts import post_url
+from .references import site_config
+from .taxonomy import Taxonomy, default_slug
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+LINK_RE = re.compile(
+    r'(?P<skip>^[ \t]*(?P<fence>```|~~~).*?^[ \t]*(?P=fence)[ \t]*$'
+    r'|<pre\b.*?</pre\s*>|<!--.*?-->|`[^`\n]+`)'
+    r'|\bhref\s*=\s*(?:"(?P<dq>[^"]*)"|\'(?P<sq>[^\']*)\')'
+    r'|\]\(\s*<?(?P<md>(?:\{\{[^}]*\}\}|\{%[^%]*%\}|[^)\s>])+)>?(?:\s+["\'(][^)]*)?\)'
+    r'|^[ \t]{0,3}\[[^\]\n]+\]:[ \t]*<?(?P<ref>(?:\{\{[^}]*\}\}|\{%[^%]*%\}|[^\s>])+)'
+    r'|<(?P<auto>https?://[^\s>]+)>',
+    re.DOTALL | re.MULTILINE | re.IGNORECASE
+)
+LIQUID_SITE_RE = re.compile(r'\{\{-?\s*site\.(baseurl|url)\s*-?\}\}')
+POST_URL_TAG_RE = re.compile(r'\{%-?\s*post_url\s+(\S+)\s*-?%\}')
+
+# Link kinds
+INTERNAL = 'internal'
+EXTERNAL = 'external'
+DYNAMIC = 'dynamic'
+IGNORED = 'ignored'
+
+IGNORED_SCHEMES = ('mailto:', 'tel:', 'javascript:', 'data:', 'sms:')
+
+# Always left out of the build, as Jekyll's own defaults
+DEFAULT_EXCLUDE = ('node_modules', 'vendor', 'Gemfile', 'Gemfile.lock')
+
+# Files the site's plugins write (jekyll-feed, jekyll-sitemap) and Netlify's admin
+PLUGIN_URLS = ('/feed.xml', '/sitemap.xml', '/robots.txt', '/admin/')
+
+
+def extract_links(text):
+    """[(target, line number)] for every link in a post's text, in order"""
+    line_starts = [0] + [m.end() for m in re.finditer(r'\n', text)]
+    links = []
+    for match in LINK_RE.finditer(text):
+        if match.group('skip'):
+            continue
+        target = next(g for g in (match.group(name) for name in ('dq', 'sq', 'md', 'ref', 'auto')) if g is not None)
+        links.append((target.strip(), bisect.bisect_right(line_starts, match.start())))
+    return links
+
+
+def _page_url(rel, front_matter, collection=False):
+    if front_matter and front_matter.get('permalink'):
+        return str(front_matter['permalink'])
+    rel = Path(rel)
+    if rel.name in ('index.html', 'index.md'):
+        parent = rel.parent.as_posix()
+        return '/' if parent == '.' else f'/{parent}/'
+    if collection:
+        # Collection documents use the collection's permalink: /:path/
+        return f'/{rel.with_suffix("").as_posix()}/'
+    return f'/{rel.with_suffix(".html").as_posix()}'
+
+
+class PermalinkIndex:
+    """The site-relative URLs a build of the site serves"""
+
+    def __init__(self, site_dir='.'):
+        self.site_dir = Path(site_dir)
+        config = site_config(self.site_dir)
+        self.permalink = config.get('permalink') or '/:title/'
+        self.site_url = (config.get('url') or '').rstrip('/')
+        self.hosts = set()
+        if self.site_url:
+            host = urlsplit(self.site_url).hostname or ''
+            self.hosts = {host, host[4:] if host.startswith('www.') else f'www.{host}'}
+        self.per_page = config.get('paginate') or 0
+        self.exclude = list(config.get('exclude') or []) + list(DEFAULT_EXCLUDE)
+        self.urls = set(PLUGIN_URLS)
+        self.redirect_prefixes = []
+        self.post_urls = {}  # post filename stem -> URL, for {% post_url %}
+        self.post_pages = {}  # URL -> post path
+        self.build()
+
+    def add(self, url):
+        self.urls.add(self.normalise(url))
+
+    def build(self):
+        taxonomy = Taxonomy.load(self.site_dir)
+        for entry in taxonomy.categories.values():
+            self.add(f"/category/{entry['slug']}/")
+
+        tags = set()
+        posts = sorted((self.site_dir / '_posts').glob('*.md'))
+        for path in posts:
+            front_matter, _body = parse_front_matter(path.read_text(encoding='utf-8'))
+            front_matter = front_matter or {}
+            url = post_url(path, front_matter, self.permalink)
+            self.add(url)
+            self.post_urls[path.stem] = url
+            self.post_pages[self.normalise(url)] = path
+            post_tags = front_matter.get('tags') or []
+            tags.update(str(tag) for tag in (post_tags if isinstance(post_tags, list) else [post_tags]))
+        for tag in tags:
+            self.add(f'/tag/{default_slug(tag)}/')
+
+        if self.per_page:
+            for page in range(2, math.ceil(len(posts) / self.per_page) + 1):
+                self.add(f'/page/{page}/')
+
+        for rel in self.site_files():
+            path = self.site_dir / rel
+            if rel.parts[0] == '_pages':
+                if path.suffix in ('.md', '.html'):
+                    front_matter, _body = parse_front_matter(path.read_text(encoding='utf-8'))
+                    self.add(_page_url(rel.relative_to('_pages'), front_matter, collection=True))
+            elif path.suffix in ('.md', '.html'):
+                front_matter, _body = parse_front_matter(path.read_text(encoding='utf-8'))
+                if front_matter is not None or path.suffix == '.html':
+                    self.add(_page_url(rel, front_matter))
+            else:
+                self.add('/' + rel.as_posix())
+
+        self.load_redirects()
+
+    def site_files(self):
+        """Source files Jekyll copies or renders: no _ or . paths (except _pages) and nothing excluded"""
+        excluded = {str(e).strip('/') for e in self.exclude}
+        for root, dirs, files in os.walk(self.site_dir):
+            rel_root = Path(root).relative_to(self.site_dir)
+            dirs[:] = sorted(d for d in dirs if (rel_root / d).as_posix() not in excluded
+                             and (not d.startswith(('_', '.')) or (rel_root == Path('.') and d == '_pages')))
+            for name in sorted(files):
+                rel = rel_root / name
+                if not name.startswith(('_', '.')) and rel.as_posix() not in excluded:
+                    yield rel
+
+    def load_redirects(self):
+        """Treat the sources of netlify.toml redirects as served URLs"""
+        if tomllib is None:
+            return
+        try:
+            with open(self.site_dir / 'netlify.toml', 'rb') as f:
+                config = tomllib.load(f)
+        except (OSError, ValueError):
+            return
+        for redirect in config.get('redirects') or []:
+            source = redirect.get('from', '')
+            if source.endswith('*'):
+                self.redirect_prefixes.append(source[:-1])
+            elif source.startswith('/'):
+                self.add(source)
+
+    @staticmethod
+    def normalise(path):
+        """Compare paths the way the host serves them: /foo, /foo/ and /foo/index.html alike"""
+        path = unquote(path.split('#', 1)[0].split('?', 1)[0]) or '/'
+        if path.endswith('/index.html'):
+            path = path[:-len('index.html')]
+        return path.rstrip('/') or '/'
+
+    def classify(self, target, page_url='/'):
+        """(kind, URL) for a link target found on the page at page_url"""
+        target = LIQUID_SITE_RE.sub(lambda m: '' if m.group(1) == 'baseurl' else self.site_url, target)
+        post_tag = POST_URL_TAG_RE.search(target)
+        if post_tag:
+            url = self.post_urls.get(post_tag.group(1))
+            if url is None:
+                return INTERNAL, target  # post_url names a post that doesn't exist
+            target = POST_URL_TAG_RE.sub(url, target)
+        if '{{' in target or '{%' in target:
+            return DYNAMIC, target
+        if not target or target.startswith('#') or target.lower().startswith(IGNORED_SCHEMES):
+            return IGNORED, target
+        if target.startswith('//'):
+            target = 'https:' + target
+
+        parts = urlsplit(target)
+        if parts.scheme in ('http', 'https'):
+            if parts.hostname in self.hosts:
+                return INTERNAL, parts.path or '/'
+            return EXTERNAL, target.split('#', 1)[0]
+        if parts.scheme:
+            return IGNORED, target
+        return INTERNAL, urlsplit(urljoin(page_url, target)).path
+
+    def resolves(self, path):
+        """True if the site serves path"""
+        normalised = self.normalise(path)
+        if normalised in self.urls:
+            return True
+        return any(normalised.startswith(prefix) or normalised + '/' == prefix
+                   for prefix in self.redirect_prefixes)
@@ -0,0 +1,158 @@
+"""
+Content-hash manifest for incremental post processing
+
+Records the mtime, size and SHA-256 of every post a script has looked at,
+together with the passes that post has already cleared. Scripts ask the
+manifest before reading a post, so reruns only touch new or edited files.
+
+Entries are keyed by path relative to the repository root and stored as a
+single JSON file under .cache/ (ignored by git and by Jekyll).
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from .files import atomic_write_text
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_MANIFEST_PATH = REPO_ROOT / '.cache' / 'post-manifest.json'
+MANIFEST_VERSION = 1
+
+
+def hash_bytes(data):
+    """Return the hex SHA-256 digest of bytes or str content"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path):
+    """Return the hex SHA-256 digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PostManifest:
+    """On-disk record of which posts have cleared which processing passes"""
+
+    def __init__(self, path=DEFAULT_MANIFEST_PATH, enabled=True):
+        self.path = Path(path)
+        self.enabled = enabled
+        self.entries = {}
+        self._dirty = False
+
+        if enabled:
+            self.load()
+
+    def load(self):
+        """Load entries from disk, starting empty if missing or unreadable"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get('version') == MANIFEST_VERSION:
+            self.entries = data.get('posts', {})
+
+    def save(self):
+        """Write entries back to disk if anything changed"""
+        if not self.enabled or not self._dirty:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.path, json.dumps(
+            {'version': MANIFEST_VERSION, 'posts': self.entries},
+            indent=1,
+            sort_keys=True
+        ))
+        self._dirty = False
+
+    def key(self, post_path):
+        """Manifest key for a post: path relative to the repo root where possible"""
+        path = Path(post_path).resolve()
+        try:
+            return path.relative_to(REPO_ROOT).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def is_current(self, post_path, pass_name):
+        """
+        Return True if post_path is unchanged since it last cleared pass_name.
+
+        A matching mtime and size is trusted without reading the file. If
+        either differs the file is hashed, so a touch without an edit still
+        counts as unchanged.
+        """
+        if not self.enabled:
+            return False
+
+        entry = self.entries.get(self.key(post_path))
+        if entry is None:
+            return False
+
+        st = os.stat(post_path)
+        if entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size:
+            return pass_name in entry['passes']
+
+        if entry['size'] == st.st_size and entry['sha256'] == hash_file(post_path):
+            entry['mtime_ns'] = st.st_mtime_ns
+            self._dirty = True
+            return pass_name in entry['passes']
+
+        return False
+
+    def mark(self, post_path, pass_name, content=None, digest=None):
+        """
+        Record that post_path, as it is on disk now, has cleared pass_name.
+
+        Pass the content just written to the file (or its digest, e.g. from
+        a worker process) if the caller has it, to avoid reading the file
+        again. Text read in text mode isn't the file's bytes when the post
+        has CRLF line endings, so content that doesn't match the file's size
+        is ignored and the file hashed instead. Passes recorded against an
+        older version of the file are dropped.
+        """
+        if not self.enabled:
+            return
+
+        key = self.key(post_path)
+        st = os.stat(post_path)
+        if digest is None and content is not None:
+            data = content.encode('utf-8')
+            if len(data) == st.st_size:
+                digest = hash_bytes(data)
+        if digest is None:
+            digest = hash_file(post_path)
+
+        entry = self.entries.get(key)
+        if entry is None or entry['sha256'] != digest:
+            entry = {'passes': []}
+            self.entries[key] = entry
+
+        entry['mtime_ns'] = st.st_mtime_ns
+        entry['size'] = st.st_size
+        entry['sha256'] = digest
+        if pass_name not in entry['passes']:
+            entry['passes'].append(pass_name)
+            entry['passes'].sort()
+        self._dirty = True
+
+    def pending(self, post_paths, pass_name):
+        """Return the subset of post_paths that still need pass_name"""
+        return [p for p in post_paths if not self.is_current(p, pass_name)]
+
+    def prune(self, posts_dir, post_paths):
+        """Drop entries under posts_dir for posts that are no longer in post_paths"""
+        prefix = self.key(posts_dir) + '/'
+        live = {self.key(p) for p in post_paths}
+        stale = [k for k in self.entries if k.startswith(prefix) and k not in live]
+        for key in stale:
+            del self.entries[key]
+        if stale:
+            self._dirty = True
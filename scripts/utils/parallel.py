@@ -0,0 +1,84 @@
+"""
+Process-pool helpers for the per-post scripts' --jobs option.
+
+Work is spread over worker processes but results always come back in input
+order, so output and stats are the same whatever the job count.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+def resolve_jobs(jobs):
+    """Turn a --jobs value into a worker count (0 means one per CPU)"""
+    if jobs is None or jobs < 0:
+        return 1
+    if jobs == 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def run_in_pool(func, items, jobs=1, initializer=None, initargs=()):
+    """
+    Yield func(item) for each item, in input order.
+
+    With jobs > 1 the calls run in a process pool, so func must be a
+    module-level function and items and results must be picklable. The
+    optional initializer runs once per worker (or once in-process when
+    running serially) to set up shared read-only state.
+    """
+    items = list(items)
+    jobs = min(resolve_jobs(jobs), max(len(items), 1))
+
+    if jobs <= 1:
+        if initializer:
+            initializer(*initargs)
+        for item in items:
+            yield func(item)
+        return
+
+    chunksize = max(1, len(items) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=initializer, initargs=initargs) as pool:
+        yield from pool.map(func, items, chunksize=chunksize)
+
+
+def stream_in_pool(func, items, jobs=1, initializer=None, initargs=(), window=None):
+    """
+    Yield (item, func(item)) for each item, in input order, consuming items lazily.
+
+    Like run_in_pool, but items may be a generator (e.g. a streaming parse):
+    at most window items (default four per worker) are in flight at once,
+    so memory stays flat however many items there are.
+    """
+    jobs = resolve_jobs(jobs)
+    if jobs <= 1:
+        if initializer:
+            initializer(*initargs)
+        for item in items:
+            yield item, func(item)
+        return
+
+    window = window or jobs * 4
+    in_flight = deque()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=initializer, initargs=initargs) as pool:
+        for item in items:
+            in_flight.append((item, pool.submit(func, item)))
+            if len(in_flight) >= window:
+                done, future = in_flight.popleft()
+                yield done, future.result()
+        while in_flight:
+            done, future = in_flight.popleft()
+            yield done, future.result()
+
+
+def merge_stats(total, part):
+    """Merge a worker's stats dict into total: numbers add, lists extend, dicts recurse"""
+    for key, value in part.items():
+        if isinstance(value, list):
+            total.setdefault(key, []).extend(value)
+        elif isinstance(value, dict):
+            merge_stats(total.setdefault(key, {}), value)
+        else:
+            total[key] = total.get(key, 0) + value
+    return total
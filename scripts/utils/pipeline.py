@@ -0,0 +1,220 @@
+"""
+Single-read post pipeline: one parse and one write per post for many passes
+
+Each post that any pass still needs is read once into a Post, the shared
+model of its text and front matter. Every ready pass then works on that
+Post in turn, in chain order, so later passes see earlier passes' edits.
+The file is written at most once, at the end. This replaces one full read,
+parse and write of the archive per script with one for all of them.
+
+A pass is a PostPass subclass:
+
+- label: short name for --passes, stats and post.results
+- name: the manifest pass name; bump its suffix when the pass's output changes
+- needs(path, manifest): whether a post has to be read for this pass
+- prepare(paths): parent-side setup, run only if some post needs the pass
+- apply(post): the per-post work, run in a worker process; returns a stats dict
+- collect(path, result): parent-side handling of what apply() left in
+  post.results, after the post has been written
+- finish(): parent-side work once every post is done
+
+Passes that need preparing (e.g. parsing a WordPress export) set ready to
+False until prepare() runs. A post is only rewritten by ready passes; any
+other pass it had cleared is dropped from the manifest if the content
+changes, so the pass runs on it next time.
+
+A post that fails (unreadable, or a pass raising) is recorded in
+stats['errors'] and the run carries on with the next one, so one bad post
+can't stop a --watch session. The passes before the failing one keep
+their edits and are marked; the failing pass and the ones after it are
+not, so they retry the post next run.
+"""
+
+from pathlib import Path
+
+import yaml
+
+from .files import atomic_write_text
+from .frontmatter import find_front_matter, parse_front_matter, set_front_matter_key, yaml_error_message
+from .manifest import PostManifest, hash_bytes, hash_file
+from .parallel import merge_stats, run_in_pool
+
+
+class Post:
+    """A post's text with its front matter parsed on first use"""
+
+    def __init__(self, path, text):
+        self.path = Path(path)
+        self.original = text
+        self.messages = []  # lines for the parent to print
+        self.results = {}   # pass label -> data for PostPass.collect()
+        self._text = text
+        self._front_matter = None
+        self._parsed = False
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        if value != self._text:
+            self._text = value
+            self._parsed = False
+
+    @property
+    def changed(self):
+        return self._text != self.original
+
+    @property
+    def front_matter(self):
+        """The front matter mapping, or None if the post has none"""
+        if not self._parsed:
+            self._front_matter = parse_front_matter(self._text)[0]
+            self._parsed = True
+        return self._front_matter
+
+    @property
+    def body_start(self):
+        """Offset of the body within text (0 without front matter)"""
+        span = find_front_matter(self._text)
+        return span.body_start if span else 0
+
+    def set_front_matter_key(self, key, value):
+        """Set one top-level key as a minimal text patch"""
+        self.text = set_front_matter_key(self._text, key, value)
+
+
+class PostPass:
+    """Base class for a pipeline pass; see the module docstring"""
+
+    label = None
+    name = None
+    ready = True
+
+    def needs(self, path, manifest):
+        return not manifest.is_current(path, self.name)
+
+    def prepare(self, paths):
+        pass
+
+    def apply(self, post):
+        return {}
+
+    def collect(self, path, result):
+        pass
+
+    def finish(self):
+        pass
+
+
+class PostPipeline:
+    """Run a chain of PostPasses over a posts directory"""
+
+    def __init__(self, passes, manifest=None, jobs=1):
+        self.passes = list(passes)
+        self.manifest = manifest or PostManifest()
+        self.jobs = jobs
+        self.stats = {
+            'posts_total': 0,
+            'posts_read': 0,
+            'posts_written': 0,
+            'passes': {p.label: {} for p in self.passes},
+            'errors': []
+        }
+
+    def run(self, posts_dir, paths=None):
+        """
+        Process every post in posts_dir that some pass needs; returns stats.
+
+        paths limits the run to those posts (e.g. the ones a watcher saw change).
+        """
+        posts_dir = Path(posts_dir)
+        all_posts = sorted(posts_dir.glob('*.md'))
+        self.stats['posts_total'] = len(all_posts)
+        if paths is None:
+            candidates = all_posts
+        else:
+            wanted = set(map(Path, paths))
+            candidates = [p for p in all_posts if p in wanted]
+
+        needed = {p.label: [path for path in candidates if p.needs(path, self.manifest)] for p in self.passes}
+        for pipeline_pass in self.passes:
+            if needed[pipeline_pass.label]:
+                pipeline_pass.prepare(needed[pipeline_pass.label])
+        ready = [p for p in self.passes if p.ready]
+
+        wanted = set()
+        for pipeline_pass in ready:
+            wanted.update(needed[pipeline_pass.label])
+        pending = [path for path in candidates if path in wanted]
+        self.stats['posts_read'] = len(pending)
+
+        results = run_in_pool(_process_post, pending, jobs=self.jobs,
+                              initializer=_init_worker, initargs=(ready,))
+        for path, (pass_stats, messages, results_by_pass, ran, written, digest, error) in zip(pending, results):
+            for line in messages:
+                print(line)
+            if error:
+                self.stats['errors'].append(f"Error processing {path.name}: {error}")
+                print(f"✗ {self.stats['errors'][-1]}")
+            merge_stats(self.stats['passes'], pass_stats)
+            self.stats['posts_written'] += written
+            for pipeline_pass in ready:
+                if pipeline_pass.label in ran:
+                    self.manifest.mark(path, pipeline_pass.name, digest=digest)
+                    pipeline_pass.collect(path, results_by_pass.get(pipeline_pass.label))
+
+        for pipeline_pass in ready:
+            pipeline_pass.finish()
+        self.manifest.prune(posts_dir, all_posts)
+        self.manifest.save()
+        return self.stats
+
+
+# Passes used by _process_post; set once per worker process
+_worker_passes = []
+
+
+def _init_worker(passes):
+    global _worker_passes
+    _worker_passes = passes
+
+
+def _process_post(path):
+    """
+    Read one post, run every ready pass over it and write it back once.
+
+    A pass that raises ends the chain for this post; the edits of the
+    passes before it are still written. Returns (per-pass stats, messages,
+    per-pass results, labels of the passes that ran, 1 if written else 0,
+    digest of the content on disk, error message or None).
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            post = Post(path, f.read())
+    except (OSError, UnicodeDecodeError) as e:
+        return {}, [], {}, [], 0, None, str(e)
+
+    pass_stats = {}
+    ran = []
+    error = None
+    for pipeline_pass in _worker_passes:
+        try:
+            pass_stats[pipeline_pass.label] = pipeline_pass.apply(post) or {}
+        except Exception as e:
+            message = yaml_error_message(e) if isinstance(e, yaml.YAMLError) else e
+            error = f"{pipeline_pass.label}: {message}"
+            break
+        ran.append(pipeline_pass.label)
+
+    written = 0
+    try:
+        if post.changed:
+            atomic_write_text(path, post.text)
+            written = 1
+        # Unchanged text was read in text mode, so hash the file itself (CRLF posts)
+        digest = hash_bytes(post.text) if written else hash_file(path)
+    except OSError as e:
+        return {}, post.messages, {}, [], 0, None, str(e)
+    return pass_stats, post.messages, post.results, ran, written, digest, error
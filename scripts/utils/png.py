@@ -0,0 +1,152 @@
+"""
+Minimal pure-Python PNG decoder and encoder
+
+Enough PNG for small images without Pillow: decode() reads 8-bit,
+non-interlaced greyscale, RGB, palette and alpha images into rows of RGB
+pixels (alpha composited onto a background colour); encode() writes RGB
+or RGBA rows as the smallest plain PNG, with no ancillary chunks beyond
+any tEXt entries asked for; text() reads them back.
+"""
+
+import struct
+import zlib
+
+SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Samples per pixel for each colour type
+_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+def _chunks(data):
+    if not data.startswith(SIGNATURE):
+        raise ValueError('not a PNG')
+    pos = len(SIGNATURE)
+    while pos + 8 <= len(data):
+        length, kind = struct.unpack_from('>I4s', data, pos)
+        body = data[pos + 8:pos + 8 + length]
+        if len(body) < length:
+            raise ValueError('truncated PNG chunk')
+        yield kind, body
+        pos += 12 + length
+        if kind == b'IEND':
+            return
+
+
+def _paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+def _unfilter(raw, width, height, bpp):
+    """Undo per-scanline filters; returns a list of bytearray rows"""
+    stride = width * bpp
+    rows = []
+    prior = bytearray(stride)
+    pos = 0
+    for _ in range(height):
+        kind = raw[pos]
+        row = bytearray(raw[pos + 1:pos + 1 + stride])
+        pos += 1 + stride
+        if kind == 1:
+            for i in range(bpp, stride):
+                row[i] = (row[i] + row[i - bpp]) & 0xFF
+        elif kind == 2:
+            for i in range(stride):
+                row[i] = (row[i] + prior[i]) & 0xFF
+        elif kind == 3:
+            for i in range(stride):
+                left = row[i - bpp] if i >= bpp else 0
+                row[i] = (row[i] + ((left + prior[i]) >> 1)) & 0xFF
+        elif kind == 4:
+            for i in range(stride):
+                left = row[i - bpp] if i >= bpp else 0
+                up_left = prior[i - bpp] if i >= bpp else 0
+                row[i] = (row[i] + _paeth(left, prior[i], up_left)) & 0xFF
+        elif kind != 0:
+            raise ValueError(f'unknown PNG filter {kind}')
+        rows.append(row)
+        prior = row
+    return rows
+
+
+def decode(data, background=(255, 255, 255)):
+    """(width, height, rows) for a PNG, each row a list of (r, g, b) tuples"""
+    header = None
+    palette = []
+    alpha = b''
+    idat = []
+    for kind, body in _chunks(data):
+        if kind == b'IHDR':
+            header = struct.unpack('>IIBBBBB', body)
+        elif kind == b'PLTE':
+            palette = [tuple(body[i:i + 3]) for i in range(0, len(body) - 2, 3)]
+        elif kind == b'tRNS':
+            alpha = body
+        elif kind == b'IDAT':
+            idat.append(body)
+    if not header:
+        raise ValueError('PNG has no IHDR chunk')
+
+    width, height, depth, colour, _compression, _filter, interlace = header
+    if depth != 8 or interlace or colour not in _CHANNELS:
+        raise ValueError(f'unsupported PNG (bit depth {depth}, colour type {colour}, interlace {interlace})')
+    channels = _CHANNELS[colour]
+    rows = _unfilter(zlib.decompress(b''.join(idat)), width, height, channels)
+
+    def blend(r, g, b, a):
+        if a == 255:
+            return r, g, b
+        return tuple((c * a + bg * (255 - a)) // 255 for c, bg in zip((r, g, b), background))
+
+    pixels = []
+    for row in rows:
+        out = []
+        for x in range(width):
+            sample = row[x * channels:(x + 1) * channels]
+            if colour == 0:
+                out.append((sample[0],) * 3)
+            elif colour == 2:
+                out.append(tuple(sample))
+            elif colour == 3:
+                index = sample[0]
+                a = alpha[index] if index < len(alpha) else 255
+                out.append(blend(*palette[index], a))
+            elif colour == 4:
+                out.append(blend(sample[0], sample[0], sample[0], sample[1]))
+            else:
+                out.append(blend(*sample))
+        pixels.append(out)
+    return width, height, pixels
+
+
+def _chunk(kind, body):
+    return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body))
+
+
+def encode(rows, text=None):
+    """PNG bytes for rows of (r, g, b) or (r, g, b, a) tuples, with optional tEXt entries"""
+    height = len(rows)
+    width = len(rows[0]) if rows else 0
+    colour = 6 if rows and len(rows[0][0]) == 4 else 2
+    raw = b''.join(b'\0' + bytes(c for pixel in row for c in pixel) for row in rows)
+    chunks = [_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, colour, 0, 0, 0))]
+    for key, value in (text or {}).items():
+        chunks.append(_chunk(b'tEXt', key.encode('latin-1') + b'\0' + value.encode('latin-1')))
+    chunks.append(_chunk(b'IDAT', zlib.compress(raw, 9)))
+    chunks.append(_chunk(b'IEND', b''))
+    return SIGNATURE + b''.join(chunks)
+
+
+def text(data):
+    """{key: value} of the tEXt chunks ahead of a PNG's image data (where encode() puts them)"""
+    entries = {}
+    for kind, body in _chunks(data):
+        if kind == b'tEXt' and b'\0' in body:
+            key, value = body.split(b'\0', 1)
+            entries[key.decode('latin-1')] = value.decode('latin-1')
+        elif kind == b'IDAT':
+            break
+    return entries
@@ -0,0 +1,92 @@
+"""
+Jekyll post metadata: slugs, dates and URLs as the site builds them
+
+The site uses `permalink: /:title/`, so a post's URL is its filename slug
+(or its `slug` front matter) unless the post sets its own `permalink`.
+Dates are shown in the site's timezone (`timezone:` in _config.yml).
+"""
+
+import re
+from datetime import date, datetime, timezone
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+
+POST_FILENAME_RE = re.compile(r'^(\d{4})-(\d{2})-(\d{2})-(.+)$')
+DEFAULT_PERMALINK = '/:title/'
+
+# Characters Jekyll's "pretty" slugify mode keeps
+_SLUG_STRIP_RE = re.compile(r"[^A-Za-z0-9._~!$&'()+,;=@]+")
+
+_DATE_FORMATS = (
+    '%Y-%m-%d %H:%M:%S %z',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M %z',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%dT%H:%M:%S%z',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d',
+)
+
+
+def slugify(value):
+    """Slugify like Jekyll's "pretty" mode, keeping case"""
+    return _SLUG_STRIP_RE.sub('-', value).strip('-')
+
+
+def post_slug(path, front_matter=None):
+    """The :title placeholder for a post: its slug front matter or filename slug"""
+    if front_matter and front_matter.get('slug'):
+        return slugify(str(front_matter['slug']))
+    stem = path.stem
+    match = POST_FILENAME_RE.match(stem)
+    return slugify(match.group(4) if match else stem)
+
+
+def post_url(path, front_matter=None, permalink=DEFAULT_PERMALINK):
+    """Site-relative URL of a post"""
+    if front_matter and front_matter.get('permalink'):
+        return str(front_matter['permalink'])
+    return permalink.replace(':title', post_slug(path, front_matter))
+
+
+def site_timezone(name):
+    """tzinfo for a _config.yml timezone name, or UTC if it can't be loaded"""
+    if name and ZoneInfo is not None:
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return timezone.utc
+
+
+def parse_date(value):
+    """datetime for a front matter date (string, date or datetime), or None"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def post_date(path, front_matter=None, tz=timezone.utc):
+    """A post's date in tz: from front matter, else from the filename"""
+    value = parse_date((front_matter or {}).get('date'))
+    if value is None:
+        match = POST_FILENAME_RE.match(path.stem)
+        if not match:
+            return None
+        value = datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+    if value.tzinfo is None:
+        return value.replace(tzinfo=tz)
+    return value.astimezone(tz)
@@ -0,0 +1,340 @@
+"""
+Cloudinary reference index across the whole site source
+
+Finds every Cloudinary image a built page can use, not just full delivery
+URLs in posts:
+
+- res.cloudinary.com delivery URLs in posts, pages, _data, _includes and
+  _layouts (transformations and version segments are skipped)
+- featured_image / image values in front matter and _data files
+- src="..." arguments to {% include cloudinary-image.html %}
+
+Bare public_ids without a folder are resolved the way the site renders
+them: the cloudinary_default_folder from _config.yml is prepended, as
+featured-image.html, cloudinary-image.html and the inject_cloudinary_folder
+filter do.
+
+DeliveryURL and split_url_path() are the one parser of delivery URLs that
+the post-rewriting scripts share with the index.
+
+The result is an inverted index of public_id -> referencing files, stored
+in .cache/cloudinary-references.json with each file's mtime and size, so
+update() only rescans files that changed and edits the index in place.
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+
+import yaml
+
+from .files import atomic_write_text
+from .manifest import REPO_ROOT
+
+DEFAULT_INDEX_PATH = REPO_ROOT / '.cache' / 'cloudinary-references.json'
+
+# Bump when the extraction rules change, to force a full rescan
+INDEX_VERSION = 2
+
+# (directory, glob) pairs scanned relative to the site root
+SOURCES = (
+    ('_posts', '**/*.md'),
+    ('_pages', '**/*.md'),
+    ('_pages', '**/*.html'),
+    ('_data', '**/*.yml'),
+    ('_data', '**/*.yaml'),
+    ('_data', '**/*.json'),
+    ('_includes', '**/*.html'),
+    ('_layouts', '**/*.html'),
+    ('.', '*.md'),
+    ('.', '*.html'),
+)
+
+IMAGE_EXTENSION_RE = re.compile(r'\.(?:jpe?g|png|gif|webp|avif|svg)$', re.IGNORECASE)
+FRONT_MATTER_RE = re.compile(r'\A---\r?\n(.*?)\r?\n---\r?\n', re.DOTALL)
+IMAGE_KEY_RE = re.compile(
+    r'^[ \t-]*(?:featured_image|image|public_id):[ \t]*["\']?([^"\'\s#]+)',
+    re.MULTILINE
+)
+INCLUDE_RE = re.compile(r'\{%-?\s*include\s+cloudinary-image\.html\b(.*?)-?%\}', re.DOTALL)
+INCLUDE_SRC_RE = re.compile(r'\bsrc\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+VERSION_SEGMENT_RE = re.compile(r'^v\d+$')
+DELIVERY_URL_RE = re.compile(
+    r'^(?P<base>https?://res\.cloudinary\.com/(?P<cloud>[^/\s]+)/image/upload)/(?P<path>[^\s?#]+)$'
+)
+TRANSFORMATION_COMPONENT_RE = re.compile(r'^[a-z]{1,3}_[^,/]+$')
+
+
+def site_config(site_dir):
+    """Return the parsed _config.yml for a site, or {} if it can't be read"""
+    try:
+        with open(Path(site_dir) / '_config.yml', 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError):
+        return {}
+
+
+def is_transformation(segment):
+    """True if a delivery URL path segment is a transformation, e.g. `c_limit,w_800`"""
+    return all(TRANSFORMATION_COMPONENT_RE.match(part) for part in segment.split(','))
+
+
+def split_url_path(path):
+    """
+    (transformation segments, asset path) for the part of a delivery URL
+    after /image/upload/.
+
+    Leading segments made only of `<key>_<value>` components are
+    transformations; the asset path is what follows, [v<version>/]<public_id>[.<ext>].
+    The last segment is always part of the asset.
+    """
+    segments = [s for s in path.split('/') if s]
+    count = 0
+    while count < len(segments) - 1 and is_transformation(segments[count]):
+        count += 1
+    return segments[:count], '/'.join(segments[count:])
+
+
+def asset_public_id(asset):
+    """public_id of an asset path: no version segment or image extension"""
+    segments = asset.split('/')
+    if len(segments) > 1 and VERSION_SEGMENT_RE.match(segments[0]):
+        segments = segments[1:]
+    return IMAGE_EXTENSION_RE.sub('', '/'.join(segments))
+
+
+class DeliveryURL:
+    """A parsed image delivery URL: base, transformation segments and the asset path"""
+
+    def __init__(self, base, cloud_name, transformations, asset):
+        self.base = base
+        self.cloud_name = cloud_name
+        self.transformations = transformations  # ['c_limit,w_800,q_auto,f_auto', ...]
+        self.asset = asset                      # [v<version>/]<public_id>[.<ext>]
+
+    @classmethod
+    def parse(cls, url):
+        """DeliveryURL for a Cloudinary image URL, or None for anything else"""
+        match = DELIVERY_URL_RE.match(url.strip())
+        if not match:
+            return None
+        transformations, asset = split_url_path(match.group('path'))
+        if not asset or VERSION_SEGMENT_RE.match(asset):
+            return None
+        return cls(match.group('base'), match.group('cloud'), transformations, asset)
+
+    @property
+    def public_id(self):
+        """The asset path without its version segment or image extension"""
+        return asset_public_id(self.asset)
+
+    @property
+    def components(self):
+        """Every transformation component, in order"""
+        return [part for segment in self.transformations for part in segment.split(',')]
+
+    def with_transformation(self, transformation):
+        """URL of the same asset with the transformation replaced"""
+        return f'{self.base}/{transformation}/{self.asset}' if transformation else f'{self.base}/{self.asset}'
+
+
+class ReferenceExtractor:
+    """Compiled patterns for pulling Cloudinary public_ids out of source text"""
+
+    def __init__(self, cloud_name='circleseven', default_folder=''):
+        self.cloud_name = cloud_name
+        self.default_folder = (default_folder or '').strip('/')
+        self.url_re = re.compile(
+            r'https?://res\.cloudinary\.com/' + re.escape(cloud_name) +
+            r'/image/upload/([^\s"\'<>()\[\]{}$`,]+(?:,[^\s"\'<>()\[\]{}$`,]+)*)'
+        )
+
+    def with_folder(self, public_id):
+        """Prepend the default folder to a bare public_id, as the site templates do"""
+        if '/' not in public_id and self.default_folder:
+            return f'{self.default_folder}/{public_id}'
+        return public_id
+
+    def from_url_path(self, path):
+        """
+        public_id for the part of a delivery URL after /image/upload/.
+
+        Transformation segments (see split_url_path()) and the version
+        segment are dropped; what's left is the folder path and name.
+        """
+        path = path.split('?', 1)[0].split('#', 1)[0]
+        if path.endswith('/'):
+            # The name is a template expression the URL pattern stopped at
+            return None
+        _transformations, asset = split_url_path(path)
+        public_id = asset_public_id(asset)
+        if not public_id or public_id.endswith('/'):
+            return None
+        return self.with_folder(public_id)
+
+    def from_value(self, value):
+        """public_id for a front matter / include value: a delivery URL or a bare ID"""
+        value = value.strip().strip('"\'')
+        if not value or '{{' in value or '{%' in value:
+            return None
+
+        if '://' in value:
+            match = self.url_re.match(value)
+            return self.from_url_path(match.group(1)) if match else None
+
+        if value.startswith('/'):
+            # Site-relative path to a local asset, not a Cloudinary image
+            return None
+        return self.with_folder(IMAGE_EXTENSION_RE.sub('', value))
+
+    def extract(self, text, is_data=False):
+        """Return the set of public_ids referenced in one file's text"""
+        ids = set()
+
+        for match in self.url_re.finditer(text):
+            public_id = self.from_url_path(match.group(1))
+            if public_id:
+                ids.add(public_id)
+
+        if is_data:
+            key_text = text
+        else:
+            front_matter = FRONT_MATTER_RE.match(text)
+            key_text = front_matter.group(1) if front_matter else ''
+        for match in IMAGE_KEY_RE.finditer(key_text):
+            public_id = self.from_value(match.group(1))
+            if public_id:
+                ids.add(public_id)
+
+        for include in INCLUDE_RE.finditer(text):
+            src = INCLUDE_SRC_RE.search(include.group(1))
+            if src:
+                public_id = self.from_value(src.group(1) or src.group(2) or '')
+                if public_id:
+                    ids.add(public_id)
+
+        return ids
+
+
+class ReferenceIndex:
+    """Persistent public_id -> referencing files index, updated incrementally"""
+
+    def __init__(self, site_dir='.', cloud_name='circleseven', default_folder=None,
+                 path=DEFAULT_INDEX_PATH):
+        self.site_dir = Path(site_dir)
+        if default_folder is None:
+            default_folder = site_config(self.site_dir).get('cloudinary_default_folder', '')
+        self.extractor = ReferenceExtractor(cloud_name, default_folder)
+        self.path = Path(path) if path else None
+        self.files = {}  # relative path -> {'mtime_ns', 'size', 'ids'}
+        self.index = {}  # public_id -> set of relative paths
+        self.stats = {
+            'files': 0,
+            'files_rescanned': 0,
+            'files_removed': 0
+        }
+        self.load()
+
+    def _signature(self):
+        return {
+            'version': INDEX_VERSION,
+            'cloud_name': self.extractor.cloud_name,
+            'default_folder': self.extractor.default_folder
+        }
+
+    def load(self):
+        """Load a saved index if it was built with the same settings"""
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if any(data.get(k) != v for k, v in self._signature().items()):
+            return
+
+        self.files = data.get('files', {})
+        self.index = {public_id: set(files) for public_id, files in data.get('index', {}).items()}
+
+    def save(self):
+        """Write the index to disk"""
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = self._signature()
+        data['files'] = self.files
+        data['index'] = {public_id: sorted(files) for public_id, files in self.index.items()}
+        atomic_write_text(self.path, json.dumps(data, separators=(',', ':'), sort_keys=True))
+
+    def source_files(self):
+        """Yield (relative path, path) for every file that can reference images"""
+        seen = set()
+        for directory, pattern in SOURCES:
+            base = self.site_dir / directory
+            if not base.is_dir():
+                continue
+            for path in sorted(base.glob(pattern)):
+                if not path.is_file():
+                    continue
+                rel = path.relative_to(self.site_dir).as_posix()
+                if rel not in seen:
+                    seen.add(rel)
+                    yield rel, path
+
+    def _set_file_ids(self, rel, ids):
+        """Replace one file's entries in the inverted index"""
+        old = self.files.get(rel, {}).get('ids', [])
+        for public_id in old:
+            files = self.index.get(public_id)
+            if files:
+                files.discard(rel)
+                if not files:
+                    del self.index[public_id]
+        for public_id in ids:
+            self.index.setdefault(public_id, set()).add(rel)
+
+    def is_current(self, rel, path):
+        """True if the entry for rel matches path's mtime and size"""
+        st = os.stat(path)
+        entry = self.files.get(rel)
+        return bool(entry) and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size
+
+    def record(self, rel, path, ids):
+        """Store the public_ids found in a file, as it is on disk now"""
+        st = os.stat(path)
+        ids = sorted(ids)
+        self._set_file_ids(rel, ids)
+        self.files[rel] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'ids': ids}
+
+    def remove(self, rel):
+        """Drop a file that no longer exists"""
+        self._set_file_ids(rel, [])
+        del self.files[rel]
+
+    def update(self):
+        """Rescan new and changed files, drop deleted ones, and save"""
+        live = set()
+        for rel, path in self.source_files():
+            live.add(rel)
+            if self.is_current(rel, path):
+                continue
+
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                text = f.read()
+            self.record(rel, path, self.extractor.extract(text, is_data=rel.startswith('_data/')))
+            self.stats['files_rescanned'] += 1
+
+        for rel in [r for r in self.files if r not in live]:
+            self.remove(rel)
+            self.stats['files_removed'] += 1
+
+        self.stats['files'] = len(self.files)
+        self.save()
+        return self.stats
+
+    def references(self):
+        """Return {public_id: sorted referencing files}"""
+        return {public_id: sorted(files) for public_id, files in self.index.items()}
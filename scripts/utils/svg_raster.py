@@ -0,0 +1,276 @@
+"""
+Rasterise simple flat SVG artwork without external libraries
+
+Covers what the site's logo and favicon use: <circle>, <rect> and
+<polygon>/<path> outlines made of straight lines (M, L, H, V, Z and
+their relative forms), solid fills with opacity, and <g> groups with
+translate() transforms. Anything else raises ValueError rather than
+rendering wrongly.
+
+render() draws one hard-edged master image at a large size, filling
+each shape row by row as spans. A span is composited onto premultiplied
+RGBA channel rows in a single bytes.translate() call, so drawing costs a
+few C-level operations per row. resize() then box-filters the master to
+each target size, which is what antialiases the edges. It sums rows with
+itertools.accumulate rather than looping per pixel.
+"""
+
+import math
+import re
+import xml.etree.ElementTree as ET
+from itertools import accumulate
+
+_NUMBER_RE = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+_PATH_TOKEN_RE = re.compile(r'[MmLlHhVvZz]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+_TRANSLATE_RE = re.compile(r'^\s*translate\(\s*([^,\s)]+)(?:[\s,]+([^)\s]+))?\s*\)\s*$')
+_NAMED_COLOURS = {'white': (255, 255, 255), 'black': (0, 0, 0)}
+
+
+def parse_colour(value):
+    """(r, g, b) for #rgb, #rrggbb or a basic colour name; None for `none`"""
+    value = value.strip().lower()
+    if value == 'none':
+        return None
+    if value in _NAMED_COLOURS:
+        return _NAMED_COLOURS[value]
+    if value.startswith('#') and len(value) in (4, 7):
+        digits = value[1:]
+        if len(digits) == 3:
+            digits = ''.join(c * 2 for c in digits)
+        return tuple(int(digits[i:i + 2], 16) for i in (0, 2, 4))
+    raise ValueError(f'unsupported colour {value!r}')
+
+
+def _path_points(d):
+    """Closed polygons (lists of (x, y)) for a straight-line path"""
+    polygons = []
+    points = []
+    x = y = 0.0
+    command = None
+    tokens = _PATH_TOKEN_RE.findall(d)
+    pos = 0
+
+    def number():
+        nonlocal pos
+        pos += 1
+        return float(tokens[pos - 1])
+
+    while pos < len(tokens):
+        if tokens[pos].isalpha():
+            command = tokens[pos]
+            pos += 1
+            if command in 'Zz':
+                if points:
+                    polygons.append(points)
+                    x, y = points[0]
+                points = []
+                continue
+        elif command is None:
+            raise ValueError('path data must start with a command')
+
+        relative = command.islower()
+        kind = command.upper()
+        if kind in 'ML':
+            dx, dy = number(), number()
+            x, y = (x + dx, y + dy) if relative else (dx, dy)
+            if kind == 'M':
+                if points:
+                    polygons.append(points)
+                points = []
+                # Further pairs after a moveto are linetos
+                command = 'l' if relative else 'L'
+        elif kind == 'H':
+            value = number()
+            x = x + value if relative else value
+        elif kind == 'V':
+            value = number()
+            y = y + value if relative else value
+        else:
+            raise ValueError(f'unsupported path command {command!r}')
+        points.append((x, y))
+
+    if points:
+        polygons.append(points)
+    return polygons
+
+
+class Shape:
+    """A filled outline: polygons or a circle, in master image pixels"""
+
+    def __init__(self, colour, opacity, polygons=None, circle=None):
+        self.colour = colour
+        self.opacity = opacity
+        self.polygons = polygons or []
+        self.circle = circle  # (cx, cy, r)
+
+    def spans(self, y):
+        """(x0, x1) pixel ranges covered on row y, sampled at pixel centres"""
+        yc = y + 0.5
+        if self.circle:
+            cx, cy, r = self.circle
+            dy = yc - cy
+            if abs(dy) >= r:
+                return []
+            half = math.sqrt(r * r - dy * dy)
+            return [(math.ceil(cx - half - 0.5), math.floor(cx + half - 0.5) + 1)]
+
+        # Even-odd fill over every polygon's edges
+        crossings = []
+        for points in self.polygons:
+            for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]):
+                if (y1 <= yc < y2) or (y2 <= yc < y1):
+                    crossings.append(x1 + (yc - y1) * (x2 - x1) / (y2 - y1))
+        crossings.sort()
+        return [(math.ceil(a - 0.5), math.floor(b - 0.5) + 1) for a, b in zip(crossings[::2], crossings[1::2])]
+
+
+def _number(element, name, default=0.0):
+    match = _NUMBER_RE.match(element.get(name, '').strip())
+    return float(match.group()) if match else default
+
+
+def parse_svg(text, size):
+    """Shapes of an SVG scaled so its viewBox fills a size x size image"""
+    root = ET.fromstring(text)
+    view_box = [float(v) for v in _NUMBER_RE.findall(root.get('viewBox', ''))]
+    if len(view_box) != 4:
+        view_box = [0, 0, _number(root, 'width', size), _number(root, 'height', size)]
+    min_x, min_y, width, height = view_box
+    scale = size / max(width, height)
+
+    shapes = []
+
+    def walk(element, offset, inherited):
+        tag = element.tag.rsplit('}', 1)[-1]
+        # fill and fill-opacity are inherited; opacity applies to the element as a whole
+        style = dict(inherited)
+        for name in ('fill', 'fill-opacity'):
+            if element.get(name) is not None:
+                style[name] = element.get(name)
+        opacity = style.get('group_opacity', 1.0) * float(element.get('opacity', 1))
+
+        transform = element.get('transform')
+        if transform:
+            match = _TRANSLATE_RE.match(transform)
+            if not match:
+                raise ValueError(f'unsupported transform {transform!r}')
+            offset = (offset[0] + float(match.group(1)), offset[1] + float(match.group(2) or 0))
+
+        def to_pixels(x, y):
+            return ((x + offset[0] - min_x) * scale, (y + offset[1] - min_y) * scale)
+
+        if tag in ('svg', 'g'):
+            style['group_opacity'] = opacity
+            for child in element:
+                walk(child, offset, style)
+            return
+        if tag in ('title', 'desc', 'defs', 'metadata'):
+            return
+
+        colour = parse_colour(style.get('fill', 'black'))
+        if colour is None:
+            return
+        alpha = opacity * float(style.get('fill-opacity', 1))
+
+        if tag == 'circle':
+            cx, cy = to_pixels(_number(element, 'cx'), _number(element, 'cy'))
+            shapes.append(Shape(colour, alpha, circle=(cx, cy, _number(element, 'r') * scale)))
+        elif tag == 'rect':
+            x, y = _number(element, 'x'), _number(element, 'y')
+            w, h = _number(element, 'width'), _number(element, 'height')
+            corners = [to_pixels(*p) for p in ((x, y), (x + w, y), (x + w, y + h), (x, y + h))]
+            shapes.append(Shape(colour, alpha, polygons=[corners]))
+        elif tag == 'polygon':
+            values = [float(v) for v in _NUMBER_RE.findall(element.get('points', ''))]
+            points = [to_pixels(values[i], values[i + 1]) for i in range(0, len(values) - 1, 2)]
+            shapes.append(Shape(colour, alpha, polygons=[points]))
+        elif tag == 'path':
+            polygons = [[to_pixels(*p) for p in points] for points in _path_points(element.get('d', ''))]
+            shapes.append(Shape(colour, alpha, polygons=polygons))
+        else:
+            raise ValueError(f'unsupported SVG element <{tag}>')
+
+    walk(root, (0.0, 0.0), {})
+    return shapes
+
+
+class Image:
+    """Square premultiplied RGBA image stored as one bytearray per channel"""
+
+    def __init__(self, size, background=None):
+        self.size = size
+        fill = list(background) + [255] if background else [0, 0, 0, 0]
+        self.channels = [bytearray([value]) * (size * size) for value in fill]
+
+    def fill_span(self, y, x0, x1, colour, alpha):
+        x0, x1 = max(0, x0), min(self.size, x1)
+        if x0 >= x1:
+            return
+        start, end = y * self.size + x0, y * self.size + x1
+        # Source-over on premultiplied values is out = src * alpha + dst * (1 - alpha)
+        for channel, value in zip(self.channels, tuple(colour) + (255,)):
+            table = _blend_table(value, alpha)
+            channel[start:end] = channel[start:end].translate(table)
+
+    def draw(self, shapes):
+        for shape in shapes:
+            for y in range(self.size):
+                for x0, x1 in shape.spans(y):
+                    self.fill_span(y, x0, x1, shape.colour, shape.opacity)
+        return self
+
+    def rows(self):
+        """Rows of straight-alpha (r, g, b, a) tuples, for encoding"""
+        r, g, b, a = self.channels
+        rows = []
+        for y in range(self.size):
+            row = []
+            for i in range(y * self.size, (y + 1) * self.size):
+                alpha = a[i]
+                if alpha in (0, 255):
+                    row.append((r[i], g[i], b[i], alpha) if alpha else (0, 0, 0, 0))
+                else:
+                    row.append(tuple(min(255, round(c[i] * 255 / alpha)) for c in (r, g, b)) + (alpha,))
+            rows.append(row)
+        return rows
+
+
+_BLEND_TABLES = {}
+
+
+def _blend_table(value, alpha):
+    key = (value, alpha)
+    if key not in _BLEND_TABLES:
+        _BLEND_TABLES[key] = bytes(min(255, round(value * alpha + d * (1 - alpha))) for d in range(256))
+    return _BLEND_TABLES[key]
+
+
+def render(svg_text, size, background=None):
+    """Hard-edged size x size Image of an SVG, optionally on an opaque background"""
+    return Image(size, background).draw(parse_svg(svg_text, size))
+
+
+def _bounds(source, target):
+    """Source pixel ranges averaged into each target pixel"""
+    edges = [round(i * source / target) for i in range(target + 1)]
+    return list(zip(edges, edges[1:]))
+
+
+def resize(image, size):
+    """Box-filtered size x size copy of a (larger) Image"""
+    bounds = _bounds(image.size, size)
+    result = Image(size)
+    for index, channel in enumerate(image.channels):
+        # Horizontal pass: per-row prefix sums give each box's total
+        columns = []
+        for y in range(image.size):
+            sums = [0] + list(accumulate(channel[y * image.size:(y + 1) * image.size]))
+            columns.append([sums[x1] - sums[x0] for x0, x1 in bounds])
+        # Vertical pass: add up each box's rows
+        out = result.channels[index]
+        for ty, (y0, y1) in enumerate(bounds):
+            totals = [sum(values) for values in zip(*columns[y0:y1])]
+            rows = y1 - y0
+            for tx, (x0, x1) in enumerate(bounds):
+                out[ty * size + tx] = round(totals[tx] / (rows * (x1 - x0)))
+    return result
@@ -0,0 +1,189 @@
+"""
+Synthetic site corpus for benchmarking the maintenance scripts
+
+Generates inputs shaped like the real ones at any size:
+
+- Jekyll posts with front matter and Cloudinary galleries like those in
+  _posts/ (width/height on gallery images, some already lazy-loaded)
+- a WordPress WXR export with an attachment and a _thumbnail_id for every
+  post, plus the post content, for FeaturedImageExtractor
+- a Cloudinary resource listing covering the referenced images, minus a
+  few "missing" ones and plus some unused uploads, for CloudinaryAuditor
+
+Everything is derived from (seed, post index), so nothing is held in memory
+between steps and the same arguments always give byte-identical output.
+Files are streamed to disk, so 100k-post corpora are fine.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+from xml.sax.saxutils import escape
+
+CLOUD_NAME = 'circleseven'
+DELIVERY_URL = f'https://res.cloudinary.com/{CLOUD_NAME}/image/upload'
+UPLOADS_URL = 'https://circleseven.co.uk/wp-content/uploads'
+
+CATEGORIES = ('Projects', 'Photography', 'Art', 'Digital Art', 'Motion Graphics', 'Academic')
+WORDS = (
+    'derelict house walk photography engine dartmoor kuka robot arm digital '
+    'media sound installation projection light gallery exhibition camera lens '
+    'river bridge stone mill sketch render animation interface prototype study'
+).split()
+
+START_DATE = datetime(2008, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class SyntheticPost:
+    """Deterministic content of one generated post"""
+
+    def __init__(self, index, seed=0, missing_ratio=0.01):
+        rng = random.Random(seed * 1_000_003 + index)
+        self.index = index
+        self.date = START_DATE + timedelta(hours=7 * index)
+        self.slug = f'{"-".join(rng.sample(WORDS, 3))}-{index}'
+        self.title = f'{" ".join(rng.sample(WORDS, 4)).capitalize()} {index}'
+        self.categories = rng.sample(CATEGORIES, rng.randint(1, 2))
+        self.paragraphs = [' '.join(rng.choices(WORDS, k=rng.randint(20, 80))).capitalize() + '.'
+                           for _ in range(rng.randint(1, 4))]
+        month = f'{self.date.month:02d}'
+        self.images = [f'{month}/img-{index}-{n}' for n in range(rng.randint(1, 8))]
+        self.sizes = [(rng.choice((300, 640, 800)), rng.choice((200, 300, 450)))
+                      for _ in self.images]
+        self.lazy = rng.random() < 0.5
+        self.missing = {public_id for public_id in self.images if rng.random() < missing_ratio}
+        self.attachment_id = 1_000_000 + index
+
+    @property
+    def filename(self):
+        return f'{self.date:%Y-%m-%d}-{self.slug}.md'
+
+    def body(self):
+        figures = []
+        for public_id, (width, height) in zip(self.images, self.sizes):
+            url = f'{DELIVERY_URL}/q_auto,f_auto/{public_id}'
+            lazy = ' loading="lazy"' if self.lazy else ''
+            figures.append(f'<figure><a href="{url}"><img src="{url}" width="{width}" '
+                           f'height="{height}" alt="{self.title}"{lazy}></a></figure>')
+        return (self.paragraphs[0] + '\n\n<div class="gallery">\n\n' + '\n'.join(figures) +
+                '\n\n</div>\n\n' + '\n\n'.join(self.paragraphs[1:]) + '\n')
+
+    def render(self):
+        categories = ''.join(f'  - {category}\n' for category in self.categories)
+        return (f'---\nlayout: post\ntitle: {self.title}\n'
+                f'date: {self.date:%Y-%m-%d %H:%M:%S} +0000\n'
+                f'categories:\n{categories}---\n{self.body()}')
+
+
+class SyntheticCorpus:
+    """A generated site of count posts under root"""
+
+    def __init__(self, root, count, seed=0, missing_ratio=0.01, unused_ratio=0.05):
+        self.root = root
+        self.count = count
+        self.seed = seed
+        self.missing_ratio = missing_ratio
+        self.unused_ratio = unused_ratio
+        self.posts_dir = root / '_posts'
+        self.wxr_path = root / 'export.xml'
+
+    def posts(self):
+        """Yield every SyntheticPost in order"""
+        for index in range(self.count):
+            yield SyntheticPost(index, self.seed, self.missing_ratio)
+
+    def write_posts(self):
+        """Write the posts to root/_posts; returns the number written"""
+        self.posts_dir.mkdir(parents=True, exist_ok=True)
+        for post in self.posts():
+            with open(self.posts_dir / post.filename, 'w', encoding='utf-8') as f:
+                f.write(post.render())
+        return self.count
+
+    def write_wxr(self):
+        """Stream a WXR export with one attachment and one post item per post"""
+        with open(self.wxr_path, 'w', encoding='utf-8') as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<rss version="2.0"\n'
+                    '  xmlns:content="http://purl.org/rss/1.0/modules/content/"\n'
+                    '  xmlns:wp="http://wordpress.org/export/1.2/">\n'
+                    '<channel>\n<title>Synthetic export</title>\n')
+            for post in self.posts():
+                name = post.images[0].split('/')[-1]
+                f.write(
+                    f'<item><title>attachment {post.attachment_id}</title>'
+                    f'<wp:post_id>{post.attachment_id}</wp:post_id>'
+                    f'<wp:post_type>attachment</wp:post_type>'
+                    f'<wp:attachment_url>{UPLOADS_URL}/{post.date:%Y/%m}/{name}.jpg</wp:attachment_url>'
+                    f'</item>\n'
+                    f'<item><title>{escape(post.title)}</title>'
+                    f'<content:encoded><![CDATA[{post.body()}]]></content:encoded>'
+                    f'<wp:post_id>{post.index + 1}</wp:post_id>'
+                    f'<wp:post_name>{post.slug}</wp:post_name>'
+                    f'<wp:post_type>post</wp:post_type>'
+                    f'<wp:postmeta><wp:meta_key>_edit_last</wp:meta_key><wp:meta_value>1</wp:meta_value></wp:postmeta>'
+                    f'<wp:postmeta><wp:meta_key>_thumbnail_id</wp:meta_key>'
+                    f'<wp:meta_value>{post.attachment_id}</wp:meta_value></wp:postmeta>'
+                    f'</item>\n'
+                )
+            f.write('</channel>\n</rss>\n')
+        return self.wxr_path
+
+    def resources(self):
+        """Cloudinary Admin API resource dicts for the library the corpus expects"""
+        rng = random.Random(self.seed)
+        listing = []
+        for post in self.posts():
+            for public_id, (width, height) in zip(post.images, post.sizes):
+                if public_id not in post.missing:
+                    listing.append(_resource(public_id, post.date, width, height))
+            if rng.random() < self.unused_ratio:
+                listing.append(_resource(f'{post.date:%m}/unused-{post.index}', post.date, 800, 600))
+        return listing
+
+
+def _resource(public_id, date, width, height):
+    return {
+        'public_id': public_id,
+        'format': 'jpg',
+        'resource_type': 'image',
+        'type': 'upload',
+        'created_at': date.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'bytes': width * height // 4,
+        'width': width,
+        'height': height
+    }
+
+
+class SyntheticCloudinaryAPI:
+    """
+    In-process resources() listing over a fixed set of resource dicts.
+
+    Pages by max_results/next_cursor and honours prefix, start_at and
+    direction the way the Admin API does, so CloudinaryAssetCache can sync
+    from it without a network.
+    """
+
+    def __init__(self, resources):
+        self.library = sorted(resources, key=lambda r: r['created_at'])
+        self._listings = {}
+
+    def _listing(self, prefix, start_at, ascending):
+        # Filter once per distinct query, not once per page
+        key = (prefix, start_at, ascending)
+        if key not in self._listings:
+            listing = self.library
+            if prefix:
+                listing = [r for r in listing if r['public_id'].startswith(prefix)]
+            if start_at:
+                listing = [r for r in listing if r['created_at'] >= start_at]
+            self._listings[key] = listing if ascending else listing[::-1]
+        return self._listings[key]
+
+    def resources(self, type='upload', max_results=10, next_cursor=None,
+                  prefix=None, start_at=None, direction='desc'):
+        listing = self._listing(prefix, start_at, direction in ('asc', 1))
+        offset = int(next_cursor or 0)
+        result = {'resources': listing[offset:offset + max_results]}
+        if offset + max_results < len(listing):
+            result['next_cursor'] = str(offset + max_results)
+        return result
@@ -0,0 +1,107 @@
+"""
+Category and tag hierarchy from _data/taxonomy.yml
+
+Categories are a two-level tree (`item`, optional `slug`, `children`);
+tags are a flat list. Posts refer to both by display name, and the site
+links them by Liquid's `slugify`, which default_slug() reproduces.
+"""
+
+import re
+from pathlib import Path
+
+import yaml
+
+from .frontmatter import YAML_LOADER
+
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+
+def default_slug(name):
+    """Slug as Liquid's `slugify` filter makes it (default mode)"""
+    return _NON_ALNUM_RE.sub('-', str(name).lower()).strip('-')
+
+
+class Taxonomy:
+    """Lookup of category slugs and parents, and tag slugs, by display name"""
+
+    def __init__(self, data=None):
+        data = data or {}
+        self.categories = {}  # name -> {'slug': ..., 'parent': parent slug or None}
+        self.tags = {}        # name -> slug
+        self.problems = []    # duplicate names and slugs, as messages
+
+        for category in data.get('categories') or []:
+            self._add_category(category, None)
+        for tag in data.get('tags') or []:
+            name = tag.get('item') if isinstance(tag, dict) else tag
+            if not name:
+                continue
+            slug = (tag.get('slug') if isinstance(tag, dict) else None) or default_slug(name)
+            if str(name) in self.tags:
+                self.problems.append(f'Tag "{name}" is listed twice')
+            elif slug in self.tags.values():
+                self.problems.append(f'Tag "{name}" has the same slug as another tag: {slug}')
+            self.tags[str(name)] = slug
+
+    def _add_category(self, category, parent):
+        if isinstance(category, str):
+            category = {'item': category}
+        name = category.get('item')
+        if not name:
+            return
+        slug = category.get('slug') or default_slug(name)
+        if str(name) in self.categories:
+            self.problems.append(f'Category "{name}" is listed twice')
+        elif any(entry['slug'] == slug for entry in self.categories.values()):
+            self.problems.append(f'Category "{name}" has the same slug as another category: {slug}')
+        self.categories[str(name)] = {'slug': slug, 'parent': parent}
+        for child in category.get('children') or []:
+            self._add_category(child, slug)
+
+    @classmethod
+    def load(cls, site_dir='.'):
+        """Taxonomy from site_dir/_data/taxonomy.yml; empty if the file is missing"""
+        try:
+            with open(Path(site_dir) / '_data' / 'taxonomy.yml', 'r', encoding='utf-8') as f:
+                return cls(yaml.load(f, Loader=YAML_LOADER))
+        except FileNotFoundError:
+            return cls()
+
+    def category_slug(self, name):
+        entry = self.categories.get(str(name))
+        return entry['slug'] if entry else default_slug(name)
+
+    def category_parent(self, name):
+        """Slug of a category's parent, or None for top-level and unknown categories"""
+        entry = self.categories.get(str(name))
+        return entry['parent'] if entry else None
+
+    def tag_slug(self, name):
+        return self.tags.get(str(name)) or default_slug(name)
+
+    def category_name(self, name, slug=None):
+        """
+        The taxonomy's display name for a category given by name or slug, or None.
+
+        Matches the display name exactly, then the slug (e.g. a WordPress
+        nicename), then the name's slugified form.
+        """
+        if str(name) in self.categories:
+            return str(name)
+        for candidate in (slug, default_slug(name)):
+            if candidate:
+                for known, entry in self.categories.items():
+                    if entry['slug'] == candidate:
+                        return known
+        return None
+
+    def tag_name(self, name, slug=None):
+        """The taxonomy's display name for a tag given by name or slug, or None"""
+        if str(name) in self.tags:
+            return str(name)
+        for candidate in (slug, default_slug(name)):
+            if candidate:
+                for known, known_slug in self.tags.items():
+                    if known_slug == candidate:
+                        return known
+        return None
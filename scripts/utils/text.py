@@ -0,0 +1,103 @@
+"""
+Plain text and search terms from post Markdown
+
+plain_text() approximates what `content | strip_html` gives in Liquid for a
+post body: Liquid tags, HTML tags, script/style contents, Markdown link
+targets and bare URLs are dropped, entities are decoded and whitespace is
+collapsed. tokenize() splits that text into lowercase search terms.
+word_count(), reading_time() and excerpt() give the numbers the templates
+used to work out in Liquid.
+
+The search page tokenises queries with the same rules (runs of letters and
+digits, lowercased, without stop words or long numbers), so the two must be
+kept in step.
+"""
+
+import html
+import re
+
+RAW_BLOCK_RE = re.compile(r'<(script|style|pre)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+LIQUID_RE = re.compile(r'\{%.*?%\}|\{\{.*?\}\}', re.DOTALL)
+TAG_RE = re.compile(r'<(/?)([A-Za-z][A-Za-z0-9-]*)?[^>]*>')
+# Tags that separate words; inline tags (a, em, span...) are removed without a gap
+BLOCK_TAGS = frozenset('''
+address article aside blockquote br dd div dl dt figcaption figure footer h1 h2 h3 h4
+h5 h6 header hr iframe img li main nav ol p section table tbody td th thead tr ul
+'''.split())
+MD_IMAGE_RE = re.compile(r'!\[([^\]]*)\]\([^)]*\)')
+MD_LINK_RE = re.compile(r'\[([^\]]*)\]\([^)]*\)')
+URL_RE = re.compile(r'https?://\S+')
+MD_BLOCK_RE = re.compile(r'^\s{0,3}(?:#{1,6}|>|[-*+]|\d+\.)\s+|^\s*\|?[-:| ]{3,}\|?\s*$', re.MULTILINE)
+MD_EMPHASIS_RE = re.compile(r'(?<!\w)[*_`~]{1,3}|[*_`~]{1,3}(?!\w)')
+WHITESPACE_RE = re.compile(r'\s+')
+WORD_RE = re.compile(r'[^\W_]+')
+
+# Long digit runs (IDs, timestamps, dimensions) are noise in the index
+LONG_NUMBER_RE = re.compile(r'^\d{5,}$')
+
+# Reading speed used for "N min read", as in _includes/reading-time.html
+WORDS_PER_MINUTE = 200
+
+# Card excerpts: the first paragraph, cut to this many words (truncatewords: 30)
+EXCERPT_SEPARATOR = '\n\n'
+EXCERPT_WORDS = 30
+
+# Terms shorter than this aren't indexed or searched for
+MIN_TERM_LENGTH = 2
+
+# Common English words that match almost every post
+STOP_WORDS = frozenset('''
+a about after all also an and any are as at be been but by can could did do does
+for from had has have he her his how i if in into is it its just me more my no not
+of on one or our out she so some than that the their them then there these they
+this to too up us was we were what when which who will with would you your
+'''.split())
+
+
+def _tag_gap(match):
+    name = (match.group(2) or '').lower()
+    return ' ' if not name or name in BLOCK_TAGS else ''
+
+
+def plain_text(markdown):
+    """Visible text of a post body, on one line"""
+    text = RAW_BLOCK_RE.sub(' ', markdown)
+    text = COMMENT_RE.sub(' ', text)
+    text = LIQUID_RE.sub(' ', text)
+    text = MD_IMAGE_RE.sub(r'\1', text)
+    text = MD_LINK_RE.sub(r'\1', text)
+    text = TAG_RE.sub(_tag_gap, text)
+    text = URL_RE.sub(' ', text)
+    text = MD_BLOCK_RE.sub(' ', text)
+    text = MD_EMPHASIS_RE.sub('', text)
+    text = html.unescape(text)
+    return WHITESPACE_RE.sub(' ', text).strip()
+
+
+def tokenize(text):
+    """Lowercase search terms in text, in order, without stop words"""
+    return [term for term in WORD_RE.findall(text.lower())
+            if len(term) >= MIN_TERM_LENGTH and term not in STOP_WORDS
+            and not LONG_NUMBER_RE.match(term)]
+
+
+def word_count(text):
+    """Number of whitespace-separated words, as Liquid's number_of_words counts them"""
+    return len(text.split())
+
+
+def reading_time(words):
+    """Whole minutes to read words, at least 1"""
+    return max(1, words // WORDS_PER_MINUTE)
+
+
+def excerpt(markdown, words=EXCERPT_WORDS):
+    """Plain text of a post body's first paragraph, cut to words words with '...'"""
+    for block in markdown.lstrip().split(EXCERPT_SEPARATOR):
+        if block.strip():
+            parts = plain_text(block).split()
+            if len(parts) > words:
+                return ' '.join(parts[:words]) + '...'
+            return ' '.join(parts)
+    return ''
@@ -0,0 +1,138 @@
+"""
+Wall-clock and peak-memory measurement for named phases of a run
+
+PhaseTimer records how long each phase took and the process's peak RSS
+when it finished. Peak RSS never goes down, so comparing consecutive
+phases shows which one grew the process.
+
+Instrumentation wraps a script's main() for the shared --stats-json and
+--profile options: the script's stats dict, its phase timings and peak
+memory go to a JSON file for build dashboards, and the whole run can be
+recorded with cProfile.
+"""
+
+import cProfile
+import json
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb(children=False):
+    """Peak resident set size in MiB of this process (or its reaped children), or None"""
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB everywhere else
+    if sys.platform == 'darwin':
+        return round(peak / (1024 * 1024), 1)
+    return round(peak / 1024, 1)
+
+
+class PhaseTimer:
+    """Collects {phase: {'seconds', 'peak_rss_mb'}} in the order phases ran"""
+
+    def __init__(self):
+        self.phases = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        """Time the body of a with-block as phase name; repeated phases add up"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            if name in self.phases:
+                seconds += self.phases[name]['seconds']
+            self.phases[name] = {
+                'seconds': round(seconds, 4),
+                'peak_rss_mb': peak_rss_mb()
+            }
+
+    @property
+    def wall_seconds(self):
+        """Seconds since the timer was created"""
+        return round(time.perf_counter() - self.started, 4)
+
+
+def add_instrumentation_arguments(parser):
+    """Add the shared --stats-json and --profile options to an ArgumentParser"""
+    group = parser.add_argument_group('instrumentation')
+    group.add_argument('--stats-json', metavar='PATH',
+                       help='Write the run\'s stats, phase timings and peak memory to PATH as JSON')
+    group.add_argument('--profile', metavar='PATH',
+                       help='Record the run with cProfile and write the dump to PATH '
+                            '(read it with python3 -m pstats PATH)')
+
+
+def _json_default(value):
+    if isinstance(value, (set, frozenset, tuple)):
+        return sorted(value) if isinstance(value, (set, frozenset)) else list(value)
+    if isinstance(value, Path):
+        return value.as_posix()
+    return str(value)
+
+
+class Instrumentation:
+    """
+    Phase timer, optional profiler and JSON report for one script run.
+
+    Use as a context manager around the work, pass .timer to the code that
+    times its phases, then call write(stats) once the stats are final.
+    """
+
+    def __init__(self, script, stats_json=None, profile=None):
+        self.script = script
+        self.stats_json = Path(stats_json) if stats_json else None
+        self.profile = Path(profile) if profile else None
+        self.timer = PhaseTimer()
+        self.started_at = datetime.now(timezone.utc)
+        self.profiler = None
+
+    @classmethod
+    def from_args(cls, script, args):
+        return cls(script, getattr(args, 'stats_json', None), getattr(args, 'profile', None))
+
+    def __enter__(self):
+        if self.profile:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profiler:
+            self.profiler.disable()
+            self.profile.parent.mkdir(parents=True, exist_ok=True)
+            self.profiler.dump_stats(self.profile)
+            self.profiler = None
+
+    def report(self, stats):
+        """The JSON-ready record of this run"""
+        return {
+            'script': self.script,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'wall_seconds': self.timer.wall_seconds,
+            'peak_rss_mb': peak_rss_mb(),
+            'children_peak_rss_mb': peak_rss_mb(children=True),
+            'phases': self.timer.phases,
+            'stats': stats
+        }
+
+    def write(self, stats):
+        """Write the report to --stats-json, if it was given"""
+        if not self.stats_json:
+            return
+        self.stats_json.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.stats_json, 'w', encoding='utf-8') as f:
+            json.dump(self.report(stats), f, indent=2, sort_keys=True, default=_json_default)
+            f.write('\n')
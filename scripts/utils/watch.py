@@ -0,0 +1,186 @@
+"""
+Watch a posts directory and hand changed posts to a pass in debounced batches
+
+On Linux the watcher uses inotify (through ctypes, so no extra package is
+needed) and wakes only when a post is closed after writing, renamed into
+place or deleted. Elsewhere it falls back to polling the directory's
+mtimes and sizes every POLL_INTERVAL seconds.
+
+Editors and the CMS often write a file several times in quick succession,
+so events are collected until DEBOUNCE_SECONDS pass without a new one and
+then returned as one batch. After rewriting posts, the caller passes them
+to settle(); the events caused by those writes are then recognised by the
+files' unchanged mtime and size and dropped, so a pass never triggers
+itself.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+DEBOUNCE_SECONDS = 0.2
+POLL_INTERVAL = 0.5
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def _is_post(name):
+    # Skip hidden files, including the temp files atomic_write_text renames into place
+    return name.endswith('.md') and not name.startswith('.')
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class _InotifySource:
+    """Changed file names from inotify events on one directory"""
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f'inotify_add_watch failed for {directory}')
+
+    def wait(self, timeout):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        data = os.read(self.fd, 65536)
+        names = set()
+        pos = 0
+        while pos + _EVENT_HEADER.size <= len(data):
+            _wd, _mask, _cookie, length = _EVENT_HEADER.unpack_from(data, pos)
+            pos += _EVENT_HEADER.size
+            names.add(os.fsdecode(data[pos:pos + length].rstrip(b'\0')))
+            pos += length
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _PollingSource:
+    """Changed file names found by rescanning a directory's mtimes and sizes"""
+
+    def __init__(self, directory, interval=POLL_INTERVAL):
+        self.directory = Path(directory)
+        self.interval = interval
+        self.seen = self.scan()
+
+    def scan(self):
+        return {path.name: _signature(path) for path in self.directory.glob('*.md')}
+
+    def wait(self, timeout):
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        current = self.scan()
+        names = {name for name in current.keys() | self.seen.keys() if current.get(name) != self.seen.get(name)}
+        self.seen = current
+        return names
+
+    def close(self):
+        pass
+
+
+class PostWatcher:
+    """Debounced batches of changed posts in one directory"""
+
+    def __init__(self, posts_dir, debounce=DEBOUNCE_SECONDS, use_inotify=True, poll_interval=POLL_INTERVAL):
+        self.posts_dir = Path(posts_dir)
+        self.debounce = debounce
+        self.written = {}  # path -> (mtime_ns, size) right after our own write
+        self.pending = set()
+        self.deadline = None
+        self.source = None
+        if use_inotify and sys.platform.startswith('linux'):
+            try:
+                self.source = _InotifySource(self.posts_dir)
+            except (OSError, AttributeError):
+                pass
+        if self.source is None:
+            self.source = _PollingSource(self.posts_dir, poll_interval)
+
+    @property
+    def mode(self):
+        return 'inotify' if isinstance(self.source, _InotifySource) else 'polling'
+
+    def settle(self, paths):
+        """Remember posts as they are now, so the events from our own writes are ignored"""
+        for path in paths:
+            self.written[Path(path)] = _signature(path)
+
+    def poll(self, timeout=None):
+        """
+        Wait for the next batch of changed posts and return it, sorted.
+
+        Returns [] if timeout seconds pass first (None waits forever). A
+        path in the batch may have been deleted since.
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            if self.pending and now >= self.deadline:
+                batch = sorted(self.pending)
+                self.pending.clear()
+                return batch
+            if end is not None and now >= end:
+                return []
+
+            waits = [t - now for t in (self.deadline if self.pending else None, end) if t is not None]
+            for name in self.source.wait(min(waits) if waits else None):
+                if not _is_post(name):
+                    continue
+                path = self.posts_dir / name
+                if path in self.written and self.written[path] == _signature(path):
+                    continue
+                self.written.pop(path, None)
+                self.pending.add(path)
+                self.deadline = time.monotonic() + self.debounce
+
+    def close(self):
+        self.source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def watch_posts(posts_dir, handle, debounce=DEBOUNCE_SECONDS):
+    """
+    Call handle(paths) with each batch of changed posts until Ctrl+C.
+
+    handle gets every changed path, including deleted ones, so it can
+    prune them; the batch is settled afterwards so its writes are ignored.
+    """
+    with PostWatcher(posts_dir, debounce) as watcher:
+        print(f"👀 Watching {posts_dir} for changes ({watcher.mode}); press Ctrl+C to stop")
+        try:
+            while True:
+                batch = watcher.poll()
+                handle(batch)
+                watcher.settle(batch)
+        except KeyboardInterrupt:
+            print("\n👋 Stopped watching")
@@ -0,0 +1,158 @@
+"""
+Shared fixtures for the Python maintenance script tests.
+
+Scripts live in scripts/ with hyphenated filenames, so they are loaded by
+path with load_script(); the shared helpers are importable as `utils`.
+"""
+
+import importlib.util
+import math
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent.parent / 'scripts'
+
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+
+def load_script(name):
+    """Import scripts/<name>.py as a module"""
+    module_name = name.replace('-', '_')
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def posts_dir(tmp_path):
+    """Empty _posts directory inside a temporary site root"""
+    path = tmp_path / '_posts'
+    path.mkdir()
+    return path
+
+
+def write_post(posts_dir, name, front_matter, body):
+    """Write a Jekyll post with the given raw front matter text and body"""
+    path = posts_dir / name
+    path.write_text(f'---\n{front_matter}\n---\n{body}', encoding='utf-8')
+    return path
+
+
+def write_wxr(path, attachments, thumbnails):
+    """
+    Write a minimal WordPress WXR export.
+
+    attachments maps attachment ID to URL; thumbnails maps post slug to
+    (title, attachment ID).
+    """
+    items = []
+    for attachment_id, url in attachments.items():
+        items.append(f'''
+    <item>
+      <title>attachment {attachment_id}</title>
+      <wp:post_id>{attachment_id}</wp:post_id>
+      <wp:post_type>attachment</wp:post_type>
+      <wp:attachment_url>{url}</wp:attachment_url>
+    </item>''')
+    for slug, (title, thumbnail_id) in thumbnails.items():
+        items.append(f'''
+    <item>
+      <title>{title}</title>
+      <wp:post_name>{slug}</wp:post_name>
+      <wp:post_type>post</wp:post_type>
+      <wp:postmeta>
+        <wp:meta_key>_edit_last</wp:meta_key>
+        <wp:meta_value>1</wp:meta_value>
+      </wp:postmeta>
+      <wp:postmeta>
+        <wp:meta_key>_thumbnail_id</wp:meta_key>
+        <wp:meta_value>{thumbnail_id}</wp:meta_value>
+      </wp:postmeta>
+    </item>''')
+
+    path.write_text(f'''<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"
+  xmlns:content="http://purl.org/rss/1.0/modules/content/"
+  xmlns:wp="http://wordpress.org/export/1.2/">
+  <channel>
+    <title>Test export</title>{''.join(items)}
+  </channel>
+</rss>
+''', encoding='utf-8')
+    return path
+
+
+def make_resource(public_id, created_at, size=1000, width=800, height=600):
+    """A resource dict shaped like the Cloudinary Admin API returns"""
+    return {
+        'public_id': public_id,
+        'format': 'jpg',
+        'resource_type': 'image',
+        'type': 'upload',
+        'created_at': created_at,
+        'bytes': size,
+        'width': width,
+        'height': height
+    }
+
+
+class FakeCloudinaryAPI:
+    """
+    In-process stand-in for cloudinary.api with a resources() listing.
+
+    Supports max_results/next_cursor paging, prefix, start_at and direction
+    like the real Admin API, and records every call. Set fail_after to raise
+    on the Nth call.
+    """
+
+    def __init__(self, resources):
+        self.library = list(resources)
+        self.calls = []
+        self.fail_after = None
+
+    def resources(self, type='upload', max_results=10, next_cursor=None,
+                  prefix=None, start_at=None, direction='desc'):
+        self.calls.append({'prefix': prefix, 'start_at': start_at, 'next_cursor': next_cursor})
+        if self.fail_after is not None and len(self.calls) > self.fail_after:
+            raise RuntimeError('rate limited')
+
+        listing = [r for r in self.library if r['type'] == type]
+        if prefix:
+            listing = [r for r in listing if r['public_id'].startswith(prefix)]
+        if start_at:
+            listing = [r for r in listing if r['created_at'] >= start_at]
+        listing.sort(key=lambda r: r['created_at'], reverse=direction not in ('asc', 1))
+
+        offset = int(next_cursor or 0)
+        page = listing[offset:offset + max_results]
+        result = {'resources': page}
+        if offset + max_results < len(listing):
+            result['next_cursor'] = str(offset + max_results)
+        return result
+
+
+def photo(width, height, seed, brightness=0, noise=0):
+    """RGB rows of a smooth greyscale 'photo' made of random soft blobs"""
+    rng = random.Random(seed)
+    blobs = [(rng.random(), rng.random(), rng.uniform(0.05, 0.3), rng.uniform(-120, 120)) for _ in range(6)]
+    grain = random.Random(0)
+    rows = []
+    for y in range(height):
+        row = []
+        for x in range(width):
+            u, v = x / width, y / height
+            value = 128 + brightness + grain.uniform(-noise, noise) + sum(
+                a * math.exp(-((u - cx) ** 2 + (v - cy) ** 2) / (r * r)) for cx, cy, r, a in blobs)
+            c = max(0, min(255, int(value)))
+            row.append((c, c, c))
+        rows.append(row)
+    return rows
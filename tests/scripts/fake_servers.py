@@ -0,0 +1,129 @@
+"""
+Local HTTP stand-ins for the services the scripts talk to.
+
+LocalServer runs a keep-alive HTTP/1.1 server on 127.0.0.1 in a background
+thread and routes every request to a Python callable, so tests exercise
+the real HTTP client code without touching the network.
+"""
+
+import base64
+import json
+import threading
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+Request = namedtuple('Request', 'method path query headers')
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, handler_class, app):
+        super().__init__(address, handler_class)
+        self.app = app
+        self.connections = 0
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def get_request(self):
+        conn = super().get_request()
+        with self.lock:
+            self.connections += 1
+        return conn
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _handle(self):
+        parts = urlsplit(self.path)
+        request = Request(self.command, parts.path, dict(parse_qsl(parts.query)), self.headers)
+        with self.server.lock:
+            self.server.requests.append(request)
+
+        status, headers, body = self.server.app(request)
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    do_GET = _handle
+    do_HEAD = _handle
+
+
+class LocalServer:
+    """Context manager serving app(request) -> (status, headers, body) on a free port"""
+
+    def __init__(self, app):
+        self.server = _Server(('127.0.0.1', 0), _Handler, app)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @property
+    def connections(self):
+        return self.server.connections
+
+    @property
+    def requests(self):
+        return self.server.requests
+
+
+def json_response(data, status=200):
+    return status, {'Content-Type': 'application/json'}, json.dumps(data)
+
+
+class FakeCloudinaryAdmin:
+    """
+    App for LocalServer imitating the Cloudinary Admin API listing endpoints.
+
+    Serves /v1_1/<cloud>/resources/image/upload and /v1_1/<cloud>/folders
+    from an in-memory FakeCloudinaryAPI, checks basic auth, and can answer
+    the first rate_limited resource requests with 420 to exercise backoff.
+    """
+
+    def __init__(self, api, cloud_name='demo', api_key='key', api_secret='secret'):
+        self.api = api
+        self.cloud_name = cloud_name
+        token = base64.b64encode(f'{api_key}:{api_secret}'.encode()).decode()
+        self.auth = f'Basic {token}'
+        self.rate_limited = 0
+
+    def __call__(self, request):
+        if request.headers.get('Authorization') != self.auth:
+            return json_response({'error': {'message': 'Invalid credentials'}}, 401)
+
+        prefix = f'/v1_1/{self.cloud_name}/'
+        route = request.path[len(prefix):] if request.path.startswith(prefix) else None
+
+        if route == 'folders':
+            names = sorted({r['public_id'].split('/')[0] for r in self.api.library if '/' in r['public_id']})
+            return json_response({'folders': [{'name': n, 'path': n} for n in names]})
+
+        if route == 'resources/image/upload':
+            if self.rate_limited > 0:
+                self.rate_limited -= 1
+                return 420, {'Retry-After': '0', 'Content-Type': 'application/json'}, '{}'
+            params = dict(request.query)
+            params['max_results'] = int(params.get('max_results', 10))
+            return json_response(self.api.resources(**params))
+
+        return json_response({'error': {'message': 'Not found'}}, 404)
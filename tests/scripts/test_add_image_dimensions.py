@@ -0,0 +1,165 @@
+"""
+Unit tests for scripts/add-image-dimensions.py and utils/image_dimensions.py.
+"""
+
+import http.client
+
+import pytest
+
+from conftest import load_script
+from fake_servers import LocalServer
+from test_image_headers import jpeg, png
+from utils.image_dimensions import DimensionProber, ImageSource
+from utils.manifest import PostManifest
+from utils.references import DeliveryURL
+
+dimensions = load_script('add-image-dimensions')
+
+FRONT_MATTER = '---\ntitle: Gallery\n---\n'
+BASE = 'https://res.cloudinary.com/demo/image/upload'
+
+
+class FakeOrigin:
+    """Delivery host serving image bytes, honouring Range unless told not to"""
+
+    def __init__(self, images):
+        self.images = images
+        self.ranges = True
+        self.broken = set()
+
+    def __call__(self, request):
+        name = request.path[len('/demo/image/upload/'):]
+        if name in self.broken:
+            return 503, {}, b''
+        if name not in self.images:
+            return 404, {}, b''
+        data = self.images[name]
+        header = request.headers.get('Range')
+        if not self.ranges or not header:
+            return 200, {'Content-Type': 'image/jpeg'}, data
+        start, end = (int(n) for n in header[len('bytes='):].split('-'))
+        return 206, {'Content-Range': f'bytes {start}-{min(end, len(data) - 1)}/{len(data)}'}, data[start:end + 1]
+
+
+@pytest.fixture
+def origin():
+    app = FakeOrigin({
+        'photo_a': jpeg(1024, 768) + b'\0' * 100000,
+        'folder/photo_b.jpg': jpeg(3000, 4000, padding=30000) + b'\0' * 100000,
+        'v123/photo_c': png(640, 480),
+    })
+    with LocalServer(app) as server:
+        yield app, server
+
+
+def make_prober(tmp_path, server):
+    prober = DimensionProber(tmp_path / 'sizes.json', workers=4, base_url=server.url)
+    prober.pool.sleep = lambda delay: None
+    return prober
+
+
+def write_posts(posts_dir):
+    posts_dir.mkdir(exist_ok=True)
+    (posts_dir / '2020-01-01-a.md').write_text(FRONT_MATTER + (
+        f'<img src="{BASE}/q_auto,f_auto/photo_a" alt="a">\n'
+        f'<img src="{BASE}/c_limit,w_400/folder/photo_b.jpg" width="300">\n'
+        f'<img src="{BASE}/v123/photo_c" width="640" height="480">\n'
+        '<img src="/assets/images/logo.png">\n'
+        '<img src="https://example.com/elsewhere.jpg">\n'
+    ), encoding='utf-8')
+    (posts_dir / '2020-01-02-b.md').write_text(FRONT_MATTER + f'<img src="{BASE}/photo_a">', encoding='utf-8')
+
+
+def test_probes_with_small_ranged_requests(tmp_path, origin):
+    app, server = origin
+    prober = make_prober(tmp_path, server)
+
+    sizes = prober.probe([
+        ImageSource('photo_a', url='demo/image/upload/photo_a'),
+        ImageSource('folder/photo_b', url='demo/image/upload/folder/photo_b.jpg'),
+        ImageSource('gone', url='demo/image/upload/gone'),
+    ])
+
+    assert sizes == {
+        'photo_a': {'width': 1024, 'height': 768, 'format': 'jpeg'},
+        'folder/photo_b': {'width': 3000, 'height': 4000, 'format': 'jpeg'},
+    }
+    assert prober.failures == {'gone': 'missing'}
+    # photo_b's frame header is past the first 16 KB, so it took a second range
+    assert len(server.requests) == 4
+    assert prober.stats['bytes_read'] < 80000
+
+
+def test_server_ignoring_range_still_works(tmp_path, origin):
+    app, server = origin
+    app.ranges = False
+
+    sizes = make_prober(tmp_path, server).probe([ImageSource('photo_a', url='demo/image/upload/photo_a')])
+
+    assert sizes['photo_a']['width'] == 1024
+
+
+def test_writes_dimensions_into_posts(tmp_path, origin):
+    app, server = origin
+    write_posts(tmp_path / '_posts')
+    (tmp_path / 'assets' / 'images').mkdir(parents=True)
+    (tmp_path / 'assets' / 'images' / 'logo.png').write_bytes(png(32, 16))
+
+    stats = dimensions.add_image_dimensions(tmp_path / '_posts', make_prober(tmp_path, server),
+                                            PostManifest(tmp_path / 'manifest.json'), site_dir=tmp_path)
+
+    content = (tmp_path / '_posts' / '2020-01-01-a.md').read_text(encoding='utf-8')
+    assert f'<img src="{BASE}/q_auto,f_auto/photo_a" alt="a" width="1024" height="768">' in content
+    assert f'<img src="{BASE}/c_limit,w_400/folder/photo_b.jpg" width="300" height="400">' in content
+    assert '<img src="/assets/images/logo.png" width="32" height="16">' in content
+    assert '<img src="https://example.com/elsewhere.jpg">' in content
+    assert stats['images_updated'] == 4
+    # photo_a appears in both posts but is fetched once
+    assert len([r for r in server.requests if r.path.endswith('/photo_a')]) == 1
+
+
+def test_rerun_uses_cache_and_retries_failed_posts(tmp_path, origin):
+    app, server = origin
+    write_posts(tmp_path / '_posts')
+    app.broken.add('photo_a')
+    manifest_path = tmp_path / 'manifest.json'
+    dimensions.add_image_dimensions(tmp_path / '_posts', make_prober(tmp_path, server),
+                                    PostManifest(manifest_path), site_dir=tmp_path)
+    app.broken.clear()
+    server.requests.clear()
+
+    stats = dimensions.add_image_dimensions(tmp_path / '_posts', make_prober(tmp_path, server),
+                                            PostManifest(manifest_path), site_dir=tmp_path)
+
+    assert stats['posts_scanned'] == 2
+    assert [r.path for r in server.requests] == ['/demo/image/upload/photo_a']
+    assert 'width="1024"' in (tmp_path / '_posts' / '2020-01-02-b.md').read_text(encoding='utf-8')
+
+
+def test_bare_public_ids_are_probed_in_the_default_folder(tmp_path, origin):
+    app, server = origin
+    app.images['circle-seven/photo_d'] = png(200, 100)
+    (tmp_path / '_config.yml').write_text('cloudinary_default_folder: circle-seven\n', encoding='utf-8')
+    (tmp_path / '_posts').mkdir()
+    (tmp_path / '_posts' / '2020-01-01-a.md').write_text(
+        FRONT_MATTER + f'<img src="{BASE}/q_auto,f_auto/photo_d">', encoding='utf-8')
+
+    dimensions.add_image_dimensions(tmp_path / '_posts', make_prober(tmp_path, server),
+                                    PostManifest(tmp_path / 'manifest.json'), site_dir=tmp_path)
+
+    assert 'width="200" height="100"' in (tmp_path / '_posts' / '2020-01-01-a.md').read_text(encoding='utf-8')
+    source = ImageSource.cloudinary(DeliveryURL.parse(f'{BASE}/c_fill,w_90/v123/photo_d.png'), 'circle-seven')
+    assert (source.key, source.url) == ('circle-seven/photo_d', 'demo/image/upload/v123/circle-seven/photo_d.png')
+    source = ImageSource.cloudinary(DeliveryURL.parse(f'{BASE}/folder/photo_b.jpg'), 'circle-seven')
+    assert (source.key, source.url) == ('folder/photo_b', 'demo/image/upload/folder/photo_b.jpg')
+
+
+def test_broken_responses_are_fetch_errors(tmp_path):
+    class BrokenPool:
+        def get(self, url, headers=None):
+            raise http.client.IncompleteRead(b'')
+
+    prober = DimensionProber(tmp_path / 'sizes.json', pool=BrokenPool())
+
+    assert prober.probe([ImageSource('photo_a', url='demo/image/upload/photo_a')]) == {}
+    assert prober.failures == {'photo_a': 'error'}
@@ -0,0 +1,97 @@
+"""
+Unit tests for scripts/add-lazy-loading.py.
+"""
+
+from conftest import load_script
+
+lazy = load_script('add-lazy-loading')
+
+FRONT_MATTER = '---\ntitle: Gallery\n---\n'
+
+
+def test_first_image_gets_priority_and_rest_are_lazy():
+    content = FRONT_MATTER + '<img src="a.jpg">\n<img src="b.jpg">\n'
+
+    updated, images = lazy.rewrite_images(content)
+
+    assert images == 2
+    assert updated == FRONT_MATTER + (
+        '<img src="a.jpg" loading="eager" fetchpriority="high" decoding="async">\n'
+        '<img src="b.jpg" loading="lazy" decoding="async">\n'
+    )
+
+
+def test_featured_image_keeps_the_priority():
+    for key in ('featured_image', 'image'):
+        content = f'---\ntitle: Post\n{key}: cover\n---\n<img src="a.jpg">\n<img src="b.jpg">\n'
+
+        updated, _ = lazy.rewrite_images(content)
+
+        assert 'fetchpriority' not in updated
+        assert updated.count('loading="lazy" decoding="async"') == 2
+
+
+def test_lazy_first_image_is_promoted():
+    content = FRONT_MATTER + '<img src="a.jpg" loading="lazy">'
+
+    updated, _ = lazy.rewrite_images(content)
+
+    assert updated == FRONT_MATTER + (
+        '<img src="a.jpg" loading="eager" fetchpriority="high" decoding="async">'
+    )
+
+
+def test_first_image_below_the_fold_stays_lazy():
+    content = FRONT_MATTER + 'x' * lazy.ABOVE_FOLD_CHARS + '<img src="a.jpg">'
+
+    updated = lazy.add_lazy_loading_to_content(content)
+
+    assert updated.endswith('<img src="a.jpg" loading="lazy" decoding="async">')
+
+
+def test_mixed_markup_is_fixed_per_image():
+    content = FRONT_MATTER + (
+        '<img src="a.jpg" loading="eager" fetchpriority="low">\n'
+        '<img src="b.jpg" loading="lazy">\n'
+        '<img src="c.jpg">\n'
+    )
+
+    updated = lazy.add_lazy_loading_to_content(content)
+
+    assert updated == FRONT_MATTER + (
+        '<img src="a.jpg" loading="eager" fetchpriority="low" decoding="async">\n'
+        '<img src="b.jpg" loading="lazy" decoding="async">\n'
+        '<img src="c.jpg" loading="lazy" decoding="async">\n'
+    )
+
+
+def test_rewrite_is_idempotent():
+    content = FRONT_MATTER + '<img src="a.jpg">\n<img src="b.jpg" />\n'
+
+    once = lazy.add_lazy_loading_to_content(content)
+
+    assert lazy.add_lazy_loading_to_content(once) == once
+
+
+def test_post_without_images_is_unchanged():
+    content = FRONT_MATTER + 'Just text.\n'
+
+    assert lazy.rewrite_images(content) == (content, 0)
+
+
+def test_parallel_main_matches_serial(tmp_path, monkeypatch, capsys):
+    outputs = {}
+    for jobs in ('1', '3'):
+        posts_dir = tmp_path / f'posts-{jobs}'
+        posts_dir.mkdir()
+        for i in range(10):
+            body = '<img src="a.jpg">\n' * (i % 3)
+            (posts_dir / f'2020-01-{10 + i}-post.md').write_text(FRONT_MATTER + body, encoding='utf-8')
+
+        monkeypatch.setattr(lazy, 'POSTS_DIR', posts_dir)
+        monkeypatch.setattr('sys.argv', ['add-lazy-loading.py', '--force', '--jobs', jobs])
+        lazy.main()
+        outputs[jobs] = (capsys.readouterr().out, sorted(p.read_text() for p in posts_dir.iterdir()))
+
+    assert outputs['3'] == outputs['1']
+    assert 'Updated with lazy loading: 6' in outputs['1'][0]
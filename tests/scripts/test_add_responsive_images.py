@@ -0,0 +1,94 @@
+"""
+Unit tests for scripts/add-responsive-images.py and the DeliveryURL parser in utils/references.py.
+"""
+
+from conftest import load_script
+from utils.references import DeliveryURL
+from utils.manifest import PostManifest
+
+responsive = load_script('add-responsive-images')
+
+FRONT_MATTER = '---\ntitle: Gallery\n---\n'
+BASE = 'https://res.cloudinary.com/circleseven/image/upload'
+
+
+def variant(width, public_id='photo_o'):
+    return f'{BASE}/c_limit,w_{width},q_auto,f_auto/{public_id}'
+
+
+def test_delivery_url_parsing():
+    url = DeliveryURL.parse(f'{BASE}/c_limit,w_800/q_auto/v123/folder/dsc_0026_o.jpg')
+
+    assert url.transformations == ['c_limit,w_800', 'q_auto']
+    assert url.asset == 'v123/folder/dsc_0026_o.jpg'
+    assert url.public_id == 'folder/dsc_0026_o'
+    assert DeliveryURL.parse(f'{BASE}/q_auto/Screenshot-at-12.42.45').public_id == 'Screenshot-at-12.42.45'
+    assert url.with_transformation('w_10') == f'{BASE}/w_10/v123/folder/dsc_0026_o.jpg'
+    assert DeliveryURL.parse(f'{BASE}/photo_o').transformations == []
+    assert DeliveryURL.parse('https://example.com/image/upload/photo') is None
+
+
+def test_gallery_images_are_left_to_the_gallery_filter():
+    content = FRONT_MATTER + (
+        '<div class="gallery">\n'
+        f'<figure><a href="{BASE}/q_auto,f_auto/photo_o"><img src="{BASE}/q_auto,f_auto/photo_o" '
+        'width="300" height="200" alt="x"></a></figure>\n</div>\n'
+    )
+
+    updated, stats = responsive.rewrite_images(content)
+
+    assert updated == content
+    assert stats['images_in_gallery'] == 1
+
+
+def test_content_image_is_sized_to_the_post_column():
+    content = FRONT_MATTER + f'<img src="{BASE}/q_auto,f_auto/photo_o" width="1024" height="768">'
+
+    updated, _ = responsive.rewrite_images(content)
+
+    assert f'src="{variant(800)}"' in updated
+    assert f'{variant(1600)} 1600w"' in updated
+    assert 'sizes="(max-width: 768px) 100vw, 800px"' in updated
+
+
+def test_rewrite_is_idempotent_and_follows_size_changes():
+    content = FRONT_MATTER + f'<img src="{BASE}/q_auto,f_auto/photo_o" width="400" height="300">'
+
+    once, _ = responsive.rewrite_images(content)
+    twice, stats = responsive.rewrite_images(once)
+    resized, _ = responsive.rewrite_images(once.replace('width="400" height="300"', 'width="200" height="150"'))
+
+    assert twice == once
+    assert stats['images_rewritten'] == 0
+    assert f'{variant(400)} 400w"' in resized
+    assert variant(800) not in resized
+
+
+def test_images_left_alone():
+    content = FRONT_MATTER + (
+        '<img src="local.jpg" width="10" height="10">\n'
+        f'<img src="{BASE}/q_auto,f_auto/a_o">\n'
+        f'<img src="{BASE}/c_fill,g_face,w_200/b_o" width="200" height="200">\n'
+        f'<img src="{BASE}/c_o" srcset="{BASE}/c_o 1x, {BASE}/e_sharpen/c_o 2x" width="100" height="100">\n'
+        f'```html\n<img src="{BASE}/d_o" width="100" height="100">\n```\n'
+    )
+
+    updated, stats = responsive.rewrite_images(content)
+
+    assert updated == content
+    assert stats == {'images': 3, 'images_rewritten': 0, 'images_without_size': 1, 'images_custom': 2,
+                     'images_in_gallery': 0}
+
+
+def test_pass_skips_posts_it_already_handled(tmp_path):
+    posts_dir = tmp_path / '_posts'
+    posts_dir.mkdir()
+    (posts_dir / '2020-01-01-a.md').write_text(
+        FRONT_MATTER + f'<img src="{BASE}/photo_o" width="640" height="480">', encoding='utf-8')
+    manifest_path = tmp_path / 'manifest.json'
+
+    first = responsive.responsive_images(posts_dir, PostManifest(manifest_path))
+    second = responsive.responsive_images(posts_dir, PostManifest(manifest_path))
+
+    assert (first['posts_updated'], first['images_rewritten']) == (1, 1)
+    assert (second['posts_total'], second['posts_scanned']) == (1, 0)
@@ -0,0 +1,118 @@
+"""
+Unit tests for scripts/audit-cloudinary-images.py.
+"""
+
+import pytest
+
+from conftest import FakeCloudinaryAPI, load_script, make_resource, photo, write_post
+from utils.cloudinary_cache import CloudinaryAssetCache
+from utils.duplicate_images import DuplicateImageFinder
+from utils.png import encode
+from utils.references import ReferenceIndex
+
+audit = load_script('audit-cloudinary-images')
+
+BASE = 'https://res.cloudinary.com/circleseven/image/upload'
+
+
+@pytest.fixture
+def api():
+    return FakeCloudinaryAPI([
+        make_resource('used-photo', '2020-01-01T00:00:00Z'),
+        make_resource('unused-photo', '2020-01-02T00:00:00Z'),
+    ])
+
+
+@pytest.fixture
+def posts(posts_dir):
+    write_post(posts_dir, '2020-01-01-a.md', 'title: A',
+               f'<img src="{BASE}/q_auto,f_auto/used-photo" alt="">\n'
+               f'<img src="{BASE}/q_auto,f_auto/missing-photo" alt="">\n')
+    return posts_dir
+
+
+def make_auditor(tmp_path, posts, **kwargs):
+    cache = CloudinaryAssetCache('circleseven', tmp_path / 'assets.json')
+    index = ReferenceIndex(posts.parent, 'circleseven', path=tmp_path / 'references.json')
+    return audit.CloudinaryAuditor('circleseven', cache=cache, site_dir=posts.parent,
+                                   reference_index=index, **kwargs)
+
+
+def test_reports_missing_and_unused_images(tmp_path, posts, api):
+    stats = make_auditor(tmp_path, posts, api=api).run()
+
+    assert [m['public_id'] for m in stats['missing_images']] == ['missing-photo']
+    assert stats['unused_images'] == ['unused-photo']
+
+
+def test_run_times_each_phase(tmp_path, posts, api):
+    auditor = make_auditor(tmp_path, posts, api=api)
+    auditor.run()
+
+    assert list(auditor.timer.phases) == ['fetch', 'scan', 'match']
+
+
+def test_offline_audit_uses_cache_without_api_calls(tmp_path, posts, api):
+    make_auditor(tmp_path, posts, api=api).run()
+    api.calls.clear()
+
+    stats = make_auditor(tmp_path, posts, api=api, offline=True).run()
+
+    assert api.calls == []
+    assert stats['total_cloudinary_assets'] == 2
+    assert [m['public_id'] for m in stats['missing_images']] == ['missing-photo']
+
+
+def test_api_failure_falls_back_to_cache(tmp_path, posts, api, capsys):
+    make_auditor(tmp_path, posts, api=api).run()
+    api.fail_after = 0
+
+    stats = make_auditor(tmp_path, posts, api=api).run()
+
+    assert 'Falling back to the cached listing' in capsys.readouterr().out
+    assert stats['total_cloudinary_assets'] == 2
+
+
+def test_featured_images_and_includes_count_as_used(tmp_path, posts, api):
+    api.library.append(make_resource('circle-seven/cover', '2020-01-03T00:00:00Z'))
+    api.library.append(make_resource('circle-seven/diagram', '2020-01-04T00:00:00Z'))
+    (posts.parent / '_config.yml').write_text('cloudinary_default_folder: circle-seven\n')
+    write_post(posts, '2020-01-02-b.md', 'title: B\nfeatured_image: cover.jpg',
+               '{% include cloudinary-image.html src="diagram" alt="Diagram" %}\n')
+
+    stats = make_auditor(tmp_path, posts, api=api).run()
+
+    assert 'circle-seven/cover' not in stats['unused_images']
+    assert 'circle-seven/diagram' not in stats['unused_images']
+
+
+def test_head_check_mode_needs_no_admin_api(tmp_path, posts):
+    from fake_servers import LocalServer
+    from utils.delivery_check import DeliveryChecker
+
+    def delivery(request):
+        return (200 if request.path.endswith('/used-photo') else 404), {}, ''
+
+    with LocalServer(delivery) as server:
+        checker = DeliveryChecker('circleseven', tmp_path / 'heads.json', base_url=server.url)
+        stats = make_auditor(tmp_path, posts, head_check=True, delivery_checker=checker).run()
+
+    assert [m['public_id'] for m in stats['missing_images']] == ['missing-photo']
+    assert stats['unused_images'] == []
+
+
+def test_duplicates_are_reported_with_their_posts(tmp_path, posts, api):
+    images = tmp_path / 'images'
+    images.mkdir()
+    (images / 'used-photo.png').write_bytes(encode(photo(64, 48, seed=3)))
+    (images / 'unused-photo.png').write_bytes(encode(photo(120, 90, seed=3, noise=6)))
+    finder = DuplicateImageFinder('circleseven', tmp_path / 'hashes.json', local_dir=images)
+
+    stats = make_auditor(tmp_path, posts, api=api, duplicate_finder=finder).run()
+
+    [cluster] = stats['duplicate_clusters']
+    assert cluster['keep'] == 'used-photo'
+    assert [(i['public_id'], i['posts']) for i in cluster['images']] == [
+        ('used-photo', ['_posts/2020-01-01-a.md']), ('unused-photo', [])
+    ]
+    assert cluster['wasted_bytes'] == 1000
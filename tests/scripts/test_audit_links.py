@@ -0,0 +1,77 @@
+"""
+Unit tests for scripts/audit-links.py and utils/links.py.
+"""
+
+import pytest
+
+from conftest import load_script, write_post
+from fake_servers import LocalServer
+from utils.link_check import ExternalLinkChecker
+from utils.links import DYNAMIC, EXTERNAL, IGNORED, INTERNAL, PermalinkIndex, extract_links
+
+audit_links = load_script('audit-links')
+
+
+@pytest.fixture
+def site(tmp_path, posts_dir):
+    (tmp_path / '_config.yml').write_text('url: https://example.org\npermalink: /:title/\nexclude:\n  - scripts/\n')
+    (tmp_path / '_data').mkdir()
+    (tmp_path / '_data' / 'taxonomy.yml').write_text('categories:\n  - item: Projects\n    children:\n      - Retro Computing\n')
+    (tmp_path / '_pages').mkdir()
+    (tmp_path / '_pages' / 'about.md').write_text('---\ntitle: About\n---\nHi\n')
+    (tmp_path / 'assets').mkdir()
+    (tmp_path / 'assets' / 'cv.pdf').write_bytes(b'%PDF')
+    (tmp_path / 'scripts').mkdir()
+    (tmp_path / 'scripts' / 'tool.py').write_text('')
+    (tmp_path / 'netlify.toml').write_text('[[redirects]]\n  from = "/old/*"\n  to = "/new/:splat"\n')
+    write_post(posts_dir, '2020-01-01-first-post.md', 'title: First\ntags: [Film]', 'First.\n')
+    return tmp_path, posts_dir
+
+
+def test_extract_links_skips_code():
+    text = (
+        'See [a](https://a.example/x "Title") and <a href=\'/about/\'>about</a>.\n'
+        '`<a href="/inline-code/">`\n'
+        '```html\n<a href="/fenced/">x</a>\n```\n'
+        '<pre><a href="/pre/">x</a></pre>\n'
+        '[next]({{ site.baseurl }}/first-post/){:target="_blank"}\n'
+        '[ref]: https://b.example/\n'
+    )
+
+    assert extract_links(text) == [
+        ('https://a.example/x', 1), ('/about/', 1), ('{{ site.baseurl }}/first-post/', 7), ('https://b.example/', 8)
+    ]
+
+
+def test_permalink_index_resolves_site_urls(site):
+    site_dir, _posts_dir = site
+    index = PermalinkIndex(site_dir)
+
+    for path in ('/first-post/', '/first-post', '/category/retro-computing/', '/tag/film/', '/about/',
+                 '/assets/cv.pdf', '/feed.xml', '/old/anything'):
+        assert index.resolves(path), path
+    for path in ('/second-post/', '/category/photography/', '/scripts/tool.py'):
+        assert not index.resolves(path), path
+
+    assert index.classify('{{ site.baseurl }}/first-post/') == (INTERNAL, '/first-post/')
+    assert index.classify('https://www.example.org/about/#team') == (INTERNAL, '/about/')
+    assert index.classify('{% post_url 2020-01-01-first-post %}') == (INTERNAL, '/first-post/')
+    assert index.classify('https://other.example/page#x') == (EXTERNAL, 'https://other.example/page')
+    assert index.classify('{{ page.url }}') == (DYNAMIC, '{{ page.url }}')
+    assert index.classify('mailto:me@example.org')[0] == IGNORED
+
+
+def test_audit_reports_broken_links_with_their_posts(site, tmp_path):
+    _site_dir, posts_dir = site
+    with LocalServer(lambda request: (200 if request.path == '/fine' else 404, {}, '')) as server:
+        write_post(posts_dir, '2020-02-01-links.md', 'title: Links',
+                   f'[first]({{{{ site.baseurl }}}}/first-post/)\n\n[gone](/missing/)\n\n'
+                   f'[ext]({server.url}/fine) [dead]({server.url}/dead)\n\n'
+                   '<img src="https://res.cloudinary.com/demo/image/upload/x">\n')
+        checker = ExternalLinkChecker(tmp_path / 'links.json', host_interval=0)
+
+        stats = audit_links.LinkAuditor(tmp_path, checker=checker).run()
+
+    assert [(e['url'], e['posts'][0][:2]) for e in stats['broken_internal']] == [('/missing/', ('_posts/2020-02-01-links.md', 6))]
+    assert [(e['url'], e['status']) for e in stats['broken_external']] == [(f'{server.url}/dead', 404)]
+    assert stats['unverified_external'] == []
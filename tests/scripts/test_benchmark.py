@@ -0,0 +1,82 @@
+"""
+Unit tests for the synthetic corpus (scripts/utils/synthetic.py) and
+scripts/benchmark-scripts.py.
+"""
+
+from conftest import load_script
+from utils.frontmatter import parse_front_matter
+from utils.synthetic import SyntheticCloudinaryAPI, SyntheticCorpus
+
+bench = load_script('benchmark-scripts')
+
+
+def test_corpus_is_deterministic(tmp_path):
+    first = SyntheticCorpus(tmp_path / 'a', 20, seed=3)
+    second = SyntheticCorpus(tmp_path / 'b', 20, seed=3)
+    first.write_posts()
+    second.write_posts()
+    first.write_wxr()
+    second.write_wxr()
+
+    names = sorted(p.name for p in first.posts_dir.iterdir())
+    assert names == sorted(p.name for p in second.posts_dir.iterdir())
+    for name in names:
+        assert (first.posts_dir / name).read_bytes() == (second.posts_dir / name).read_bytes()
+    assert first.wxr_path.read_bytes() == second.wxr_path.read_bytes()
+    assert first.resources() == second.resources()
+
+
+def test_posts_look_like_site_posts(tmp_path):
+    corpus = SyntheticCorpus(tmp_path, 5)
+    corpus.write_posts()
+
+    for path in corpus.posts_dir.iterdir():
+        front_matter, body = parse_front_matter(path.read_text(encoding='utf-8'))
+        assert front_matter['layout'] == 'post'
+        assert front_matter['categories']
+        assert '<div class="gallery">' in body
+        assert 'width="' in body and 'height="' in body
+
+
+def test_fake_api_pages_in_both_directions(tmp_path):
+    api = SyntheticCloudinaryAPI(SyntheticCorpus(tmp_path, 30).resources())
+
+    ids = []
+    cursor = None
+    while True:
+        page = api.resources(max_results=7, next_cursor=cursor, direction='asc')
+        ids.extend(r['public_id'] for r in page['resources'])
+        cursor = page.get('next_cursor')
+        if not cursor:
+            break
+
+    assert ids == [r['public_id'] for r in api.library]
+    assert api.resources(max_results=1)['resources'][0] == api.library[-1]
+
+
+def test_run_benchmark_times_every_phase(tmp_path):
+    run = bench.run_benchmark(40, tmp_path)
+
+    assert run['posts'] == 40
+    assert set(run['phases']) >= {
+        'lazy-loading: cold', 'lazy-loading: warm',
+        'featured-images: parse export', 'featured-images: cold', 'featured-images: warm',
+        'audit: fetch assets', 'audit: scan references', 'audit: compare', 'audit: warm'
+    }
+    assert all(phase['seconds'] >= 0 for phase in run['phases'].values())
+    assert run['results']['lazy_loading']['posts_updated'] == 40
+    assert run['results']['featured_images']['posts_updated'] == 40
+    assert run['results']['audit']['references'] > 40
+
+
+def test_compare_reports_only_real_slowdowns():
+    def result(seconds):
+        return {'runs': [{'posts': 1000, 'jobs': 1, 'phases': {
+            'fast': {'seconds': seconds[0]},
+            'slow': {'seconds': seconds[1]},
+        }}]}
+
+    regressions = bench.compare(result((0.011, 3.0))['runs'], result((0.01, 2.0)), tolerance=0.25)
+
+    assert len(regressions) == 1
+    assert 'slow' in regressions[0]
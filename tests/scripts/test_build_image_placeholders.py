@@ -0,0 +1,118 @@
+"""
+Unit tests for scripts/build-image-placeholders.py and utils/png.py.
+"""
+
+import base64
+import http.client
+import json
+import struct
+import zlib
+
+import pytest
+
+from conftest import load_script, write_post
+from fake_servers import LocalServer
+from utils import png
+
+placeholders = load_script('build-image-placeholders')
+
+
+def solid(colour, width=12, height=8):
+    return [[colour] * width for _ in range(height)]
+
+
+def test_png_round_trip_and_filters():
+    rows = [[(x * 20, y * 30, 100) for x in range(12)] for y in range(8)]
+
+    assert png.decode(png.encode(rows)) == (12, 8, rows)
+
+    # A paletted image with a transparent entry, stored with the Sub filter
+    raw = b'\x01\x00\x01' + b'\x01\x01\xff'
+    data = (png.SIGNATURE + png._chunk(b'IHDR', struct.pack('>IIBBBBB', 2, 2, 8, 3, 0, 0, 0))
+            + png._chunk(b'PLTE', bytes([255, 0, 0, 0, 0, 255])) + png._chunk(b'tRNS', b'\xff\x00')
+            + png._chunk(b'IDAT', zlib.compress(raw)) + png._chunk(b'IEND', b''))
+    assert png.decode(data)[2] == [[(255, 0, 0), (255, 255, 255)], [(255, 255, 255), (255, 0, 0)]]
+
+
+def test_placeholder_has_average_colour_and_small_data_uri():
+    entry = placeholders.make_placeholder(png.encode(solid((200, 100, 0))))
+
+    assert entry['color'] == '#c86400'
+    assert entry['lqip'].startswith('data:image/png;base64,')
+    assert len(entry['lqip']) < 200
+    assert png.decode(base64.b64decode(entry['lqip'].split(',', 1)[1]))[2] == solid((200, 100, 0))
+
+
+class FakeTransforms:
+    """Delivery host returning a solid tiny PNG per public_id"""
+
+    def __init__(self, colours):
+        self.colours = colours
+
+    def __call__(self, request):
+        prefix = f'/demo/image/upload/{placeholders.placeholder_transformation()}/'
+        public_id = request.path[len(prefix):]
+        if not request.path.startswith(prefix) or public_id not in self.colours:
+            return 404, {}, b''
+        return 200, {'Content-Type': 'image/png'}, png.encode(solid(self.colours[public_id]))
+
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / '_config.yml').write_text('cloudinary_cloud_name: demo\ncloudinary_default_folder: site\n')
+    posts_dir = tmp_path / '_posts'
+    posts_dir.mkdir()
+    write_post(posts_dir, '2020-01-01-a.md', 'title: A\nfeatured_image: photo-a', 'Body.')
+    write_post(posts_dir, '2020-01-02-b.md', 'title: B\nimage: other/photo-b.jpg', 'Body.')
+    write_post(posts_dir, '2020-01-03-c.md', 'title: C\nfeatured_image: https://example.com/c.jpg', 'Body.')
+    write_post(posts_dir, '2020-01-04-d.md', 'title: D\nfeatured_image: missing', 'Body.')
+    return tmp_path
+
+
+def build(site, server, **kwargs):
+    builder = placeholders.PlaceholderBuilder(site / '_posts', site / 'placeholders.json', site_dir=site,
+                                              base_url=server.url, workers=4, **kwargs)
+    stats = builder.build()
+    return stats, json.loads((site / 'placeholders.json').read_text(encoding='utf-8'))
+
+
+def test_builds_placeholders_keyed_like_the_templates(site):
+    app = FakeTransforms({'site/photo-a': (10, 20, 30), 'other/photo-b': (255, 255, 255)})
+    with LocalServer(app) as server:
+        stats, data = build(site, server, jobs=2)
+
+    assert sorted(data) == ['other/photo-b', 'site/photo-a']
+    assert data['site/photo-a']['color'] == '#0a141e'
+    assert stats['computed'] == 2
+    assert [public_id for public_id, _reason in stats['failed']] == ['site/missing']
+
+
+def test_only_new_images_are_fetched(site):
+    app = FakeTransforms({'site/photo-a': (10, 20, 30), 'other/photo-b': (0, 0, 0), 'site/new': (1, 2, 3)})
+    with LocalServer(app) as server:
+        build(site, server)
+        (site / '_posts' / '2020-01-02-b.md').unlink()
+        write_post(site / '_posts', '2020-01-05-e.md', 'title: E\nfeatured_image: new', 'Body.')
+        server.requests.clear()
+
+        stats, data = build(site, server)
+
+        assert sorted(r.path.rsplit('/', 1)[1] for r in server.requests) == ['missing', 'new']
+    assert sorted(data) == ['site/new', 'site/photo-a']
+    assert (stats['unchanged'], stats['computed'], stats['removed']) == (1, 1, 1)
+
+
+def test_bad_front_matter_and_broken_responses_are_reported(site):
+    write_post(site / '_posts', '2020-01-05-bad.md', 'title: [unclosed\nfeatured_image: bad', 'Body.')
+
+    class BrokenPool:
+        def get(self, url):
+            raise http.client.IncompleteRead(b'')
+
+    builder = placeholders.PlaceholderBuilder(site / '_posts', site / 'placeholders.json', site_dir=site,
+                                              pool=BrokenPool())
+    stats = builder.build()
+
+    assert [name for name, _message in stats['posts_failed']] == ['2020-01-05-bad.md']
+    assert sorted(public_id for public_id, _reason in stats['failed']) == ['other/photo-b', 'site/missing',
+                                                                          'site/photo-a']
@@ -0,0 +1,76 @@
+"""
+Unit tests for scripts/build-post-stats.py.
+"""
+
+import json
+
+from conftest import load_script, write_post
+from utils.text import excerpt
+
+post_stats = load_script('build-post-stats')
+
+
+def test_excerpt_is_first_paragraph_cut_to_thirty_words():
+    words = ' '.join(f'w{i}' for i in range(40))
+
+    assert excerpt('The *[Globe](https://x)*, Hay.\n\nSecond paragraph.') == 'The Globe, Hay.'
+    assert excerpt(f'\n{words}\n\nMore.') == ' '.join(f'w{i}' for i in range(30)) + '...'
+    assert excerpt('<div class="gallery">\n\n<figure></figure>') == ''
+
+
+def test_writes_stats_keyed_by_post_path(tmp_path, posts_dir):
+    body = 'First <a href="#">linked</a> paragraph.\n\n' + 'word ' * 450
+    write_post(posts_dir, '2020-01-01-long.md', 'title: Long', body)
+    output = tmp_path / '_data' / 'post_stats.json'
+
+    stats = post_stats.build_post_stats(posts_dir, output)
+
+    data = json.loads(output.read_text(encoding='utf-8'))
+    entry = data['_posts/2020-01-01-long.md']
+    assert entry['words'] == 453
+    assert entry['reading_time'] == 2
+    assert entry['excerpt'] == 'First linked paragraph.'
+    assert stats['posts_computed'] == 1
+
+
+def test_only_changed_posts_are_recomputed(tmp_path, posts_dir, monkeypatch):
+    for i in range(3):
+        write_post(posts_dir, f'2020-01-0{i + 1}-p{i}.md', f'title: P{i}', 'Short post.')
+    output = tmp_path / 'post_stats.json'
+    post_stats.build_post_stats(posts_dir, output)
+
+    write_post(posts_dir, '2020-01-02-p1.md', 'title: P1', 'Now a longer post.')
+    (posts_dir / '2020-01-03-p2.md').unlink()
+    computed = []
+    compute = post_stats.compute_stats
+    monkeypatch.setattr(post_stats, 'compute_stats', lambda content: computed.append(content) or compute(content))
+
+    stats = post_stats.build_post_stats(posts_dir, output)
+
+    assert len(computed) == 1
+    assert stats == {'posts': 2, 'posts_computed': 1, 'posts_unchanged': 1, 'posts_removed': 1, 'posts_failed': []}
+    data = json.loads(output.read_text(encoding='utf-8'))
+    assert sorted(data) == ['_posts/2020-01-01-p0.md', '_posts/2020-01-02-p1.md']
+    assert data['_posts/2020-01-02-p1.md']['words'] == 4
+
+
+def test_unchanged_file_is_not_rewritten(tmp_path, posts_dir):
+    write_post(posts_dir, '2020-01-01-a.md', 'title: A', 'Body.')
+    output = tmp_path / 'post_stats.json'
+    post_stats.build_post_stats(posts_dir, output)
+    mtime = output.stat().st_mtime_ns
+
+    post_stats.build_post_stats(posts_dir, output)
+
+    assert output.stat().st_mtime_ns == mtime
+
+
+def test_post_with_invalid_front_matter_is_reported_and_skipped(tmp_path, posts_dir):
+    write_post(posts_dir, '2020-01-01-a.md', 'title: A', 'Body.')
+    write_post(posts_dir, '2020-01-02-b.md', 'title: [B', 'Body.')
+    output = tmp_path / 'post_stats.json'
+
+    stats = post_stats.build_post_stats(posts_dir, output)
+
+    assert [name for name, _message in stats['posts_failed']] == ['2020-01-02-b.md']
+    assert sorted(json.loads(output.read_text(encoding='utf-8'))) == ['_posts/2020-01-01-a.md']
@@ -0,0 +1,168 @@
+"""
+Unit tests for scripts/build-related-posts.py and utils/taxonomy.py.
+"""
+
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from conftest import load_script, write_post
+from utils.taxonomy import Taxonomy, default_slug
+
+related = load_script('build-related-posts')
+
+TAXONOMY = """categories:
+  - item: Projects
+    children:
+      - item: Photography
+      - item: Retro Computing
+        slug: retro
+  - item: Digital Art and Technology
+    children:
+      - item: DAT401 - Strategies
+tags:
+  - Dartmoor
+  - item: ZX Spectrum
+    slug: spectrum
+"""
+
+
+def site(tmp_path):
+    (tmp_path / '_data').mkdir(exist_ok=True)
+    (tmp_path / '_data' / 'taxonomy.yml').write_text(TAXONOMY, encoding='utf-8')
+    return tmp_path
+
+
+def write_corpus(posts_dir):
+    write_post(posts_dir, '2020-01-01-moor.md', 'title: Dartmoor tors\ncategories: [Photography]\ntags: [Dartmoor]',
+               'Granite tors and clapper bridges on the moor.')
+    write_post(posts_dir, '2020-01-02-bridge.md', 'title: Clapper bridge\ncategories: [Photography]\ntags: [Dartmoor]',
+               'A granite clapper bridge photographed at dawn.')
+    write_post(posts_dir, '2020-01-03-spectrum.md', 'title: Spectrum sprites\ncategories: [Retro Computing]',
+               'Drawing sprites on the ZX Spectrum in assembly.')
+    write_post(posts_dir, '2020-01-04-loader.md', 'title: Tape loader\ncategories: [Retro Computing]\ntags: [ZX Spectrum]',
+               'Writing a Spectrum tape loader in assembly.')
+    write_post(posts_dir, '2020-01-05-essay.md', 'title: Research essay\ncategories: [DAT401 - Strategies]',
+               'An essay on research methods.')
+
+
+def build(tmp_path, posts_dir, **kwargs):
+    builder = related.RelatedPostsBuilder(posts_dir, tmp_path / 'related.json', tmp_path / 'cache.json',
+                                          site_dir=tmp_path, top_k=3, **kwargs)
+    stats = builder.build()
+    data = json.loads((tmp_path / 'related.json').read_text(encoding='utf-8'))
+    return stats, {key: [card['path'] for card in cards] for key, cards in data.items()}
+
+
+def test_taxonomy_slugs_and_parents(tmp_path):
+    taxonomy = Taxonomy.load(site(tmp_path))
+
+    assert default_slug('DAT401 - Strategies') == 'dat401-strategies'
+    assert taxonomy.category_slug('Retro Computing') == 'retro'
+    assert taxonomy.category_parent('Photography') == 'projects'
+    assert taxonomy.category_parent('Projects') is None
+    assert taxonomy.tag_slug('ZX Spectrum') == 'spectrum'
+    assert taxonomy.tag_slug('Unlisted Tag') == 'unlisted-tag'
+    assert Taxonomy.load(tmp_path / 'missing').categories == {}
+
+
+def test_related_posts_rank_text_and_taxonomy(tmp_path, posts_dir):
+    write_corpus(posts_dir)
+
+    stats, data = build(site(tmp_path), posts_dir)
+
+    assert stats['mode'] == 'full'
+    assert data['_posts/2020-01-01-moor.md'][0] == '_posts/2020-01-02-bridge.md'
+    assert data['_posts/2020-01-03-spectrum.md'][0] == '_posts/2020-01-04-loader.md'
+    # Photography and Retro Computing share the Projects parent; DAT401 doesn't
+    assert '_posts/2020-01-03-spectrum.md' in data['_posts/2020-01-01-moor.md']
+    assert '_posts/2020-01-05-essay.md' not in data['_posts/2020-01-01-moor.md']
+    assert all(key not in others for key, others in data.items())
+
+
+def test_incremental_update_matches_full_rows_for_changed_posts(tmp_path, posts_dir):
+    write_corpus(posts_dir)
+    site(tmp_path)
+    build(tmp_path, posts_dir)
+    for i in range(6, 12):
+        write_post(posts_dir, f'2020-01-{i:02d}-filler{i}.md', f'title: Filler {i}\ncategories: [Projects]', f'Filler {i}.')
+    build(tmp_path, posts_dir, full=True)
+
+    write_post(posts_dir, '2020-01-05-essay.md', 'title: Granite essay\ncategories: [Photography]\ntags: [Dartmoor]',
+               'An essay on granite tors and clapper bridges.')
+    stats, data = build(tmp_path, posts_dir)
+    _full_stats, full = build(tmp_path, posts_dir, full=True)
+
+    assert stats['mode'] == 'incremental'
+    assert stats['rows_computed'] == 1
+    assert data['_posts/2020-01-05-essay.md'] == full['_posts/2020-01-05-essay.md']
+    assert '_posts/2020-01-05-essay.md' in data['_posts/2020-01-01-moor.md']
+
+
+def test_removed_posts_are_dropped(tmp_path, posts_dir):
+    write_corpus(posts_dir)
+    site(tmp_path)
+    build(tmp_path, posts_dir)
+
+    (posts_dir / '2020-01-02-bridge.md').unlink()
+    stats, data = build(tmp_path, posts_dir)
+
+    assert stats['posts_removed'] == 1
+    assert '_posts/2020-01-02-bridge.md' not in data
+    assert all('_posts/2020-01-02-bridge.md' not in others for others in data.values())
+
+
+def test_related_entries_carry_card_fields(tmp_path, posts_dir):
+    write_corpus(posts_dir)
+    write_post(posts_dir, '2020-01-02-bridge.md', 'title: Clapper bridge\ncategories: [Photography]\ntags: [Dartmoor]',
+               'Granite <img src="https://res.cloudinary.com/demo/image/upload/w_800/05/bridge.jpg"> at dawn.')
+    builder = related.RelatedPostsBuilder(posts_dir, tmp_path / 'related.json', tmp_path / 'cache.json',
+                                          site_dir=site(tmp_path), top_k=3)
+    builder.build()
+
+    data = json.loads((tmp_path / 'related.json').read_text(encoding='utf-8'))
+    assert data['_posts/2020-01-01-moor.md'][0] == {
+        'path': '_posts/2020-01-02-bridge.md', 'url': '/bridge/', 'title': 'Clapper bridge',
+        'date': '2020-01-02T00:00:00+00:00', 'categories': ['Photography'], 'featured_image': 'bridge.jpg'
+    }
+
+
+def test_post_with_invalid_front_matter_is_reported_and_skipped(tmp_path, posts_dir):
+    write_corpus(posts_dir)
+    write_post(posts_dir, '2020-01-06-broken.md', 'title: [Broken', 'Granite tors.')
+
+    stats, data = build(site(tmp_path), posts_dir)
+
+    assert [name for name, _message in stats['posts_failed']] == ['2020-01-06-broken.md']
+    assert '_posts/2020-01-06-broken.md' not in data
+
+
+def test_future_posts_join_once_their_date_passes(tmp_path, posts_dir):
+    write_corpus(posts_dir)
+    write_post(posts_dir, '2030-01-01-moor-again.md', 'title: Dartmoor tors again\ncategories: [Photography]',
+               'More granite tors on the moor.')
+    future = '_posts/2030-01-01-moor-again.md'
+
+    stats, data = build(site(tmp_path), posts_dir, now=datetime(2025, 1, 1, tzinfo=timezone.utc))
+    assert stats['posts_future'] == 1
+    assert future not in data
+    assert all(future not in others for others in data.values())
+
+    # Same file, later run: it is read as a new post and merged incrementally
+    stats, data = build(tmp_path, posts_dir, now=datetime(2030, 6, 1, tzinfo=timezone.utc))
+    assert (stats['mode'], stats['posts_changed'], stats['posts_future']) == ('incremental', 1, 0)
+    assert data['_posts/2020-01-01-moor.md'][0] == future
+
+
+def test_python_and_sparse_backends_agree():
+    pytest.importorskip('scipy')
+    vectors = [{'a': 0.6, 'b': 0.8}, {'a': 1.0}, {'b': 0.6, 'c': 0.8}]
+
+    python_rows = dict(related.PythonBackend(vectors).rows(range(3)))
+    sparse_rows = dict(related.SparseBackend(vectors).rows(range(3)))
+
+    for doc_id in range(3):
+        assert set(python_rows[doc_id]) == set(sparse_rows[doc_id])
+        for other, score in python_rows[doc_id].items():
+            assert sparse_rows[doc_id][other] == pytest.approx(score)
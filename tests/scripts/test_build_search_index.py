@@ -0,0 +1,138 @@
+"""
+Unit tests for scripts/build-search-index.py and the text/post helpers it uses.
+"""
+
+import gzip
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+from conftest import load_script, write_post
+from utils.posts import post_date, post_url, site_timezone
+from utils.text import plain_text, tokenize
+
+search = load_script('build-search-index')
+
+
+def build(tmp_path, posts_dir, **kwargs):
+    builder = search.SearchIndexBuilder(posts_dir, tmp_path / 'search', site_dir=tmp_path, **kwargs)
+    builder.build()
+    index = json.loads((tmp_path / 'search' / 'index.json').read_text(encoding='utf-8'))
+    return builder, index
+
+
+def load(tmp_path, filename):
+    return json.loads((tmp_path / 'search' / filename).read_text(encoding='utf-8'))
+
+
+def test_plain_text_drops_markup():
+    body = ('## Heading\n\n<div class="gallery"><img src="https://x/y.jpg"></div>\n'
+            '{% include cloudinary-image.html src="a" %}A [link](https://example.com) &amp; **bold**'
+            '<script>var hidden = 1;</script>')
+
+    assert plain_text(body) == 'Heading A link & bold'
+
+
+def test_tokenize_lowercases_and_filters():
+    assert tokenize('The Kuka robot-arm at 2016, id 16339765756 in Plymouth') == \
+        ['kuka', 'robot', 'arm', '2016', 'id', 'plymouth']
+
+
+def test_post_url_and_date(tmp_path):
+    path = Path('2015-01-04-derelict-house.md')
+
+    assert post_url(path) == '/derelict-house/'
+    assert post_url(path, {'permalink': '/custom/'}) == '/custom/'
+    assert post_url(path, {'slug': 'Other Name'}) == '/Other-Name/'
+
+    date = post_date(path, {'date': '2015-06-30 23:30:00 +0000'}, site_timezone('Europe/London'))
+    assert (date.month, date.day, date.hour) == (7, 1, 0)
+    assert post_date(path).day == 4
+
+
+def test_index_ranks_title_matches_first(tmp_path, posts_dir):
+    write_post(posts_dir, '2020-01-01-robots.md', 'title: Kuka robot arm\ncategories:\n  - Projects',
+               'Programming an industrial arm.')
+    write_post(posts_dir, '2020-02-01-walk.md', 'title: Dartmoor walk\ncategories:\n  - Photography',
+               'We passed a robot sculpture and a robot shop on the walk.')
+    write_post(posts_dir, '2020-03-01-draft.md', 'title: Draft robot\npublished: false', 'Robot.')
+
+    builder, index = build(tmp_path, posts_dir)
+
+    assert index['doc_count'] == 2
+    docs = load(tmp_path, index['docs'][0])
+    # Newest first, as site.posts
+    assert [d['url'] for d in docs] == ['/walk/', '/robots/']
+    assert docs[1]['category'] == 'Projects'
+    assert docs[1]['date'] == 'Jan 1, 2020'
+
+    postings = load(tmp_path, index['shards']['ro'])['robot']
+    weights = dict(zip(postings[::2], postings[1::2]))
+    assert weights[1] > weights[0]
+    assert 'dr' not in index['shards']
+
+
+def test_shards_by_prefix_with_compressed_copies(tmp_path, posts_dir):
+    write_post(posts_dir, '2020-01-01-a.md', 'title: Alpha', 'alpine apple banana')
+
+    builder, index = build(tmp_path, posts_dir, prefix_length=1)
+
+    assert set(index['shards']) == {'a', 'b'}
+    shard = load(tmp_path, index['shards']['a'])
+    assert set(shard) == {'alpha', 'alpine', 'apple'}
+    raw = (tmp_path / 'search' / index['shards']['a']).read_bytes()
+    assert gzip.decompress((tmp_path / 'search' / (index['shards']['a'] + '.gz')).read_bytes()) == raw
+
+
+def test_rebuild_only_rewrites_changed_shards(tmp_path, posts_dir):
+    write_post(posts_dir, '2020-01-01-a.md', 'title: Alpha', 'banana cherry')
+    build(tmp_path, posts_dir, prefix_length=1)
+    write_post(posts_dir, '2020-01-01-a.md', 'title: Alpha', 'banana damson')
+
+    builder, index = build(tmp_path, posts_dir, prefix_length=1)
+
+    files = {p.name for p in (tmp_path / 'search').iterdir()}
+    assert not any(name.startswith('terms-c.') for name in files)
+    assert index['shards']['d'] in files
+    # the "d" shard is new; "a" and "b" postings are unchanged, so only
+    # the new shard, the docs chunk and index.json are written
+    assert builder.stats['files_written'] == 3
+    assert builder.stats['files_removed'] > 0
+
+
+def test_only_generated_files_are_removed(tmp_path, posts_dir):
+    write_post(posts_dir, '2020-01-01-a.md', 'title: Alpha', 'banana')
+    (tmp_path / 'search').mkdir()
+    (tmp_path / 'search' / 'main.css').write_text('body {}', encoding='utf-8')
+    (tmp_path / 'search' / 'terms-zz.0123456789.json').write_text('{}', encoding='utf-8')
+
+    builder, _index = build(tmp_path, posts_dir)
+
+    assert (tmp_path / 'search' / 'main.css').exists()
+    assert not (tmp_path / 'search' / 'terms-zz.0123456789.json').exists()
+    assert builder.stats['files_removed'] == 1
+
+
+def test_post_with_invalid_front_matter_is_reported_and_skipped(tmp_path, posts_dir):
+    write_post(posts_dir, '2020-01-01-a.md', 'title: Alpha', 'banana')
+    write_post(posts_dir, '2020-01-02-b.md', 'title: "Unclosed', 'cherry')
+
+    builder, index = build(tmp_path, posts_dir)
+
+    assert index['doc_count'] == 1
+    assert builder.stats['posts_failed'] == [('2020-01-02-b.md', 'found unexpected end of stream (line 3)')]
+
+
+def test_future_posts_are_left_out_unless_configured(tmp_path, posts_dir):
+    write_post(posts_dir, '2020-01-01-a.md', 'title: Alpha', 'banana')
+    write_post(posts_dir, '2030-01-01-later.md', 'title: Later', 'banana')
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    builder, index = build(tmp_path, posts_dir, now=now)
+    assert index['doc_count'] == 1
+    assert [doc['title'] for doc in load(tmp_path, index['docs'][0])] == ['Alpha']
+    assert builder.stats['posts_future'] == 1
+
+    (tmp_path / '_config.yml').write_text('future: true\n', encoding='utf-8')
+    _builder, index = build(tmp_path, posts_dir, now=now)
+    assert index['doc_count'] == 2
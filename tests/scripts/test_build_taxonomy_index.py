@@ -0,0 +1,143 @@
+"""
+Unit tests for scripts/build-taxonomy-index.py.
+"""
+
+import json
+from datetime import datetime, timezone
+
+from conftest import load_script, write_post
+from utils.taxonomy import Taxonomy
+
+taxonomy_index = load_script('build-taxonomy-index')
+
+TAXONOMY = """categories:
+  - item: Projects
+    children:
+      - item: Photography
+      - item: Retro Computing
+        slug: retro
+  - item: Digital Art and Technology
+    children:
+      - item: DAT401 - Strategies
+tags:
+  - Dartmoor
+  - item: ZX Spectrum
+    slug: spectrum
+"""
+
+
+def build(tmp_path, posts_dir, **kwargs):
+    (tmp_path / '_data').mkdir(exist_ok=True)
+    (tmp_path / '_data' / 'taxonomy.yml').write_text(TAXONOMY, encoding='utf-8')
+    output = tmp_path / '_data' / 'taxonomy_index.json'
+    builder = taxonomy_index.TaxonomyIndexBuilder(posts_dir, output, tmp_path / '.cache' / 'taxonomy-index.json',
+                                                  site_dir=tmp_path, **kwargs)
+    builder.build()
+    return builder, json.loads(output.read_text(encoding='utf-8'))
+
+
+def test_index_has_hierarchy_post_lists_and_rolled_up_totals(tmp_path, posts_dir):
+    write_post(posts_dir, '2020-01-01-moor.md', 'title: Moor\ncategories: [Projects, Photography]\ntags: [Dartmoor]', '')
+    write_post(posts_dir, '2020-03-01-zx.md', 'title: ZX\ncategories: Retro Computing\ntags: [ZX Spectrum]', '')
+    write_post(posts_dir, '2020-02-01-tor.md', 'title: Tor\ncategories: [Photography]\ntags: Dartmoor', '')
+    write_post(posts_dir, '2020-04-01-draft.md', 'title: Draft\ncategories: [Photography]\npublished: false', '')
+
+    _builder, data = build(tmp_path, posts_dir)
+
+    projects = data['categories']['projects']
+    assert projects['children'] == ['photography', 'retro']
+    assert projects['count'] == 1
+    assert projects['total'] == 3
+    assert data['categories']['retro'] == {
+        'name': 'Retro Computing', 'parent': 'projects', 'ancestors': ['projects'], 'children': [],
+        'posts': ['_posts/2020-03-01-zx.md'], 'count': 1, 'total': 1
+    }
+    assert data['categories']['photography']['posts'] == ['_posts/2020-02-01-tor.md', '_posts/2020-01-01-moor.md']
+    assert data['categories']['digital-art-and-technology']['total'] == 0
+    assert data['roots'] == ['projects', 'digital-art-and-technology']
+    assert data['category_slugs']['DAT401 - Strategies'] == 'dat401-strategies'
+    assert data['tags']['dartmoor']['count'] == 2
+    assert data['tag_slugs'] == {'Dartmoor': 'dartmoor', 'ZX Spectrum': 'spectrum'}
+
+
+def test_unknown_categories_and_tags_are_reported_with_suggestions(tmp_path, posts_dir):
+    write_post(posts_dir, '2020-01-01-a.md', 'title: A\ncategories: [photography, Knitting]\ntags: [spectrum]', '')
+
+    builder, data = build(tmp_path, posts_dir)
+
+    assert builder.stats['unknown_categories'] == [
+        ('_posts/2020-01-01-a.md', 'photography', 'Photography'),
+        ('_posts/2020-01-01-a.md', 'Knitting', None)
+    ]
+    assert builder.stats['unknown_tags'] == [('_posts/2020-01-01-a.md', 'spectrum', 'ZX Spectrum')]
+    assert builder.problems() == 3
+    assert data['categories']['photography']['count'] == 0
+    assert 'Digital Art and Technology' in builder.stats['empty_categories']
+
+
+def test_only_changed_posts_are_parsed(tmp_path, posts_dir, monkeypatch):
+    for i in range(3):
+        write_post(posts_dir, f'2020-01-0{i + 1}-p{i}.md', f'title: P{i}\ncategories: [Photography]', '')
+    build(tmp_path, posts_dir)
+    output = tmp_path / '_data' / 'taxonomy_index.json'
+    mtime = output.stat().st_mtime_ns
+
+    parsed = []
+    read_post = taxonomy_index.read_post
+    monkeypatch.setattr(taxonomy_index, 'read_post', lambda path, raw: parsed.append(path.name) or read_post(path, raw))
+    builder, _data = build(tmp_path, posts_dir)
+    assert parsed == []
+    assert output.stat().st_mtime_ns == mtime
+
+    write_post(posts_dir, '2020-01-02-p1.md', 'title: P1\ncategories: [Retro Computing]', '')
+    (posts_dir / '2020-01-03-p2.md').unlink()
+    builder, data = build(tmp_path, posts_dir)
+
+    assert parsed == ['2020-01-02-p1.md']
+    assert builder.stats['posts_unchanged'] == 1
+    assert builder.stats['posts_removed'] == 1
+    assert data['categories']['photography']['posts'] == ['_posts/2020-01-01-p0.md']
+    assert data['categories']['retro']['posts'] == ['_posts/2020-01-02-p1.md']
+
+
+def test_taxonomy_reports_duplicate_names_and_slugs():
+    taxonomy = Taxonomy({
+        'categories': [{'item': 'Projects', 'children': ['Photography']}, {'item': 'Photography'},
+                       {'item': 'Retro', 'slug': 'projects'}],
+        'tags': ['Dartmoor', {'item': 'Moor', 'slug': 'dartmoor'}]
+    })
+
+    assert taxonomy.problems == [
+        'Category "Photography" is listed twice',
+        'Category "Retro" has the same slug as another category: projects',
+        'Tag "Moor" has the same slug as another tag: dartmoor'
+    ]
+
+
+def test_future_posts_are_left_out_until_their_date(tmp_path, posts_dir):
+    write_post(posts_dir, '2020-01-01-moor.md', 'title: Moor\ncategories: [Photography]', '')
+    write_post(posts_dir, '2030-01-01-later.md', 'title: Later\ncategories: [Photography]', '')
+
+    builder, data = build(tmp_path, posts_dir, now=datetime(2025, 1, 1, tzinfo=timezone.utc))
+    assert data['categories']['photography']['posts'] == ['_posts/2020-01-01-moor.md']
+    assert builder.stats['posts_future'] == 1
+
+    # Unchanged file, read from the cache, once its date has passed
+    builder, data = build(tmp_path, posts_dir, now=datetime(2030, 6, 1, tzinfo=timezone.utc))
+    assert builder.stats['posts_parsed'] == 0
+    assert data['categories']['photography']['count'] == 2
+
+    (tmp_path / '_config.yml').write_text('future: true\n', encoding='utf-8')
+    _builder, data = build(tmp_path, posts_dir, now=datetime(2025, 1, 1, tzinfo=timezone.utc))
+    assert data['categories']['photography']['count'] == 2
+
+
+def test_posts_with_invalid_front_matter_are_reported_and_skipped(tmp_path, posts_dir):
+    write_post(posts_dir, '2020-01-01-moor.md', 'title: Moor\ncategories: [Photography]', '')
+    write_post(posts_dir, '2020-01-02-bad.md', 'title: [unclosed\ncategories: [Photography]', '')
+
+    builder, data = build(tmp_path, posts_dir)
+
+    assert builder.stats['posts_failed'] == [('2020-01-02-bad.md', "did not find expected ',' or ']' (line 3)")]
+    assert builder.problems() == 1
+    assert data['categories']['photography']['posts'] == ['_posts/2020-01-01-moor.md']
@@ -0,0 +1,175 @@
+"""
+Unit tests for the Cloudinary asset cache (scripts/utils/cloudinary_cache.py).
+"""
+
+import time
+
+import pytest
+
+from conftest import FakeCloudinaryAPI, make_resource
+from utils import cloudinary_cache
+from utils.cloudinary_cache import CloudinaryAssetCache
+
+
+@pytest.fixture(autouse=True)
+def small_pages(monkeypatch):
+    monkeypatch.setattr(cloudinary_cache, 'PAGE_SIZE', 10)
+
+
+@pytest.fixture
+def api():
+    return FakeCloudinaryAPI([
+        make_resource(f'0{i % 9 + 1}/photo-{i}', f'2020-01-01T00:00:{i:02d}Z', size=i)
+        for i in range(25)
+    ])
+
+
+def test_first_sync_lists_whole_library(tmp_path, api):
+    cache = CloudinaryAssetCache('demo', tmp_path / 'assets.json')
+
+    assert cache.sync(api) == 25
+    assert cache.stats['sync_mode'] == 'full'
+    assert len(api.calls) == 3
+    assert cache.assets['03/photo-2'] == {
+        'created_at': '2020-01-01T00:00:02Z', 'bytes': 2, 'format': 'jpg', 'width': 800, 'height': 600
+    }
+
+
+def test_later_sync_fetches_only_new_assets(tmp_path, api):
+    CloudinaryAssetCache('demo', tmp_path / 'assets.json').sync(api)
+    api.library.append(make_resource('new/upload', '2020-02-01T00:00:00Z'))
+    api.calls.clear()
+
+    cache = CloudinaryAssetCache('demo', tmp_path / 'assets.json')
+    cache.sync(api)
+
+    assert cache.stats['sync_mode'] == 'incremental'
+    assert api.calls == [{'prefix': None, 'start_at': '2020-01-01T00:00:24Z', 'next_cursor': None}]
+    assert 'new/upload' in cache.assets
+    assert len(cache.assets) == 26
+
+
+def test_stale_cache_forces_full_sync_and_drops_deleted_assets(tmp_path, api):
+    cache = CloudinaryAssetCache('demo', tmp_path / 'assets.json', max_age_days=1)
+    cache.sync(api)
+    cache.full_synced_at = time.time() - 2 * 86400
+    del api.library[0]
+
+    cache.sync(api)
+
+    assert cache.stats['sync_mode'] == 'full'
+    assert '01/photo-0' not in cache.assets
+    assert len(cache.assets) == 24
+
+
+def test_interrupted_full_sync_resumes_from_cursor(tmp_path, api):
+    api.fail_after = 2
+    cache = CloudinaryAssetCache('demo', tmp_path / 'assets.json')
+    with pytest.raises(RuntimeError):
+        cache.sync(api)
+
+    api.fail_after = None
+    api.calls.clear()
+    resumed = CloudinaryAssetCache('demo', tmp_path / 'assets.json')
+    resumed.sync(api)
+
+    assert api.calls == [{'prefix': None, 'start_at': None, 'next_cursor': '20'}]
+    assert len(resumed.assets) == 25
+    assert resumed.resume is None
+
+
+def test_cache_for_another_cloud_is_ignored(tmp_path, api):
+    CloudinaryAssetCache('demo', tmp_path / 'assets.json').sync(api)
+
+    other = CloudinaryAssetCache('other', tmp_path / 'assets.json')
+
+    assert not other.loaded
+    assert other.assets == {}
+
+
+def month_library():
+    return FakeCloudinaryAPI([
+        make_resource(f'{month:02d}/photo-{i}', f'2020-{month:02d}-01T00:00:{i:02d}Z')
+        for month in range(1, 13)
+        for i in range(15)
+    ])
+
+
+def test_full_resync_lists_folders_concurrently_over_http(tmp_path):
+    from fake_servers import FakeCloudinaryAdmin, LocalServer
+    from utils.cloudinary_admin import CloudinaryAdminClient
+
+    api = month_library()
+    app = FakeCloudinaryAdmin(api)
+    with LocalServer(app) as server:
+        client = CloudinaryAdminClient('demo', 'key', 'secret', base_url=server.url)
+        cache = CloudinaryAssetCache('demo', tmp_path / 'assets.json', workers=4)
+        cache.sync(client)
+        assert cache.stats['shards'] == 1
+
+        app.rate_limited = 2
+        client.pool.sleep = lambda delay: None
+        resynced = CloudinaryAssetCache('demo', tmp_path / 'assets.json', workers=4)
+        resynced.sync(client, full=True)
+
+    assert resynced.stats['shards'] == 13
+    assert resynced.assets == cache.assets
+    assert len(resynced.assets) == 180
+    assert client.pool.stats['retries'] == 2
+    assert server.connections <= 4
+    prefixes = {r.query.get('prefix') for r in server.requests if r.path.endswith('/upload')}
+    assert prefixes == {None} | {f'{m:02d}/' for m in range(1, 13)}
+
+
+def test_root_level_assets_keep_sync_sequential(tmp_path):
+    api = month_library()
+    api.root_folders = lambda: ['01', '02']
+    api.library.append(make_resource('logo', '2021-01-01T00:00:00Z'))
+    cache = CloudinaryAssetCache('demo', tmp_path / 'assets.json')
+    cache.sync(api)
+
+    cache.sync(api, full=True)
+
+    assert cache.stats['shards'] == 1
+    assert 'logo' in cache.assets
+
+
+def test_sharded_full_sync_keeps_new_root_level_uploads(tmp_path):
+    api = month_library()
+    api.root_folders = lambda: [f'{m:02d}' for m in range(1, 13)]
+    cache = CloudinaryAssetCache('demo', tmp_path / 'assets.json', workers=4)
+    cache.sync(api)
+    api.library.append(make_resource('logo', '2030-01-01T00:00:00Z'))
+
+    cache.sync(api, full=True)
+
+    assert cache.stats['shards'] == 13
+    assert 'logo' in cache.assets
+    assert len(cache.assets) == 181
+
+
+def test_failed_shard_resumes_only_unfinished_folders(tmp_path):
+    api = month_library()
+    api.root_folders = lambda: [f'{m:02d}' for m in range(1, 13)]
+    cache = CloudinaryAssetCache('demo', tmp_path / 'assets.json', workers=1)
+    cache.sync(api)
+
+    original = api.resources
+
+    def flaky(**params):
+        if params.get('prefix') == '07/' and params.get('next_cursor') == '10':
+            raise RuntimeError('rate limited')
+        return original(**params)
+
+    api.resources = flaky
+    sharded = CloudinaryAssetCache('demo', tmp_path / 'assets.json', workers=4)
+    with pytest.raises(RuntimeError):
+        sharded.sync(api, full=True)
+
+    api.resources = original
+    api.calls.clear()
+    resumed = CloudinaryAssetCache('demo', tmp_path / 'assets.json', workers=4)
+    resumed.sync(api)
+
+    assert api.calls == [{'prefix': '07/', 'start_at': None, 'next_cursor': '10'}]
+    assert len(resumed.assets) == 180
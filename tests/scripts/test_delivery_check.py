@@ -0,0 +1,106 @@
+"""
+Unit tests for HEAD-based image verification (scripts/utils/delivery_check.py).
+"""
+
+import http.client
+
+import pytest
+
+from fake_servers import LocalServer
+from utils.delivery_check import ERROR, MISSING, PRESENT, DeliveryChecker
+
+
+class FakeDelivery:
+    """Delivery host serving HEAD for a fixed set of public_ids"""
+
+    def __init__(self, existing):
+        self.existing = set(existing)
+        self.broken = set()
+
+    def __call__(self, request):
+        prefix = '/demo/image/upload/'
+        public_id = request.path[len(prefix):]
+        if request.method != 'HEAD':
+            return 405, {}, ''
+        if public_id in self.broken:
+            return 503, {}, ''
+        return (200 if public_id in self.existing else 404), {'Content-Type': 'image/jpeg'}, ''
+
+
+@pytest.fixture
+def delivery():
+    app = FakeDelivery({f'05/photo-{i}' for i in range(20)})
+    with LocalServer(app) as server:
+        yield app, server
+
+
+def make_checker(tmp_path, server, **kwargs):
+    checker = DeliveryChecker('demo', tmp_path / 'heads.json', base_url=server.url, workers=4, **kwargs)
+    checker.pool.sleep = lambda delay: None
+    return checker
+
+
+def test_checks_concurrently_over_pooled_connections(tmp_path, delivery):
+    app, server = delivery
+    ids = [f'05/photo-{i}' for i in range(20)] + ['05/gone']
+
+    statuses = make_checker(tmp_path, server).check(ids)
+
+    assert statuses['05/photo-3'] == PRESENT
+    assert statuses['05/gone'] == MISSING
+    assert len(server.requests) == 21
+    assert server.connections <= 4
+
+
+def test_rerun_only_rechecks_new_and_missing(tmp_path, delivery):
+    app, server = delivery
+    make_checker(tmp_path, server).check(['05/photo-1', '05/photo-2', '05/gone'])
+    server.requests.clear()
+    app.existing.add('05/gone')
+
+    checker = make_checker(tmp_path, server)
+    statuses = checker.check(['05/photo-1', '05/photo-2', '05/gone', '05/photo-9'])
+
+    assert sorted(r.path for r in server.requests) == [
+        '/demo/image/upload/05/gone', '/demo/image/upload/05/photo-9'
+    ]
+    assert statuses['05/gone'] == PRESENT
+    assert checker.stats['cached'] == 2
+
+
+def test_expired_results_are_rechecked(tmp_path, delivery):
+    app, server = delivery
+    make_checker(tmp_path, server).check(['05/photo-1'])
+    server.requests.clear()
+
+    make_checker(tmp_path, server, ttl_days=0).check(['05/photo-1'])
+
+    assert len(server.requests) == 1
+
+
+def test_server_errors_are_reported_but_not_cached(tmp_path, delivery):
+    app, server = delivery
+    app.broken.add('05/photo-4')
+
+    checker = make_checker(tmp_path, server)
+    statuses = checker.check(['05/photo-4'])
+
+    assert statuses['05/photo-4'] == ERROR
+    assert checker.stats['errors'] == 1
+    assert '05/photo-4' not in checker.results
+
+
+def test_malformed_response_is_an_error_not_a_crash(tmp_path, delivery):
+    app, server = delivery
+    checker = make_checker(tmp_path, server)
+    head = checker.pool.head
+
+    def truncated(url, **kwargs):
+        if url.endswith('/05/photo-2'):
+            raise http.client.IncompleteRead(b'')
+        return head(url, **kwargs)
+
+    checker.pool.head = truncated
+    statuses = checker.check(['05/photo-1', '05/photo-2'])
+
+    assert statuses == {'05/photo-1': PRESENT, '05/photo-2': ERROR}
@@ -0,0 +1,97 @@
+"""
+Unit tests for perceptual hashing (scripts/utils/image_hash.py) and
+near-duplicate detection (scripts/utils/duplicate_images.py).
+"""
+
+import http.client
+import random
+
+import pytest
+
+from conftest import photo
+from fake_servers import LocalServer
+from utils.duplicate_images import DuplicateImageFinder
+from utils.image_hash import MultiIndex, hamming, image_hashes
+from utils.png import encode
+
+
+@pytest.fixture
+def library(tmp_path):
+    """Local fixture images: two copies of one picture, and a different one"""
+    images = tmp_path / 'images'
+    (images / '05').mkdir(parents=True)
+    (images / '05' / 'sunset.png').write_bytes(encode(photo(64, 48, seed=1)))
+    (images / '05' / 'sunset_16178123268_o.png').write_bytes(encode(photo(150, 100, seed=1, brightness=12, noise=8)))
+    (images / '05' / 'harbour.png').write_bytes(encode(photo(64, 48, seed=2)))
+    return images
+
+
+def test_hashes_survive_resizing_and_recompression():
+    original = image_hashes(photo(64, 48, seed=1))
+    copy = image_hashes(photo(150, 100, seed=1, brightness=12, noise=8))
+    other = image_hashes(photo(64, 48, seed=2))
+
+    for kind in ('phash', 'dhash'):
+        assert hamming(int(original[kind], 16), int(copy[kind], 16)) <= 6
+        assert hamming(int(original[kind], 16), int(other[kind], 16)) > 16
+
+
+def test_multi_index_search_matches_brute_force():
+    rng = random.Random(7)
+    values = [rng.getrandbits(64) for _ in range(500)]
+    values += [v ^ (rng.getrandbits(64) & rng.getrandbits(64) & rng.getrandbits(64)) for v in values[:50]]
+    index = MultiIndex()
+    for key, value in enumerate(values):
+        index.add(value, key)
+
+    for probe in values[:20]:
+        expected = sorted((hamming(probe, v), k) for k, v in enumerate(values) if hamming(probe, v) <= 6)
+        assert sorted(index.search(probe, 6)) == expected
+
+
+def test_clusters_local_copies(tmp_path, library):
+    finder = DuplicateImageFinder('demo', tmp_path / 'hashes.json', local_dir=library, base_url='http://127.0.0.1:9')
+    finder.update({'05/sunset': None, '05/sunset_16178123268_o': None, '05/harbour': None})
+
+    assert finder.stats['failed'] == []
+    assert finder.clusters() == [['05/sunset', '05/sunset_16178123268_o']]
+
+
+def test_fetches_thumbnails_once_per_upload(tmp_path, library):
+    def thumbnails(request):
+        name = request.path.rsplit('/', 2)
+        if 'e_grayscale' not in request.path:
+            return 400, {}, ''
+        path = library / name[-2] / f'{name[-1]}.png'
+        return (200, {'Content-Type': 'image/png'}, path.read_bytes()) if path.exists() else (404, {}, '')
+
+    assets = {
+        '05/sunset': {'created_at': '2020-01-01T00:00:00Z', 'bytes': 1000},
+        '05/sunset_16178123268_o': {'created_at': '2021-01-01T00:00:00Z', 'bytes': 3000},
+        '05/gone': {'created_at': '2021-01-01T00:00:00Z', 'bytes': 10},
+    }
+    with LocalServer(thumbnails) as server:
+        finder = DuplicateImageFinder('demo', tmp_path / 'hashes.json', base_url=server.url, workers=4)
+        finder.update(assets)
+        assert [p for p, _reason in finder.stats['failed']] == ['05/gone']
+        assert finder.clusters() == [['05/sunset', '05/sunset_16178123268_o']]
+        server.requests.clear()
+
+        # Only the re-uploaded image (and the one that failed) is fetched again
+        assets['05/sunset']['created_at'] = '2022-01-01T00:00:00Z'
+        finder = DuplicateImageFinder('demo', tmp_path / 'hashes.json', base_url=server.url, workers=4)
+        finder.update(assets)
+
+    assert sorted(r.path.rsplit('/', 1)[-1] for r in server.requests) == ['gone', 'sunset']
+    assert finder.stats['cached'] == 1
+
+
+def test_broken_responses_are_recorded_as_failures(tmp_path):
+    class BrokenPool:
+        def get(self, url):
+            raise http.client.IncompleteRead(b'')
+
+    finder = DuplicateImageFinder('demo', tmp_path / 'hashes.json', pool=BrokenPool())
+    finder.update({'05/sunset': {'created_at': '2020-01-01T00:00:00Z', 'bytes': 1000}})
+
+    assert finder.stats['failed'] == [('05/sunset', 'IncompleteRead(0 bytes read)')]
@@ -0,0 +1,122 @@
+"""
+Unit tests for scripts/extract-featured-images.py.
+"""
+
+import pytest
+
+from conftest import load_script, write_post, write_wxr
+from utils.manifest import PostManifest
+
+extract = load_script('extract-featured-images')
+
+UPLOADS = 'https://circleseven.co.uk/wp-content/uploads'
+
+
+@pytest.fixture
+def site(tmp_path, posts_dir):
+    attachments = {}
+    thumbnails = {}
+    for i in range(12):
+        slug = f'post-{i}'
+        attachments[str(100 + i)] = f'{UPLOADS}/2016/0{1 + i % 9}/photo-{i}.JPG'
+        thumbnails[slug] = (f'Post {i}', str(100 + i))
+        write_post(posts_dir, f'2016-01-{10 + i}-{slug}.md', f'title: Post {i}', 'Body\n')
+
+    write_post(posts_dir, '2016-02-01-has-image.md', 'title: Has image\nimage: x', 'Body\n')
+    write_post(posts_dir, '2016-02-02-unknown.md', 'title: Unknown', 'Body\n')
+
+    xml_path = write_wxr(tmp_path / 'export.xml', attachments, thumbnails)
+    return xml_path, posts_dir
+
+
+def test_adds_featured_image_public_id(site):
+    xml_path, posts_dir = site
+
+    extractor = extract.FeaturedImageExtractor(xml_path, posts_dir)
+    extractor.run()
+
+    content = (posts_dir / '2016-01-13-post-3.md').read_text(encoding='utf-8')
+    assert 'featured_image: 04/photo-3\n' in content
+    assert extractor.stats['posts_updated'] == 12
+    assert extractor.stats['posts_skipped'] == 2
+
+
+def test_parallel_run_matches_serial_run(site, tmp_path, capsys):
+    xml_path, posts_dir = site
+    serial_dir = tmp_path / 'serial'
+    serial_dir.mkdir()
+    for post in posts_dir.iterdir():
+        (serial_dir / post.name).write_bytes(post.read_bytes())
+
+    serial = extract.FeaturedImageExtractor(xml_path, serial_dir)
+    serial.run()
+    serial_output = capsys.readouterr().out
+
+    parallel = extract.FeaturedImageExtractor(xml_path, posts_dir, jobs=3)
+    parallel.run()
+    parallel_output = capsys.readouterr().out
+
+    assert parallel.stats == serial.stats
+    assert parallel_output == serial_output.replace(str(serial_dir), str(posts_dir))
+    for post in posts_dir.iterdir():
+        assert post.read_bytes() == (serial_dir / post.name).read_bytes()
+    assert not list(posts_dir.glob('.*.tmp'))
+
+
+def test_rerun_skips_posts_and_export(site, tmp_path, monkeypatch):
+    xml_path, posts_dir = site
+    manifest_path = tmp_path / 'manifest.json'
+
+    first = extract.FeaturedImageExtractor(xml_path, posts_dir, manifest=PostManifest(manifest_path))
+    first.run()
+
+    second = extract.FeaturedImageExtractor(xml_path, posts_dir, manifest=PostManifest(manifest_path))
+    monkeypatch.setattr(second, 'parse_xml', lambda: pytest.fail('export parsed on rerun'))
+    second.run()
+
+    assert second.stats['posts_found'] == 0
+    assert second.stats['posts_unchanged'] == 14
+
+
+def write_large_wxr(path, count):
+    """WXR export with `count` posts, each carrying a sizeable body"""
+    attachments = {str(i): f'{UPLOADS}/2016/01/photo-{i}.jpg' for i in range(count)}
+    thumbnails = {f'post-{i}': (f'Post {i}', str(i)) for i in range(count)}
+    write_wxr(path, attachments, thumbnails)
+
+    body = '<content:encoded><![CDATA[' + 'Lorem ipsum dolor sit amet. ' * 200 + ']]></content:encoded>'
+    text = path.read_text(encoding='utf-8').replace('<wp:post_type>post</wp:post_type>',
+                                                    '<wp:post_type>post</wp:post_type>' + body)
+    path.write_text(text, encoding='utf-8')
+    return path
+
+
+def test_streaming_parse_never_holds_the_tree(tmp_path):
+    import tracemalloc
+
+    peaks = {}
+    for count in (200, 2000):
+        xml_path = write_large_wxr(tmp_path / f'export-{count}.xml', count)
+        extractor = extract.FeaturedImageExtractor(xml_path, tmp_path)
+
+        tracemalloc.start()
+        extractor.parse_xml()
+        _, peaks[count] = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert len(extractor.attachments) == count
+        assert extractor.get_thumbnail_url(f'post-{count - 1}', '') == f'{UPLOADS}/2016/01/photo-{count - 1}.jpg'
+
+    # Only the attachment and thumbnail maps are kept, never the tree
+    assert peaks[2000] < (tmp_path / 'export-2000.xml').stat().st_size / 5
+
+
+def test_parse_reports_progress(site, monkeypatch, capsys):
+    xml_path, posts_dir = site
+    monkeypatch.setattr(extract, 'PROGRESS_INTERVAL', 10)
+
+    extract.FeaturedImageExtractor(xml_path, posts_dir).parse_xml()
+
+    output = capsys.readouterr().out
+    assert '...10 items parsed' in output
+    assert 'Parsed 24 items' in output
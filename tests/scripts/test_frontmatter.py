@@ -0,0 +1,93 @@
+"""
+Unit tests for front matter parsing and patching (scripts/utils/frontmatter.py).
+"""
+
+import pytest
+
+from utils.frontmatter import (find_front_matter, format_scalar, parse_front_matter,
+                               set_front_matter_key)
+
+POST = (
+    '---\n'
+    'layout: post\n'
+    "title: 'Kuka: \"Arm\" test'\n"
+    'date: 2016-01-10 12:00:00 +0000\n'
+    '# keep this comment\n'
+    'categories:\n'
+    '  - Projects\n'
+    '  - Robotics\n'
+    'description: >-\n'
+    '  A folded\n'
+    '  description\n'
+    '---\n'
+    'Body with a --- rule\n'
+    '---\n'
+)
+
+
+def test_parse_splits_front_matter_and_body():
+    front_matter, body = parse_front_matter(POST)
+
+    assert front_matter['title'] == 'Kuka: "Arm" test'
+    assert front_matter['categories'] == ['Projects', 'Robotics']
+    assert front_matter['date'] == '2016-01-10 12:00:00 +0000'
+    assert body == 'Body with a --- rule\n---\n'
+
+
+def test_parse_without_front_matter():
+    assert parse_front_matter('Just text\n') == (None, 'Just text\n')
+    assert parse_front_matter('---\nunterminated: yes\n') == (None, '---\nunterminated: yes\n')
+
+
+def test_insert_is_a_single_line_diff():
+    patched = set_front_matter_key(POST, 'featured_image', '04/photo-3')
+
+    assert patched == POST.replace('  description\n---\n', '  description\nfeatured_image: 04/photo-3\n---\n', 1)
+
+
+def test_update_replaces_only_that_key():
+    patched = set_front_matter_key(POST, 'categories', ['Art'])
+
+    assert 'categories:\n  - Art\ndescription: >-\n' in patched
+    assert patched.replace('categories:\n  - Art\n', 'categories:\n  - Projects\n  - Robotics\n') == POST
+    assert parse_front_matter(patched)[0]['categories'] == ['Art']
+
+
+def test_update_multiline_scalar():
+    patched = set_front_matter_key(POST, 'description', 'Short')
+
+    assert patched.endswith('  - Robotics\ndescription: Short\n---\nBody with a --- rule\n---\n')
+
+
+def test_crlf_files_keep_their_line_endings():
+    post = '---\r\ntitle: A\r\n---\r\nBody\r\n'
+
+    patched = set_front_matter_key(post, 'featured_image', 'x')
+
+    assert patched == '---\r\ntitle: A\r\nfeatured_image: x\r\n---\r\nBody\r\n'
+
+
+def test_empty_front_matter():
+    span = find_front_matter('---\n---\nBody')
+    assert span.yaml_start == span.yaml_end
+
+    assert set_front_matter_key('---\n---\nBody', 'title', 'A') == '---\ntitle: A\n---\nBody'
+
+
+def test_no_front_matter_raises():
+    with pytest.raises(ValueError):
+        set_front_matter_key('Body', 'title', 'A')
+
+
+@pytest.mark.parametrize('value', [
+    '04/photo-3', 'true', 'No', '123', '1.5e3', 'a: b', '#hash', ' padded', "it's", 'Ünïcode', '',
+])
+def test_formatted_scalars_round_trip(value):
+    text = set_front_matter_key('---\n---\n', 'key', value)
+
+    assert parse_front_matter(text)[0]['key'] == value
+
+
+def test_plain_scalars_stay_unquoted():
+    assert format_scalar('04/photo-3') == '04/photo-3'
+    assert format_scalar('true') == '"true"'
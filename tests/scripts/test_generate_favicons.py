@@ -0,0 +1,82 @@
+"""
+Unit tests for scripts/generate-favicons.py and utils/svg_raster.py.
+"""
+
+import struct
+
+import pytest
+
+from conftest import load_script
+from utils import png
+from utils.svg_raster import render, resize
+
+favicons = load_script('generate-favicons')
+
+SVG = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">
+  <circle cx="50" cy="50" r="40" fill="#20b2aa"/>
+  <g transform="translate(40, 40)"><rect width="20" height="20" fill="white" opacity="0.5"/></g>
+</svg>'''
+
+
+def test_render_fills_shapes_and_resize_averages():
+    image = render(SVG, 100)
+    rows = image.rows()
+
+    assert rows[0][0] == (0, 0, 0, 0)
+    assert rows[20][50] == (32, 178, 170, 255)
+    # Half-opaque white over teal
+    assert rows[50][50] == (144, 216, 212, 255)
+
+    small = resize(image, 10).rows()
+    assert small[5][5] == (144, 216, 212, 255)
+    # The circle's edge is partly covered, which is what antialiases it
+    assert 0 < small[1][3][3] < 255
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    (tmp_path / 'images').mkdir()
+    (tmp_path / 'favicon.svg').write_text(SVG)
+    monkeypatch.setattr(favicons, 'SOURCE_SVG', tmp_path / 'favicon.svg')
+    monkeypatch.setattr(favicons, 'IMAGES_DIR', tmp_path / 'images')
+    monkeypatch.setattr(favicons, 'ICO_PATH', tmp_path / 'favicon.ico')
+    monkeypatch.setattr(favicons, 'MASTER_SIZE', 128)
+    monkeypatch.setattr(favicons, 'OUTPUTS', (('small.png', 16, None), ('touch.png', 60, (255, 255, 255))))
+    return tmp_path
+
+
+def test_writes_pngs_and_multi_size_ico(site):
+    written = favicons.generate_favicons()
+
+    assert sorted(p.name for p in written) == ['favicon.ico', 'small.png', 'touch.png']
+    width, height, rows = png.decode((site / 'images' / 'touch.png').read_bytes(), background=(0, 0, 0))
+    assert (width, height) == (60, 60)
+    # Flattened onto white, so transparent corners don't turn black on iOS
+    assert rows[0][0] == (255, 255, 255)
+
+    data = (site / 'favicon.ico').read_bytes()
+    _reserved, kind, count = struct.unpack_from('<HHH', data)
+    assert (kind, count) == (1, len(favicons.ICO_SIZES))
+    for index, size in enumerate(favicons.ICO_SIZES):
+        w, h, _colours, _reserved, planes, bpp, length, offset = struct.unpack_from('<BBBBHHII', data, 6 + 16 * index)
+        assert (w, h, planes, bpp) == (size, size, 1, 32)
+        assert png.decode(data[offset:offset + length])[:2] == (size, size)
+
+
+def test_skips_when_source_is_unchanged(site):
+    favicons.generate_favicons()
+    mtimes = {p: p.stat().st_mtime_ns for p in favicons.output_paths()}
+
+    assert favicons.generate_favicons() == []
+    assert {p: p.stat().st_mtime_ns for p in favicons.output_paths()} == mtimes
+
+    (site / 'favicon.svg').write_text(SVG.replace('#20b2aa', '#ff0000'))
+    assert len(favicons.generate_favicons()) == 3
+
+
+def test_regenerates_a_missing_or_foreign_output(site):
+    favicons.generate_favicons()
+    (site / 'images' / 'small.png').write_bytes(png.encode([[(0, 0, 0)]]))
+    (site / 'favicon.ico').unlink()
+
+    assert sorted(p.name for p in favicons.generate_favicons()) == ['favicon.ico', 'small.png']
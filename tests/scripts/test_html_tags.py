@@ -0,0 +1,91 @@
+"""
+Unit tests for the streaming tag rewriter (scripts/utils/html_tags.py).
+"""
+
+from utils.html_tags import iter_tags, rewrite_tags
+
+
+def add_lazy(tag):
+    tag.setdefault('loading', 'lazy')
+
+
+def test_finds_tags_with_quoted_gt_in_attributes():
+    text = '<p>x</p><img alt="a > b" src=\'y.jpg\' width=300><IMG SRC="z.png"/>'
+    tags = list(iter_tags(text, ['img']))
+
+    assert [t.get('src') for t in tags] == ['y.jpg', 'z.png']
+    assert tags[0].get('alt') == 'a > b'
+    assert tags[0].get('width') == '300'
+    assert tags[1].self_closing
+
+
+def test_appends_attributes_preserving_original_markup():
+    text = 'Intro <img src="a.jpg"  alt=\'A\'> and <img src="b.jpg" />'
+
+    assert rewrite_tags(text, ['img'], add_lazy) == (
+        'Intro <img src="a.jpg"  alt=\'A\' loading="lazy"> and '
+        '<img src="b.jpg" loading="lazy" />'
+    )
+
+
+def test_replaces_existing_attribute_in_place():
+    text = '<img loading="lazy" src="a.jpg">'
+
+    result = rewrite_tags(text, ['img'], lambda tag: tag.set('loading', 'eager'))
+
+    assert result == '<img loading="eager" src="a.jpg">'
+
+
+def test_unchanged_tags_return_identical_text():
+    text = '<img src="a.jpg" loading="lazy">'
+
+    assert rewrite_tags(text, ['img'], add_lazy) is text
+
+
+def test_skips_code_comments_and_raw_text_elements():
+    text = (
+        '```html\n<img src="fenced.jpg">\n```\n'
+        'Inline `<img src="span.jpg">` code\n'
+        '<!-- <img src="comment.jpg"> -->\n'
+        '<pre><img src="pre.jpg"></pre>\n'
+        '<img src="real.jpg">\n'
+    )
+
+    assert [t.get('src') for t in iter_tags(text, ['img'])] == ['real.jpg']
+
+
+def test_unclosed_fence_hides_rest_of_document():
+    text = '<img src="a.jpg">\n~~~\n<img src="b.jpg">\n'
+
+    assert [t.get('src') for t in iter_tags(text, ['img'])] == ['a.jpg']
+
+
+def test_unmatched_backtick_is_literal():
+    text = 'It`s here <img src="a.jpg">'
+
+    assert [t.get('src') for t in iter_tags(text, ['img'])] == ['a.jpg']
+
+
+def test_stray_angle_bracket_is_not_a_tag():
+    text = 'if a <b and c> d: <img src="a.jpg">'
+
+    assert [t.get('src') for t in iter_tags(text, ['img'])] == ['a.jpg']
+
+
+def test_escapes_new_attribute_values():
+    text = '<img src="a.jpg">'
+
+    result = rewrite_tags(text, ['img'], lambda tag: tag.set('alt', 'Tom & "Jerry"'))
+
+    assert result == '<img src="a.jpg" alt="Tom &amp; &quot;Jerry&quot;">'
+
+
+def test_removes_attributes_with_leading_whitespace():
+    text = '<img src="a.jpg" srcset="a-300.jpg 300w, a.jpg 600w"\n  sizes="100vw" alt="A">'
+
+    def strip(tag):
+        tag.remove('srcset')
+        tag.remove('sizes')
+        tag.set('src', 'b.jpg')
+
+    assert rewrite_tags(text, ['img'], strip) == '<img src="b.jpg" alt="A">'
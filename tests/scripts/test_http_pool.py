@@ -0,0 +1,62 @@
+"""
+Unit tests for the pooled HTTP client (scripts/utils/http_pool.py).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from fake_servers import LocalServer
+from utils.http_pool import HTTPError, HTTPPool
+
+
+def ok_app(request):
+    return 200, {'Content-Type': 'text/plain'}, f'{request.method} {request.path}'
+
+
+def test_reuses_keep_alive_connections():
+    with LocalServer(ok_app) as server, HTTPPool() as pool:
+        bodies = [pool.get(f'{server.url}/item/{i}').body for i in range(10)]
+
+    assert bodies[3] == b'GET /item/3'
+    assert server.connections == 1
+    assert pool.stats['connections'] == 1
+
+
+def test_concurrent_requests_are_bounded_per_host():
+    with LocalServer(ok_app) as server, HTTPPool(max_per_host=3) as pool:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            statuses = list(executor.map(lambda i: pool.head(f'{server.url}/{i}').status, range(40)))
+
+    assert statuses == [200] * 40
+    assert server.connections <= 3
+
+
+def test_retries_rate_limited_requests_with_backoff():
+    calls = []
+
+    def app(request):
+        calls.append(request.path)
+        if len(calls) < 3:
+            return 429, {'Retry-After': '2'}, ''
+        return 200, {}, 'done'
+
+    delays = []
+    with LocalServer(app) as server, HTTPPool() as pool:
+        pool.sleep = delays.append
+        response = pool.get(f'{server.url}/limited')
+
+    assert response.body == b'done'
+    assert delays == [2.0, 2.0]
+    assert pool.stats['retries'] == 2
+
+
+def test_gives_up_after_configured_retries():
+    with LocalServer(lambda request: (420, {}, '')) as server, HTTPPool(retries=2) as pool:
+        pool.sleep = lambda delay: None
+        response = pool.get(f'{server.url}/x')
+
+    assert response.status == 420
+    assert len(server.requests) == 3
+    with pytest.raises(HTTPError):
+        response.raise_for_status()
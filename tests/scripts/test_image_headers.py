@@ -0,0 +1,66 @@
+"""
+Unit tests for header-only image size parsing (scripts/utils/image_headers.py).
+"""
+
+import struct
+
+import pytest
+
+from utils.image_headers import NeedMoreData, image_size
+
+
+def png(width, height):
+    return b'\x89PNG\r\n\x1a\n' + struct.pack('>I4sII', 13, b'IHDR', width, height) + b'\x08\x02\0\0\0' + b'\0' * 64
+
+
+def jpeg(width, height, orientation=None, padding=0):
+    """Minimal JPEG: optional EXIF orientation, an APP segment of padding, then SOF0"""
+    data = b'\xff\xd8'
+    if orientation:
+        tiff = b'MM\0\x2a' + struct.pack('>IH', 8, 1) + struct.pack('>HHIHH', 0x0112, 3, 1, orientation, 0) + b'\0\0\0\0'
+        body = b'Exif\0\0' + tiff
+        data += b'\xff\xe1' + struct.pack('>H', len(body) + 2) + body
+    if padding:
+        data += b'\xff\xe2' + struct.pack('>H', padding + 2) + b'\0' * padding
+    data += b'\xff\xc0' + struct.pack('>HBHHB', 17, 8, height, width, 3) + b'\0' * 9
+    return data + b'\xff\xda' + b'\0' * 32
+
+
+def webp_vp8x(width, height):
+    chunk = b'VP8X' + struct.pack('<I', 10) + b'\0' * 4 + (width - 1).to_bytes(3, 'little') + (height - 1).to_bytes(3, 'little')
+    return b'RIFF' + struct.pack('<I', 4 + len(chunk)) + b'WEBP' + chunk
+
+
+def test_reads_each_format():
+    assert image_size(png(640, 480)) == (640, 480, 'png')
+    assert image_size(b'GIF89a' + struct.pack('<HH', 300, 200) + b'\0' * 8) == (300, 200, 'gif')
+    assert image_size(webp_vp8x(4000, 3000)) == (4000, 3000, 'webp')
+    assert image_size(jpeg(1024, 712)) == (1024, 712, 'jpeg')
+
+
+def test_jpeg_exif_rotation_swaps_dimensions():
+    assert image_size(jpeg(4000, 3000, orientation=6)) == (3000, 4000, 'jpeg')
+    assert image_size(jpeg(4000, 3000, orientation=3)) == (4000, 3000, 'jpeg')
+
+
+def test_truncated_data_asks_for_more():
+    data = jpeg(800, 600, padding=20000)
+
+    with pytest.raises(NeedMoreData) as excinfo:
+        image_size(data[:16384])
+
+    needed = excinfo.value.needed
+    assert needed > 16384
+    while True:
+        try:
+            assert image_size(data[:needed]) == (800, 600, 'jpeg')
+            break
+        except NeedMoreData as e:
+            assert e.needed > needed
+            needed = e.needed
+    assert needed < 20100
+
+
+def test_rejects_other_files():
+    with pytest.raises(ValueError):
+        image_size(b'<svg xmlns="http://www.w3.org/2000/svg"></svg>')
@@ -0,0 +1,204 @@
+"""
+Unit tests for scripts/import-wordpress.py.
+"""
+
+import pytest
+
+from conftest import load_script
+from utils.frontmatter import parse_front_matter
+
+importer = load_script('import-wordpress')
+
+UPLOADS = 'https://circleseven.co.uk/wp-content/uploads'
+BASE = 'https://res.cloudinary.com/circleseven/image/upload'
+
+TAXONOMY = '''categories:
+  - item: Photography
+    slug: photography
+tags:
+  - item: Film
+    slug: film
+'''
+
+
+def post_item(post_id, slug, content, modified='2020-01-02 10:00:00', status='publish', thumbnail=None):
+    thumbnail_meta = f'''
+      <wp:postmeta>
+        <wp:meta_key>_thumbnail_id</wp:meta_key>
+        <wp:meta_value>{thumbnail}</wp:meta_value>
+      </wp:postmeta>''' if thumbnail else ''
+    return f'''
+    <item>
+      <title>Post {post_id}: "{slug}"</title>
+      <content:encoded><![CDATA[{content}]]></content:encoded>
+      <wp:post_id>{post_id}</wp:post_id>
+      <wp:post_date>2020-01-01 09:30:00</wp:post_date>
+      <wp:post_date_gmt>2020-01-01 09:30:00</wp:post_date_gmt>
+      <wp:post_modified_gmt>{modified}</wp:post_modified_gmt>
+      <wp:post_name>{slug}</wp:post_name>
+      <wp:status>{status}</wp:status>
+      <wp:post_type>post</wp:post_type>
+      <category domain="category" nicename="photography"><![CDATA[Photos]]></category>
+      <category domain="category" nicename="uncategorized"><![CDATA[Uncategorized]]></category>
+      <category domain="post_tag" nicename="film"><![CDATA[film]]></category>
+      <category domain="post_tag" nicename="darkroom"><![CDATA[Darkroom]]></category>{thumbnail_meta}
+    </item>'''
+
+
+def attachment_item(attachment_id, url):
+    return f'''
+    <item>
+      <title>attachment {attachment_id}</title>
+      <wp:post_id>{attachment_id}</wp:post_id>
+      <wp:post_type>attachment</wp:post_type>
+      <wp:attachment_url>{url}</wp:attachment_url>
+    </item>'''
+
+
+def write_export(path, items):
+    path.write_text(f'''<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"
+  xmlns:content="http://purl.org/rss/1.0/modules/content/"
+  xmlns:wp="http://wordpress.org/export/1.2/">
+  <channel>
+    <title>Test export</title>{''.join(items)}
+  </channel>
+</rss>
+''', encoding='utf-8')
+    return path
+
+
+@pytest.fixture
+def site(tmp_path, posts_dir):
+    (tmp_path / '_data').mkdir()
+    (tmp_path / '_data' / 'taxonomy.yml').write_text(TAXONOMY)
+    return tmp_path, posts_dir
+
+
+def run(site, xml_path, **kwargs):
+    site_dir, posts_dir = site
+    return importer.WordPressImporter(xml_path, posts_dir, site_dir, state_path=site_dir / 'state.json',
+                                      **kwargs).run()
+
+
+def test_convert_content_rewrites_html_and_uploads():
+    content = (
+        '<!-- wp:paragraph -->\n<p>An <em>old</em> <a href="https://example.com" target="_blank">link</a>'
+        ' and <strong>bold</strong> <code>x</code></p>\n<!-- /wp:paragraph -->\n\n'
+        '<h2>Section</h2>\n\n'
+        f'[caption id="a" width="300"]<a href="{UPLOADS}/2019/05/cat.jpg"><img class="size-medium wp-image-9" '
+        f'src="{UPLOADS}/2019/05/cat-300x200.jpg" srcset="{UPLOADS}/2019/05/cat-300x200.jpg 300w" '
+        'sizes="(max-width: 300px)"></a> A cat[/caption]\n\n'
+        f'<a href="{UPLOADS}/2019/05/notes.pdf">Notes</a>\n\n'
+        '<pre>\n<em>kept</em>\n</pre>'
+    )
+
+    assert importer.convert_content(content, 'circleseven') == (
+        'An *old* [link](https://example.com){:target="_blank"} and **bold** `x`\n\n'
+        '## Section\n\n'
+        f'<figure><a href="{BASE}/q_auto,f_auto/05/cat"><img src="{BASE}/c_limit,w_800,h_800,q_auto,f_auto/05/cat"></a>'
+        '<figcaption>A cat</figcaption></figure>\n\n'
+        f'[Notes]({UPLOADS}/2019/05/notes.pdf)\n\n'
+        '<pre>\n<em>kept</em>\n</pre>\n'
+    )
+
+
+def test_imports_posts_with_mapped_taxonomy_and_featured_image(site, tmp_path):
+    xml_path = write_export(tmp_path / 'export.xml', [
+        post_item(1, 'first-post', '<p>Hello</p>', thumbnail='50'),
+        post_item(2, 'draft', '<p>Not yet</p>', status='draft'),
+        # The attachment comes after the post that uses it
+        attachment_item(50, f'{UPLOADS}/2019/12/cover.jpg'),
+    ])
+
+    stats = run(site, xml_path)
+
+    _site_dir, posts_dir = site
+    assert [p.name for p in posts_dir.iterdir()] == ['2020-01-01-first-post.md']
+    text = (posts_dir / '2020-01-01-first-post.md').read_text(encoding='utf-8')
+    front_matter, body = parse_front_matter(text)
+    assert front_matter['title'] == 'Post 1: "first-post"'
+    assert front_matter['categories'] == ['Photography']
+    assert front_matter['tags'] == ['Film', 'Darkroom']
+    assert front_matter['featured_image'] == '12/cover'
+    assert 'date: 2020-01-01 09:30:00 +0000\n' in text
+    assert body == 'Hello\n'
+    assert (stats['posts_created'], stats['posts_unpublished']) == (1, 1)
+    assert stats['unmapped_tags'] == ['Darkroom']
+
+
+def test_rerun_is_incremental_and_follows_renames(site, tmp_path, monkeypatch):
+    _site_dir, posts_dir = site
+    xml_path = write_export(tmp_path / 'export.xml', [
+        post_item(1, 'one', '<p>One</p>'),
+        post_item(2, 'two', '<p>Two</p>'),
+    ])
+    run(site, xml_path)
+
+    # An unchanged export isn't parsed at all
+    monkeypatch.setattr(importer.WordPressImporter, 'iter_items', lambda self: pytest.fail('parsed'))
+    assert run(site, xml_path)['posts_created'] == 0
+    monkeypatch.undo()
+
+    write_export(xml_path, [
+        post_item(1, 'one', '<p>One</p>'),
+        post_item(2, 'two-renamed', '<p>Two, edited</p>', modified='2021-06-01 08:00:00'),
+    ])
+    converted = []
+    convert = importer.convert_content
+    monkeypatch.setattr(importer, 'convert_content', lambda content, cloud: (converted.append(content), convert(content, cloud))[1])
+
+    stats = run(site, xml_path)
+
+    assert converted == ['<p>Two, edited</p>']
+    assert (stats['posts_unchanged'], stats['posts_created'], stats['posts_renamed']) == (1, 1, 1)
+    assert sorted(p.name for p in posts_dir.iterdir()) == ['2020-01-01-one.md', '2020-01-01-two-renamed.md']
+
+
+def test_leaves_posts_it_did_not_create(site, tmp_path):
+    _site_dir, posts_dir = site
+    existing = posts_dir / '2020-01-01-one.md'
+    existing.write_text('---\ntitle: Hand edited\n---\nKeep me\n', encoding='utf-8')
+    xml_path = write_export(tmp_path / 'export.xml', [post_item(1, 'one', '<p>One</p>')])
+
+    assert run(site, xml_path)['posts_existing'] == 1
+    assert existing.read_text(encoding='utf-8').endswith('Keep me\n')
+
+    run(site, xml_path, overwrite_existing=True)
+    assert existing.read_text(encoding='utf-8').endswith('\nOne\n')
+
+
+def test_interrupted_import_resumes(site, tmp_path, monkeypatch):
+    _site_dir, posts_dir = site
+    xml_path = write_export(tmp_path / 'export.xml', [post_item(i, f'post-{i}', f'<p>{i}</p>') for i in range(1, 4)])
+    monkeypatch.setattr(importer, 'SAVE_INTERVAL', 1)
+    write = importer.WordPressImporter.write_post
+
+    def fail_on_third(self, record, body):
+        if record['post_id'] == '3':
+            raise KeyboardInterrupt
+        write(self, record, body)
+
+    monkeypatch.setattr(importer.WordPressImporter, 'write_post', fail_on_third)
+    with pytest.raises(KeyboardInterrupt):
+        run(site, xml_path)
+    monkeypatch.undo()
+
+    stats = run(site, xml_path)
+    assert (stats['posts_unchanged'], stats['posts_created']) == (2, 1)
+    assert len(list(posts_dir.iterdir())) == 3
+
+
+def test_parallel_import_matches_serial(site, tmp_path):
+    _site_dir, posts_dir = site
+    items = [post_item(i, f'post-{i}', f'<p>Post <b>{i}</b></p>\n\n<img src="{UPLOADS}/2020/01/p{i}.jpg">')
+             for i in range(1, 9)]
+    xml_path = write_export(tmp_path / 'export.xml', items)
+
+    run(site, xml_path)
+    serial = {p.name: p.read_text(encoding='utf-8') for p in posts_dir.iterdir()}
+    for path in posts_dir.iterdir():
+        path.unlink()
+
+    run(site, xml_path, jobs=2, force=True)
+    assert {p.name: p.read_text(encoding='utf-8') for p in posts_dir.iterdir()} == serial
@@ -0,0 +1,119 @@
+"""
+Unit tests for concurrent external link checks (scripts/utils/link_check.py).
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from fake_servers import LocalServer
+from utils.link_check import BROKEN, ERROR, OK, ExternalLinkChecker
+
+
+class FakeSite:
+    """Serves /ok-*, /gone, a redirect, a HEAD-refusing page and a flaky page; tracks concurrency"""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(0.02)
+            if request.path.startswith('/ok-'):
+                return 200, {}, 'hello'
+            if request.path == '/moved':
+                return 301, {'Location': '/ok-target'}, ''
+            if request.path == '/no-head':
+                return (405, {}, '') if request.method == 'HEAD' else (206, {}, 'h')
+            if request.path == '/down':
+                return 500, {}, ''
+            return 404, {}, ''
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def site():
+    app = FakeSite()
+    with LocalServer(app) as server:
+        yield app, server
+
+
+def make_checker(tmp_path, **kwargs):
+    kwargs.setdefault('host_interval', 0)
+    checker = ExternalLinkChecker(tmp_path / 'links.json', **kwargs)
+    checker.pool.sleep = lambda delay: None
+    return checker
+
+
+def test_classifies_links_and_follows_redirects(tmp_path, site):
+    _app, server = site
+    urls = [f'{server.url}/ok-1', f'{server.url}/gone', f'{server.url}/moved',
+            f'{server.url}/no-head', f'{server.url}/down']
+
+    statuses = make_checker(tmp_path).check(urls)
+
+    assert statuses[f'{server.url}/ok-1'] == (OK, 200)
+    assert statuses[f'{server.url}/gone'] == (BROKEN, 404)
+    assert statuses[f'{server.url}/moved'] == (OK, 200)
+    assert statuses[f'{server.url}/no-head'] == (OK, 206)
+    assert statuses[f'{server.url}/down'] == (ERROR, 500)
+
+
+def test_limits_concurrency_per_host(tmp_path, site):
+    app, server = site
+    make_checker(tmp_path, workers=8, per_host=2).check([f'{server.url}/ok-{i}' for i in range(12)])
+
+    assert app.peak <= 2
+    assert server.connections <= 2
+
+
+def test_spaces_out_requests_to_one_host(tmp_path, site):
+    _app, server = site
+    start = time.monotonic()
+    make_checker(tmp_path, per_host=4, host_interval=0.05).check([f'{server.url}/ok-{i}' for i in range(4)])
+
+    assert time.monotonic() - start >= 0.15
+
+
+def test_one_busy_host_does_not_starve_the_others(tmp_path):
+    class SlowPool:
+        def head(self, url):
+            time.sleep(0.05)
+            return SimpleNamespace(status=200, headers={})
+
+    urls = [f'https://host-{h}.example/page-{i}' for h in range(4) for i in range(20)]
+    checker = ExternalLinkChecker(tmp_path / 'links.json', workers=8, per_host=2, host_interval=0, pool=SlowPool())
+    start = time.monotonic()
+    statuses = checker.check(urls)
+
+    assert all(status == (OK, 200) for status in statuses.values())
+    # 10 rounds of two requests per host, all four hosts in parallel: ~0.5s.
+    # Taking the global slot first queued the hosts one after another (~2s).
+    assert time.monotonic() - start < 1.2
+
+
+def test_rerun_only_rechecks_stale_and_failed_links(tmp_path, site):
+    _app, server = site
+    urls = [f'{server.url}/ok-1', f'{server.url}/gone', f'{server.url}/down']
+    make_checker(tmp_path).check(urls)
+    server.requests.clear()
+
+    checker = make_checker(tmp_path)
+    statuses = checker.check(urls + [f'{server.url}/ok-2'])
+
+    assert sorted(r.path for r in server.requests) == ['/down', '/down', '/down', '/ok-2']
+    assert statuses[f'{server.url}/gone'] == (BROKEN, 404)
+    assert (checker.stats['checked'], checker.stats['cached']) == (2, 2)
+
+    server.requests.clear()
+    make_checker(tmp_path, ttl_days=0).check([f'{server.url}/ok-1'])
+    assert [r.path for r in server.requests] == ['/ok-1']
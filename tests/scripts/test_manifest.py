@@ -0,0 +1,85 @@
+"""
+Unit tests for the post manifest (scripts/utils/manifest.py).
+"""
+
+import os
+
+from conftest import write_post
+from utils.manifest import PostManifest
+
+
+def test_new_post_is_pending(tmp_path, posts_dir):
+    post = write_post(posts_dir, '2020-01-01-a.md', 'title: A', 'Body')
+    manifest = PostManifest(tmp_path / 'manifest.json')
+
+    assert manifest.pending([post], 'lazy') == [post]
+
+
+def test_marked_post_is_current_after_reload(tmp_path, posts_dir):
+    post = write_post(posts_dir, '2020-01-01-a.md', 'title: A', 'Body')
+    manifest = PostManifest(tmp_path / 'manifest.json')
+    manifest.mark(post, 'lazy')
+    manifest.save()
+
+    reloaded = PostManifest(tmp_path / 'manifest.json')
+    assert reloaded.is_current(post, 'lazy')
+    assert not reloaded.is_current(post, 'featured')
+
+
+def test_edit_invalidates_all_passes(tmp_path, posts_dir):
+    post = write_post(posts_dir, '2020-01-01-a.md', 'title: A', 'Body')
+    manifest = PostManifest(tmp_path / 'manifest.json')
+    manifest.mark(post, 'lazy')
+    manifest.mark(post, 'featured')
+
+    post.write_text('---\ntitle: A\n---\nEdited body', encoding='utf-8')
+
+    assert not manifest.is_current(post, 'lazy')
+    manifest.mark(post, 'lazy')
+    assert manifest.entries[manifest.key(post)]['passes'] == ['lazy']
+
+
+def test_touch_without_edit_stays_current(tmp_path, posts_dir):
+    post = write_post(posts_dir, '2020-01-01-a.md', 'title: A', 'Body')
+    manifest = PostManifest(tmp_path / 'manifest.json')
+    manifest.mark(post, 'lazy')
+
+    st = os.stat(post)
+    os.utime(post, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000_000))
+
+    assert manifest.is_current(post, 'lazy')
+
+
+def test_disabled_manifest_reports_everything_pending(tmp_path, posts_dir):
+    post = write_post(posts_dir, '2020-01-01-a.md', 'title: A', 'Body')
+    manifest = PostManifest(tmp_path / 'manifest.json', enabled=False)
+    manifest.mark(post, 'lazy')
+    manifest.save()
+
+    assert manifest.pending([post], 'lazy') == [post]
+    assert not (tmp_path / 'manifest.json').exists()
+
+
+def test_prune_drops_deleted_posts(tmp_path, posts_dir):
+    keep = write_post(posts_dir, '2020-01-01-a.md', 'title: A', 'Body')
+    gone = write_post(posts_dir, '2020-01-02-b.md', 'title: B', 'Body')
+    manifest = PostManifest(tmp_path / 'manifest.json')
+    manifest.mark(keep, 'lazy')
+    manifest.mark(gone, 'lazy')
+
+    gone.unlink()
+    manifest.prune(posts_dir, [keep])
+
+    assert list(manifest.entries) == [manifest.key(keep)]
+
+
+def test_crlf_post_marked_from_text_stays_current(tmp_path, posts_dir):
+    post = posts_dir / '2020-01-01-a.md'
+    post.write_bytes(b'---\r\ntitle: A\r\n---\r\nBody\r\n')
+    manifest = PostManifest(tmp_path / 'manifest.json')
+
+    with open(post, 'r', encoding='utf-8') as f:
+        manifest.mark(post, 'lazy', content=f.read())
+    manifest.save()
+
+    assert PostManifest(tmp_path / 'manifest.json').is_current(post, 'lazy')
@@ -0,0 +1,121 @@
+"""
+Unit tests for scripts/process-posts.py and utils/pipeline.py.
+"""
+
+import pytest
+
+from conftest import load_script, write_post, write_wxr
+from utils import pipeline
+from utils.manifest import PostManifest
+from utils.references import ReferenceIndex
+
+process = load_script('process-posts')
+lazy = load_script('add-lazy-loading')
+
+UPLOADS = 'https://circleseven.co.uk/wp-content/uploads'
+BASE = 'https://res.cloudinary.com/circleseven/image/upload'
+
+
+@pytest.fixture
+def site(tmp_path, posts_dir):
+    (tmp_path / '_config.yml').write_text('cloudinary_default_folder: site\n')
+    for i in range(4):
+        write_post(posts_dir, f'2020-01-0{i + 1}-post-{i}.md', f'title: Post {i}',
+                   f'<img src="{BASE}/q_auto/photo-{i}.jpg">\n\n' + 'text ' * 400 + f'\n<img src="{BASE}/other-{i}.jpg">\n')
+    write_post(posts_dir, '2020-02-01-plain.md', 'title: Plain\nimage: cover', 'No images.\n')
+    xml_path = write_wxr(tmp_path / 'export.xml', {'7': f'{UPLOADS}/2020/01/feature.jpg'},
+                         {'post-1': ('Post 1', '7')})
+    return tmp_path, posts_dir, xml_path
+
+
+def run(site, passes=process.PASSES, manifest=None):
+    site_dir, posts_dir, xml_path = site
+    chain = process.build_passes(passes, xml_path=xml_path, posts_dir=posts_dir,
+                                 index_path=site_dir / 'references.json')
+    return chain, pipeline.PostPipeline(chain, manifest=manifest or PostManifest(site_dir / 'manifest.json')).run(posts_dir)
+
+
+def test_every_pass_runs_on_one_read_and_write(site, monkeypatch):
+    _site_dir, posts_dir, _xml_path = site
+    writes = []
+    write = pipeline.atomic_write_text
+    monkeypatch.setattr(pipeline, 'atomic_write_text', lambda path, text: (writes.append(path.name), write(path, text)))
+
+    _chain, stats = run(site)
+
+    assert sorted(writes) == sorted(p.name for p in posts_dir.glob('2020-01-*.md'))
+    assert (stats['posts_read'], stats['posts_written']) == (5, 4)
+    assert stats['passes']['featured-image']['posts_updated'] == 1
+
+    content = (posts_dir / '2020-01-02-post-1.md').read_text(encoding='utf-8')
+    assert 'featured_image: 01/feature\n' in content
+    # Same markup the standalone script produces
+    assert lazy.add_lazy_loading_to_content(content) == content
+    # The featured image set by the earlier pass takes the priority
+    assert 'fetchpriority' not in content and 'loading="lazy"' in content
+    assert 'fetchpriority="high"' in (posts_dir / '2020-01-01-post-0.md').read_text(encoding='utf-8')
+
+
+def test_references_pass_fills_the_auditors_index(site):
+    site_dir, _posts_dir, _xml_path = site
+    run(site, passes=['references'])
+
+    index = ReferenceIndex(site_dir, path=site_dir / 'references.json')
+    assert index.update()['files_rescanned'] == 0
+    assert index.references()['site/photo-2'] == ['_posts/2020-01-03-post-2.md']
+    assert index.references()['site/cover'] == ['_posts/2020-02-01-plain.md']
+
+
+def test_rerun_reads_nothing_and_skips_the_export(site, monkeypatch):
+    run(site)
+    parsed = []
+    monkeypatch.setattr(process.featured_images.FeaturedImageExtractor, 'parse_xml', lambda self: parsed.append(1))
+
+    chain, stats = run(site)
+
+    assert stats['posts_read'] == 0
+    assert parsed == []
+    assert not chain[0].ready
+
+
+def test_a_failing_post_is_recorded_and_only_passes_that_ran_are_marked(site, monkeypatch):
+    site_dir, posts_dir, _xml_path = site
+    bad = write_post(posts_dir, '2020-03-01-bad.md', 'title: [unclosed', f'<img src="{BASE}/bad.jpg">\n')
+    manifest_path = site_dir / 'manifest.json'
+
+    chain, stats = run(site, manifest=PostManifest(manifest_path))
+
+    assert stats['posts_written'] == 4
+    assert stats['errors'] == ["Error processing 2020-03-01-bad.md: featured-image: "
+                               "did not find expected ',' or ']' (line 3)"]
+    assert 'decoding' not in bad.read_text(encoding='utf-8')
+    assert not any(PostManifest(manifest_path).is_current(bad, p.name) for p in chain)
+
+    # Without the export, lazy loading runs on it and a later pass failing keeps that edit
+    apply = process.ReferencesPass.apply
+    monkeypatch.setattr(process.ReferencesPass, 'apply',
+                        lambda self, post: 1 / 0 if post.path == bad else apply(self, post))
+    chain, stats = run(site, passes=['lazy-loading', 'references'], manifest=PostManifest(manifest_path))
+
+    assert stats['errors'] == ['Error processing 2020-03-01-bad.md: references: division by zero']
+    assert 'decoding="async"' in bad.read_text(encoding='utf-8')
+    assert PostManifest(manifest_path).is_current(bad, chain[0].name)
+    assert '_posts/2020-03-01-bad.md' not in ReferenceIndex(site_dir, path=site_dir / 'references.json').files
+
+
+def test_export_is_only_reparsed_when_it_changes(site, monkeypatch):
+    site_dir, posts_dir, xml_path = site
+    chain = process.build_passes(['featured-image'], xml_path=xml_path, posts_dir=posts_dir)
+    parsed = []
+    parse_xml = process.featured_images.FeaturedImageExtractor.parse_xml
+    monkeypatch.setattr(process.featured_images.FeaturedImageExtractor, 'parse_xml',
+                        lambda self: (parsed.append(1), parse_xml(self)))
+
+    for _batch in range(2):
+        pipeline.PostPipeline(chain, manifest=PostManifest(enabled=False)).run(posts_dir)
+    assert parsed == [1]
+
+    write_wxr(xml_path, {'8': f'{UPLOADS}/2020/01/other.jpg'}, {'post-2': ('Post 2', '8')})
+    _stats = pipeline.PostPipeline(chain, manifest=PostManifest(enabled=False)).run(posts_dir)
+    assert parsed == [1, 1]
+    assert 'featured_image: 01/other\n' in (posts_dir / '2020-01-03-post-2.md').read_text(encoding='utf-8')
@@ -0,0 +1,95 @@
+"""
+Unit tests for the Cloudinary reference index (scripts/utils/references.py).
+"""
+
+import os
+
+import pytest
+
+from utils.references import ReferenceExtractor, ReferenceIndex
+
+BASE = 'https://res.cloudinary.com/circleseven/image/upload'
+
+
+@pytest.fixture
+def extractor():
+    return ReferenceExtractor('circleseven', 'circle-seven')
+
+
+def test_delivery_urls_skip_transformations_and_versions(extractor):
+    text = (
+        f'<a href="{BASE}/q_auto,f_auto/dsc_0026_o"><img src="{BASE}/c_limit,w_800/v1760879325/05/photo.jpg"></a>\n'
+        f'srcset="{BASE}/c_limit,w_400,q_auto,f_auto/credit-block 400w, {BASE}/w_800/other-site/x.png 800w"\n'
+        f'![alt]({BASE}/avatar.webp)\n'
+    )
+
+    assert extractor.extract(text) == {
+        'circle-seven/dsc_0026_o', '05/photo', 'circle-seven/credit-block',
+        'other-site/x', 'circle-seven/avatar'
+    }
+
+
+def test_front_matter_and_includes(extractor):
+    text = (
+        '---\ntitle: Post\nfeatured_image: 05/cover.jpg\nimage: "legacy"\n---\n'
+        'Body mentioning image: not-front-matter\n'
+        '{% include cloudinary-image.html src="diagram.png" alt="D" %}\n'
+        "{%- include cloudinary-image.html alt='x' src='09/chart' -%}\n"
+    )
+
+    assert extractor.extract(text) == {'05/cover', 'circle-seven/legacy', 'circle-seven/diagram', '09/chart'}
+
+
+def test_liquid_and_javascript_templates_are_ignored(extractor):
+    text = (
+        '<img src="{{ cloudinary_url }}/c_fill,w_320/{{ full_path }}">\n'
+        f'`{BASE}/c_fill,g_auto,w_320/${{folderPath}}${{imgId}}`\n'
+        '{% include cloudinary-image.html src=page.image %}\n'
+        '---\nimage: /assets/images/default-post.svg\n'
+    )
+
+    assert extractor.extract(text, is_data=True) == set()
+
+
+def test_data_files_are_scanned_for_image_keys(tmp_path):
+    (tmp_path / '_data').mkdir()
+    (tmp_path / '_data' / 'menus.yml').write_text('- label: Home\n  image: 01/logo\n')
+
+    index = ReferenceIndex(tmp_path, 'circleseven', default_folder='', path=None)
+    index.update()
+
+    assert index.references() == {'01/logo': ['_data/menus.yml']}
+
+
+def test_update_rescans_only_changed_files(tmp_path):
+    posts = tmp_path / '_posts'
+    posts.mkdir()
+    a = posts / '2020-01-01-a.md'
+    b = posts / '2020-01-02-b.md'
+    a.write_text(f'<img src="{BASE}/q_auto/01/one">')
+    b.write_text(f'<img src="{BASE}/q_auto/01/one"><img src="{BASE}/q_auto/02/two">')
+
+    ReferenceIndex(tmp_path, 'circleseven', '', tmp_path / 'refs.json').update()
+
+    b.write_text(f'<img src="{BASE}/q_auto/03/three">')
+    st = os.stat(b)
+    os.utime(b, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    a.unlink()
+
+    index = ReferenceIndex(tmp_path, 'circleseven', '', tmp_path / 'refs.json')
+    stats = index.update()
+
+    assert stats == {'files': 1, 'files_rescanned': 1, 'files_removed': 1}
+    assert index.references() == {'03/three': ['_posts/2020-01-02-b.md']}
+
+
+def test_changed_settings_rebuild_the_index(tmp_path):
+    posts = tmp_path / '_posts'
+    posts.mkdir()
+    (posts / '2020-01-01-a.md').write_text(f'<img src="{BASE}/q_auto/one">')
+    ReferenceIndex(tmp_path, 'circleseven', '', tmp_path / 'refs.json').update()
+
+    index = ReferenceIndex(tmp_path, 'circleseven', 'circle-seven', tmp_path / 'refs.json')
+    index.update()
+
+    assert list(index.references()) == ['circle-seven/one']
@@ -0,0 +1,56 @@
+"""
+Unit tests for phase timing and the --stats-json/--profile instrumentation
+(scripts/utils/timing.py).
+"""
+
+import argparse
+import json
+import pstats
+
+from conftest import load_script, write_post
+from utils.manifest import PostManifest
+from utils.timing import Instrumentation, PhaseTimer, add_instrumentation_arguments
+
+lazy = load_script('add-lazy-loading')
+
+
+def test_repeated_phases_add_up():
+    timer = PhaseTimer()
+    for _ in range(2):
+        with timer.phase('scan'):
+            pass
+
+    assert list(timer.phases) == ['scan']
+    assert timer.phases['scan']['seconds'] >= 0
+
+
+def test_stats_json_and_profile(tmp_path, posts_dir):
+    write_post(posts_dir, '2020-01-01-a.md', 'title: A', '<img src="a.jpg">\n')
+    parser = argparse.ArgumentParser()
+    add_instrumentation_arguments(parser)
+    args = parser.parse_args(['--stats-json', str(tmp_path / 'out' / 'stats.json'),
+                              '--profile', str(tmp_path / 'run.prof')])
+
+    with Instrumentation.from_args('add-lazy-loading', args) as run:
+        stats = lazy.lazy_load_posts(posts_dir, PostManifest(enabled=False), timer=run.timer)
+        stats['seen'] = {'b', 'a'}
+    run.write(stats)
+
+    report = json.loads((tmp_path / 'out' / 'stats.json').read_text(encoding='utf-8'))
+    assert report['script'] == 'add-lazy-loading'
+    assert list(report['phases']) == ['scan', 'write']
+    assert report['stats']['posts_updated'] == 1
+    assert report['stats']['seen'] == ['a', 'b']
+    assert report['peak_rss_mb'] is None or report['peak_rss_mb'] > 0
+
+    profile = pstats.Stats(str(tmp_path / 'run.prof'))
+    assert any(name == 'lazy_load_posts' for _file, _line, name in profile.stats)
+
+
+def test_nothing_written_without_options(tmp_path):
+    run = Instrumentation('script')
+    with run:
+        pass
+    run.write({'a': 1})
+
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,54 @@
+"""
+Unit tests for the debounced post watcher (scripts/utils/watch.py).
+"""
+
+import sys
+
+import pytest
+
+from conftest import load_script, write_post
+from utils.manifest import PostManifest
+from utils.watch import PostWatcher
+
+lazy = load_script('add-lazy-loading')
+
+MODES = [False] + ([True] if sys.platform.startswith('linux') else [])
+
+
+@pytest.fixture(params=MODES, ids=lambda inotify: 'inotify' if inotify else 'polling')
+def watcher(request, posts_dir):
+    with PostWatcher(posts_dir, debounce=0.1, use_inotify=request.param, poll_interval=0.02) as watcher:
+        yield watcher
+
+
+def test_rapid_saves_arrive_as_one_batch(watcher, posts_dir):
+    for i in range(3):
+        write_post(posts_dir, '2020-01-01-a.md', 'title: A', f'Draft {i}\n')
+    write_post(posts_dir, '.2020-01-01-a.md.tmp', 'title: A', 'Temp file\n')
+
+    assert watcher.poll(timeout=2) == [posts_dir / '2020-01-01-a.md']
+    assert watcher.poll(timeout=0.3) == []
+
+
+def test_own_writes_are_ignored(watcher, posts_dir):
+    path = write_post(posts_dir, '2020-01-01-a.md', 'title: A', '<img src="a.jpg">\n')
+    batch = watcher.poll(timeout=2)
+
+    lazy.lazy_load_posts(posts_dir, PostManifest(posts_dir.parent / 'manifest.json'), paths=batch)
+    watcher.settle(batch)
+
+    assert 'loading="eager"' in path.read_text(encoding='utf-8')
+    assert watcher.poll(timeout=0.3) == []
+
+    write_post(posts_dir, '2020-01-01-a.md', 'title: A', 'Edited again\n')
+    assert watcher.poll(timeout=2) == [path]
+
+
+def test_lazy_loading_limited_to_changed_paths(posts_dir):
+    first = write_post(posts_dir, '2020-01-01-a.md', 'title: A', '<img src="a.jpg">\n')
+    second = write_post(posts_dir, '2020-01-02-b.md', 'title: B', '<img src="b.jpg">\n')
+
+    stats = lazy.lazy_load_posts(posts_dir, PostManifest(enabled=False), paths=[second])
+
+    assert (stats['posts_scanned'], stats['posts_updated']) == (1, 1)
+    assert 'loading' not in first.read_text(encoding='utf-8')